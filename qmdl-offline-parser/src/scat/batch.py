@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# coding: utf8
+"""
+QMDL Offline Parser Batch Mode
+
+Decodes many dump files concurrently, one worker process per file.
+Invoked as `qmdl-parser batch [options] <file|directory|glob> ...`.
+
+Every dump gets its own parser instance and its own writers; output files are
+named after the dump (e.g. <outdir>/<dump name>.json). At the end an aggregate
+throughput and failure report is printed.
+"""
+
+import scat.iodevices
+import scat.parsers
+import scat.util
+import scat.writers.jsonwriter
+import scat.writers.pcapwriter
+from scat.writers.compositewriter import CompositeWriter
+
+import argparse
+import concurrent.futures
+import glob
+import logging
+import os, sys
+import time
+import traceback
+
+DUMP_EXTENSIONS = ('.qmdl', '.qmdl2', '.dlf', '.hdf', '.sdm', '.sdmraw', '.lpd')
+COMPRESSED_EXTENSIONS = ('', '.gz', '.bz2')
+OUTPUT_FORMATS = ('json', 'txt', 'sqlite', 'columnar', 'pcap')
+
+def _is_dump(fname):
+    lname = fname.lower()
+    for ext in DUMP_EXTENSIONS:
+        for cext in COMPRESSED_EXTENSIONS:
+            if lname.endswith(ext + cext):
+                return True
+    return False
+
+def collect_dumps(inputs, recursive=False):
+    """Expands files, directories and glob patterns into a sorted list of dump files."""
+    dumps = []
+    for item in inputs:
+        if os.path.isdir(item):
+            if recursive:
+                for root, dirs, files in os.walk(item):
+                    dumps += [os.path.join(root, f) for f in files if _is_dump(f)]
+            else:
+                dumps += [os.path.join(item, f) for f in os.listdir(item)
+                    if _is_dump(f) and os.path.isfile(os.path.join(item, f))]
+        elif os.path.isfile(item):
+            dumps.append(item)
+        else:
+            dumps += [f for f in glob.glob(item, recursive=recursive) if os.path.isfile(f)]
+
+    # Remove duplicates, keep a stable order
+    seen = set()
+    result = []
+    for f in sorted(dumps):
+        key = os.path.abspath(f)
+        if key in seen:
+            continue
+        seen.add(key)
+        result.append(f)
+    return result
+
+def output_prefix(fname, outdir):
+    base = os.path.basename(fname)
+    for cext in ('.gz', '.bz2'):
+        if base.endswith(cext):
+            base = base[:-len(cext)]
+    base = os.path.splitext(base)[0]
+    return os.path.join(outdir if outdir else os.path.dirname(fname), base)
+
+def _create_writers(fname, prefix, formats, port_cp, port_up, json_mode='document', json_raw=False, pcap_options=None):
+    writers = []
+    outputs = []
+    for fmt in formats:
+        if fmt == 'json':
+            from scat.writers.jsonwriter import JsonWriter
+            json_fname = prefix + ('.ndjson' if json_mode == 'ndjson' else '.json')
+            w = JsonWriter(json_fname, mode=json_mode, raw_capture=json_raw)
+            w.set_input_filename(fname)
+            outputs.append(json_fname)
+            if json_raw:
+                outputs.append(w.raw_filename)
+        elif fmt == 'txt':
+            from scat.writers.qcat_txtwriter import QcatTxtWriter
+            w = QcatTxtWriter(prefix + '.txt')
+            w.set_input_filename(fname)
+            outputs.append(prefix + '.txt')
+        elif fmt == 'sqlite':
+            from scat.writers.sqlitewriter import SqliteWriter
+            w = SqliteWriter(prefix + '.sqlite')
+            w.set_input_filename(fname)
+            outputs.append(prefix + '.sqlite')
+        elif fmt == 'columnar':
+            from scat.writers.columnarwriter import ColumnarWriter, COLUMNAR_EXTENSIONS, default_columnar_format, npz_chunk_pattern
+            columnar_fmt = default_columnar_format()
+            columnar_fname = prefix + COLUMNAR_EXTENSIONS[columnar_fmt]
+            w = ColumnarWriter(columnar_fname, columnar_fmt)
+            outputs.append(npz_chunk_pattern(columnar_fname) if columnar_fmt == 'npz' else columnar_fname)
+        elif fmt == 'pcap':
+            from scat.writers.pcapwriter import PcapWriter
+            pcap_options = pcap_options or {}
+            pcap_fname = prefix + ('.pcapng' if pcap_options.get('fmt') == 'pcapng' else '.pcap')
+            w = PcapWriter(pcap_fname, port_cp, port_up, **pcap_options)
+            outputs.append(pcap_fname)
+        writers.append(w)
+    # A single writer is used directly, as in scat_main: CompositeWriter has
+    # write_parsed_data and would turn on the structured fields for PCAP only
+    if len(writers) == 1:
+        return writers[0], outputs
+    return CompositeWriter(writers), outputs
+
+def _create_parser(shortname):
+    for parser_module in dir(scat.parsers):
+        if parser_module.startswith('__'):
+            continue
+        c = getattr(scat.parsers, parser_module)
+        if type(c) == type:
+            p = c()
+            if p.shortname == shortname:
+                return p
+    raise ValueError('invalid baseband type {}'.format(shortname))
+
+def process_dump(job):
+    """Decodes a single dump file. Runs in a worker process.
+
+    Parameters:
+    job (dict): dump filename, output prefix, baseband type, output formats and parser parameters
+
+    Returns:
+    dict: per-file result with size, elapsed times, output files and the error if any
+    """
+    fname = job['fname']
+    result = {'fname': fname, 'size': 0, 'elapsed': 0.0, 'cpu': 0.0, 'outputs': [], 'error': None}
+    start = time.perf_counter()
+    start_cpu = time.process_time()
+    writer = None
+    try:
+        result['size'] = os.path.getsize(fname)
+        parser = _create_parser(job['type'])
+        parser.set_parameter({'log_level': job['log_level']})
+        parser.set_parameter(job['params'])
+
+        writer, result['outputs'] = _create_writers(fname, job['prefix'], job['formats'],
+            job['port_cp'], job['port_up'], job.get('json_mode', 'document'), job.get('json_raw', False),
+            job.get('pcap_options'))
+        parser.set_io_device(scat.iodevices.FileIO([fname]))
+        parser.set_writer(writer)
+        parser.read_dump()
+    except Exception:
+        result['error'] = traceback.format_exc()
+    finally:
+        if writer is not None:
+            try:
+                writer.close()
+            except Exception:
+                if result['error'] is None:
+                    result['error'] = traceback.format_exc()
+    result['elapsed'] = time.perf_counter() - start
+    result['cpu'] = time.process_time() - start_cpu
+    return result
+
+def _format_size(size):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024 or unit == 'GiB':
+            return '{:.1f} {}'.format(size, unit)
+        size /= 1024
+
+def print_report(results, wall_time, stream=None):
+    if stream is None:
+        stream = sys.stdout
+    ok = [r for r in results if r['error'] is None]
+    failed = [r for r in results if r['error'] is not None]
+    total_size = sum(r['size'] for r in results)
+    cpu_time = sum(r['cpu'] for r in results)
+
+    stream.write('\nBatch summary\n')
+    stream.write('  Files:      {} ({} succeeded, {} failed)\n'.format(len(results), len(ok), len(failed)))
+    stream.write('  Input size: {}\n'.format(_format_size(total_size)))
+    stream.write('  Wall time:  {:.2f} s (CPU time {:.2f} s)\n'.format(wall_time, cpu_time))
+    if wall_time > 0:
+        stream.write('  Throughput: {}/s, {:.2f} files/s\n'.format(
+            _format_size(total_size / wall_time), len(results) / wall_time))
+    if len(failed) > 0:
+        stream.write('\nFailed files:\n')
+        for r in failed:
+            last_line = r['error'].strip().splitlines()[-1]
+            stream.write('  {}: {}\n'.format(r['fname'], last_line))
+
+def batch_main(argv=None):
+    parser = argparse.ArgumentParser(prog='qmdl-parser batch',
+        description='Decode many dump files concurrently, one worker process per file')
+    parser.add_argument('inputs', nargs='+', help='Dump files, directories or glob patterns')
+    parser.add_argument('-t', '--type', help='Baseband type to be parsed (default: qc)', default='qc')
+    parser.add_argument('-o', '--outdir', help='Output directory (default: next to each dump)', type=str)
+    parser.add_argument('-f', '--formats', help='Comma separated output formats: {} (default: json)'.format(', '.join(OUTPUT_FORMATS)), default='json')
+    parser.add_argument('--json-mode', help='JSON output mode, see qmdl-parser --json-mode (default: document)', choices=scat.writers.jsonwriter.JSON_MODES, default='document')
+    parser.add_argument('--json-raw', action='store_true', help='Capture the raw GSMTAP payloads in a binary sidecar next to each JSON file')
+    parser.add_argument('--pcap-format', help='PCAP file format, see qmdl-parser --pcap-format (default: pcap)', choices=scat.writers.pcapwriter.PCAP_FORMATS, default='pcap')
+    parser.add_argument('--pcap-ns', action='store_true', help='Write nanosecond timestamps to each PCAP file')
+    parser.add_argument('--pcap-link-type', help='PCAP link type, see qmdl-parser --pcap-link-type (default: ethernet)', choices=scat.writers.pcapwriter.PCAP_LINK_TYPES, default='ethernet')
+    parser.add_argument('-j', '--jobs', help='Number of concurrent worker processes (default: number of CPUs)', type=int, default=0)
+    parser.add_argument('-r', '--recursive', action='store_true', help='Search directories and ** patterns recursively')
+    parser.add_argument('-D', '--debug', action='store_true', help='Print debug information, mostly hexdumps.')
+    parser.add_argument('-L', '--layer', help='Specify the layers to see as GSMTAP packets (comma separated)', type=str, default='ip,nas,rrc,pdcp,rlc,mac,qmi')
+    parser.add_argument('--format', help='Select display format for LAC/RAC/TAC/CID', choices=['x', 'd', 'b'], default='x')
+    parser.add_argument('--events', action='store_true', help='Decode Events as GSMTAP logging')
+    parser.add_argument('--msgs', action='store_true', help='Decode Extended Message Reports and QSR Message Reports as GSMTAP logging')
+    parser.add_argument('--qsr-hash', help='Specify QSR message hash file, implies --msgs', type=str)
+    parser.add_argument('--qsr4-hash', help='Specify QSR4 message hash file, implies --msgs', type=str)
+    parser.add_argument('--disable-crc-check', action='store_true', help='Disable CRC mismatch checks')
+    parser.add_argument('--crc-check', help='CRC verification policy (default: strict)', choices=scat.util.CRC_POLICIES)
+    parser.add_argument('--crc-sample-rate', help='With --crc-check lazy, additionally verify every N-th frame', type=int, default=0)
+    parser.add_argument('-P', '--port', help='UDP port of GSMTAP packets in PCAP output', type=int, default=4729)
+    parser.add_argument('--port-up', help='UDP port of user plane packets in PCAP output', type=int, default=47290)
+    args = parser.parse_args(argv)
+
+    formats = [x.strip() for x in args.formats.split(',') if x.strip()]
+    for fmt in formats:
+        if not fmt in OUTPUT_FORMATS:
+            print('Error: invalid output format {} specified. Available formats: {}'.format(fmt, ', '.join(OUTPUT_FORMATS)))
+            return 1
+
+    dumps = collect_dumps(args.inputs, args.recursive)
+    if len(dumps) == 0:
+        print('Error: no dump files found')
+        return 1
+    if args.outdir:
+        os.makedirs(args.outdir, exist_ok=True)
+
+    # Parameters understood by every parser module, unknown ones are ignored
+    params = {
+        'events': args.events,
+        'msgs': args.msgs,
+        'qsr-hash': args.qsr_hash,
+        'qsr4-hash': args.qsr4_hash,
+        'crc-check': args.crc_check,
+        'crc-sample-rate': args.crc_sample_rate,
+        'disable-crc-check': args.disable_crc_check,
+        'layer': args.layer.split(','),
+        'format': args.format,
+    }
+
+    jobs = []
+    prefixes = set()
+    for fname in dumps:
+        prefix = output_prefix(fname, args.outdir)
+        # Dumps with the same name in different directories must not share outputs
+        if prefix in prefixes:
+            i = 1
+            while '{}_{}'.format(prefix, i) in prefixes:
+                i += 1
+            prefix = '{}_{}'.format(prefix, i)
+        prefixes.add(prefix)
+        jobs.append({'fname': fname, 'prefix': prefix, 'type': args.type, 'formats': formats,
+            'params': params, 'log_level': logging.DEBUG if args.debug else logging.WARNING,
+            'port_cp': args.port, 'port_up': args.port_up, 'json_mode': args.json_mode, 'json_raw': args.json_raw,
+            'pcap_options': {'fmt': args.pcap_format, 'nanosecond': args.pcap_ns, 'link_type': args.pcap_link_type}})
+
+    max_workers = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    max_workers = min(max_workers, len(jobs))
+    print('Decoding {} file(s) with {} worker(s)'.format(len(jobs), max_workers))
+
+    results = []
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(process_dump, job): job for job in jobs}
+        for future in concurrent.futures.as_completed(futures):
+            job = futures[future]
+            try:
+                r = future.result()
+            except Exception:
+                # Worker process died (e.g. killed by the OOM killer)
+                r = {'fname': job['fname'], 'size': 0, 'elapsed': 0.0, 'cpu': 0.0,
+                    'outputs': [], 'error': traceback.format_exc()}
+            results.append(r)
+            status = 'OK' if r['error'] is None else 'FAILED'
+            print('[{}/{}] {} {} ({:.2f} s)'.format(len(results), len(jobs), status, r['fname'], r['elapsed']))
+    wall_time = time.perf_counter() - start
+
+    results.sort(key=lambda r: r['fname'])
+    print_report(results, wall_time)
+    return 0 if all(r['error'] is None for r in results) else 2
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# coding: utf8
+"""
+Bit field extraction on plain integers.
+
+Bit positions follow the LSB0 convention the parsers historically used with
+bitstring (bit 0 is the least significant bit), so a bitstring slice
+bits[start:stop].uint becomes field(value, start, stop). Byte strings are
+first converted with uint_le() (equivalent to bitstring.Bits(bytes=reversed(x)))
+or uint_be().
+"""
+
+
+class BitFields:
+    """
+    Precomputed (shift, mask) pairs of a set of bit ranges.
+    """
+    __slots__ = ('specs',)
+
+    def __init__(self, *ranges):
+        """
+        Each range is a (start, stop) tuple of LSB0 bit positions, stop exclusive.
+        """
+        for start, stop in ranges:
+            if not 0 <= start < stop:
+                raise ValueError('Invalid bit range {}:{}'.format(start, stop))
+        self.specs = tuple((start, (1 << (stop - start)) - 1) for start, stop in ranges)
+
+    def unpack(self, value):
+        """
+        Returns the value of every range as a tuple of unsigned integers.
+        """
+        return tuple((value >> shift) & mask for shift, mask in self.specs)
+
+
+def field(value, start, stop):
+    """Returns bits start to stop - 1 (LSB0) of value as unsigned integer."""
+    return (value >> start) & ((1 << (stop - start)) - 1)
+
+def uint_le(buf):
+    """Returns the unsigned integer of little endian bytes."""
+    return int.from_bytes(buf, 'little')
+
+def uint_be(buf):
+    """Returns the unsigned integer of big endian bytes."""
+    return int.from_bytes(buf, 'big')
+
+def join_words(words, width=32):
+    """Concatenates integer words, the first word holding the least significant bits."""
+    value = 0
+    for i, word in enumerate(words):
+        value |= word << (width * i)
+    return value
+
+def bin_lsb0(value, length):
+    """Returns the binary digits of value as string, starting with bit 0."""
+    return format(value, '0{}b'.format(length))[::-1][:length]
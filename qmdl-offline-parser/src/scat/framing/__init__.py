@@ -0,0 +1,6 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+from scat.framing.ringbuffer import RingBuffer
+from scat.framing.framers import Framer, HdlcFramer, SdmFramer, LengthPrefixFramer, UnisocFramer, DlfFramer, HdfFramer
+from scat.framing.framers import read_frames, iter_frames
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# coding: utf8
+"""
+Framers Module
+
+Provides the pluggable framers of all supported baseband dump and stream formats,
+and the generic loops driving them over an I/O device or an in-memory buffer.
+
+A framer only locates frames. Its next_frame() method inspects buf[pos:end] of any
+buffer supporting find(), slicing and struct.unpack_from() (bytes, bytearray, mmap)
+and returns (start, stop, next_pos):
+- start >= 0: a frame occupies buf[start:stop], scanning continues at next_pos
+- start < 0: no complete frame is available, data before next_pos can be dropped
+The same framer thus runs over a streaming RingBuffer and over a memory mapped file.
+"""
+
+from scat.framing.ringbuffer import RingBuffer
+
+import logging
+import struct
+
+# Large reads for dump files, live devices keep their small transfer size
+FILE_READ_SIZE = 0x100000
+LIVE_READ_SIZE = 0x1000
+
+NO_FRAME = -1
+
+
+class Framer:
+    """
+    Base class of the frame locators.
+    """
+    def __init__(self, logger=None):
+        self.logger = logger if logger else logging.getLogger('scat.framing')
+
+    def next_frame(self, buf, pos, end, eof):
+        """
+        Locate the next frame in buf[pos:end].
+        eof is set when no further data will follow end.
+        """
+        raise NotImplementedError
+
+    def iter_spans(self, buf, pos=0, end=None):
+        """
+        Yield (start, stop) of every frame of a complete buffer.
+        """
+        if end is None:
+            end = len(buf)
+        while pos < end:
+            start, stop, pos = self.next_frame(buf, pos, end, True)
+            if start < 0:
+                break
+            yield (start, stop)
+
+
+class HdlcFramer(Framer):
+    """
+    0x7e terminated HDLC frames (Qualcomm DIAG, HiSilicon). Frames are returned
+    still escaped and without the trailing 0x7e.
+    """
+    def __init__(self, keep_trailing=False, logger=None):
+        """
+        When keep_trailing is set, unterminated data at the end of the input is
+        returned as a last frame instead of being dropped.
+        """
+        super(HdlcFramer, self).__init__(logger)
+        self.keep_trailing = keep_trailing
+
+    def next_frame(self, buf, pos, end, eof):
+        while pos < end:
+            next_pos = buf.find(b'\x7e', pos, end)
+            if next_pos < 0:
+                if eof and self.keep_trailing:
+                    return (pos, end, end)
+                return (NO_FRAME, NO_FRAME, end if eof else pos)
+            if next_pos > pos:
+                return (pos, next_pos, next_pos + 1)
+            pos = next_pos + 1
+        return (NO_FRAME, NO_FRAME, pos)
+
+
+class SdmFramer(Framer):
+    """
+    Samsung SDM frames: 0x7f, length (2B), header, body, 0x7e.
+    The inner length must be 3 bytes shorter than the outer one.
+    """
+    sdm_lengths = struct.Struct('<HBH')
+
+    def next_frame(self, buf, pos, end, eof):
+        while pos < end:
+            pos = buf.find(b'\x7f', pos, end)
+            if pos < 0:
+                self.logger.log(logging.WARNING, 'Cannot find the start of packet')
+                return (NO_FRAME, NO_FRAME, end)
+
+            if end - pos < 15:
+                return (NO_FRAME, NO_FRAME, pos)
+
+            length1, _, length2 = self.sdm_lengths.unpack_from(buf, pos + 1)
+            if end < pos + 2 + length1:
+                return (NO_FRAME, NO_FRAME, pos)
+
+            if buf[pos + 1 + length1] != 0x7e:
+                self.logger.log(logging.WARNING, 'Packet start {:02x} and end {:02x} does not match, dropping'.format(buf[pos], buf[pos + 1 + length1]))
+                pos += 2
+                continue
+
+            if length2 + 3 != length1:
+                self.logger.log(logging.WARNING, 'Inner and outer length does not match, dropping')
+                pos += 2
+                continue
+
+            stop = pos + length1 + 2
+            return (pos, stop, stop)
+        return (NO_FRAME, NO_FRAME, pos)
+
+
+class LengthPrefixFramer(Framer):
+    """
+    Frames prefixed with a 2 byte little endian length of the following payload
+    (Samsung SDM logger output). Only the payload is returned.
+    """
+    def next_frame(self, buf, pos, end, eof):
+        if end - pos < 2:
+            return (NO_FRAME, NO_FRAME, pos)
+        pkt_len = struct.unpack_from('<H', buf, pos)[0]
+        stop = pos + 2 + pkt_len
+        if stop > end:
+            return (NO_FRAME, NO_FRAME, pos)
+        return (pos + 2, stop, stop)
+
+
+class UnisocFramer(Framer):
+    """
+    Unisoc dump records: length (2B), payload, sync word '~~~~'.
+    The record is returned including length and sync word. When the sync word
+    is missing, scanning resumes after the next sync word.
+    """
+    sync_word = b'~~~~'
+
+    def __init__(self, logger=None):
+        super(UnisocFramer, self).__init__(logger)
+        self.resync = False
+
+    def next_frame(self, buf, pos, end, eof):
+        while True:
+            if self.resync:
+                sync_pos = buf.find(self.sync_word, pos, end)
+                if sync_pos < 0:
+                    # Keep a partial sync word at the end
+                    return (NO_FRAME, NO_FRAME, max(pos, end - len(self.sync_word) + 1))
+                pos = sync_pos + len(self.sync_word)
+                self.resync = False
+
+            if end - pos < 2:
+                return (NO_FRAME, NO_FRAME, pos)
+            pkt_len = struct.unpack_from('<H', buf, pos)[0]
+            stop = pos + pkt_len + 4
+            if stop > end:
+                return (NO_FRAME, NO_FRAME, pos)
+
+            if buf[stop - 4:stop] != self.sync_word:
+                self.logger.log(logging.WARNING, 'End-of-packet indicator not found, resynchronizing')
+                self.resync = True
+                pos += 2
+                continue
+
+            return (pos, stop, stop)
+
+
+class DlfFramer(Framer):
+    """
+    Qualcomm DLF records: length (2B, including itself), log ID (2B), timestamp (8B), body.
+    A truncated last record is returned as is.
+    """
+    def next_frame(self, buf, pos, end, eof):
+        # DLF lacks CRC16/other fancy stuff
+        while end - pos >= 2:
+            pkt_len = struct.unpack_from('<H', buf, pos)[0]
+            if pkt_len < 2:
+                pos += 2
+                continue
+            stop = pos + pkt_len
+            if stop > end:
+                if not eof:
+                    return (NO_FRAME, NO_FRAME, pos)
+                stop = end
+            return (pos, stop, stop)
+        return (NO_FRAME, NO_FRAME, pos)
+
+
+class HdfFramer(Framer):
+    """
+    Qualcomm HDF packets: 0x10 0x00, length (2B), length (2B), body. Additional
+    fields between the packets are skipped. When the duplicated length check fails,
+    the 6 header bytes are skipped. A truncated last packet is returned as is.
+    """
+    def next_frame(self, buf, pos, end, eof):
+        while True:
+            hdr_pos = buf.find(b'\x10\x00', pos, end)
+            if hdr_pos < 0:
+                # Keep the last byte, it may be the start of the signature
+                return (NO_FRAME, NO_FRAME, end if eof else max(pos, end - 1))
+            if end - hdr_pos < 6:
+                return (NO_FRAME, NO_FRAME, end if eof else hdr_pos)
+
+            # pkt length from header and pkt length from body must be equal
+            if buf[hdr_pos+2:hdr_pos+4] != buf[hdr_pos+4:hdr_pos+6]:
+                pos = hdr_pos + 6
+                continue
+
+            pkt_len = struct.unpack_from('<H', buf, hdr_pos + 2)[0]
+            if pkt_len - 2 < 1:
+                pos = hdr_pos + 6
+                continue
+
+            stop = hdr_pos + 4 + pkt_len
+            if stop > end:
+                if not eof:
+                    return (NO_FRAME, NO_FRAME, hdr_pos)
+                stop = end
+            return (hdr_pos, stop, stop)
+
+
+def default_read_size(io_device):
+    # Avoid importing the I/O devices, only files have a list of file names
+    if hasattr(io_device, 'fnames'):
+        return FILE_READ_SIZE
+    return LIVE_READ_SIZE
+
+def read_frames(io_device, framer, read_size=None, ring=None):
+    """Reads the I/O device until EOF and yields the frames found by the framer as bytes.
+
+    Parameters:
+    io_device: I/O device providing read() and block_until_data
+    framer (Framer): frame locator of the stream format
+    read_size (int): size of a single read, default depends on the I/O device
+    ring (RingBuffer): buffer to reuse, a new one is created if not given
+    """
+    if read_size is None:
+        read_size = default_read_size(io_device)
+    if ring is None:
+        ring = RingBuffer()
+    else:
+        ring.clear()
+    eof = False
+
+    while True:
+        while True:
+            start, stop, next_pos = framer.next_frame(ring.data, ring.start, ring.end, eof)
+            if start < 0:
+                ring.consume_to(next_pos)
+                break
+            frame = ring.take(start, stop)
+            ring.consume_to(next_pos)
+            yield frame
+
+        if eof:
+            break
+        buf = io_device.read(read_size)
+        if len(buf) == 0:
+            if io_device.block_until_data:
+                continue
+            eof = True
+        else:
+            ring.write(buf)
+
+def iter_frames(buf, framer, view=None):
+    """Yields the frames of a complete in-memory buffer (e.g. a memory mapping) as memoryview slices.
+
+    Parameters:
+    buf (bytes-like): complete input data
+    framer (Framer): frame locator of the data format
+    view (memoryview): view of buf to slice from, created if not given
+    """
+    if view is None:
+        view = memoryview(buf)
+    for start, stop in framer.iter_spans(buf):
+        yield view[start:stop]
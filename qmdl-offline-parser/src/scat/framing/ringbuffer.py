@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# coding: utf8
+"""
+RingBuffer Module
+
+Provides the reusable byte buffer used by the streaming frame readers.
+Incoming blocks are appended behind the unread data, consumed data is dropped by
+advancing a read cursor, and the storage is compacted in place once the consumed
+part dominates. Frames are located directly in the storage, so no per-block
+`oldbuf + buf` concatenation or per-frame re-slicing of the remainder is needed.
+"""
+
+
+class RingBuffer:
+    """
+    Growable byte FIFO with a read cursor over a single reusable bytearray.
+    """
+    def __init__(self, compact_threshold=0x10000):
+        """
+        Initialize an empty buffer.
+        Storage is compacted when at least compact_threshold bytes were consumed
+        and they make up half of the storage or more.
+        """
+        self.data = bytearray()
+        self.start = 0
+        self.compact_threshold = compact_threshold
+
+    def __len__(self):
+        """
+        Number of unread bytes.
+        """
+        return len(self.data) - self.start
+
+    @property
+    def end(self):
+        return len(self.data)
+
+    def write(self, buf):
+        """
+        Append a block of data behind the unread bytes.
+        """
+        if self.start > 0:
+            if self.start == len(self.data):
+                self.data.clear()
+                self.start = 0
+            elif self.start >= self.compact_threshold and self.start * 2 >= len(self.data):
+                del self.data[:self.start]
+                self.start = 0
+        self.data += buf
+
+    def consume_to(self, pos):
+        """
+        Drop the unread bytes before the absolute storage position pos.
+        """
+        if pos > self.start:
+            self.start = min(pos, len(self.data))
+
+    def take(self, start, stop):
+        """
+        Return a copy of data[start:stop] as bytes.
+        """
+        with memoryview(self.data) as view:
+            return view[start:stop].tobytes()
+
+    def clear(self):
+        self.data.clear()
+        self.start = 0
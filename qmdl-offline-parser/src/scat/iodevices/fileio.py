@@ -5,10 +5,12 @@
 FileIO Module
 
 Provides file-based I/O abstraction for reading log files, including support for gzip and bz2 compressed files.
+Uncompressed files are additionally exposed as a read-only memory mapping so parsers can frame them in place.
 Used by the main parser to read input data for offline analysis.
 """
 
 import gzip, bz2
+import mmap
 import scat.util as util
 
 
@@ -19,25 +21,45 @@ class FileIO:
     def _open_file(self, fname):
         """
         Open a file for reading, supporting gzip and bz2 compression.
+        Uncompressed files are also memory-mapped when mmap mode is enabled.
         """
-        if self.f:
-            self.f.close()
+        self._close_file()
         if fname.find('.gz') > 0:
             self.f = gzip.open(fname, 'rb')
         elif fname.find('.bz2') > 0:
             self.f = bz2.open(fname, 'rb')
         else:
             self.f = open(fname, 'rb')
+            if self.use_mmap:
+                try:
+                    self.mapping = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+                except (ValueError, OSError):
+                    # Empty files and non-regular files cannot be mapped
+                    self.mapping = None
 
-    def __init__(self, fnames):
+    def _close_file(self):
+        """
+        Release the memory mapping and the file handle of the current file.
+        """
+        if self.mapping is not None:
+            self.mapping.close()
+            self.mapping = None
+        if self.f:
+            self.f.close()
+            self.f = None
+
+    def __init__(self, fnames, use_mmap=True):
         """
         Initialize FileIO with a list of filenames to read sequentially.
+        When use_mmap is set, uncompressed files are exposed through the mapping attribute.
         """
         self.fnames = fnames[:]
         self.fnames.reverse()
         self.fname = ''
         self.file_available = True
         self.f = None
+        self.mapping = None
+        self.use_mmap = use_mmap
         self.block_until_data = False
         self.open_next_file()
 
@@ -63,6 +85,7 @@ class FileIO:
             self.fname = self.fnames.pop()
         except IndexError:
             self.file_available = False
+            self._close_file()
             return
         self._open_file(self.fname)
 
@@ -83,5 +106,4 @@ class FileIO:
         """
         Close the file handle on exit.
         """
-        if self.f:
-            self.f.close()
+        self._close_file()
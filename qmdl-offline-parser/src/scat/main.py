@@ -12,13 +12,16 @@ Key functions:
 - Handles command-line arguments for selecting baseband type, output format, and debug options
 - Manages signal handling for graceful termination
 - Entry point for offline file analysis
+- Dispatches `batch` subcommand to the batch runner (scat.batch)
 """
 
 import scat.iodevices
 import scat.writers
 import scat.parsers
+import scat.util
 
 import argparse
+import datetime
 import faulthandler
 import importlib.metadata
 import logging
@@ -26,15 +29,24 @@ import os, sys
 import signal
 
 current_parser = None
+current_writer = None
 logger = logging.getLogger('qmdl-offline-parser')
 __version__ = "1.4.0-offline"
 
 if os.name != 'nt':
     faulthandler.register(signal.SIGUSR1)
 
+def close_writer():
+    # Writers buffer their output, every exit has to close them once
+    global current_writer
+    writer, current_writer = current_writer, None
+    if hasattr(writer, 'close'):
+        writer.close()
+
 def sigint_handler(signal, frame):
     global current_parser
     current_parser.stop_diag()
+    close_writer()
     sys.exit(0)
 
 def hexint(string):
@@ -43,13 +55,26 @@ def hexint(string):
     else:
         return int(string)
 
+def hexint_list(string):
+    return [hexint(x.strip()) for x in string.split(',') if x.strip()]
+
+def iso_datetime(string):
+    try:
+        return datetime.datetime.fromisoformat(string)
+    except ValueError:
+        raise argparse.ArgumentTypeError('invalid ISO 8601 date/time: {}'.format(string))
+
 class ListUSBAction(argparse.Action):
     def __call__(self, parser, namespace, values, option_string=None):
         scat.iodevices.USBIO().list_usb_devices()
         parser.exit()
 
 def scat_main():
-    global current_parser
+    global current_parser, current_writer
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        from scat.batch import batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+
     # Load parser modules
     parser_dict = {}
     for parser_module in dir(scat.parsers):
@@ -97,10 +122,22 @@ def scat_main():
         qc_group.add_argument('--qmdl', help='Store log as QMDL file (Qualcomm only)')
         qc_group.add_argument('--qsr-hash', help='Specify QSR message hash file (usually QSRMessageHash.db), implies --msgs', type=str)
         qc_group.add_argument('--qsr4-hash', help='Specify QSR4 message hash file (need to obtain from the device firmware), implies --msgs', type=str)
+        qc_group.add_argument('--no-qsr4-cache', action='store_true', help='Do not read or write the parsed QSR4 hash cache (.qsr4c next to the QSR4 hash file)')
         qc_group.add_argument('--events', action='store_true', help='Decode Events as GSMTAP logging')
         qc_group.add_argument('--msgs', action='store_true', help='Decode Extended Message Reports and QSR Message Reports as GSMTAP logging')
         qc_group.add_argument('--cacombos', action='store_true', help='Display raw values of UE CA combo information on 4G/5G (0xB0CD/0xB826)')
         qc_group.add_argument('--disable-crc-check', action='store_true', help='Disable CRC mismatch checks. Improves performance by avoiding CRC calculations.')
+        qc_group.add_argument('--crc-check', help='CRC verification policy: strict verifies every frame, lazy only suspicious frames, frames failing to decode and sampled frames, off none (default: strict)', choices=scat.util.CRC_POLICIES)
+        qc_group.add_argument('--crc-sample-rate', help='With --crc-check lazy, additionally verify every N-th frame (default: 0, no sampling)', type=int, default=0)
+        qc_group.add_argument('--index', action='store_true', help='Build the packet index of the dump (.qidx sidecar) and reuse it on later runs')
+        qc_group.add_argument('--log-ids', help='Only decode the given log IDs from the dump, comma separated (e.g. 0xb0c0,0xb821)', type=hexint_list)
+        qc_group.add_argument('--exclude-log-ids', help='Skip the given log IDs without decoding them, comma separated (e.g. 0xb0c1,0xb193)', type=hexint_list)
+        qc_group.add_argument('--dispatch-priority', help='Parser selected for log IDs handled by several log parsers: first or last registered (default: last)', choices=('first', 'last'), default='last')
+        qc_group.add_argument('--layer-filter', action='store_true', help='Skip log packets outside the log masks of the layers given by --layer')
+        qc_group.add_argument('--start-time', help='Skip dump packets before the given ISO 8601 time (UTC unless specified)', type=iso_datetime)
+        qc_group.add_argument('--end-time', help='Skip dump packets after the given ISO 8601 time (UTC unless specified)', type=iso_datetime)
+        qc_group.add_argument('--profile', nargs='?', const='scat_profile.json', metavar='REPORT', help='Time the decoders and writers per log ID, event ID and writer method, log a summary table and write a JSON report (default: scat_profile.json)')
+        qc_group.add_argument('-j', '--jobs', help='Decode a single dump file with the given number of worker processes', type=int, default=1)
 
     if 'sec' in parser_dict.keys():
         sec_group = parser.add_argument_group('Samsung specific settings')
@@ -117,6 +154,8 @@ def scat_main():
         try:
             hisi_group.add_argument('--msgs', action='store_true', help='Decode debug messages GSMTAP logging')
             hisi_group.add_argument('--disable-crc-check', action='store_true', help='Disable CRC mismatch checks. Improves performance by avoiding CRC calculations.')
+            hisi_group.add_argument('--crc-check', help='CRC verification policy: strict verifies every frame, lazy only suspicious frames, frames failing to decode and sampled frames, off none (default: strict)', choices=scat.util.CRC_POLICIES)
+            hisi_group.add_argument('--crc-sample-rate', help='With --crc-check lazy, additionally verify every N-th frame (default: 0, no sampling)', type=int, default=0)
         except argparse.ArgumentError:
             pass
 
@@ -126,12 +165,20 @@ def scat_main():
     ip_group.add_argument('-H', '--hostname', help='Change base host name/IP to emit GSMTAP packets. For dual SIM devices the subsequent IP address will be used.', type=str, default='127.0.0.1')
 
     ip_group.add_argument('-F', '--pcap-file', help='Write GSMTAP packets directly to specified PCAP file')
+    ip_group.add_argument('--pcap-format', help='PCAP file format, pcapng has one interface per radio ID (default: pcap)', choices=scat.writers.pcapwriter.PCAP_FORMATS, default='pcap')
+    ip_group.add_argument('--pcap-ns', action='store_true', help='Write nanosecond timestamps to the PCAP file, keeping the resolution of the device timestamps')
+    ip_group.add_argument('--pcap-link-type', help='PCAP link type: ethernet encapsulates packets in Ethernet/IP/UDP, upper_pdu hands them to the Wireshark GSMTAP and IP dissectors directly (default: ethernet)', choices=scat.writers.pcapwriter.PCAP_LINK_TYPES, default='ethernet')
     ip_group.add_argument('-C', '--combine-stdout', action='store_true', help='Write standard output messages as osmocore log file, along with other GSMTAP packets.')
     
     # Enhanced output formats
     output_group = parser.add_argument_group('Enhanced output formats')
     output_group.add_argument('--json-file', help='Write structured data to JSON file', type=str)
+    output_group.add_argument('--json-mode', help='JSON output mode: document keeps all records in memory, stream spools them to disk and assembles the same document on close, ndjson writes one record per line (default: document)', choices=scat.writers.jsonwriter.JSON_MODES, default='document')
+    output_group.add_argument('--json-raw', action='store_true', help='Capture the raw GSMTAP payloads in a binary sidecar next to the JSON file (<json file>.raw), referenced by offset and length')
     output_group.add_argument('--txt-file', help='Write human-readable analysis to TXT file', type=str)
+    output_group.add_argument('--sqlite-file', help='Write parsed records to SQLite database with one indexed table per record type', type=str)
+    output_group.add_argument('--columnar-file', help='Export measurements column by column to Parquet/Arrow file, or numbered .npz chunks without pyarrow', type=str)
+    output_group.add_argument('--columnar-format', help='Columnar export format (default: from the file extension, else parquet if pyarrow is installed and npz otherwise)', choices=scat.writers.columnarwriter.COLUMNAR_FORMATS, default=None)
     output_group.add_argument('--preserve-intermediate', action='store_true', help='Keep intermediate PCAP files when using JSON/TXT output')
 
     args = parser.parse_args()
@@ -183,80 +230,46 @@ def scat_main():
         print('Usage: qmdl-parser -t qc -d your_file.qmdl --json-file output.json')
         sys.exit(1)
 
-    # Writer preparation - Enhanced for multiple output formats
-    writer = None
-    pcap_writer = None
-    # Determine output format priority: JSON/TXT > PCAP > Network
-    if args.json_file or args.txt_file:
-        # Enhanced output mode - use JSON/TXT writers
-        if args.json_file and args.txt_file:
-            # Both JSON and TXT - create composite writer
-            from scat.writers.jsonwriter import JsonWriter
-            from scat.writers.qcat_txtwriter import QcatTxtWriter
-            json_writer = JsonWriter(args.json_file)
-            txt_writer = QcatTxtWriter(args.txt_file)
-            # Set input filename for metadata
-            if args.dump and len(args.dump) > 0:
-                json_writer.set_input_filename(args.dump[0])
-                txt_writer.set_input_filename(args.dump[0])
-            # If PCAP requested, create PcapWriter
-            if args.pcap_file:
-                from scat.writers.pcapwriter import PcapWriter
-                pcap_writer = PcapWriter(args.pcap_file, GSMTAP_PORT, IP_OVER_UDP_PORT)
-            # Create composite writer
-            class CompositeWriter:
-                def __init__(self, json_w, txt_w, pcap_w=None):
-                    self.json_writer = json_w
-                    self.txt_writer = txt_w
-                    self.pcap_writer = pcap_w
-                def write_cp(self, sock_content, radio_id, ts):
-                    self.json_writer.write_cp(sock_content, radio_id, ts)
-                    self.txt_writer.write_cp(sock_content, radio_id, ts)
-                    if self.pcap_writer:
-                        self.pcap_writer.write_cp(sock_content, radio_id, ts)
-                def write_up(self, sock_content, radio_id, ts):
-                    self.json_writer.write_up(sock_content, radio_id, ts)
-                    self.txt_writer.write_up(sock_content, radio_id, ts)
-                    if self.pcap_writer:
-                        self.pcap_writer.write_up(sock_content, radio_id, ts)
-                def write_parsed_data(self, parsed_result, radio_id, ts):
-                    self.json_writer.write_parsed_data(parsed_result, radio_id, ts)
-                    self.txt_writer.write_parsed_data(parsed_result, radio_id, ts)
-                def write_stdout_data(self, stdout_text, radio_id, ts):
-                    self.json_writer.write_stdout_data(stdout_text, radio_id, ts)
-                    self.txt_writer.write_stdout_data(stdout_text, radio_id, ts)
-                def close(self):
-                    self.json_writer.close()
-                    self.txt_writer.close()
-                    if self.pcap_writer:
-                        self.pcap_writer.pcap_file.close()
-            writer = CompositeWriter(json_writer, txt_writer, pcap_writer)
-        elif args.json_file:
-            # JSON only
-            from scat.writers.jsonwriter import JsonWriter
-            writer = JsonWriter(args.json_file)
-            if args.dump and len(args.dump) > 0:
-                writer.set_input_filename(args.dump[0])
-        elif args.txt_file:
-            # TXT only - use QCAT-style writer
-            from scat.writers.qcat_txtwriter import QcatTxtWriter
-            writer = QcatTxtWriter(args.txt_file)
-            if args.dump and len(args.dump) > 0:
-                writer.set_input_filename(args.dump[0])
-        # If PCAP requested for single output, set as writer
-        if args.pcap_file and not (args.json_file and args.txt_file):
-            if not pcap_writer:
-                from scat.writers.pcapwriter import PcapWriter
-                pcap_writer = PcapWriter(args.pcap_file, GSMTAP_PORT, IP_OVER_UDP_PORT)
-            writer = pcap_writer
-    elif args.pcap_file:
-        # PCAP output only
+    # Writer preparation - every requested output file gets its own writer
+    file_writers = []
+    if args.json_file:
+        from scat.writers.jsonwriter import JsonWriter
+        file_writers.append(JsonWriter(args.json_file, mode=args.json_mode, raw_capture=args.json_raw))
+    if args.txt_file:
+        # QCAT-style TXT writer
+        from scat.writers.qcat_txtwriter import QcatTxtWriter
+        file_writers.append(QcatTxtWriter(args.txt_file))
+    if args.sqlite_file:
+        from scat.writers.sqlitewriter import SqliteWriter
+        file_writers.append(SqliteWriter(args.sqlite_file))
+    if args.columnar_file:
+        from scat.writers.columnarwriter import ColumnarWriter
+        try:
+            columnar_writer = ColumnarWriter(args.columnar_file, args.columnar_format)
+            file_writers.append(columnar_writer)
+        except ValueError as e:
+            print('Error: {}'.format(e))
+            sys.exit(1)
+    # Set input filename for metadata
+    if args.dump and len(args.dump) > 0:
+        for w in file_writers:
+            if hasattr(w, 'set_input_filename'):
+                w.set_input_filename(args.dump[0])
+    if args.pcap_file:
         from scat.writers.pcapwriter import PcapWriter
-        writer = PcapWriter(args.pcap_file, GSMTAP_PORT, IP_OVER_UDP_PORT)
+        file_writers.append(PcapWriter(args.pcap_file, GSMTAP_PORT, IP_OVER_UDP_PORT,
+            fmt=args.pcap_format, nanosecond=args.pcap_ns, link_type=args.pcap_link_type))
+
+    if len(file_writers) > 1:
+        from scat.writers.compositewriter import CompositeWriter
+        writer = CompositeWriter(file_writers)
+    elif file_writers:
+        writer = file_writers[0]
     else:
         # Default network output
         writer = scat.writers.SocketWriter(GSMTAP_IP, GSMTAP_PORT, IP_OVER_UDP_PORT)
 
+    current_writer = writer
     current_parser = parser_dict[args.type]
     current_parser.set_io_device(io_device)
     current_parser.set_writer(writer)
@@ -276,14 +289,26 @@ def scat_main():
         current_parser.set_parameter({
             'qsr-hash': args.qsr_hash,
             'qsr4-hash': args.qsr4_hash,
+            'qsr4-cache': not args.no_qsr4_cache,
             'events': args.events,
             'msgs': args.msgs,
             'cacombos': args.cacombos,
             'combine-stdout': args.combine_stdout,
+            'crc-check': args.crc_check,
+            'crc-sample-rate': args.crc_sample_rate,
             'disable-crc-check': args.disable_crc_check,
             'layer': layers,
             'format': args.format,
-            'gsmtapv3': args.gsmtapv3})
+            'gsmtapv3': args.gsmtapv3,
+            'index': args.index,
+            'log-ids': args.log_ids,
+            'exclude-log-ids': args.exclude_log_ids,
+            'layer-filter': args.layer_filter,
+            'dispatch-priority': args.dispatch_priority,
+            'start-time': args.start_time,
+            'end-time': args.end_time,
+            'jobs': args.jobs,
+            'profile': args.profile})
     elif args.type == 'sec':
         current_parser.set_parameter({
             'model': args.model,
@@ -299,43 +324,50 @@ def scat_main():
         current_parser.set_parameter({
             'msgs': args.msgs,
             'combine-stdout': args.combine_stdout,
+            'crc-check': args.crc_check,
+            'crc-sample-rate': args.crc_sample_rate,
             'disable-crc-check': args.disable_crc_check,
             'layer': layers,
             'format': args.format,
             'gsmtapv3': args.gsmtapv3})
 
-    # Run process
-    if args.serial or args.usb:
-        current_parser.stop_diag()
-        current_parser.init_diag()
-        current_parser.prepare_diag()
-
-        signal.signal(signal.SIGINT, sigint_handler)
-
-        if not (args.qmdl == None) and args.type == 'qc':
-            current_parser.run_diag(scat.writers.RawWriter(args.qmdl))
-        elif not (args.sdmraw == None) and args.type == 'sec':
-            current_parser.run_diag(scat.writers.RawWriter(args.sdmraw))
+    # Run process, the writers are closed on errors and SIGINT as well
+    try:
+        if args.serial or args.usb:
+            current_parser.stop_diag()
+            current_parser.init_diag()
+            current_parser.prepare_diag()
+
+            signal.signal(signal.SIGINT, sigint_handler)
+
+            if not (args.qmdl == None) and args.type == 'qc':
+                current_parser.run_diag(scat.writers.RawWriter(args.qmdl))
+            elif not (args.sdmraw == None) and args.type == 'sec':
+                current_parser.run_diag(scat.writers.RawWriter(args.sdmraw))
+            else:
+                current_parser.run_diag()
+
+            current_parser.stop_diag()
+        elif args.dump:
+            print(f"🔍 Analyzing QMDL file(s): {', '.join(args.dump)}")
+            current_parser.read_dump()
+            print("✅ Analysis completed successfully!")
         else:
-            current_parser.run_diag()
+            print('Error: Invalid input handler')
+            sys.exit(1)
+    finally:
+        close_writer()
 
-        current_parser.stop_diag()
-    elif args.dump:
-        print(f"🔍 Analyzing QMDL file(s): {', '.join(args.dump)}")
-        current_parser.read_dump()
-        print("✅ Analysis completed successfully!")
-    else:
-        print('Error: Invalid input handler')
-        sys.exit(1)
-        
-    # Cleanup writers
     if hasattr(writer, 'close'):
-        writer.close()
         print(f"Output files written successfully")
         if args.json_file:
             print(f"JSON output: {args.json_file}")
         if args.txt_file:
             print(f"TXT output: {args.txt_file}")
+        if args.sqlite_file:
+            print(f"SQLite output: {args.sqlite_file}")
+        if args.columnar_file:
+            print(f"Columnar output: {', '.join(columnar_writer.outputs) if columnar_writer.outputs else 'no measurements'}")
         if args.pcap_file:
             print(f"PCAP output: {args.pcap_file}")
 
@@ -4,6 +4,10 @@
 
 """
 Enhanced Qualcomm Parser that extracts structured data for JSON/TXT output
+
+Decoders converted to structured output (LTE, NR, WCDMA and GSM measurement
+and cell info parsers) return their fields under the keys listed in
+NATIVE_KEYS. The text extraction below is the fallback for all other decoders.
 """
 
 import datetime
@@ -13,6 +17,9 @@ import binascii
 from collections import namedtuple
 import struct
 
+# Result keys carrying typed fields set by the decoders themselves
+NATIVE_KEYS = ('cell_info', 'measurement')
+
 class EnhancedQualcommParser:
     """Enhanced parser that extracts structured data from stdout messages"""
     
@@ -24,6 +31,11 @@ class EnhancedQualcommParser:
         """Enhance parse result with structured data extraction"""
         if not parse_result:
             return parse_result
+
+        # Decoders with native fields already have their values, nothing to recover from stdout
+        for key in NATIVE_KEYS:
+            if key in parse_result:
+                return parse_result
             
         enhanced_result = parse_result.copy()
         
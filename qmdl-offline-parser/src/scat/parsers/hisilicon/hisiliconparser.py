@@ -8,6 +8,7 @@ import logging
 import os, sys
 import struct
 
+import scat.framing as framing
 import scat.util as util
 from scat.parsers.hisilicon.hisilogparser import HisiLogParser
 from scat.parsers.hisilicon.hisinestedparser import HisiNestedParser
@@ -37,7 +38,6 @@ class HisiliconParser:
         self.io_device = None
         self.writer = None
         self.combine_stdout = False
-        self.check_crc = True
         self.layers = []
         self.display_format = 'x'
         self.gsmtapv3 = False
@@ -46,6 +46,7 @@ class HisiliconParser:
         self.shortname = 'hisi'
 
         self.logger = logging.getLogger('scat.hisiliconparser')
+        self.crc_verifier = util.CrcVerifier(logger=self.logger)
 
         self.diag_log_parsers = [HisiLogParser(self)]
         self.process = { }
@@ -93,7 +94,13 @@ class HisiliconParser:
             elif p == 'combine-stdout':
                 self.combine_stdout = params[p]
             elif p == 'disable-crc-check':
-                self.check_crc = not params[p]
+                if params[p]:
+                    self.crc_verifier.policy = util.CRC_OFF
+            elif p == 'crc-check':
+                if params[p]:
+                    self.crc_verifier = util.CrcVerifier(params[p], self.crc_verifier.sample_rate, self.logger)
+            elif p == 'crc-sample-rate':
+                self.crc_verifier.sample_rate = params[p] if params[p] else 0
             elif p == 'layer':
                 self.layers = params[p]
             elif p == 'format':
@@ -116,17 +123,24 @@ class HisiliconParser:
         if hdlc_encoded:
             pkt = util.unwrap(pkt)
 
+        deferred_frame = None
         if has_crc:
-            # Check CRC only if check_crc is enabled
-            if self.check_crc:
-                crc = util.dm_crc16(pkt[:-2])
-                crc_pkt = (pkt[-1] << 8) | pkt[-2]
-                if crc != crc_pkt:
-                    self.logger.log(logging.WARNING, "CRC mismatch: expected 0x{:04x}, got 0x{:04x}".format(crc, crc_pkt))
-                    self.logger.log(logging.DEBUG, util.xxd(pkt))
+            if self.crc_verifier.needs_check():
+                self.crc_verifier.verify(pkt)
+            elif self.crc_verifier.policy == util.CRC_LAZY:
+                deferred_frame = pkt
             pkt = pkt[:-2]
 
-        return self.parse_diag_log(pkt)
+        if deferred_frame is None:
+            return self.parse_diag_log(pkt)
+
+        try:
+            return self.parse_diag_log(pkt)
+        except Exception:
+            # Deferred CRC check: drop corrupted frames, keep decoder errors of valid ones
+            if self.crc_verifier.verify(deferred_frame, deferred=True):
+                raise
+            return None
 
     def run_diag(self):
         pass
@@ -137,35 +151,14 @@ class HisiliconParser:
     def run_dump(self):
         self.logger.log(logging.INFO, 'Starting diag from dump')
 
-        oldbuf = b''
-        loop = True
-        cur_pos = 0
+        # Unterminated data at the end of the dump is parsed as the last packet
+        framer = framing.HdlcFramer(keep_trailing=True, logger=self.logger)
         try:
-            while loop:
-                buf = self.io_device.read(0x90000)
-                if len(buf) == 0:
-                    if self.io_device.block_until_data:
-                        continue
-                    else:
-                        loop = False
-
-                last_pkt_pos = buf.rfind(b'\x7e')
-                if last_pkt_pos > 0:
-                    buf_t = oldbuf + buf[0:last_pkt_pos]
-                    oldbuf = buf[last_pkt_pos:]
-                    buf = buf_t
-                else:
-                    buf = oldbuf + buf
+            for pkt in framing.read_frames(self.io_device, framer):
+                parse_result = self.parse_diag(pkt)
 
-                buf_atom = buf.split(b'\x7e')
-
-                for pkt in buf_atom:
-                    if len(pkt) == 0:
-                        continue
-                    parse_result = self.parse_diag(pkt)
-
-                    if parse_result is not None:
-                        self.postprocess_parse_result(parse_result)
+                if parse_result is not None:
+                    self.postprocess_parse_result(parse_result)
 
         except KeyboardInterrupt:
             return
@@ -180,6 +173,10 @@ class HisiliconParser:
                 self.run_dump()
             self.io_device.open_next_file()
 
+        crc = self.crc_verifier
+        if crc.verified + crc.skipped > 0:
+            self.logger.log(logging.INFO, crc.summary())
+
     def postprocess_parse_result(self, parse_result):
         if 'radio_id' in parse_result:
             radio_id = parse_result['radio_id']
@@ -1,13 +1,13 @@
 #!/usr/bin/env python3
 
-from collections import namedtuple
 import binascii
-import calendar
+import functools
 import logging
 import struct
 
 import scat.util as util
 import scat.parsers.qualcomm.diagcmd as diagcmd
+import scat.parsers.qualcomm.diaglayouts as diaglayouts
 
 try:
     import gi
@@ -19,6 +19,16 @@ except ModuleNotFoundError:
 except ValueError:
     has_gobject = False
 
+# Record layouts by log code and packet version, see diaglayouts
+i = diagcmd.diag_log_get_1x_item_id
+c = diagcmd.diag_log_code_1x
+PROTOCOL_DATA = diaglayouts.register(i(c.LOG_DATA_PROTOCOL_LOGGING_C), None, 'QcDiag1xProtocolData', '<BBBBHH',
+    'instance protocol ifnameid direction sequence_num segment_num_is_final')
+IMS_SIP_MESSAGE = diaglayouts.register(i(c.LOG_IMS_SIP_MESSAGE), None, 'QcDiag1xSipMessage', '<BBB BHH HHL',
+    'version direction has_sdp len_call_id len_pkt len_pkt_real msg_type status_code unk4')
+del i, c
+
+
 class Diag1xLogParser:
     def __init__(self, parent):
         self.parent = parent
@@ -40,21 +50,21 @@ class Diag1xLogParser:
         x = diagcmd.diag_log_code_1x
         self.process = {
             # SIM
-            # i(x.LOG_UIM_DATA_C): lambda x, y, z: self.parse_sim(x, y, z), # RUIM Debug
-            # i(x.LOG_UIM_DS_DATA_C): lambda x, y, z: self.parse_dual_sim(x, y, z), # UIM DS Data
+            # i(x.LOG_UIM_DATA_C): self.parse_sim, # RUIM Debug
+            # i(x.LOG_UIM_DS_DATA_C): self.parse_dual_sim, # UIM DS Data
 
             # IP
-            i(x.LOG_DATA_PROTOCOL_LOGGING_C): lambda x, y, z: self.parse_ip(x, y, z), # Protocol Services Data
+            i(x.LOG_DATA_PROTOCOL_LOGGING_C): self.parse_ip, # Protocol Services Data
 
             # IMS
-            i(x.LOG_IMS_RTP_SN_PAYLOAD): lambda x, y, z: self.parse_1x_stub(x, y, z, 0x1568),
-            i(x.LOG_IMS_RTP_PACKET_LOSS): lambda x, y, z: self.parse_1x_stub(x, y, z, 0x1569),
-            i(x.LOG_IMS_RTCP): lambda x, y, z: self.parse_1x_stub(x, y, z, 0x156A),
-            i(x.LOG_IMS_SIP_MESSAGE): lambda x, y, z: self.parse_sip_message(x, y, z),
-            i(x.LOG_IMS_VOICE_CALL_STATS): lambda x, y, z: self.parse_1x_stub(x, y, z, 0x17F2),
-            i(x.LOG_IMS_VOLTE_SESSION_SETUP): lambda x, y, z: self.parse_ims_session_setup(x, y, z),
-            i(x.LOG_IMS_VOLTE_SESSION_END): lambda x, y, z: self.parse_1x_stub(x, y, z, 0x1831),
-            i(x.LOG_IMS_REGISTRATION): lambda x, y, z: self.parse_ims_registration(x, y, z),
+            i(x.LOG_IMS_RTP_SN_PAYLOAD): functools.partial(self.parse_1x_stub, item_id=0x1568),
+            i(x.LOG_IMS_RTP_PACKET_LOSS): functools.partial(self.parse_1x_stub, item_id=0x1569),
+            i(x.LOG_IMS_RTCP): functools.partial(self.parse_1x_stub, item_id=0x156A),
+            i(x.LOG_IMS_SIP_MESSAGE): self.parse_sip_message,
+            i(x.LOG_IMS_VOICE_CALL_STATS): functools.partial(self.parse_1x_stub, item_id=0x17F2),
+            i(x.LOG_IMS_VOLTE_SESSION_SETUP): self.parse_ims_session_setup,
+            i(x.LOG_IMS_VOLTE_SESSION_END): functools.partial(self.parse_1x_stub, item_id=0x1831),
+            i(x.LOG_IMS_REGISTRATION): self.parse_ims_registration,
 
             # QMI
             # i(x.LOG_QMI_LINK_01_RX_MSG_C): lambda x, y, z: self.parse_qmi_message(x, y, z, 1, False),
@@ -99,8 +109,8 @@ class Diag1xLogParser:
             # i(x.LOG_QMI_LINK_20_TX_MSG_C): lambda x, y, z: self.parse_qmi_message(x, y, z, 20, True),
             # i(x.LOG_QMI_LINK_21_RX_MSG_C): lambda x, y, z: self.parse_qmi_message(x, y, z, 21, False),
             # i(x.LOG_QMI_LINK_21_TX_MSG_C): lambda x, y, z: self.parse_qmi_message(x, y, z, 21, True),
-            i(x.LOG_QMI_CALL_FLOW_C): lambda x, y, z: self.parse_qmi_call_flow(x, y, z),
-            i(x.LOG_QMI_SUPPORTED_INTERFACES_C): lambda x, y, z: self.parse_qmi_supported_interfaces(x, y, z),
+            i(x.LOG_QMI_CALL_FLOW_C): self.parse_qmi_call_flow,
+            i(x.LOG_QMI_SUPPORTED_INTERFACES_C): self.parse_qmi_supported_interfaces,
         }
 
     def update_parameters(self, display_format, gsmtapv3):
@@ -115,7 +125,7 @@ class Diag1xLogParser:
     # SIM
     def parse_sim(self, pkt_header, pkt_body, args, sim_id):
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        ts_sec = calendar.timegm(pkt_ts.timetuple())
+        ts_sec = pkt_ts.us // 1000000
         ts_usec = pkt_ts.microsecond
 
         msg_content = pkt_body
@@ -145,7 +155,7 @@ class Diag1xLogParser:
 
     def parse_dual_sim(self, pkt_header, pkt_body, args):
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        ts_sec = calendar.timegm(pkt_ts.timetuple())
+        ts_sec = pkt_ts.us // 1000000
         ts_usec = pkt_ts.microsecond
 
         msg_content = pkt_body
@@ -187,8 +197,7 @@ class Diag1xLogParser:
     # IP
     def parse_ip(self, pkt_header, pkt_body, args):
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        item_struct = namedtuple('QcDiag1xProtocolData', 'instance protocol ifnameid direction sequence_num segment_num_is_final')
-        item = item_struct._make(struct.unpack('<BBBBHH', pkt_body[0:8]))
+        item = PROTOCOL_DATA.unpack_from(pkt_body)
         item_data = pkt_body[8:]
 
         # pkt[3] = 0a00 0000 [a: direction, 0=RX, 1=TX]
@@ -228,8 +237,7 @@ class Diag1xLogParser:
     # IMS
     def parse_sip_message(self, pkt_header, pkt_body, args):
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        item_struct = namedtuple('QcDiag1xSipMessage', 'version direction has_sdp len_call_id len_pkt len_pkt_real msg_type status_code unk4')
-        item = item_struct._make(struct.unpack('<BBB BHH HHL', pkt_body[0:16]))
+        item = IMS_SIP_MESSAGE.unpack_from(pkt_body)
         # direction: 0: downlink, 1: uplink
         # type: 1: REGISTER 2: INVITE 3: PRACK 5: ACK 6: BYE 7: SUBSCRIBE 8: NOTIFY 14: OPTIONS
 
@@ -327,7 +335,7 @@ class Diag1xLogParser:
     # QMI
     def parse_qmi_message(self, pkt_header, pkt_body, args, qmi_port, is_tx):
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        ts_sec = calendar.timegm(pkt_ts.timetuple())
+        ts_sec = pkt_ts.us // 1000000
         ts_usec = pkt_ts.microsecond
         stdout = ''
 
@@ -347,7 +355,7 @@ class Diag1xLogParser:
 
     def parse_qmi_call_flow(self, pkt_header, pkt_body, args):
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        ts_sec = calendar.timegm(pkt_ts.timetuple())
+        ts_sec = pkt_ts.us // 1000000
         ts_usec = pkt_ts.microsecond
 
         stdout = 'QMI_CALL_FLOW: {}'.format(binascii.hexlify(pkt_body).decode())
@@ -355,7 +363,7 @@ class Diag1xLogParser:
 
     def parse_qmi_supported_interfaces(self, pkt_header, pkt_body, args):
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        ts_sec = calendar.timegm(pkt_ts.timetuple())
+        ts_sec = pkt_ts.us // 1000000
         ts_usec = pkt_ts.microsecond
 
         stdout = 'QMI_IFACES: {}'.format(binascii.hexlify(pkt_body).decode())
@@ -615,6 +615,26 @@ def log_mask_scat_nr(num_max_items=0x09ff, layers=[]):
 def log_mask_empty_tdscdma(num_max_items=0x0207):
     return create_log_config_set_mask(DIAG_SUBSYS_ID_TDSCDMA, num_max_items)
 
+def log_ids_from_mask(mask):
+    # Inverse of create_log_config_set_mask: returns the full log codes (equip_id << 12 | item)
+    _, _, equip_id, last_item = struct.unpack('<LLLL', mask[0:16])
+    log_ids = set()
+    for pos_byte, b in enumerate(mask[16:]):
+        for pos_bit in range(8):
+            item = pos_byte * 8 + pos_bit
+            if b & (1 << pos_bit) and item <= last_item:
+                log_ids.add((equip_id << 12) | item)
+    return log_ids
+
+def log_ids_scat(layers=[]):
+    # Log codes enabled by the SCAT log masks of the given layers
+    log_ids = set()
+    for mask in (log_mask_scat_1x(layers=layers), log_mask_scat_wcdma(layers=layers),
+            log_mask_scat_gsm(layers=layers), log_mask_scat_umts(layers=layers),
+            log_mask_scat_lte(layers=layers)):
+        log_ids |= log_ids_from_mask(mask)
+    return log_ids
+
 def create_extended_message_config_set_mask(first_ssid, last_ssid, *masks):
     # Command ID, Operation | first_ssid, last_ssid, runtime_masks
     diag_log_config_mask_header = struct.pack('<BBHHH',
@@ -82,7 +82,7 @@ class DiagCommonEventParser:
                 pid = args[1],
             )
 
-            gsmtap_hdr = util.create_gsmtap_header(
+            gsmtap_hdr = util.static_gsmtap_header(
                 version = 2,
                 payload_type = util.gsmtap_type.OSMOCORE_LOG)
 
@@ -21,18 +21,18 @@ class DiagComprehensiveLogParser:
         # All remaining high-frequency message IDs
         self.process = {
             # System messages
-            0x0000: lambda x, y, z: self.parse_system_status(x, y, z),
-            0x18C4: lambda x, y, z: self.parse_rf_advanced_status(x, y, z),
-            0x18C3: lambda x, y, z: self.parse_rf_configuration_report(x, y, z),
-            0x1C72: lambda x, y, z: self.parse_system_configuration(x, y, z),
-            0x1C70: lambda x, y, z: self.parse_system_status_extended(x, y, z),
-            0x1C6E: lambda x, y, z: self.parse_system_performance(x, y, z),
-            0x1375: lambda x, y, z: self.parse_power_management_report(x, y, z),
-            0x41D6: lambda x, y, z: self.parse_rf_advanced_rx_report(x, y, z),
-            0x41CD: lambda x, y, z: self.parse_rf_calibration_status(x, y, z),
-            0x4189: lambda x, y, z: self.parse_rf_power_management(x, y, z),
-            0x4191: lambda x, y, z: self.parse_rf_system_report(x, y, z),
-            0x4188: lambda x, y, z: self.parse_rf_configuration_status(x, y, z),
+            0x0000: self.parse_system_status,
+            0x18C4: self.parse_rf_advanced_status,
+            0x18C3: self.parse_rf_configuration_report,
+            0x1C72: self.parse_system_configuration,
+            0x1C70: self.parse_system_status_extended,
+            0x1C6E: self.parse_system_performance,
+            0x1375: self.parse_power_management_report,
+            0x41D6: self.parse_rf_advanced_rx_report,
+            0x41CD: self.parse_rf_calibration_status,
+            0x4189: self.parse_rf_power_management,
+            0x4191: self.parse_rf_system_report,
+            0x4188: self.parse_rf_configuration_status,
         }
         
         self.no_process = {}
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# coding: utf8
+"""
+Dispatch table of the Qualcomm DIAG log parsers.
+
+Every log parser exposes a process dict mapping log IDs to callables taking
+(pkt_header, pkt_body, args), i.e. bound methods or functools.partial objects.
+The dispatch table merges these dicts once at startup, so decoding a log
+packet costs a single dict lookup and a direct call of the parser method.
+
+Log IDs claimed by more than one parser are resolved by an explicit priority
+policy and recorded as conflicts, which are logged at startup.
+"""
+
+from collections import namedtuple
+import logging
+
+# Priority policies for log IDs claimed by several parsers
+PRIORITY_FIRST = 'first'
+PRIORITY_LAST = 'last'
+PRIORITY_POLICIES = (PRIORITY_FIRST, PRIORITY_LAST)
+
+DispatchConflict = namedtuple('DispatchConflict', 'log_id selected overridden')
+
+
+def handler_name(handler):
+    """Returns a readable Parser.method name of a dispatch handler."""
+    func = handler.func if hasattr(handler, 'func') else handler
+    owner = getattr(func, '__self__', None)
+    name = getattr(func, '__name__', repr(func))
+    if owner is not None:
+        return '{}.{}'.format(type(owner).__name__, name)
+    return name
+
+
+class LogDispatchTable:
+    """
+    Log ID to parser method table merged from the log parsers.
+    """
+    def __init__(self, policy=PRIORITY_LAST, logger=None):
+        """
+        With PRIORITY_LAST, a parser registered later overrides earlier ones for the
+        same log ID (the historical dict.update order). PRIORITY_FIRST keeps the
+        first registration.
+        """
+        if policy not in PRIORITY_POLICIES:
+            raise ValueError('Unknown dispatch priority policy {}'.format(policy))
+        self.policy = policy
+        self.logger = logger if logger else logging.getLogger('scat.diagdispatch')
+        self.table = {}
+        self.ignored = set()
+        self.conflicts = []
+
+    def register(self, log_id, handler):
+        """Registers a handler for a log ID, applying the priority policy on conflicts."""
+        current = self.table.get(log_id)
+        if current is None:
+            self.table[log_id] = handler
+            return True
+
+        if self.policy == PRIORITY_LAST:
+            self.conflicts.append(DispatchConflict(log_id, handler, current))
+            self.table[log_id] = handler
+            return True
+        self.conflicts.append(DispatchConflict(log_id, current, handler))
+        return False
+
+    def register_parser(self, parser):
+        """Registers the process dict and the no_process log IDs of a log parser."""
+        for log_id, handler in parser.process.items():
+            self.register(log_id, handler)
+        self.ignored.update(getattr(parser, 'no_process', {}).keys())
+
+    def get(self, log_id):
+        """Returns the handler of a log ID, None if no parser handles it."""
+        return self.table.get(log_id)
+
+    def unprocessed_log_ids(self):
+        """Returns the log IDs known to be not processed and not claimed by any parser."""
+        return self.ignored - self.table.keys()
+
+    def report_conflicts(self, level=logging.INFO):
+        for conflict in self.conflicts:
+            self.logger.log(level, 'Log ID 0x{:04x} handled by {}, overriding {} (priority: {})'.format(
+                conflict.log_id, handler_name(conflict.selected), handler_name(conflict.overridden), self.policy))
+
+    def entries(self):
+        """Returns (log ID, handler name) of every entry, sorted by log ID."""
+        return [(log_id, handler_name(self.table[log_id])) for log_id in sorted(self.table)]
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# coding: utf8
+"""
+Statistics of the DIAG events seen while parsing.
+
+Counts every event ID with its first and last timestamp and how it was
+handled: decoded by an event parser, ignored (no_process) or passed to the
+fallback parser because no event parser knows it.
+"""
+
+import logging
+
+EVENT_KNOWN = 'known'
+EVENT_IGNORED = 'ignored'
+EVENT_UNKNOWN = 'unknown'
+
+
+class EventStatistics:
+    """
+    Per event ID counters, reported once at the end of a run or on demand.
+    """
+    def __init__(self):
+        # event_id: [count, first_ts, last_ts, kind]
+        self.events = {}
+        self.reports = 0
+
+    def add(self, event_id, ts, kind):
+        entry = self.events.get(event_id)
+        if entry is None:
+            self.events[event_id] = [1, ts, ts, kind]
+        else:
+            entry[0] += 1
+            entry[2] = ts
+
+    def merge(self, other):
+        """Adds the counters of other, gathered on the frames following ours."""
+        for event_id, (count, first_ts, last_ts, kind) in other.events.items():
+            entry = self.events.get(event_id)
+            if entry is None:
+                self.events[event_id] = [count, first_ts, last_ts, kind]
+            else:
+                entry[0] += count
+                entry[2] = last_ts
+        self.reports += other.reports
+
+    def reset(self):
+        self.events = {}
+        self.reports = 0
+
+    def count(self, kind=None):
+        """Returns the number of events, optionally only of the given kind."""
+        return sum(entry[0] for entry in self.events.values() if kind is None or entry[3] == kind)
+
+    def summary(self):
+        kinds = [entry[3] for entry in self.events.values()]
+        return 'Events: {} in {} reports, {} distinct IDs ({} known, {} ignored, {} unknown)'.format(
+            self.count(), self.reports, len(kinds), kinds.count(EVENT_KNOWN),
+            kinds.count(EVENT_IGNORED), kinds.count(EVENT_UNKNOWN))
+
+    def format_table(self):
+        """Returns one line per event ID, sorted by event ID."""
+        lines = ['{:>6} {:<8} {:>9}  {:<32} {:<32}'.format('ID', 'Kind', 'Count', 'First', 'Last')]
+        for event_id in sorted(self.events):
+            count, first_ts, last_ts, kind = self.events[event_id]
+            lines.append('{:>6} {:<8} {:>9}  {:<32} {:<32}'.format(event_id, kind, count, str(first_ts), str(last_ts)))
+        return '\n'.join(lines)
+
+    def log(self, logger, level=logging.INFO):
+        """Logs the summary at level and the per event ID table at DEBUG level."""
+        if not self.events:
+            return
+        logger.log(level, self.summary())
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.log(logging.DEBUG, 'Event statistics:\n{}'.format(self.format_table()))
@@ -1657,12 +1657,14 @@ class DiagFallbackEventParser:
             2747: 'EVENT_WLAN_LOW_RESOURCE_FAILURE', # 0xabb
         }
 
+        self.log_precontents = {}
+
     def update_parameters(self, display_format, gsmtapv3):
         self.display_format = display_format
         self.gsmtapv3 = gsmtapv3
 
     def parse_event_fallback(self, ts, event_id, *args):
-        gsmtap_hdr = util.create_gsmtap_header(
+        gsmtap_hdr = util.static_gsmtap_header(
             version = 2,
             payload_type = util.gsmtap_type.OSMOCORE_LOG)
         osmocore_log_hdr = util.create_osmocore_logging_header(
@@ -1670,10 +1672,13 @@ class DiagFallbackEventParser:
             process_name = b'Event',
             pid = event_id,
         )
-        if event_id in self.event_names:
-            log_precontent = '{}: '.format(self.event_names[event_id]).encode('utf-8')
-        else:
-            log_precontent = 'Event {}: '.format(event_id).encode('utf-8')
+        log_precontent = self.log_precontents.get(event_id)
+        if log_precontent is None:
+            if event_id in self.event_names:
+                log_precontent = '{}: '.format(self.event_names[event_id]).encode('utf-8')
+            else:
+                log_precontent = 'Event {}: '.format(event_id).encode('utf-8')
+            self.log_precontents[event_id] = log_precontent
 
         header = gsmtap_hdr + osmocore_log_hdr + log_precontent
         log_content = b''
@@ -20,10 +20,10 @@ class DiagGnssLogParser:
         
         # GNSS message IDs from QCAT output analysis
         self.process = {
-            0x1384: lambda x, y, z: self.parse_cgps_pdsm_nmea_report(x, y, z),
-            0x1476: lambda x, y, z: self.parse_gnss_position_report(x, y, z),
-            0x13D1: lambda x, y, z: self.parse_xo_frequency_estimation(x, y, z),
-            0x418B: lambda x, y, z: self.parse_gnss_measurement_report(x, y, z),
+            0x1384: self.parse_cgps_pdsm_nmea_report,
+            0x1476: self.parse_gnss_position_report,
+            0x13D1: self.parse_xo_frequency_estimation,
+            0x418B: self.parse_gnss_measurement_report,
         }
         
         self.no_process = {}
@@ -1,25 +1,44 @@
 #!/usr/bin/env python3
 
-from collections import namedtuple
-from packaging import version
 import binascii
-import bitstring
-import calendar
 import logging
 import struct
 
+import scat.bitfields as bitfields
 import scat.util as util
 import scat.parsers.qualcomm.diagcmd as diagcmd
+import scat.parsers.qualcomm.diaglayouts as diaglayouts
+
+# ARFCN and band indicator, LSB0 bit ranges
+GSM_ARFCN_BAND_BITS = bitfields.BitFields((0, 12), (12, 16))
+
+# Record layouts by log code and packet version, see diaglayouts
+i = diagcmd.diag_log_get_gsm_item_id
+c = diagcmd.diag_log_code_gsm
+GSM_L1_FCCH = diaglayouts.register(i(c.LOG_GSM_L1_FCCH_ACQUISITION_C), None, 'QcDiagGsmL1Fcch', '<HHHHhhhH',
+    'arfcn_band tone_id msw lsw coarse_freq_offset fine_freq_offset afc_freq snr')
+GSM_L1_SCH = diaglayouts.register(i(c.LOG_GSM_L1_SCH_ACQUISITION_C), None, 'QcDiagGsmL1Sch', '<HHHHHHLHHHH',
+    'arfcn_band tone_id crc_pass dsp_rx bad_frame decoded_data_len decoded_data msw lsw peak_corr_energy freq_offset')
+GSM_L1_NEW_BURST_METRIC_V4 = diaglayouts.register(i(c.LOG_GSM_L1_NEW_BURST_METRICS_C), 4, 'QcDiagGsmL1NewBurstMetricV4', '<LHLhhhhhhbbLBBHLB',
+    'sfn arfcn_band rssi rxpwr dcoff_i dcoff_q freq_offset time_offset snr_est gain_state aci q16 aqpsk timeslot jdet_reading_divrx wb_power ll_hl_state')
+GSM_L1_BURST_METRIC = diaglayouts.register(i(c.LOG_GSM_L1_BURST_METRICS_C), None, 'QcDiagGsmL1BurstMetric', '<LHLhhhhhhb',
+    'sfn arfcn_band rssi rxpwr dcoff_i dcoff_q freq_offset time_offset snr_est gain_state')
+GSM_L1_SCELL_BA = diaglayouts.register(i(c.LOG_GSM_L1_SCELL_BA_LIST_C), None, 'QcDiagGsmL1SurroundCellBa', '<HhBBLH',
+    'arfcn_band rxpwr bsic_valid bsic fn_offset time_offset')
+GSM_L1_SCELL_AUX_MEAS = diaglayouts.register(i(c.LOG_GSM_L1_SCELL_AUX_MEASUREMENTS_C), None, 'QcDiagGsmL1ServAuxMeas', '<hB',
+    'rxpwr snr_is_bad')
+GSM_L1_NCELL_AUX_MEAS = diaglayouts.register(i(c.LOG_GSM_L1_NCELL_AUX_MEASUREMENTS_C), None, 'QcDiagGsmL1NeigAuxMeas', '<Hh',
+    'arfcn_band rxpwr')
+GSM_RR_CELL_INFO = diaglayouts.register(i(c.LOG_GSM_RR_CELL_INFORMATION_C), None, 'QcDiagGsmRrCellInfo', '<HBBH5sBB',
+    'arfcn_band bcc ncc cid lai priority ncc_permitted')
+GSM_RR_SIGNALING = diaglayouts.register(i(c.LOG_GSM_RR_SIGNALING_MESSAGE_C), None, 'QcDiagGsmRrSignalingMessage', '<BBB',
+    'channel_type_dir message_type message_len')
+GPRS_MAC_SIGNALING = diaglayouts.register(i(c.LOG_GPRS_MAC_SIGNALING_MESSACE_C), None, 'QcDiagGsmGprsMac', '<BBB',
+    'chan_type_dir message_type message_len')
+GPRS_SM_GMM_OTA = diaglayouts.register(i(c.LOG_GPRS_SM_GMM_OTA_SIGNALING_MESSAGE_C), None, 'QcDiagGsmGprsOta', '<BBH',
+    'msg_dir message_type message_len')
+del i, c
 
-bitstring_ver = version.parse(bitstring.__version__)
-if bitstring_ver >= version.parse('4.2.0'):
-    bitstring.options.lsb0 = True
-elif bitstring_ver >= version.parse('4.0.0'):
-    bitstring.lsb0 = True
-elif bitstring_ver >= version.parse('3.1.7'):
-    bitstring.set_lsb0(True)
-else:
-    raise Exception("SCAT requires bitstring>=3.1.7, recommends bitstring>=4.0.0")
 
 class DiagGsmLogParser:
     def __init__(self, parent):
@@ -40,33 +59,33 @@ class DiagGsmLogParser:
         c = diagcmd.diag_log_code_gsm
         self.process = {
             # L1
-            i(c.LOG_GSM_L1_FCCH_ACQUISITION_C): lambda x, y, z: self.parse_gsm_fcch(x, y, z),
-            i(c.LOG_GSM_L1_SCH_ACQUISITION_C): lambda x, y, z: self.parse_gsm_sch(x, y, z),
-            i(c.LOG_GSM_L1_NEW_BURST_METRICS_C): lambda x, y, z: self.parse_gsm_l1_new_burst_metric(x, y, z),
-            i(c.LOG_GSM_L1_BURST_METRICS_C): lambda x, y, z: self.parse_gsm_l1_burst_metric(x, y, z),
-            i(c.LOG_GSM_L1_SCELL_BA_LIST_C): lambda x, y, z: self.parse_gsm_l1_surround_cell_ba(x, y, z),
-            i(c.LOG_GSM_L1_SCELL_AUX_MEASUREMENTS_C): lambda x, y, z: self.parse_gsm_l1_serv_aux_meas(x, y, z),
-            i(c.LOG_GSM_L1_NCELL_AUX_MEASUREMENTS_C): lambda x, y, z: self.parse_gsm_l1_neig_aux_meas(x, y, z),
+            i(c.LOG_GSM_L1_FCCH_ACQUISITION_C): self.parse_gsm_fcch,
+            i(c.LOG_GSM_L1_SCH_ACQUISITION_C): self.parse_gsm_sch,
+            i(c.LOG_GSM_L1_NEW_BURST_METRICS_C): self.parse_gsm_l1_new_burst_metric,
+            i(c.LOG_GSM_L1_BURST_METRICS_C): self.parse_gsm_l1_burst_metric,
+            i(c.LOG_GSM_L1_SCELL_BA_LIST_C): self.parse_gsm_l1_surround_cell_ba,
+            i(c.LOG_GSM_L1_SCELL_AUX_MEASUREMENTS_C): self.parse_gsm_l1_serv_aux_meas,
+            i(c.LOG_GSM_L1_NCELL_AUX_MEASUREMENTS_C): self.parse_gsm_l1_neig_aux_meas,
 
             # RR
-            i(c.LOG_GSM_RR_SIGNALING_MESSAGE_C): lambda x, y, z: self.parse_gsm_rr(x, y, z),
-            i(c.LOG_GSM_RR_CELL_INFORMATION_C): lambda x, y, z: self.parse_gsm_cell_info(x, y, z),
+            i(c.LOG_GSM_RR_SIGNALING_MESSAGE_C): self.parse_gsm_rr,
+            i(c.LOG_GSM_RR_CELL_INFORMATION_C): self.parse_gsm_cell_info,
 
             # GPRS
-            i(c.LOG_GPRS_MAC_SIGNALING_MESSACE_C): lambda x, y, z: self.parse_gprs_mac(x, y, z),
-            i(c.LOG_GPRS_SM_GMM_OTA_SIGNALING_MESSAGE_C): lambda x, y, z: self.parse_gprs_ota(x, y, z),
+            i(c.LOG_GPRS_MAC_SIGNALING_MESSACE_C): self.parse_gprs_mac,
+            i(c.LOG_GPRS_SM_GMM_OTA_SIGNALING_MESSAGE_C): self.parse_gprs_ota,
 
             # DSDS L1
-            i(c.LOG_GSM_DSDS_L1_FCCH_ACQUISITION_C): lambda x, y, z: self.parse_gsm_dsds_fcch(x, y, z),
-            i(c.LOG_GSM_DSDS_L1_SCH_ACQUISITION_C): lambda x, y, z: self.parse_gsm_dsds_sch(x, y, z),
-            i(c.LOG_GSM_DSDS_L1_BURST_METRICS_C): lambda x, y, z: self.parse_gsm_dsds_l1_burst_metric(x, y, z),
-            i(c.LOG_GSM_DSDS_L1_SCELL_BA_LIST_C): lambda x, y, z: self.parse_gsm_dsds_l1_surround_cell_ba(x, y, z),
-            i(c.LOG_GSM_DSDS_L1_SCELL_AUX_MEASUREMENTS_C): lambda x, y, z: self.parse_gsm_dsds_l1_serv_aux_meas(x, y, z),
-            i(c.LOG_GSM_DSDS_L1_NCELL_AUX_MEASUREMENTS_C): lambda x, y, z: self.parse_gsm_dsds_l1_neig_aux_meas(x, y, z),
+            i(c.LOG_GSM_DSDS_L1_FCCH_ACQUISITION_C): self.parse_gsm_dsds_fcch,
+            i(c.LOG_GSM_DSDS_L1_SCH_ACQUISITION_C): self.parse_gsm_dsds_sch,
+            i(c.LOG_GSM_DSDS_L1_BURST_METRICS_C): self.parse_gsm_dsds_l1_burst_metric,
+            i(c.LOG_GSM_DSDS_L1_SCELL_BA_LIST_C): self.parse_gsm_dsds_l1_surround_cell_ba,
+            i(c.LOG_GSM_DSDS_L1_SCELL_AUX_MEASUREMENTS_C): self.parse_gsm_dsds_l1_serv_aux_meas,
+            i(c.LOG_GSM_DSDS_L1_NCELL_AUX_MEASUREMENTS_C): self.parse_gsm_dsds_l1_neig_aux_meas,
 
             # DSDS RR
-            i(c.LOG_GSM_DSDS_RR_SIGNALING_MESSAGE_C): lambda x, y, z: self.parse_gsm_dsds_rr(x, y, z),
-            i(c.LOG_GSM_DSDS_RR_CELL_INFORMATION_C): lambda x, y, z: self.parse_gsm_dsds_cell_info(x, y, z),
+            i(c.LOG_GSM_DSDS_RR_SIGNALING_MESSAGE_C): self.parse_gsm_dsds_rr,
+            i(c.LOG_GSM_DSDS_RR_CELL_INFORMATION_C): self.parse_gsm_dsds_cell_info,
         }
 
     def update_parameters(self, display_format, gsmtapv3):
@@ -81,12 +100,9 @@ class DiagGsmLogParser:
         if args is not None and 'radio_id' in args:
             radio_id = args['radio_id']
 
-        item_struct = namedtuple('QcDiagGsmL1Fcch', 'arfcn_band tone_id msw lsw coarse_freq_offset fine_freq_offset afc_freq snr')
-        item = item_struct._make(struct.unpack('<HHHHhhhH', pkt_body[0:16]))
+        item = GSM_L1_FCCH.unpack_from(pkt_body)
 
-        band_arfcn_bits = bitstring.Bits(uint=item.arfcn_band, length=16)
-        arfcn = band_arfcn_bits[0:12].uint
-        band = band_arfcn_bits[12:16].uint
+        arfcn, band = GSM_ARFCN_BAND_BITS.unpack(item.arfcn_band)
 
         if self.parent:
             self.parent.gsm_last_arfcn[radio_id] = arfcn
@@ -102,12 +118,9 @@ class DiagGsmLogParser:
         if args is not None and 'radio_id' in args:
             radio_id = args['radio_id']
 
-        item_struct = namedtuple('QcDiagGsmL1Sch', 'arfcn_band tone_id crc_pass dsp_rx bad_frame decoded_data_len decoded_data msw lsw peak_corr_energy freq_offset')
-        item = item_struct._make(struct.unpack('<HHHHHHLHHHH', pkt_body[0:24]))
+        item = GSM_L1_SCH.unpack_from(pkt_body)
 
-        band_arfcn_bits = bitstring.Bits(uint=item.arfcn_band, length=16)
-        arfcn = band_arfcn_bits[0:12].uint
-        band = band_arfcn_bits[12:16].uint
+        arfcn, band = GSM_ARFCN_BAND_BITS.unpack(item.arfcn_band)
         sch_data = struct.unpack('>L', struct.pack('<L', item.decoded_data))[0]
         # SCH data 25bits: 19b reduced frame number, 6b BSIC
 
@@ -121,46 +134,52 @@ class DiagGsmLogParser:
 
     def parse_gsm_l1_new_burst_metric(self, pkt_header, pkt_body, args):
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        item_struct_v4 = namedtuple('QcDiagGsmL1NewBurstMetricV4', 'sfn arfcn_band rssi rxpwr dcoff_i dcoff_q freq_offset time_offset snr_est gain_state aci q16 aqpsk timeslot jdet_reading_divrx wb_power ll_hl_state')
         stdout = ''
+        measurement = [] if self.parent and self.parent.structured_fields else None
 
         pkt_version = pkt_body[0]
         if pkt_version == 4: # Version 4
             chan = pkt_body[1]
             for i in range(4):
-                cell_pkt = pkt_body[2+37*i:2+37*(i+1)]
-                item = item_struct_v4._make(struct.unpack('<LHLhhhhhhbbLBBHLB', cell_pkt))
-                c_band_arfcn_bits = bitstring.Bits(uint=item.arfcn_band, length=16)
-                c_arfcn = c_band_arfcn_bits[0:12].uint
-                c_band = c_band_arfcn_bits[12:16].uint
+                item = GSM_L1_NEW_BURST_METRIC_V4.unpack_from(pkt_body, 2+37*i)
+                c_arfcn, c_band = GSM_ARFCN_BAND_BITS.unpack(item.arfcn_band)
                 if item.rxpwr != 0:
                     c_rxpwr_real = item.rxpwr * 0.0625
                     stdout += 'GSM Serving Cell New Burst Metric: ARFCN: {}/BC: {}, RSSI: {}, RxPwr: {:.2f}\n'.format(c_arfcn, c_band, item.rssi, c_rxpwr_real)
+                    if measurement is not None:
+                        measurement.append({'type': 'gsm_measurement', 'technology': 'GSM', 'cell': 'serving',
+                            'arfcn': c_arfcn, 'band': c_band, 'rssi': item.rssi, 'rxpwr_dbm': c_rxpwr_real})
         else:
             if self.parent:
                 self.parent.logger.log(logging.WARNING, 'Unsupported GSM Serving Cell L1 New Burst Metric version {}'.format(pkt_version))
                 self.parent.logger.log(logging.DEBUG, util.xxd(pkt_body))
 
-        return {'stdout': stdout.rstrip(), 'ts': pkt_ts}
+        result = {'stdout': stdout.rstrip(), 'ts': pkt_ts}
+        if measurement:
+            result['measurement'] = measurement
+        return result
 
     def parse_gsm_l1_burst_metric(self, pkt_header, pkt_body, args):
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
         channel = pkt_body[0]
         # for each 23 bytes
-        item_struct = namedtuple('QcDiagGsmL1BurstMetric', 'sfn arfcn_band rssi rxpwr dcoff_i dcoff_q freq_offset time_offset snr_est gain_state')
         stdout = ''
+        measurement = [] if self.parent and self.parent.structured_fields else None
 
         for i in range(4):
-            cell_pkt = pkt_body[1+23*i:1+23*(i+1)]
-            item = item_struct._make(struct.unpack('<LHLhhhhhhb', cell_pkt))
-            c_band_arfcn_bits = bitstring.Bits(uint=item.arfcn_band, length=16)
-            c_arfcn = c_band_arfcn_bits[0:12].uint
-            c_band = c_band_arfcn_bits[12:16].uint
+            item = GSM_L1_BURST_METRIC.unpack_from(pkt_body, 1+23*i)
+            c_arfcn, c_band = GSM_ARFCN_BAND_BITS.unpack(item.arfcn_band)
             if item.rxpwr != 0:
                 c_rxpwr_real = item.rxpwr * 0.0625
                 stdout += 'GSM Serving Cell Burst Metric: ARFCN: {}/BC: {}, RSSI: {}, RxPwr: {:.2f}\n'.format(c_arfcn, c_band, item.rssi, c_rxpwr_real)
+                if measurement is not None:
+                    measurement.append({'type': 'gsm_measurement', 'technology': 'GSM', 'cell': 'serving',
+                        'arfcn': c_arfcn, 'band': c_band, 'rssi': item.rssi, 'rxpwr_dbm': c_rxpwr_real})
 
-        return {'stdout': stdout.rstrip(), 'ts': pkt_ts}
+        result = {'stdout': stdout.rstrip(), 'ts': pkt_ts}
+        if measurement:
+            result['measurement'] = measurement
+        return result
 
     def parse_gsm_dsds_l1_burst_metric(self, pkt_header, pkt_body, args):
         radio_id_pkt = self.parent.sanitize_radio_id(pkt_body[0])
@@ -168,23 +187,27 @@ class DiagGsmLogParser:
 
     def parse_gsm_l1_surround_cell_ba(self, pkt_header, pkt_body, args):
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        item_struct = namedtuple('QcDiagGsmL1SurroundCellBa', 'arfcn_band rxpwr bsic_valid bsic fn_offset time_offset')
         stdout = ''
         num_cells = pkt_body[0]
         stdout += 'GSM Surround Cell BA: {} cells\n'.format(num_cells)
+        measurement = [] if self.parent and self.parent.structured_fields else None
         for i in range(num_cells):
-            cell_pkt = pkt_body[1 + 12 * i:1 + 12 * (i + 1)]
-            item = item_struct._make(struct.unpack('<HhBBLH', cell_pkt))
-            s_band_arfcn_bits = bitstring.Bits(uint=item.arfcn_band, length=16)
-            s_arfcn = s_band_arfcn_bits[0:12].uint
-            s_band = s_band_arfcn_bits[12:16].uint
+            item = GSM_L1_SCELL_BA.unpack_from(pkt_body, 1 + 12 * i)
+            s_arfcn, s_band = GSM_ARFCN_BAND_BITS.unpack(item.arfcn_band)
             s_rxpwr_real = item.rxpwr * 0.0625
             if item.bsic_valid == 1:
                 stdout += 'GSM Surround Cell BA: Cell {}: ARFCN: {}/BC: {}/BSIC: {}, RxPwr: {:.2f}\n'.format(i, s_arfcn, s_band, item.bsic, s_rxpwr_real)
             else:
                 stdout += 'GSM Surround Cell BA: Cell {}: ARFCN: {}/BC: {}/BSIC: N/A, RxPwr: {:.2f}\n'.format(i, s_arfcn, s_band, item.bsic, s_rxpwr_real)
+            if measurement is not None:
+                measurement.append({'type': 'gsm_measurement', 'technology': 'GSM', 'cell': 'neighbor',
+                    'arfcn': s_arfcn, 'band': s_band, 'bsic': item.bsic if item.bsic_valid == 1 else None,
+                    'rxpwr_dbm': s_rxpwr_real})
 
-        return {'stdout': stdout.rstrip(), 'ts': pkt_ts}
+        result = {'stdout': stdout.rstrip(), 'ts': pkt_ts}
+        if measurement:
+            result['measurement'] = measurement
+        return result
 
     def parse_gsm_dsds_l1_surround_cell_ba(self, pkt_header, pkt_body, args):
         radio_id_pkt = self.parent.sanitize_radio_id(pkt_body[0])
@@ -192,10 +215,12 @@ class DiagGsmLogParser:
 
     def parse_gsm_l1_serv_aux_meas(self, pkt_header, pkt_body, args):
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        item_struct = namedtuple('QcDiagGsmL1ServAuxMeas', 'rxpwr snr_is_bad')
-        item = item_struct._make(struct.unpack('<hB', pkt_body[0:3]))
+        item = GSM_L1_SCELL_AUX_MEAS.unpack_from(pkt_body)
         rxpwr_real = item.rxpwr * 0.0625
-        return {'stdout': 'GSM Serving Cell Aux Measurement: RxPwr: {:.2f}'.format(rxpwr_real), 'ts': pkt_ts}
+        result = {'stdout': 'GSM Serving Cell Aux Measurement: RxPwr: {:.2f}'.format(rxpwr_real), 'ts': pkt_ts}
+        if self.parent and self.parent.structured_fields:
+            result['measurement'] = [{'type': 'gsm_measurement', 'technology': 'GSM', 'cell': 'serving', 'rxpwr_dbm': rxpwr_real}]
+        return result
 
     def parse_gsm_dsds_l1_serv_aux_meas(self, pkt_header, pkt_body, args):
         radio_id_pkt = self.parent.sanitize_radio_id(pkt_body[0])
@@ -204,19 +229,23 @@ class DiagGsmLogParser:
     def parse_gsm_l1_neig_aux_meas(self, pkt_header, pkt_body, args):
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
         stdout = ''
-        item_struct = namedtuple('QcDiagGsmL1NeigAuxMeas', 'arfcn_band rxpwr')
 
         num_cells = pkt_body[0]
         stdout += 'GSM Neighbor Cell Aux: {} cells\n'.format(num_cells)
+        measurement = [] if self.parent and self.parent.structured_fields else None
         for i in range(num_cells):
-            item = item_struct._make(struct.unpack('<Hh', pkt_body[1+4*i:1+4*(i+1)]))
-            n_band_arfcn_bits = bitstring.Bits(uint=item.arfcn_band, length=16)
-            n_arfcn = n_band_arfcn_bits[0:12].uint
-            n_band = n_band_arfcn_bits[12:16].uint
+            item = GSM_L1_NCELL_AUX_MEAS.unpack_from(pkt_body, 1+4*i)
+            n_arfcn, n_band = GSM_ARFCN_BAND_BITS.unpack(item.arfcn_band)
             n_rxpwr_real = item.rxpwr * 0.0625
             stdout += 'GSM Neighbor Cell Aux {}: ARFCN: {}/BC: {}, RxPwr: {:.2f}\n'.format(i, n_arfcn, n_band, n_rxpwr_real)
+            if measurement is not None:
+                measurement.append({'type': 'gsm_measurement', 'technology': 'GSM', 'cell': 'neighbor',
+                    'arfcn': n_arfcn, 'band': n_band, 'rxpwr_dbm': n_rxpwr_real})
 
-        return {'stdout': stdout.rstrip(), 'ts': pkt_ts}
+        result = {'stdout': stdout.rstrip(), 'ts': pkt_ts}
+        if measurement:
+            result['measurement'] = measurement
+        return result
 
     def parse_gsm_dsds_l1_neig_aux_meas(self, pkt_header, pkt_body, args):
         radio_id_pkt = self.parent.sanitize_radio_id(pkt_body[0])
@@ -228,12 +257,9 @@ class DiagGsmLogParser:
         if args is not None and 'radio_id' in args:
             radio_id = args['radio_id']
 
-        item_struct = namedtuple('QcDiagGsmRrCellInfo', 'arfcn_band bcc ncc cid lai priority ncc_permitted')
-        item = item_struct._make(struct.unpack('<HBBH5sBB', pkt_body[0:13]))
+        item = GSM_RR_CELL_INFO.unpack_from(pkt_body)
 
-        band_arfcn_bits = bitstring.Bits(uint=item.arfcn_band, length=16)
-        arfcn = band_arfcn_bits[0:12].uint
-        band = band_arfcn_bits[12:16].uint
+        arfcn, band = GSM_ARFCN_BAND_BITS.unpack(item.arfcn_band)
 
         if self.parent:
             self.parent.gsm_last_arfcn[radio_id] = arfcn
@@ -247,8 +273,15 @@ class DiagGsmLogParser:
         elif self.display_format == 'b':
             cid_str = 'MCC/MNC: {}/{}, LAC/CID: {}/{} ({:#x}/{:#x})'.format(*mcc_mnc_lac, item.cid, mcc_mnc_lac[2], item.cid)
 
-        return {'stdout': 'GSM RR Cell Info: ARFCN: {}/Band: {}, BCC: {}, NCC: {}, {}'.format(arfcn, band, item.bcc, item.ncc, cid_str),
+        result = {'stdout': 'GSM RR Cell Info: ARFCN: {}/Band: {}, BCC: {}, NCC: {}, {}'.format(arfcn, band, item.bcc, item.ncc, cid_str),
                 'ts': pkt_ts}
+        if self.parent and self.parent.structured_fields:
+            # MCC/MNC as integers like the LTE and NR cell info, None if not decodable
+            mcc, mnc = (int(x) if x.isdigit() else None for x in mcc_mnc_lac[:2])
+            result['cell_info'] = {'type': 'gsm_rr_cell', 'technology': 'GSM', 'arfcn': arfcn, 'band': band,
+                'bcc': item.bcc, 'ncc': item.ncc, 'mcc': mcc, 'mnc': mnc, 'mnc_digits': len(mcc_mnc_lac[1]) if mnc is not None else None,
+                'lac': mcc_mnc_lac[2], 'cell_id': item.cid}
+        return result
 
     def parse_gsm_dsds_cell_info(self, pkt_header, pkt_body, args):
         radio_id_pkt = self.parent.sanitize_radio_id(pkt_body[0])
@@ -258,8 +291,7 @@ class DiagGsmLogParser:
         radio_id = 0
         if args is not None and 'radio_id' in args:
             radio_id = args['radio_id']
-        item_struct = namedtuple('QcDiagGsmRrSignalingMessage', 'channel_type_dir message_type message_len')
-        item = item_struct._make(struct.unpack('<BBB', pkt_body[0:3]))
+        item = GSM_RR_SIGNALING.unpack_from(pkt_body)
         l3_message = pkt_body[3:]
 
         if item.message_len != len(l3_message):
@@ -283,7 +315,7 @@ class DiagGsmLogParser:
         channel_type = rr_channel_map[chan]
 
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        ts_sec = calendar.timegm(pkt_ts.timetuple())
+        ts_sec = pkt_ts.us // 1000000
         ts_usec = pkt_ts.microsecond
 
         # Attach L2 pseudo length
@@ -344,8 +376,7 @@ class DiagGsmLogParser:
         if args is not None and 'radio_id' in args:
             radio_id = args['radio_id']
 
-        item_struct = namedtuple('QcDiagGsmGprsMac', 'chan_type_dir message_type message_len')
-        item = item_struct._make(struct.unpack('<BBB', pkt_body[0:3]))
+        item = GPRS_MAC_SIGNALING.unpack_from(pkt_body)
         l3_message = pkt_body[3:]
 
         payload_type = util.gsmtap_type.UM
@@ -366,7 +397,7 @@ class DiagGsmLogParser:
         channel_type = chan
 
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        ts_sec = calendar.timegm(pkt_ts.timetuple())
+        ts_sec = pkt_ts.us // 1000000
         ts_usec = pkt_ts.microsecond
 
         gsmtap_hdr = util.create_gsmtap_header(
@@ -384,8 +415,7 @@ class DiagGsmLogParser:
         if args is not None and 'radio_id' in args:
             radio_id = args['radio_id']
 
-        item_struct = namedtuple('QcDiagGsmGprsOta', 'msg_dir message_type message_len')
-        item = item_struct._make(struct.unpack('<BBH', pkt_body[0:4]))
+        item = GPRS_SM_GMM_OTA.unpack_from(pkt_body)
         l3_message = pkt_body[4:]
 
         arfcn = self.parent.gsm_last_arfcn[radio_id]
@@ -394,7 +424,7 @@ class DiagGsmLogParser:
             arfcn = arfcn | (1 << 14)
 
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        ts_sec = calendar.timegm(pkt_ts.timetuple())
+        ts_sec = pkt_ts.us // 1000000
         ts_usec = pkt_ts.microsecond
 
         gsmtap_hdr = util.create_gsmtap_header(
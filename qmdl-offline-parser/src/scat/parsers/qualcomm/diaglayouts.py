@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# coding: utf8
+"""
+Record layouts of the Qualcomm DIAG log packets.
+
+A layout pairs a struct.Struct compiled once at import time with a record class
+created once, so decoding a fixed size record is a single unpack_from() call on
+the packet body (bytes or memoryview) without slicing or class creation.
+
+Log parsers register their layouts at module level, keyed by the full log code
+(e.g. 0xB0C0) and the packet version. Records nested in a log packet use a tuple
+as version, starting with the record name: (name, version).
+"""
+
+from collections import namedtuple
+import struct
+
+layouts = {}
+
+
+class RecordLayout:
+    """
+    Precompiled struct layout paired with its record class.
+    """
+    __slots__ = ('struct', 'size', 'record')
+
+    def __init__(self, name, fmt, fields):
+        self.struct = struct.Struct(fmt)
+        self.size = self.struct.size
+        self.record = namedtuple(name, fields)
+        if len(self.record._fields) != len(self.struct.unpack(bytes(self.size))):
+            raise ValueError('Layout {}: {} fields do not match format {}'.format(name, len(self.record._fields), fmt))
+
+    def unpack_from(self, buf, offset=0):
+        """
+        Decode the record at buf[offset:offset + size].
+        Raises struct.error if the buffer is too short.
+        """
+        return self.record._make(self.struct.unpack_from(buf, offset))
+
+
+def register(log_code, version, name, fmt, fields):
+    """Creates a record layout and registers it for a log code and packet version.
+
+    Parameters:
+    log_code (int): full log code of the log packet
+    version: packet version, or (name, version) for records nested in the packet
+    name (str): record class name
+    fmt (str): struct format of the record
+    fields (str): space separated field names
+    """
+    key = (log_code, version)
+    if key in layouts:
+        raise ValueError('Layout for log code 0x{:04x} version {} already registered'.format(log_code, version))
+    layout = RecordLayout(name, fmt, fields)
+    layouts[key] = layout
+    return layout
+
+
+def get(log_code, version):
+    """Returns the record layout of a log code and packet version, None if unknown."""
+    return layouts.get((log_code, version))
@@ -1,26 +1,101 @@
 #!/usr/bin/env python3
 
-from collections import namedtuple
-from packaging import version
 import binascii
-import bitstring
-import calendar
+import functools
 import logging
 import struct
 
-bitstring_ver = version.parse(bitstring.__version__)
-if bitstring_ver >= version.parse('4.2.0'):
-    bitstring.options.lsb0 = True
-elif bitstring_ver >= version.parse('4.0.0'):
-    bitstring.lsb0 = True
-elif bitstring_ver >= version.parse('3.1.7'):
-    bitstring.set_lsb0(True)
-else:
-    raise Exception("SCAT requires bitstring>=3.1.7, recommends bitstring>=4.0.0")
-
+import scat.bitfields as bitfields
 import scat.parsers.qualcomm.diagcmd as diagcmd
+import scat.parsers.qualcomm.diaglayouts as diaglayouts
 import scat.util as util
 
+# Record layouts by log code and packet version, see diaglayouts
+i = diagcmd.diag_log_get_lte_item_id
+c = diagcmd.diag_log_code_lte
+LTE_ML1_SCELL_MEAS_V4 = diaglayouts.register(i(c.LOG_LTE_ML1_SERVING_CELL_MEAS_AND_EVAL), 4, 'QcDiagLteMl1ScellMeas', '<BHHHLLLLLL',
+    'rrc_rel reserved1 earfcn pci_serv_layer_prio meas_rsrp avg_rsrp rsrq rssi rxlev s_search')
+LTE_ML1_SCELL_MEAS_V5 = diaglayouts.register(i(c.LOG_LTE_ML1_SERVING_CELL_MEAS_AND_EVAL), 5, 'QcDiagLteMl1ScellMeas', '<BHLH2xLLLLLL',
+    'rrc_rel reserved1 earfcn pci_serv_layer_prio meas_rsrp avg_rsrp rsrq rssi rxlev s_search')
+LTE_ML1_NCELL_MEAS_V4 = diaglayouts.register(i(c.LOG_LTE_ML1_NEIGHBOR_MEASUREMENTS), 4, 'QcDiagLteMl1NcellMeas', '<BHHH',
+    'rrc_rel reserved1 earfcn q_rxlevmin_n_cells')
+LTE_ML1_NCELL_MEAS_V5 = diaglayouts.register(i(c.LOG_LTE_ML1_NEIGHBOR_MEASUREMENTS), 5, 'QcDiagLteMl1NcellMeas', '<BHLL',
+    'rrc_rel reserved1 earfcn q_rxlevmin_n_cells')
+LTE_ML1_NCELL_MEAS_NCELL = diaglayouts.register(i(c.LOG_LTE_ML1_NEIGHBOR_MEASUREMENTS), ('ncell', 4), 'QcDiagLteMl1NcellMeasNcell', '<LLLLHHLL',
+    'val0 val1 val2 val3 n_freq_offset val5 ant0_offset ant1_offset')
+LTE_ML1_SCELL_MEAS_RESPONSE_SUBPKT = diaglayouts.register(i(c.LOG_LTE_ML1_SERVING_CELL_MEAS_RESPONSE), ('subpkt', 1), 'QcDiagLteMl1Subpkt', '<BBH',
+    'id version size')
+LTE_ML1_SCELL_MEAS_RESPONSE_V36 = diaglayouts.register(i(c.LOG_LTE_ML1_SERVING_CELL_MEAS_RESPONSE), ('scell_meas', 36), 'QcDiagLteMl1SubpktScellMeasV36', '<LHH',
+    'earfcn num_cells valid_rx')
+LTE_ML1_SCELL_MEAS_RESPONSE_V48 = diaglayouts.register(i(c.LOG_LTE_ML1_SERVING_CELL_MEAS_RESPONSE), ('scell_meas', 48), 'QcDiagLteMl1SubpktScellMeasV48', '<LHHL',
+    'earfcn num_cells valid_rx rx_map')
+LTE_ML1_CELL_INFO_V1 = diaglayouts.register(i(c.LOG_LTE_ML1_SERVING_CELL_INFO), 1, 'QcDiagLteMl1CellInfo', '<BHHHLLQLhH',
+    'dl_bandwidth sfn earfcn pci_pbch_phich pss sss ref_time mib_bytes freq_offset num_antennas')
+LTE_ML1_CELL_INFO_V2 = diaglayouts.register(i(c.LOG_LTE_ML1_SERVING_CELL_INFO), 2, 'QcDiagLteMl1CellInfo', '<BHLLLLQLhH',
+    'dl_bandwidth sfn earfcn pci_pbch_phich pss sss ref_time mib_bytes freq_offset num_antennas')
+LTE_MAC_SUBPKT = diaglayouts.register(i(c.LOG_LTE_MAC_DL_TRANSPORT_BLOCK), ('subpkt', 1), 'QcDiagLteMacSubpkt', '<BBH',
+    'id version size')
+LTE_MAC_RACH_ATTEMPT_V2 = diaglayouts.register(i(c.LOG_LTE_MAC_RACH_RESPONSE), ('rach_attempt', 2), 'QcDiagLteMacSubpktRachAttempt', '<BBBB',
+    'num_attempt rach_result contention msg_bitmask')
+LTE_MAC_RACH_MSG1 = diaglayouts.register(i(c.LOG_LTE_MAC_RACH_RESPONSE), ('rach_msg1', 2), 'QcDiagLteMacSubpktRachAttemptMsg1', '<BBh',
+    'preamble_index preamble_index_mask preamble_power_offset')
+LTE_MAC_RACH_MSG2 = diaglayouts.register(i(c.LOG_LTE_MAC_RACH_RESPONSE), ('rach_msg2', 2), 'QcDiagLteMacSubpktRachAttemptMsg2', '<HBHH',
+    'backoff result tc_rnti ta')
+LTE_MAC_RACH_MSG3 = diaglayouts.register(i(c.LOG_LTE_MAC_RACH_RESPONSE), ('rach_msg3', 2), 'QcDiagLteMacSubpktRachAttemptMsg3', '<LHB10s',
+    'grant_raw grant harq_id mac_pdu')
+LTE_MAC_RACH_ATTEMPT_V3 = diaglayouts.register(i(c.LOG_LTE_MAC_RACH_RESPONSE), ('rach_attempt', 3), 'QcDiagLteMacSubpktRachAttemptV3', '<BBBBBB',
+    'subid cellid num_attempt rach_result contention msg_bitmask')
+LTE_MAC_DL_TB_V2 = diaglayouts.register(i(c.LOG_LTE_MAC_DL_TRANSPORT_BLOCK), ('dl_tb', 2), 'QcDiagLteMacSubpktDlTransportBlock', '<HBBHHBHB',
+    'sfn_subfn rnti_type harq_id pmch_id dl_tbs rlc_pdus padding header_len')
+LTE_MAC_DL_TB_V4 = diaglayouts.register(i(c.LOG_LTE_MAC_DL_TRANSPORT_BLOCK), ('dl_tb', 4), 'QcDiagLteMacSubpktDlTransportBlockV4', '<BBHBBHHBHB',
+    'subid cellid sfn_subfn rnti_type harq_id pmch_id dl_tbs rlc_pdus padding header_len')
+LTE_MAC_UL_TB_V1 = diaglayouts.register(i(c.LOG_LTE_MAC_UL_TRANSPORT_BLOCK), ('ul_tb', 1), 'QcDiagLteMacSubpktUlTransportBlock', '<HBBHBHBBB',
+    'sfn_subfn rnti_type harq_id grant rlc_pdus padding bsr_event bsr_trig header_len')
+LTE_MAC_UL_TB_V2 = diaglayouts.register(i(c.LOG_LTE_MAC_UL_TRANSPORT_BLOCK), ('ul_tb', 2), 'QcDiagLteMacSubpktUlTransportBlockV4', '<BBBBHHBHBBB',
+    'subid cellid harq_id rnti_type sfn_subfn grant rlc_pdus padding bsr_event bsr_trig header_len')
+LTE_PDCP_SUBPKT = diaglayouts.register(i(c.LOG_LTE_PDCP_DL_CIPHER_DATA_PDU), ('subpkt', 1), 'QcDiagLtePdcpSubpkt', '<BBH',
+    'id version size')
+LTE_RRC_MIB_V1 = diaglayouts.register(i(c.LOG_LTE_RRC_MIB_MESSAGE), 1, 'QcDiagLteMib', '<HHH BB',
+    'pci earfcn sfn tx_antenna bandwidth')
+LTE_RRC_MIB_V2 = diaglayouts.register(i(c.LOG_LTE_RRC_MIB_MESSAGE), 2, 'QcDiagLteMib', '<HLH BB',
+    'pci earfcn sfn tx_antenna bandwidth')
+LTE_RRC_MIB_V17 = diaglayouts.register(i(c.LOG_LTE_RRC_MIB_MESSAGE), 17, 'QcDiagLteMibV17', '<HLH BBBBB BHB',
+    'pci earfcn sfn sfn_msb4 hsfn_lsb2 sib1_sch_info si_value_tag access_barring opmode_type opmode_info tx_antenna')
+LTE_RRC_SCELL_INFO_V2 = diaglayouts.register(i(c.LOG_LTE_RRC_SERVING_CELL_INFO), 2, 'QcDiagLteRrcServCellInfo', '<H HH BB LH L HBH B',
+    'pci dl_earfcn ul_earfcn dl_bw ul_bw cell_id tac band mcc mnc_digit mnc allowed_access')
+LTE_RRC_SCELL_INFO_V3 = diaglayouts.register(i(c.LOG_LTE_RRC_SERVING_CELL_INFO), 3, 'QcDiagLteRrcServCellInfo', '<H LL BB LH L HBH B',
+    'pci dl_earfcn ul_earfcn dl_bw ul_bw cell_id tac band mcc mnc_digit mnc allowed_access')
+LTE_RRC_OTA_V30 = diaglayouts.register(i(c.LOG_LTE_RRC_OTA_MESSAGE), 30, 'QcDiagLteRrcOtaPacketV30', '<BBBB BHLH BLHBBB',
+    'rrc_rel_maj rrc_rel_min nr_rrc_rel_maj nr_rrc_rel_min rbid pci earfcn sfn_subfn pdu_num sib_mask len unk1 unk2 segment_id')
+LTE_RRC_OTA_V25 = diaglayouts.register(i(c.LOG_LTE_RRC_OTA_MESSAGE), 25, 'QcDiagLteRrcOtaPacketV25', '<BBBB BHLH BLH',
+    'rrc_rel_maj rrc_rel_min nr_rrc_rel_maj nr_rrc_rel_min rbid pci earfcn sfn_subfn pdu_num sib_mask len')
+LTE_RRC_OTA_V8 = diaglayouts.register(i(c.LOG_LTE_RRC_OTA_MESSAGE), 8, 'QcDiagLteRrcOtaPacketV5', '<BB BHLH BLH',
+    'rrc_rel_maj rrc_rel_min rbid pci earfcn sfn_subfn pdu_num sib_mask len')
+LTE_RRC_OTA_V5 = diaglayouts.register(i(c.LOG_LTE_RRC_OTA_MESSAGE), 5, 'QcDiagLteRrcOtaPacketV5', '<BB BHHH BLH',
+    'rrc_rel_maj rrc_rel_min rbid pci earfcn sfn_subfn pdu_num sib_mask len')
+LTE_RRC_OTA_V2 = diaglayouts.register(i(c.LOG_LTE_RRC_OTA_MESSAGE), 2, 'QcDiagLteRrcOtaPacket', '<BB BHHH BH',
+    'rrc_rel_maj rrc_rel_min rbid pci earfcn sfn_subfn pdu_num len')
+LTE_NAS_MSG = diaglayouts.register(i(c.LOG_LTE_NAS_ESM_SEC_OTA_INCOMING_MESSAGE), 1, 'QcDiagLteNasMsg', '<BBB',
+    'vermaj vermid vermin')
+del i, c
+
+# Packed fields of the measurement words, LSB0 bit ranges
+LTE_SCELL_MEAS_PCI_PRIO_BITS = bitfields.BitFields((0, 9), (9, 16))
+LTE_SCELL_MEAS_RSRQ_BITS = bitfields.BitFields((0, 10), (20, 30))
+LTE_SCELL_MEAS_RXLEV_BITS = bitfields.BitFields((0, 6), (6, 13), (13, 19), (19, 26), (26, 32))
+LTE_SCELL_MEAS_S_SEARCH_BITS = bitfields.BitFields((0, 6), (6, 12))
+LTE_SCELL_MEAS_R9_BITS = bitfields.BitFields((0, 7), (7, 14), (14, 20), (20, 26))
+LTE_NCELL_MEAS_VAL0_BITS = bitfields.BitFields((0, 9), (9, 20), (20, 32))
+LTE_SCELL_MEAS_RESPONSE_PCI_BITS = bitfields.BitFields((0, 9), (9, 12), (12, 13))
+LTE_SCELL_MEAS_RESPONSE_SFN_BITS = bitfields.BitFields((0, 10), (10, 14))
+LTE_SCELL_MEAS_RESPONSE_RSRP_BITS = bitfields.BitFields((10, 22), (44, 56), (76, 88), (96, 108), (108, 120), (140, 152))
+LTE_SCELL_MEAS_RESPONSE_RSRQ_BITS = bitfields.BitFields((160, 170), (180, 190), (202, 212), (212, 222), (224, 234), (244, 254))
+LTE_SCELL_MEAS_RESPONSE_RSSI_BITS = bitfields.BitFields((256, 267), (267, 278), (288, 299), (299, 310), (320, 331))
+LTE_SCELL_MEAS_RESPONSE_SNR_BITS = bitfields.BitFields((0, 9), (9, 18), (32, 41), (42, 50))
+LTE_CELL_INFO_PCI_PBCH_PHICH_BITS = bitfields.BitFields((0, 9), (9, 10), (10, 13), (13, 16))
+LTE_SFN_SUBFN_BITS = bitfields.BitFields((0, 4), (4, 16))
+
+
 class DiagLteLogParser:
     def __init__(self, parent):
         self.parent = parent
@@ -42,57 +117,57 @@ class DiagLteLogParser:
         c = diagcmd.diag_log_code_lte
         self.process = {
             # ML1
-            # i(c.LOG_LTE_ML1_MAC_RAR_MSG1_REPORT): lambda x, y, z: self.parse_lte_dummy(x, y, z),
-            # i(c.LOG_LTE_ML1_MAC_RAR_MSG2_REPORT): lambda x, y, z: self.parse_lte_dummy(x, y, z),
-            # i(c.LOG_LTE_ML1_MAC_UE_IDENTIFICATION_MESSAGE_MSG3_REPORT): lambda x, y, z: self.parse_lte_dummy(x, y, z),
-            # i(c.LOG_LTE_ML1_MAC_CONTENTION_RESOLUTION_MESSAGE_MSG4_REPORT): lambda x, y, z: self.parse_lte_dummy(x, y, z),
-            # i(c.LOG_LTE_ML1_CONNECTED_MODE_INTRA_FREQ_MEAS): lambda x, y, z: self.parse_lte_ml1_connected_intra_freq_meas(x, y, z),
-            i(c.LOG_LTE_ML1_SERVING_CELL_MEAS_AND_EVAL): lambda x, y, z: self.parse_lte_ml1_scell_meas(x, y, z),
-            i(c.LOG_LTE_ML1_NEIGHBOR_MEASUREMENTS): lambda x, y, z: self.parse_lte_ml1_ncell_meas(x, y, z),
+            # i(c.LOG_LTE_ML1_MAC_RAR_MSG1_REPORT): self.parse_lte_dummy,
+            # i(c.LOG_LTE_ML1_MAC_RAR_MSG2_REPORT): self.parse_lte_dummy,
+            # i(c.LOG_LTE_ML1_MAC_UE_IDENTIFICATION_MESSAGE_MSG3_REPORT): self.parse_lte_dummy,
+            # i(c.LOG_LTE_ML1_MAC_CONTENTION_RESOLUTION_MESSAGE_MSG4_REPORT): self.parse_lte_dummy,
+            # i(c.LOG_LTE_ML1_CONNECTED_MODE_INTRA_FREQ_MEAS): self.parse_lte_ml1_connected_intra_freq_meas,
+            i(c.LOG_LTE_ML1_SERVING_CELL_MEAS_AND_EVAL): self.parse_lte_ml1_scell_meas,
+            i(c.LOG_LTE_ML1_NEIGHBOR_MEASUREMENTS): self.parse_lte_ml1_ncell_meas,
             # i(c.LOG_LTE_ML1_INTRA_FREQ_CELL_RESELECTION)
-            # i(c.LOG_LTE_ML1_NEIGHBOR_CELL_MEAS_REQ_RESPONSE): lambda x, y, z: self.parse_lte_ml1_ncell_meas_rr(x, y, z),
-            i(c.LOG_LTE_ML1_SERVING_CELL_MEAS_RESPONSE): lambda x, y, z: self.parse_lte_ml1_scell_meas_response(x, y, z),
-            # i(c.LOG_LTE_ML1_SEARCH_REQ_RESPONSE): lambda x, y, z: self.parse_lte_ml1_search_rr(x, y, z),
-            # i(c.LOG_LTE_ML1_CONNECTED_MODE_NEIGHBOR_MEAS_REQ_RESPONSE): lambda x, y, z: self.parse_lte_ml1_connected_ncell_meas_rr(x, y, z),
-            i(c.LOG_LTE_ML1_SERVING_CELL_INFO): lambda x, y, z: self.parse_lte_ml1_cell_info(x, y, z),
+            # i(c.LOG_LTE_ML1_NEIGHBOR_CELL_MEAS_REQ_RESPONSE): self.parse_lte_ml1_ncell_meas_rr,
+            i(c.LOG_LTE_ML1_SERVING_CELL_MEAS_RESPONSE): self.parse_lte_ml1_scell_meas_response,
+            # i(c.LOG_LTE_ML1_SEARCH_REQ_RESPONSE): self.parse_lte_ml1_search_rr,
+            # i(c.LOG_LTE_ML1_CONNECTED_MODE_NEIGHBOR_MEAS_REQ_RESPONSE): self.parse_lte_ml1_connected_ncell_meas_rr,
+            i(c.LOG_LTE_ML1_SERVING_CELL_INFO): self.parse_lte_ml1_cell_info,
 
             # MAC
-            i(c.LOG_LTE_MAC_RACH_TRIGGER): lambda x, y, z: self.parse_lte_mac_rach_trigger(x, y, z),
-            i(c.LOG_LTE_MAC_RACH_RESPONSE): lambda x, y, z: self.parse_lte_mac_rach_response(x, y, z),
-            i(c.LOG_LTE_MAC_DL_TRANSPORT_BLOCK): lambda x, y, z: self.parse_lte_mac_dl_block(x, y, z),
-            i(c.LOG_LTE_MAC_UL_TRANSPORT_BLOCK): lambda x, y, z: self.parse_lte_mac_ul_block(x, y, z),
+            i(c.LOG_LTE_MAC_RACH_TRIGGER): self.parse_lte_mac_rach_trigger,
+            i(c.LOG_LTE_MAC_RACH_RESPONSE): self.parse_lte_mac_rach_response,
+            i(c.LOG_LTE_MAC_DL_TRANSPORT_BLOCK): self.parse_lte_mac_dl_block,
+            i(c.LOG_LTE_MAC_UL_TRANSPORT_BLOCK): self.parse_lte_mac_ul_block,
 
             # RLC
 
             # PDCP
-            # i(c.LOG_LTE_PDCP_DL_CONFIG): lambda x, y, z: self.parse_lte_dummy(x, y, z),
-            # i(c.LOG_LTE_PDCP_UL_CONFIG): lambda x, y, z: self.parse_lte_dummy(x, y, z),
-            # i(c.LOG_LTE_PDCP_DL_DATA_PDU): lambda x, y, z: self.parse_lte_dummy(x, y, z),
-            # i(c.LOG_LTE_PDCP_UL_DATA_PDU): lambda x, y, z: self.parse_lte_dummy(x, y, z),
-            # i(c.LOG_LTE_PDCP_DL_CONTROL_PDU): lambda x, y, z: self.parse_lte_dummy(x, y, z),
-            # i(c.LOG_LTE_PDCP_UL_CONTROL_PDU): lambda x, y, z: self.parse_lte_dummy(x, y, z),
-            i(c.LOG_LTE_PDCP_DL_CIPHER_DATA_PDU): lambda x, y, z: self.parse_lte_pdcp_dl_cip(x, y, z),
-            i(c.LOG_LTE_PDCP_UL_CIPHER_DATA_PDU): lambda x, y, z: self.parse_lte_pdcp_ul_cip(x, y, z),
-            i(c.LOG_LTE_PDCP_DL_SRB_INTEGRITY_DATA_PDU): lambda x, y, z: self.parse_lte_pdcp_dl_srb_int(x, y, z),
-            i(c.LOG_LTE_PDCP_UL_SRB_INTEGRITY_DATA_PDU): lambda x, y, z: self.parse_lte_pdcp_ul_srb_int(x, y, z),
+            # i(c.LOG_LTE_PDCP_DL_CONFIG): self.parse_lte_dummy,
+            # i(c.LOG_LTE_PDCP_UL_CONFIG): self.parse_lte_dummy,
+            # i(c.LOG_LTE_PDCP_DL_DATA_PDU): self.parse_lte_dummy,
+            # i(c.LOG_LTE_PDCP_UL_DATA_PDU): self.parse_lte_dummy,
+            # i(c.LOG_LTE_PDCP_DL_CONTROL_PDU): self.parse_lte_dummy,
+            # i(c.LOG_LTE_PDCP_UL_CONTROL_PDU): self.parse_lte_dummy,
+            i(c.LOG_LTE_PDCP_DL_CIPHER_DATA_PDU): self.parse_lte_pdcp_dl_cip,
+            i(c.LOG_LTE_PDCP_UL_CIPHER_DATA_PDU): self.parse_lte_pdcp_ul_cip,
+            i(c.LOG_LTE_PDCP_DL_SRB_INTEGRITY_DATA_PDU): self.parse_lte_pdcp_dl_srb_int,
+            i(c.LOG_LTE_PDCP_UL_SRB_INTEGRITY_DATA_PDU): self.parse_lte_pdcp_ul_srb_int,
 
             # RRC
-            i(c.LOG_LTE_RRC_OTA_MESSAGE): lambda x, y, z: self.parse_lte_rrc(x, y, z),
-            i(c.LOG_LTE_RRC_MIB_MESSAGE): lambda x, y, z: self.parse_lte_mib(x, y, z),
-            i(c.LOG_LTE_RRC_SERVING_CELL_INFO): lambda x, y, z: self.parse_lte_rrc_cell_info(x, y, z),
+            i(c.LOG_LTE_RRC_OTA_MESSAGE): self.parse_lte_rrc,
+            i(c.LOG_LTE_RRC_MIB_MESSAGE): self.parse_lte_mib,
+            i(c.LOG_LTE_RRC_SERVING_CELL_INFO): self.parse_lte_rrc_cell_info,
 
             # CA COMBOS
-            i(c.LOG_LTE_RRC_SUPPORTED_CA_COMBOS): lambda x, y, z: self.parse_lte_cacombos(x, y, z),
+            i(c.LOG_LTE_RRC_SUPPORTED_CA_COMBOS): self.parse_lte_cacombos,
 
             # NAS
-            i(c.LOG_LTE_NAS_ESM_SEC_OTA_INCOMING_MESSAGE): lambda x, y, z: self.parse_lte_nas(x, y, z, False),
-            i(c.LOG_LTE_NAS_ESM_SEC_OTA_OUTGOING_MESSAGE): lambda x, y, z: self.parse_lte_nas(x, y, z, False),
-            i(c.LOG_LTE_NAS_EMM_SEC_OTA_INCOMING_MESSAGE): lambda x, y, z: self.parse_lte_nas(x, y, z, False),
-            i(c.LOG_LTE_NAS_EMM_SEC_OTA_OUTGOING_MESSAGE): lambda x, y, z: self.parse_lte_nas(x, y, z, False),
-            i(c.LOG_LTE_NAS_ESM_PLAIN_OTA_INCOMING_MESSAGE): lambda x, y, z: self.parse_lte_nas(x, y, z, True),
-            i(c.LOG_LTE_NAS_ESM_PLAIN_OTA_OUTGOING_MESSAGE): lambda x, y, z: self.parse_lte_nas(x, y, z, True),
-            i(c.LOG_LTE_NAS_EMM_PLAIN_OTA_INCOMING_MESSAGE): lambda x, y, z: self.parse_lte_nas(x, y, z, True),
-            i(c.LOG_LTE_NAS_EMM_PLAIN_OTA_OUTGOING_MESSAGE): lambda x, y, z: self.parse_lte_nas(x, y, z, True),
+            i(c.LOG_LTE_NAS_ESM_SEC_OTA_INCOMING_MESSAGE): functools.partial(self.parse_lte_nas, plain=False),
+            i(c.LOG_LTE_NAS_ESM_SEC_OTA_OUTGOING_MESSAGE): functools.partial(self.parse_lte_nas, plain=False),
+            i(c.LOG_LTE_NAS_EMM_SEC_OTA_INCOMING_MESSAGE): functools.partial(self.parse_lte_nas, plain=False),
+            i(c.LOG_LTE_NAS_EMM_SEC_OTA_OUTGOING_MESSAGE): functools.partial(self.parse_lte_nas, plain=False),
+            i(c.LOG_LTE_NAS_ESM_PLAIN_OTA_INCOMING_MESSAGE): functools.partial(self.parse_lte_nas, plain=True),
+            i(c.LOG_LTE_NAS_ESM_PLAIN_OTA_OUTGOING_MESSAGE): functools.partial(self.parse_lte_nas, plain=True),
+            i(c.LOG_LTE_NAS_EMM_PLAIN_OTA_INCOMING_MESSAGE): functools.partial(self.parse_lte_nas, plain=True),
+            i(c.LOG_LTE_NAS_EMM_PLAIN_OTA_OUTGOING_MESSAGE): functools.partial(self.parse_lte_nas, plain=True),
         }
 
     def update_parameters(self, display_format, gsmtapv3):
@@ -117,56 +192,39 @@ class DiagLteLogParser:
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
         pkt_version = pkt_body[0]
 
-        item_struct = namedtuple('QcDiagLteMl1ScellMeas', 'rrc_rel reserved1 earfcn pci_serv_layer_prio meas_rsrp avg_rsrp rsrq rssi rxlev s_search')
         if pkt_version == 4: # Version 4
             # Version, RRC standard release, EARFCN, PCI - Serving Layer Priority
             # Measured, Average RSRP, Measured, Average RSRQ, Measured RSSI
             # Q_rxlevmin, P_max, Max UE TX Power, S_rxlev, Num DRX S Fail
             # S Intra Searcn, S Non Intra Search, Meas Rules Updated, Meas Rules
             # R9 Info (last 4b) - Q Qual Min, S Qual, S Intra Search Q, S Non Intra Search Q
-            item = item_struct._make(struct.unpack('<BHHHLLLLLL', pkt_body[1:32]))
+            item = LTE_ML1_SCELL_MEAS_V4.unpack_from(pkt_body, 1)
         elif pkt_version == 5: # Version 5
             # EARFCN -> 4 bytes
             # PCI, Serv Layer Priority -> 4 bytes
-            item = item_struct._make(struct.unpack('<BHLH2xLLLLLL', pkt_body[1:36]))
+            item = LTE_ML1_SCELL_MEAS_V5.unpack_from(pkt_body, 1)
         else:
             if self.parent:
                 self.parent.logger.log(logging.WARNING, 'Unknown LTE ML1 Serving Cell Meas packet version 0x{:02x}'.format(pkt_version))
                 self.parent.logger.log(logging.DEBUG, util.xxd(pkt_body))
             return None
 
-        pci_serv_layer_prio_bits = bitstring.Bits(uint=item.pci_serv_layer_prio, length=16)
-        pci = pci_serv_layer_prio_bits[0:9].uint
-        serv_layer_priority = pci_serv_layer_prio_bits[9:16].uint
+        pci, serv_layer_priority = LTE_SCELL_MEAS_PCI_PRIO_BITS.unpack(item.pci_serv_layer_prio)
         meas_rsrp = item.meas_rsrp & 0xfff
         avg_rsrp = item.avg_rsrp & 0xfff
 
-        rsrq_bits = bitstring.Bits(uint=item.rsrq, length=32)
-        meas_rsrq = rsrq_bits[0:10].uint
-        avg_rsrq = rsrq_bits[20:30].uint
+        meas_rsrq, avg_rsrq = LTE_SCELL_MEAS_RSRQ_BITS.unpack(item.rsrq)
 
-        rssi_bits = bitstring.Bits(uint=item.rssi, length=32)
-        meas_rssi = rssi_bits[10:21].uint
+        meas_rssi = bitfields.field(item.rssi, 10, 21)
 
-        rxlev_bits = bitstring.Bits(uint=item.rxlev, length=32)
-        q_rxlevmin = rxlev_bits[0:6].uint
-        p_max = rxlev_bits[6:13].uint
-        max_ue_tx_pwr = rxlev_bits[13:19].uint
-        s_rxlev = rxlev_bits[19:26].uint
-        num_drx_s_fail = rxlev_bits[26:32].uint
+        q_rxlevmin, p_max, max_ue_tx_pwr, s_rxlev, num_drx_s_fail = LTE_SCELL_MEAS_RXLEV_BITS.unpack(item.rxlev)
 
-        s_search_bits = bitstring.Bits(uint=item.s_search, length=32)
-        s_intra_search = s_search_bits[0:6].uint
-        s_non_intra_search = s_search_bits[6:12].uint
+        s_intra_search, s_non_intra_search = LTE_SCELL_MEAS_S_SEARCH_BITS.unpack(item.s_search)
 
         if pkt_version == 4:
             if item.rrc_rel == 0x01: # RRC Rel. 9
                 r9_data_interim = struct.unpack('<L', pkt_body[32:36])[0]
-                r9_data_bits = bitstring.Bits(uint=r9_data_interim, length=32)
-                q_qual_min = r9_data_bits[0:7].uint
-                s_qual = r9_data_bits[7:14].uint
-                s_intra_search_q = r9_data_bits[14:20].uint
-                s_nonintra_search_q = r9_data_bits[20:26].uint
+                q_qual_min, s_qual, s_intra_search_q, s_nonintra_search_q = LTE_SCELL_MEAS_R9_BITS.unpack(r9_data_interim)
             else:
                 if self.parent:
                     self.parent.logger.log(logging.WARNING, 'Unknown LTE ML1 Serving Cell Meas packet - RRC version {}'.format(item.rrc_rel))
@@ -174,11 +232,7 @@ class DiagLteLogParser:
         elif pkt_version == 5:
             if item.rrc_rel == 0x01: # RRC Rel. 9
                 r9_data_interim = struct.unpack('<L', pkt_body[36:40])[0]
-                r9_data_bits = bitstring.Bits(uint=r9_data_interim, length=32)
-                q_qual_min = r9_data_bits[0:7].uint
-                s_qual = r9_data_bits[7:14].uint
-                s_intra_search_q = r9_data_bits[14:20].uint
-                s_nonintra_search_q = r9_data_bits[20:26].uint
+                q_qual_min, s_qual, s_intra_search_q, s_nonintra_search_q = LTE_SCELL_MEAS_R9_BITS.unpack(r9_data_interim)
             else:
                 if self.parent:
                     self.parent.logger.log(logging.WARNING, 'Unknown LTE ML1 Serving Cell Meas packet - RRC version {}'.format(item.rrc_rel))
@@ -188,16 +242,18 @@ class DiagLteLogParser:
         real_rssi = self.parse_rssi(meas_rssi)
         real_rsrq = self.parse_rsrq(meas_rsrq)
 
-        return {'stdout': 'LTE SCell: EARFCN: {}, PCI: {:3d}, Measured RSRP: {:.2f}, Measured RSSI: {:.2f}, Measured RSRQ: {:.2f}'.format(item.earfcn, pci, real_rsrp, real_rssi, real_rsrq),
+        result = {'stdout': 'LTE SCell: EARFCN: {}, PCI: {:3d}, Measured RSRP: {:.2f}, Measured RSSI: {:.2f}, Measured RSRQ: {:.2f}'.format(item.earfcn, pci, real_rsrp, real_rssi, real_rsrq),
                 'ts': pkt_ts}
+        if self.parent and self.parent.structured_fields:
+            result['measurement'] = [{'type': 'lte_measurement', 'technology': 'LTE', 'cell': 'serving',
+                'earfcn': item.earfcn, 'pci': pci, 'rsrp_dbm': real_rsrp, 'rssi_dbm': real_rssi, 'rsrq_db': real_rsrq}]
+        return result
 
     def parse_lte_ml1_ncell_meas(self, pkt_header, pkt_body, args):
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
         pkt_version = pkt_body[0]
         stdout = ''
 
-        item_struct = namedtuple('QcDiagLteMl1NcellMeas', 'rrc_rel reserved1 earfcn q_rxlevmin_n_cells')
-        n_cell_struct = namedtuple('QcDiagLteMl1NcellMeasNcell', 'val0 val1 val2 val3 n_freq_offset val5 ant0_offset ant1_offset')
 
         pos = 0
         if pkt_version == 4: # Version 4
@@ -206,11 +262,11 @@ class DiagLteLogParser:
             #    Measured RSRQ, Average RSRQ, S_rxlev, Freq Offset
             #    Ant0 Frame Offset, Ant0 Sample Offset, Ant1 Frame Offset, Ant1 Sample Offset
             #    S_qual
-            item = item_struct._make(struct.unpack('<BHHH', pkt_body[1:8]))
+            item = LTE_ML1_NCELL_MEAS_V4.unpack_from(pkt_body, 1)
             pos = 8
         elif pkt_version == 5: # Version 5
             # EARFCN -> 4 bytes
-            item = item_struct._make(struct.unpack('<BHLL', pkt_body[1:12]))
+            item = LTE_ML1_NCELL_MEAS_V5.unpack_from(pkt_body, 1)
             pos = 12
         else:
             if self.parent:
@@ -221,15 +277,13 @@ class DiagLteLogParser:
         q_rxlevmin = item.q_rxlevmin_n_cells & 0x3f
         n_cells = item.q_rxlevmin_n_cells >> 6
         stdout += 'LTE NCell: EARFCN: {}, number of cells: {}\n'.format(item.earfcn, n_cells)
+        measurement = [] if self.parent and self.parent.structured_fields else None
 
         for i in range(n_cells):
             n_cell_pkt = pkt_body[pos + 32 * i:pos + 32 * (i + 1)]
-            n_cell = n_cell_struct._make(struct.unpack('<LLLLHHLL', n_cell_pkt[0:28]))
+            n_cell = LTE_ML1_NCELL_MEAS_NCELL.unpack_from(n_cell_pkt)
 
-            val0_bits = bitstring.Bits(uint=n_cell.val0, length=32)
-            n_pci = val0_bits[0:9].uint
-            n_meas_rssi = val0_bits[9:20].uint
-            n_meas_rsrp = val0_bits[20:32].uint
+            n_pci, n_meas_rssi, n_meas_rsrp = LTE_NCELL_MEAS_VAL0_BITS.unpack(n_cell.val0)
             n_avg_rsrp = (n_cell.val1 >> 12) & 0xfff
             n_meas_rsrq = (n_cell.val2 >> 12) & 0x3ff
             n_avg_rsrq = n_cell.val3 & 0x3ff
@@ -252,50 +306,34 @@ class DiagLteLogParser:
             n_real_rsrq = self.parse_rsrq(n_meas_rsrq)
 
             stdout += '└── Neighbor cell {}: PCI: {:3d}, RSRP: {:.2f}, RSSI: {:.2f}, RSRQ: {:.2f}\n'.format(i, n_pci, n_real_rsrp, n_real_rssi, n_real_rsrq)
-        return {'stdout': stdout.rstrip(), 'ts': pkt_ts}
+            if measurement is not None:
+                measurement.append({'type': 'lte_measurement', 'technology': 'LTE', 'cell': 'neighbor',
+                    'earfcn': item.earfcn, 'pci': n_pci, 'rsrp_dbm': n_real_rsrp, 'rssi_dbm': n_real_rssi, 'rsrq_db': n_real_rsrq})
 
-    def parse_lte_ml1_scell_meas_response_cell_v36(self, cell_id, cell_bytes, rsrp_offset=16, snr_offset=80, sir_cinr_offset=104):
-        interim = struct.unpack('<HHH', cell_bytes[0:6])
-        val0_bits = bitstring.Bits(uint=interim[0], length=16)
-        pci = val0_bits[0:9].uint
-        scell_idx = val0_bits[9:12].uint
-        is_scell = val0_bits[12:13].uint
+        result = {'stdout': stdout.rstrip(), 'ts': pkt_ts}
+        if measurement:
+            result['measurement'] = measurement
+        return result
 
-        val2_bits = bitstring.Bits(uint=interim[2], length=16)
-        sfn = val2_bits[0:10].uint
-        subfn = val2_bits[10:14].uint
+    def parse_lte_ml1_scell_meas_response_cell_v36(self, cell_id, cell_bytes, rsrp_offset=16, snr_offset=80, sir_cinr_offset=104, earfcn=None, measurement=None):
+        interim = struct.unpack('<HHH', cell_bytes[0:6])
+        pci, scell_idx, is_scell = LTE_SCELL_MEAS_RESPONSE_PCI_BITS.unpack(interim[0])
+        sfn, subfn = LTE_SCELL_MEAS_RESPONSE_SFN_BITS.unpack(interim[2])
 
         interim = struct.unpack('<LLLLLLLLLLLL', cell_bytes[rsrp_offset:rsrp_offset+48])
-        val_bits = bitstring.Bits().join([bitstring.Bits(uint=x, length=32) for x in interim][::-1])
-
-        rsrp0 = self.parse_rsrp(val_bits[10:22].uint)
-        rsrp1 = self.parse_rsrp(val_bits[44:56].uint)
-        rsrp2 = self.parse_rsrp(val_bits[76:88].uint)
-        rsrp3 = self.parse_rsrp(val_bits[96:108].uint)
-        rsrp = self.parse_rsrp(val_bits[108:120].uint) + 40
-        frsrp = self.parse_rsrp(val_bits[140:152].uint)
-
-        rsrq0 = self.parse_rsrq(val_bits[160:170].uint)
-        rsrq1 = self.parse_rsrq(val_bits[180:190].uint)
-        rsrq2 = self.parse_rsrq(val_bits[202:212].uint)
-        rsrq3 = self.parse_rsrq(val_bits[212:222].uint)
-        rsrq = self.parse_rsrq(val_bits[224:234].uint)
-        frsrq = self.parse_rsrq(val_bits[244:254].uint)
-
-        rssi0 = self.parse_rssi(val_bits[256:267].uint)
-        rssi1 = self.parse_rssi(val_bits[267:278].uint)
-        rssi2 = self.parse_rssi(val_bits[288:299].uint)
-        rssi3 = self.parse_rssi(val_bits[299:310].uint)
-        rssi = self.parse_rssi(val_bits[320:331].uint)
+        val = bitfields.join_words(interim)
+
+        rsrp0, rsrp1, rsrp2, rsrp3, rsrp, frsrp = [self.parse_rsrp(x) for x in LTE_SCELL_MEAS_RESPONSE_RSRP_BITS.unpack(val)]
+        rsrp += 40
+
+        rsrq0, rsrq1, rsrq2, rsrq3, rsrq, frsrq = [self.parse_rsrq(x) for x in LTE_SCELL_MEAS_RESPONSE_RSRQ_BITS.unpack(val)]
+
+        rssi0, rssi1, rssi2, rssi3, rssi = [self.parse_rssi(x) for x in LTE_SCELL_MEAS_RESPONSE_RSSI_BITS.unpack(val)]
 
         # resid_freq_error = struct.unpack('<H', cell_bytes[70:72])[0]
 
         interim = struct.unpack('<LL', cell_bytes[snr_offset:snr_offset+8])
-        val_bits = bitstring.Bits().join([bitstring.Bits(uint=x, length=32) for x in interim][::-1])
-        snr0 = val_bits[0:9].uint * 0.1 - 20.0
-        snr1 = val_bits[9:18].uint * 0.1 - 20.0
-        snr2 = val_bits[32:41].uint * 0.1 - 20.0
-        snr3 = val_bits[42:50].uint * 0.1 - 20.0
+        snr0, snr1, snr2, snr3 = [x * 0.1 - 20.0 for x in LTE_SCELL_MEAS_RESPONSE_SNR_BITS.unpack(bitfields.join_words(interim))]
 
         interim = struct.unpack('<LLllll', cell_bytes[sir_cinr_offset:sir_cinr_offset+24])
         prj_sir = interim[0]
@@ -310,11 +348,17 @@ class DiagLteLogParser:
         cinr2 = interim[4]
         cinr3 = interim[5]
 
+        if measurement is not None:
+            # Only the printed fields, the levels above are not verified against QXDM
+            measurement.append({'type': 'lte_measurement', 'technology': 'LTE', 'cell': 'serving' if is_scell else 'scell',
+                'earfcn': earfcn, 'pci': pci, 'sfn': sfn, 'subfn': subfn, 'scell_index': scell_idx})
+
         return 'LTE ML1 SCell Meas Response (Cell {}): PCI: {}, SFN/SubFN: {}/{}, Serving cell index: {}, is_serving_cell: {}\n'.format(cell_id, pci, sfn, subfn, scell_idx, is_scell)
 
-    def parse_lte_ml1_scell_meas_response_cell_v48(self, cell_id, cell_bytes):
+    def parse_lte_ml1_scell_meas_response_cell_v48(self, cell_id, cell_bytes, earfcn=None, measurement=None):
         # resid_freq_error = struct.unpack('<H', cell_bytes[84:86])[0]
-        return self.parse_lte_ml1_scell_meas_response_cell_v36(cell_id, cell_bytes, snr_offset=92, sir_cinr_offset=116)
+        return self.parse_lte_ml1_scell_meas_response_cell_v36(cell_id, cell_bytes, snr_offset=92, sir_cinr_offset=116,
+            earfcn=earfcn, measurement=measurement)
 
     def parse_lte_ml1_scell_meas_response_cell_v60(self, cell_id, cell_bytes):
         pass
@@ -323,10 +367,10 @@ class DiagLteLogParser:
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
         pkt_version = pkt_body[0]
         stdout = ''
+        measurement = [] if self.parent and self.parent.structured_fields else None
 
         # First 4b: Version, Number of subpackets, reserved
         # 01 | 01 | 35 0c
-        subpkt_struct = namedtuple('QcDiagLteMl1Subpkt', 'id version size')
         if pkt_version == 1: # Version 1
             num_subpkts = pkt_body[1]
             pos = 4
@@ -334,7 +378,7 @@ class DiagLteLogParser:
             for x in range(num_subpkts):
                 # 4b: Subpacket ID, Subpacket version, Subpacket size
                 # 19 | 30 | 40 02
-                subpkt_header = subpkt_struct._make(struct.unpack('<BBH', pkt_body[pos:pos+4]))
+                subpkt_header = LTE_ML1_SCELL_MEAS_RESPONSE_SUBPKT.unpack_from(pkt_body, pos)
                 subpkt_body = pkt_body[pos+4:pos+4+subpkt_header.size]
                 pos += subpkt_header.size
 
@@ -342,25 +386,25 @@ class DiagLteLogParser:
                     # Serving Cell Measurement Result
                     # EARFCN, num of cell, valid RX data
                     if subpkt_header.version == 36:
-                        subpkt_scell_meas_v36_struct = namedtuple('QcDiagLteMl1SubpktScellMeasV36', 'earfcn num_cells valid_rx')
-                        subpkt_scell_meas_v36 = subpkt_scell_meas_v36_struct._make(struct.unpack('<LHH', subpkt_body[0:8]))
+                        subpkt_scell_meas_v36 = LTE_ML1_SCELL_MEAS_RESPONSE_V36.unpack_from(subpkt_body)
                         stdout += 'LTE ML1 SCell Meas Response: EARFCN: {}, Number of cells: {}, Valid RX: {}\n'.format(subpkt_scell_meas_v36.earfcn,
                             subpkt_scell_meas_v36.num_cells, subpkt_scell_meas_v36.valid_rx)
 
                         pos_meas = 8
                         for y in range(subpkt_scell_meas_v36.num_cells):
-                            stdout += self.parse_lte_ml1_scell_meas_response_cell_v36(y, subpkt_body[pos_meas:pos_meas+128])
+                            stdout += self.parse_lte_ml1_scell_meas_response_cell_v36(y, subpkt_body[pos_meas:pos_meas+128],
+                                earfcn=subpkt_scell_meas_v36.earfcn, measurement=measurement)
                             pos_meas += 128
                     elif subpkt_header.version == 48 or subpkt_header.version == 50:
                         # EARFCN, num of cell, valid RX data
-                        subpkt_scell_meas_v48_struct = namedtuple('QcDiagLteMl1SubpktScellMeasV48', 'earfcn num_cells valid_rx rx_map')
-                        subpkt_scell_meas_v48 = subpkt_scell_meas_v48_struct._make(struct.unpack('<LHHL', subpkt_body[0:12]))
+                        subpkt_scell_meas_v48 = LTE_ML1_SCELL_MEAS_RESPONSE_V48.unpack_from(subpkt_body)
                         stdout += 'LTE ML1 SCell Meas Response: EARFCN: {}, Number of cells: {}, Valid RX: {}\n'.format(subpkt_scell_meas_v48.earfcn,
                             subpkt_scell_meas_v48.num_cells, subpkt_scell_meas_v48.valid_rx)
 
                         pos_meas = 12
                         for y in range(subpkt_scell_meas_v48.num_cells):
-                            stdout += self.parse_lte_ml1_scell_meas_response_cell_v48(y, subpkt_body[pos_meas:pos_meas+140])
+                            stdout += self.parse_lte_ml1_scell_meas_response_cell_v48(y, subpkt_body[pos_meas:pos_meas+140],
+                                earfcn=subpkt_scell_meas_v48.earfcn, measurement=measurement)
                             pos_meas += 140
                     # elif subpkt_header.version == 60:
                     #     subpkt_scell_meas_v60_struct = namedtuple('QcDiagLteMl1SubpktScellMeasV60', 'earfcn num_cells')
@@ -381,7 +425,10 @@ class DiagLteLogParser:
                         self.parent.logger.log(logging.WARNING, 'Unknown LTE ML1 Serving Cell Meas subpacket ID 0x{:02x}'.format(subpkt_header.id))
                         self.parent.logger.log(logging.DEBUG, util.xxd(pkt_body))
 
-            return {'stdout': stdout.rstrip(), 'ts': pkt_ts}
+            result = {'stdout': stdout.rstrip(), 'ts': pkt_ts}
+            if measurement:
+                result['measurement'] = measurement
+            return result
         else:
             if self.parent:
                 self.parent.logger.log(logging.WARNING, 'Unknown LTE ML1 Serving Cell Meas Response packet version 0x{:02x}'.format(pkt_version))
@@ -395,28 +442,23 @@ class DiagLteLogParser:
         if args is not None and 'radio_id' in args:
             radio_id = args['radio_id']
 
-        item_struct = namedtuple('QcDiagLteMl1CellInfo', 'dl_bandwidth sfn earfcn pci_pbch_phich pss sss ref_time mib_bytes freq_offset num_antennas')
         item = None
         mib_payload = b''
         stdout = ''
 
         if pkt_version == 1: # Version 1
             # Version, DL BW, SFN, EARFCN, (Cell ID, PBCH, PHICH Duration, PHICH Resource), PSS, SSS, Ref Time, MIB Payload, Freq Offset, Num Antennas
-            item = item_struct._make(struct.unpack('<BHHHLLQLhH', pkt_body[1:32]))
+            item = LTE_ML1_CELL_INFO_V1.unpack_from(pkt_body, 1)
         elif pkt_version == 2: # Version 2
             # Version, DL BW, SFN, EARFCN, (Cell ID 9, PBCH 1, PHICH Duration 3, PHICH Resource 3), PSS, SSS, Ref Time, MIB Payload, Freq Offset, Num Antennas
-            item = item_struct._make(struct.unpack('<BHLLLLQLhH', pkt_body[1:36]))
+            item = LTE_ML1_CELL_INFO_V2.unpack_from(pkt_body, 1)
         else:
             if self.parent:
                 self.parent.logger.log(logging.WARNING, 'Unknown LTE ML1 cell info packet version 0x{:02x}'.format(pkt_version))
                 self.parent.logger.log(logging.DEBUG, util.xxd(pkt_body))
             return None
 
-        pci_pbch_phich_bits = bitstring.Bits(uint=item.pci_pbch_phich % 65536, length=16)
-        pci = pci_pbch_phich_bits[0:9].uint
-        pbch = pci_pbch_phich_bits[9:10].uint
-        phich_duration = pci_pbch_phich_bits[10:13].uint
-        phich_resource = pci_pbch_phich_bits[13:16].uint
+        pci, pbch, phich_duration, phich_resource = LTE_CELL_INFO_PCI_PBCH_PHICH_BITS.unpack(item.pci_pbch_phich)
 
         if self.parent:
             self.parent.lte_last_bw_dl[radio_id] = item.dl_bandwidth
@@ -430,7 +472,7 @@ class DiagLteLogParser:
             stdout = 'LTE ML1 Cell Info: EARFCN: {}, PCI: {}, Bandwidth: {} PRBs, Num antennas: {}'.format(item.earfcn, pci, item.dl_bandwidth, item.num_antennas)
 
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        ts_sec = calendar.timegm(pkt_ts.timetuple())
+        ts_sec = pkt_ts.us // 1000000
         ts_usec = pkt_ts.microsecond
 
         if self.gsmtapv3:
@@ -454,12 +496,19 @@ class DiagLteLogParser:
                 device_sec = ts_sec,
                 device_usec = ts_usec)
 
-        return {'layer': 'rrc', 'cp': [gsmtap_hdr + mib_payload], 'ts': pkt_ts, 'stdout': stdout}
+        result = {'layer': 'rrc', 'cp': [gsmtap_hdr + mib_payload], 'ts': pkt_ts, 'stdout': stdout}
+        if self.parent and self.parent.structured_fields:
+            cell_info = {'type': 'lte_ml1_cell', 'technology': 'LTE', 'earfcn_dl': item.earfcn, 'pci': pci,
+                'sfn': item.sfn, 'bandwidth_dl_prb': item.dl_bandwidth, 'num_antennas': item.num_antennas}
+            if item.dl_bandwidth in prb_to_mhz:
+                cell_info['bandwidth_dl_mhz'] = float(prb_to_mhz[item.dl_bandwidth])
+            result['cell_info'] = cell_info
+        return result
 
     # MAC
 
     def create_lte_mac_gsmtap_packet(self, pkt_ts, is_downlink, header, body):
-        ts_sec = calendar.timegm(pkt_ts.timetuple())
+        ts_sec = pkt_ts.us // 1000000
         ts_usec = pkt_ts.microsecond
 
         # RNTI Type: {0: C-RNTI, 2: P-RNTI, 3: RA-RNTI, 4: T-C-RNTI, 5: SI-RNTI}
@@ -499,39 +548,33 @@ class DiagLteLogParser:
 
         pos = 4
         for i in range(num_subpacket):
-            subpkt_mac_struct = namedtuple('QcDiagLteMacSubpkt', 'id version size')
-            subpkt_mac = subpkt_mac_struct._make(struct.unpack('<BBH', pkt_body[pos:pos+4]))
+            subpkt_mac = LTE_MAC_SUBPKT.unpack_from(pkt_body, pos)
             subpkt_body = pkt_body[pos+4:pos+4+subpkt_mac.size]
             pos += (4 + subpkt_mac.size)
 
             if subpkt_mac.id == 0x06: # RACH Attempt
-                subpkt_mac_rach_attempt_struct = namedtuple('QcDiagLteMacSubpktRachAttempt', 'num_attempt rach_result contention msg_bitmask')
-                subpkt_mac_rach_attempt_struct_v3 = namedtuple('QcDiagLteMacSubpktRachAttemptV3', 'subid cellid num_attempt rach_result contention msg_bitmask')
                 subpkt_mac_rach_attempt = None
 
-                subpkt_mac_rach_attempt_msg1_struct = namedtuple('QcDiagLteMacSubpktRachAttemptMsg1', 'preamble_index preamble_index_mask preamble_power_offset')
-                subpkt_mac_rach_attempt_msg2_struct = namedtuple('QcDiagLteMacSubpktRachAttemptMsg2', 'backoff result tc_rnti ta')
-                subpkt_mac_rach_attempt_msg3_struct = namedtuple('QcDiagLteMacSubpktRachAttemptMsg3', 'grant_raw grant harq_id mac_pdu')
                 rach_msg1 = None
                 rach_msg2 = None
                 rach_msg3 = None
 
                 if subpkt_mac.version == 0x02: # Version 2
-                    subpkt_mac_rach_attempt = subpkt_mac_rach_attempt_struct._make(struct.unpack('<BBBB', subpkt_body[0:4]))
+                    subpkt_mac_rach_attempt = LTE_MAC_RACH_ATTEMPT_V2.unpack_from(subpkt_body)
                     if subpkt_mac_rach_attempt.msg_bitmask & 0x01: # Msg1
-                        rach_msg1 = subpkt_mac_rach_attempt_msg1_struct._make(struct.unpack('<BBh', subpkt_body[4:8]))
+                        rach_msg1 = LTE_MAC_RACH_MSG1.unpack_from(subpkt_body, 4)
                     if subpkt_mac_rach_attempt.msg_bitmask & 0x02: # Msg2
-                        rach_msg2 = subpkt_mac_rach_attempt_msg2_struct._make(struct.unpack('<HBHH', subpkt_body[8:15]))
+                        rach_msg2 = LTE_MAC_RACH_MSG2.unpack_from(subpkt_body, 8)
                     if subpkt_mac_rach_attempt.msg_bitmask & 0x04: # Msg3
-                        rach_msg3 = subpkt_mac_rach_attempt_msg3_struct._make(struct.unpack('<LHB10s', subpkt_body[15:32]))
+                        rach_msg3 = LTE_MAC_RACH_MSG3.unpack_from(subpkt_body, 15)
                 elif subpkt_mac.version == 0x03: # Version 3
-                    subpkt_mac_rach_attempt = subpkt_mac_rach_attempt_struct_v3._make(struct.unpack('<BBBBBB', subpkt_body[0:6]))
+                    subpkt_mac_rach_attempt = LTE_MAC_RACH_ATTEMPT_V3.unpack_from(subpkt_body)
                     if subpkt_mac_rach_attempt.msg_bitmask & 0x01: # Msg1
-                        rach_msg1 = subpkt_mac_rach_attempt_msg1_struct._make(struct.unpack('<BBh', subpkt_body[6:10]))
+                        rach_msg1 = LTE_MAC_RACH_MSG1.unpack_from(subpkt_body, 6)
                     if subpkt_mac_rach_attempt.msg_bitmask & 0x02: # Msg2
-                        rach_msg2 = subpkt_mac_rach_attempt_msg2_struct._make(struct.unpack('<HBHH', subpkt_body[10:17]))
+                        rach_msg2 = LTE_MAC_RACH_MSG2.unpack_from(subpkt_body, 10)
                     if subpkt_mac_rach_attempt.msg_bitmask & 0x04: # Msg3
-                        rach_msg3 = subpkt_mac_rach_attempt_msg3_struct._make(struct.unpack('<LHB10s', subpkt_body[17:34]))
+                        rach_msg3 = LTE_MAC_RACH_MSG3.unpack_from(subpkt_body, 17)
                 else:
                     if self.parent:
                         self.parent.logger.log(logging.WARNING, 'Unexpected MAC RACH Response Subpacket version {}'.format(subpkt_mac.version))
@@ -551,7 +594,7 @@ class DiagLteLogParser:
                     continue
 
                 pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-                ts_sec = calendar.timegm(pkt_ts.timetuple())
+                ts_sec = pkt_ts.us // 1000000
                 ts_usec = pkt_ts.microsecond
 
                 # MAC header required by Wireshark MAC-LTE: radioType, direction, rntiType
@@ -604,19 +647,17 @@ class DiagLteLogParser:
 
             elif subpkt_mac.id == 0x07: # DL Transport Block
                 n_samples = subpkt_body[0]
-                subpkt_mac_dl_tb_struct = namedtuple('QcDiagLteMacSubpktDlTransportBlock', 'sfn_subfn rnti_type harq_id pmch_id dl_tbs rlc_pdus padding header_len')
-                subpkt_mac_dl_tb_struct_v4 = namedtuple('QcDiagLteMacSubpktDlTransportBlockV4', 'subid cellid sfn_subfn rnti_type harq_id pmch_id dl_tbs rlc_pdus padding header_len')
                 subpkt_mac_dl_tb = None
                 mac_hdr = b''
 
                 subpkt_pos = 1
                 for j in range(n_samples):
                     if subpkt_mac.version == 0x02:
-                        subpkt_mac_dl_tb = subpkt_mac_dl_tb_struct._make(struct.unpack('<HBBHHBHB', subpkt_body[subpkt_pos:subpkt_pos+12]))
+                        subpkt_mac_dl_tb = LTE_MAC_DL_TB_V2.unpack_from(subpkt_body, subpkt_pos)
                         mac_hdr = subpkt_body[subpkt_pos+12:subpkt_pos+12+subpkt_mac_dl_tb.header_len]
                         subpkt_pos += (12 + subpkt_mac_dl_tb.header_len)
                     elif subpkt_mac.version == 0x04:
-                        subpkt_mac_dl_tb = subpkt_mac_dl_tb_struct_v4._make(struct.unpack('<BBHBBHHBHB', subpkt_body[subpkt_pos:subpkt_pos+14]))
+                        subpkt_mac_dl_tb = LTE_MAC_DL_TB_V4.unpack_from(subpkt_body, subpkt_pos)
                         mac_hdr = subpkt_body[subpkt_pos+14:subpkt_pos+14+subpkt_mac_dl_tb.header_len]
                         subpkt_pos += (14 + subpkt_mac_dl_tb.header_len)
                     else:
@@ -637,19 +678,17 @@ class DiagLteLogParser:
                         mac_hdr))
             elif subpkt_mac.id == 0x08: # UL Transport Block
                 n_samples = subpkt_body[0]
-                subpkt_mac_ul_tb_struct = namedtuple('QcDiagLteMacSubpktUlTransportBlock', 'sfn_subfn rnti_type harq_id grant rlc_pdus padding bsr_event bsr_trig header_len')
-                subpkt_mac_ul_tb_struct_v2 = namedtuple('QcDiagLteMacSubpktUlTransportBlockV4', 'subid cellid harq_id rnti_type sfn_subfn grant rlc_pdus padding bsr_event bsr_trig header_len')
                 subpkt_mac_ul_tb = None
                 mac_hdr = b''
 
                 subpkt_pos = 1
                 for j in range(n_samples):
                     if subpkt_mac.version == 0x01:
-                        subpkt_mac_ul_tb = subpkt_mac_ul_tb_struct._make(struct.unpack('<HBBHBHBBB', subpkt_body[subpkt_pos:subpkt_pos+12]))
+                        subpkt_mac_ul_tb = LTE_MAC_UL_TB_V1.unpack_from(subpkt_body, subpkt_pos)
                         mac_hdr = subpkt_body[subpkt_pos+12:subpkt_pos+12+subpkt_mac_ul_tb.header_len]
                         subpkt_pos += (12 + subpkt_mac_ul_tb.header_len)
                     elif subpkt_mac.version == 0x02:
-                        subpkt_mac_ul_tb = subpkt_mac_ul_tb_struct_v2._make(struct.unpack('<BBBBHHBHBBB', subpkt_body[subpkt_pos:subpkt_pos+14]))
+                        subpkt_mac_ul_tb = LTE_MAC_UL_TB_V2.unpack_from(subpkt_body, subpkt_pos)
                         mac_hdr = subpkt_body[subpkt_pos+14:subpkt_pos+14+subpkt_mac_ul_tb.header_len]
                         subpkt_pos += (14 + subpkt_mac_ul_tb.header_len)
                     else:
@@ -738,8 +777,7 @@ class DiagLteLogParser:
         pos = 4
 
         for x in range(n_subpackets):
-            subpkt_pdcp_struct = namedtuple('QcDiagLtePdcpSubpkt', 'id version size')
-            subpkt_pdcp = subpkt_pdcp_struct._make(struct.unpack('<BBH', pkt_body[pos:pos+4]))
+            subpkt_pdcp = LTE_PDCP_SUBPKT.unpack_from(pkt_body, pos)
             subpkt_body = pkt_body[pos+4:pos+4+subpkt_pdcp.size]
             pos += (4 + subpkt_pdcp.size)
 
@@ -1012,16 +1050,14 @@ class DiagLteLogParser:
         pkt_version = pkt_body[0]
         prb_to_mhz = {6: 1.4, 15: 3, 25: 5, 50: 10, 75: 15, 100: 20}
 
-        item_struct = namedtuple('QcDiagLteMib', 'pci earfcn sfn tx_antenna bandwidth')
-        item_struct_v17 = namedtuple('QcDiagLteMibV17', 'pci earfcn sfn sfn_msb4 hsfn_lsb2 sib1_sch_info si_value_tag access_barring opmode_type opmode_info tx_antenna')
         item = None
 
         if pkt_version == 1:
-            item = item_struct._make(struct.unpack('<HHH BB', pkt_body[1:10]))
+            item = LTE_RRC_MIB_V1.unpack_from(pkt_body, 1)
         elif pkt_version == 2:
-            item = item_struct._make(struct.unpack('<HLH BB', pkt_body[1:12]))
+            item = LTE_RRC_MIB_V2.unpack_from(pkt_body, 1)
         elif pkt_version == 17:
-            item = item_struct_v17._make(struct.unpack('<HLH BBBBB BHB', pkt_body[1:18]))
+            item = LTE_RRC_MIB_V17.unpack_from(pkt_body, 1)
         else:
             if self.parent:
                 self.parent.logger.log(logging.WARNING, 'Unknown LTE MIB packet version 0x{:02x}'.format(pkt_version))
@@ -1049,13 +1085,12 @@ class DiagLteLogParser:
         if args is not None and 'radio_id' in args:
             radio_id = args['radio_id']
 
-        item_struct = namedtuple('QcDiagLteRrcServCellInfo', 'pci dl_earfcn ul_earfcn dl_bw ul_bw cell_id tac band mcc mnc_digit mnc allowed_access')
         if pkt_version == 2:
             # Version, Physical CID, DL EARFCN, UL EARFCN, DL BW, UL BW, Cell ID, TAC, Band, MCC, MNC Digit/MNC, Allowed Access
-            item = item_struct._make(struct.unpack('<H HH BB LH L HBH B', pkt_body[1:25]))
+            item = LTE_RRC_SCELL_INFO_V2.unpack_from(pkt_body, 1)
         elif pkt_version == 3:
             # Version, Physical CID, DL EARFCN, UL EARFCN, DL BW, UL BW, Cell ID, TAC, Band, MCC, MNC Digit/MNC, Allowed Access
-            item = item_struct._make(struct.unpack('<H LL BB LH L HBH B', pkt_body[1:29]))
+            item = LTE_RRC_SCELL_INFO_V3.unpack_from(pkt_body, 1)
         else:
             if self.parent:
                 self.parent.logger.log(logging.WARNING, 'Unknown LTE RRC cell info packet version 0x{:02x}'.format(pkt_version))
@@ -1091,37 +1126,48 @@ class DiagLteLogParser:
         else:
             stdout = 'LTE RRC SCell Info: EARFCN: {}/{}, Band: {}, Bandwidth: {}, PCI: {}, MCC: {}, MNC: {}, {}'.format(item.dl_earfcn,
                 item.ul_earfcn, item.band, bw_str, item.pci, item.mcc, item.mnc, tac_cid_fmt)
-        return {'stdout': stdout, 'ts': pkt_ts}
+
+        result = {'stdout': stdout, 'ts': pkt_ts}
+        if self.parent and self.parent.structured_fields:
+            cell_info = {'type': 'lte_rrc_scell', 'technology': 'LTE',
+                'earfcn_dl': item.dl_earfcn, 'earfcn_ul': item.ul_earfcn, 'band': item.band,
+                'bandwidth_dl_prb': item.dl_bw, 'bandwidth_ul_prb': item.ul_bw, 'pci': item.pci,
+                'mcc': item.mcc, 'mnc': item.mnc, 'mnc_digits': item.mnc_digit, 'tac': item.tac, 'cell_id': item.cell_id}
+            # Same keys and types as the stdout extraction of EnhancedQualcommParser
+            if item.dl_bw in prb_to_mhz and item.ul_bw in prb_to_mhz:
+                cell_info['bandwidth_dl_mhz'] = float(prb_to_mhz[item.dl_bw])
+                cell_info['bandwidth_ul_mhz'] = float(prb_to_mhz[item.ul_bw])
+            if self.display_format == 'x':
+                cell_info['tac_hex'] = '{:x}'.format(item.tac)
+                cell_info['cell_id_hex'] = '{:x}'.format(item.cell_id)
+            result['cell_info'] = cell_info
+        return result
 
     def parse_lte_rrc(self, pkt_header, pkt_body, args):
         pkt_version = pkt_body[0]
         msg_content = b''
 
-        item_struct = namedtuple('QcDiagLteRrcOtaPacket', 'rrc_rel_maj rrc_rel_min rbid pci earfcn sfn_subfn pdu_num len')
-        item_struct_v5 = namedtuple('QcDiagLteRrcOtaPacketV5', 'rrc_rel_maj rrc_rel_min rbid pci earfcn sfn_subfn pdu_num sib_mask len')
-        item_struct_v25 = namedtuple('QcDiagLteRrcOtaPacketV25', 'rrc_rel_maj rrc_rel_min nr_rrc_rel_maj nr_rrc_rel_min rbid pci earfcn sfn_subfn pdu_num sib_mask len')
-        item_struct_v30 = namedtuple('QcDiagLteRrcOtaPacketV30', 'rrc_rel_maj rrc_rel_min nr_rrc_rel_maj nr_rrc_rel_min rbid pci earfcn sfn_subfn pdu_num sib_mask len unk1 unk2 segment_id')
         item = None
 
         if pkt_version >= 30:
             # Version 30
-            item = item_struct_v30._make(struct.unpack('<BBBB BHLH BLHBBB', pkt_body[1:24]))
+            item = LTE_RRC_OTA_V30.unpack_from(pkt_body, 1)
             msg_content = pkt_body[24:]
         elif pkt_version >= 25:
             # Version 25, 26, 27
-            item = item_struct_v25._make(struct.unpack('<BBBB BHLH BLH', pkt_body[1:21]))
+            item = LTE_RRC_OTA_V25.unpack_from(pkt_body, 1)
             msg_content = pkt_body[21:]
         elif pkt_version >= 8:
             # Version 8, 9, 12, 13, 15, 16, 19, 20, 22, 24
-            item = item_struct_v5._make(struct.unpack('<BB BHLH BLH', pkt_body[1:19]))
+            item = LTE_RRC_OTA_V8.unpack_from(pkt_body, 1)
             msg_content = pkt_body[19:]
         elif pkt_version >= 5:
             # Version 6, 7
-            item = item_struct_v5._make(struct.unpack('<BB BHHH BLH', pkt_body[1:17]))
+            item = LTE_RRC_OTA_V5.unpack_from(pkt_body, 1)
             msg_content = pkt_body[17:]
         else:
             # Version 2, 3, 4
-            item = item_struct._make(struct.unpack('<BB BHHH BH', pkt_body[1:13]))
+            item = LTE_RRC_OTA_V2.unpack_from(pkt_body, 1)
             msg_content = pkt_body[13:]
 
         if item.len != len(msg_content):
@@ -1150,9 +1196,7 @@ class DiagLteLogParser:
                 self.rrc_segments = dict()
                 self.first_segment_item = None
 
-        sfn_subfn_bits = bitstring.Bits(uint=item.sfn_subfn, length=16)
-        subfn = sfn_subfn_bits[0:4].uint
-        sfn = sfn_subfn_bits[4:16].uint
+        subfn, sfn = LTE_SFN_SUBFN_BITS.unpack(item.sfn_subfn)
 
         t_v2 = util.gsmtap_lte_rrc_types
         t_v3 = util.gsmtapv3_lte_rrc_types
@@ -1249,7 +1293,7 @@ class DiagLteLogParser:
             return None
 
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        ts_sec = calendar.timegm(pkt_ts.timetuple())
+        ts_sec = pkt_ts.us // 1000000
         ts_usec = pkt_ts.microsecond
 
         if not (item.pdu_num in rrc_subtype_map):
@@ -1298,12 +1342,11 @@ class DiagLteLogParser:
     def parse_lte_nas(self, pkt_header, pkt_body, args, plain = False):
         pkt_version = pkt_body[0]
 
-        item_struct = namedtuple('QcDiagLteNasMsg', 'vermaj vermid vermin')
-        item = item_struct._make(struct.unpack('<BBB', pkt_body[1:4]))
+        item = LTE_NAS_MSG.unpack_from(pkt_body, 1)
         msg_content = pkt_body[4:]
 
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        ts_sec = calendar.timegm(pkt_ts.timetuple())
+        ts_sec = pkt_ts.us // 1000000
         ts_usec = pkt_ts.microsecond
 
         if self.gsmtapv3:
@@ -1,26 +1,61 @@
 #!/usr/bin/env python3
 
-from collections import namedtuple
-from packaging import version
 import binascii
-import bitstring
-import calendar
+import functools
 import logging
 import struct
 
-bitstring_ver = version.parse(bitstring.__version__)
-if bitstring_ver >= version.parse('4.2.0'):
-    bitstring.options.lsb0 = True
-elif bitstring_ver >= version.parse('4.0.0'):
-    bitstring.lsb0 = True
-elif bitstring_ver >= version.parse('3.1.7'):
-    bitstring.set_lsb0(True)
-else:
-    raise Exception("SCAT requires bitstring>=3.1.7, recommends bitstring>=4.0.0")
-
+import scat.bitfields as bitfields
 import scat.parsers.qualcomm.diagcmd as diagcmd
+import scat.parsers.qualcomm.diaglayouts as diaglayouts
 import scat.util as util
 
+# SFN and subcarrier spacing of the MIB info, LSB0 bit ranges
+NR_MIB_PROPS_V3_BITS = bitfields.BitFields((0, 10), (30, 32))
+NR_MIB_PROPS_V20000_BITS = bitfields.BitFields((0, 10), (31, 33))
+
+NR_PKT_VER = diaglayouts.RecordLayout('QcDiagNrPktVer', '<HH', 'rel_min rel_maj')
+
+# Record layouts by log code and packet version (rel_maj << 16 | rel_min), see diaglayouts
+i = diagcmd.diag_log_get_lte_item_id
+c = diagcmd.diag_log_code_5gnr
+NR_ML1_MEAS_DB_V2_7 = diaglayouts.register(i(c.LOG_5GNR_ML1_MEAS_DATABASE_UPDATE), 0x20007, 'QcDiagNrMl1Packet', '<BB2sII',
+    'num_layers ssb_periocity null frequency_offset timing_offset')
+NR_ML1_MEAS_DB_V2_9 = diaglayouts.register(i(c.LOG_5GNR_ML1_MEAS_DATABASE_UPDATE), 0x20009, 'QcDiagNrMl1Packet', '<IBBHII',
+    'unknown num_layers ssb_periocity null frequency_offset timing_offset')
+NR_ML1_MEAS_DB_CARRIER_V2 = diaglayouts.register(i(c.LOG_5GNR_ML1_MEAS_DATABASE_UPDATE), ('carrier', 0x20007), 'QcDiagNrMl1Packet', '<IBBHB3sIIHHH2sHH',
+    'raster_arfcn num_cells serv_cell_index serv_cell_pci serv_ssb null_0 serv_rsrp_rx_0 serv_rsrp_rx_1 serv_rx_beam_0 serv_rx_beam_1 serv_rfic_id null_1 serv_subarr_0 serv_subarr_1')
+NR_ML1_MEAS_DB_CARRIER_V3 = diaglayouts.register(i(c.LOG_5GNR_ML1_MEAS_DATABASE_UPDATE), ('carrier', 0x30000), 'QcDiagNrMl1PacketV3', '<IBBHBB2sIIIIHHH2sHH',
+    'raster_arfcn cc_id num_cells serv_cell_pci serv_cell_index serv_ssb null_0 serv_rsrp_rx_0 serv_rsrp_rx_1 serv_rsrp_rx_2 serv_rsrp_rx_3 serv_rx_beam_0 serv_rx_beam_1 serv_rfic_id null_1 serv_subarr_0 serv_subarr_1')
+NR_ML1_MEAS_DB_CELL = diaglayouts.register(i(c.LOG_5GNR_ML1_MEAS_DATABASE_UPDATE), ('cell', 0x20007), 'QcDiagNrMl1Packet', '<HHB3sII',
+    'pci pbch_sfn num_beams null_0 cell_quality_rsrp cell_quality_rsrq')
+NR_ML1_MEAS_DB_BEAM_V2 = diaglayouts.register(i(c.LOG_5GNR_ML1_MEAS_DATABASE_UPDATE), ('beam', 0x20007), 'QcDiagNrMl1Packet', '<HHHHIQIIIIII',
+    'ssb_index null_0 rx_beam_0 rx_beam_1 null_1 ssb_ref_timing rx_beam_info_rsrp_0 rx_beam_info_rsrp_1 nr2nr_filtered_beam_rsrp_l3 nr2nr_filtered_beam_rsrq_l3 l_2_nr_filtered_tx_beam_rsrp_l3 l_2_nr_filtered_tx_beam_rsrq_l3')
+NR_ML1_MEAS_DB_BEAM_V3 = diaglayouts.register(i(c.LOG_5GNR_ML1_MEAS_DATABASE_UPDATE), ('beam', 0x30000), 'QcDiagNrMl1PacketV3', '<HHHHIQIIIIIIIIIIIIIIII',
+    'ssb_index null_0 rx_beam_0 rx_beam_1 null_1 ssb_ref_timing rx_beam_info_rsrp_0 rx_beam_info_rsrp_1 unk_0 unk_1 unk_2 unk_3 unk_4 unk_5 unk_6 unk_7 unk_8 unk_9 nr2nr_filtered_beam_rsrp_l3 nr2nr_filtered_beam_rsrq_l3 l_2_nr_filtered_tx_beam_rsrp_l3 l_2_nr_filtered_tx_beam_rsrq_l3')
+NR_RRC_MIB_INFO = diaglayouts.register(i(c.LOG_5GNR_RRC_MIB_INFO), 3, 'QcDiagNrMibInfo', '<HI',
+    'pci nrarfcn')
+NR_RRC_SCELL_INFO_V4 = diaglayouts.register(i(c.LOG_5GNR_RRC_SERVING_CELL_INFO), 4, 'QcDiagNrScellInfo', '<H LLHH Q H BH B LH',
+    'pci dl_nrarfcn ul_nrarfcn dl_bandwidth ul_bandwidth cell_id mcc mnc_digit mnc allowed_access tac band')
+NR_RRC_SCELL_INFO_V30000 = diaglayouts.register(i(c.LOG_5GNR_RRC_SERVING_CELL_INFO), 0x30000, 'QcDiagNrScellInfoV30000', '<H Q LLHH Q H BH B LH',
+    'pci nr_cgi dl_nrarfcn ul_nrarfcn dl_bandwidth ul_bandwidth cell_id mcc mnc_digit mnc allowed_access tac band')
+NR_RRC_OTA_V9 = diaglayouts.register(i(c.LOG_5GNR_RRC_OTA_MESSAGE), 9, 'QcDiagNrRrcOtaPacket', '<BBBHIIBIH',
+    'rrc_rel_maj rrc_rel_min rbid pci nrarfcn sfn_subfn pdu_id sib_mask len')
+NR_RRC_OTA_V12 = diaglayouts.register(i(c.LOG_5GNR_RRC_OTA_MESSAGE), 12, 'QcDiagNrRrcOtaPacket', '<BBBHI3sBIH',
+    'rrc_rel_maj rrc_rel_min rbid pci nrarfcn sfn_subfn pdu_id sib_mask len')
+NR_RRC_OTA_V17 = diaglayouts.register(i(c.LOG_5GNR_RRC_OTA_MESSAGE), 17, 'QcDiagNrRrcOtaPacketV17', '<BBBH Q I3sBIH',
+    'rrc_rel_maj rrc_rel_min rbid pci ncgi nrarfcn sfn_subfn pdu_id sib_mask len')
+NR_RRC_OTA_V19 = diaglayouts.register(i(c.LOG_5GNR_RRC_OTA_MESSAGE), 19, 'QcDiagNrRrcOtaPacketV19', '<BBBH Q I3sBIHB',
+    'rrc_rel_maj rrc_rel_min rbid pci ncgi nrarfcn sfn_subfn pdu_id sib_mask len unk1')
+NR_RRC_OTA_V23 = diaglayouts.register(i(c.LOG_5GNR_RRC_OTA_MESSAGE), 23, 'QcDiagNrRrcOtaPacketV23', '<BBBH Q I3sBIHBBBB',
+    'rrc_rel_maj rrc_rel_min rbid pci ncgi nrarfcn sfn_subfn pdu_id sib_mask len unk1 unk2 unk3 segment_id')
+NR_NAS_MM_STATE = diaglayouts.register(i(c.LOG_5GNR_NAS_5GMM_STATE), 1, 'QcDiagNrNasMmState', '<BH3s12sb3s',
+    'mm_state mm_substate plmn_id guti_5gs mm_update_status tac')
+NR_NAS_MSG = diaglayouts.register(i(c.LOG_5GNR_NAS_5GSM_PLAIN_OTA_INCOMING_MESSAGE), 1, 'QcDiagNrNasMsg', '<BBB',
+    'vermaj vermid vermin')
+del i, c
+
+
 class DiagNrLogParser:
     def __init__(self, parent):
         self.parent = parent
@@ -37,30 +72,28 @@ class DiagNrLogParser:
         c = diagcmd.diag_log_code_5gnr
         self.process = {
             # Management Layer 1
-            i(c.LOG_5GNR_ML1_MEAS_DATABASE_UPDATE): lambda x, y, z: self.parse_nr_ml1_meas_db_update(x, y, z),
+            i(c.LOG_5GNR_ML1_MEAS_DATABASE_UPDATE): self.parse_nr_ml1_meas_db_update,
 
             # MAC
 
             # RRC
-            i(c.LOG_5GNR_RRC_OTA_MESSAGE): lambda x, y, z: self.parse_nr_rrc(x, y, z),
-            i(c.LOG_5GNR_RRC_MIB_INFO): lambda x, y, z: self.parse_nr_mib_info(x, y, z),
-            i(c.LOG_5GNR_RRC_SERVING_CELL_INFO): lambda x, y, z: self.parse_nr_rrc_scell_info(x, y, z),
-            # i(c.LOG_5GNR_RRC_CONFIGURATION_INFO): lambda x, y, z: self.parse_nr_rrc_conf_info(x, y, z),
-            i(c.LOG_5GNR_RRC_SUPPORTED_CA_COMBOS): lambda x, y, z: self.parse_nr_cacombos(x, y, z),
+            i(c.LOG_5GNR_RRC_OTA_MESSAGE): self.parse_nr_rrc,
+            i(c.LOG_5GNR_RRC_MIB_INFO): self.parse_nr_mib_info,
+            i(c.LOG_5GNR_RRC_SERVING_CELL_INFO): self.parse_nr_rrc_scell_info,
+            # i(c.LOG_5GNR_RRC_CONFIGURATION_INFO): self.parse_nr_rrc_conf_info,
+            i(c.LOG_5GNR_RRC_SUPPORTED_CA_COMBOS): self.parse_nr_cacombos,
 
             # NAS
-            i(c.LOG_5GNR_NAS_5GSM_PLAIN_OTA_INCOMING_MESSAGE): lambda x, y, z: self.parse_nr_nas(x, y, z, 0xB800),
-            i(c.LOG_5GNR_NAS_5GSM_PLAIN_OTA_OUTGOING_MESSAGE): lambda x, y, z: self.parse_nr_nas(x, y, z, 0xB801),
-            i(c.LOG_5GNR_NAS_5GSM_SEC_OTA_INCOMING_MESSAGE): lambda x, y, z: self.parse_nr_nas(x, y, z, 0xB808),
-            i(c.LOG_5GNR_NAS_5GSM_SEC_OTA_OUTGOING_MESSAGE): lambda x, y, z: self.parse_nr_nas(x, y, z, 0xB809),
-            i(c.LOG_5GNR_NAS_5GMM_PLAIN_OTA_INCOMING_MESSAGE): lambda x, y, z: self.parse_nr_nas(x, y, z, 0xB80A),
-            i(c.LOG_5GNR_NAS_5GMM_PLAIN_OTA_OUTGOING_MESSAGE): lambda x, y, z: self.parse_nr_nas(x, y, z, 0xB80B),
-            i(c.LOG_5GNR_NAS_5GMM_PLAIN_OTA_CONTAINER_MESSAGE): lambda x, y, z: self.parse_nr_nas(x, y, z, 0xB814),
-            i(c.LOG_5GNR_NAS_5GMM_STATE): lambda x, y, z: self.parse_nr_mm_state(x, y, z),
+            i(c.LOG_5GNR_NAS_5GSM_PLAIN_OTA_INCOMING_MESSAGE): functools.partial(self.parse_nr_nas, cmd_id=0xB800),
+            i(c.LOG_5GNR_NAS_5GSM_PLAIN_OTA_OUTGOING_MESSAGE): functools.partial(self.parse_nr_nas, cmd_id=0xB801),
+            i(c.LOG_5GNR_NAS_5GSM_SEC_OTA_INCOMING_MESSAGE): functools.partial(self.parse_nr_nas, cmd_id=0xB808),
+            i(c.LOG_5GNR_NAS_5GSM_SEC_OTA_OUTGOING_MESSAGE): functools.partial(self.parse_nr_nas, cmd_id=0xB809),
+            i(c.LOG_5GNR_NAS_5GMM_PLAIN_OTA_INCOMING_MESSAGE): functools.partial(self.parse_nr_nas, cmd_id=0xB80A),
+            i(c.LOG_5GNR_NAS_5GMM_PLAIN_OTA_OUTGOING_MESSAGE): functools.partial(self.parse_nr_nas, cmd_id=0xB80B),
+            i(c.LOG_5GNR_NAS_5GMM_PLAIN_OTA_CONTAINER_MESSAGE): functools.partial(self.parse_nr_nas, cmd_id=0xB814),
+            i(c.LOG_5GNR_NAS_5GMM_STATE): self.parse_nr_mm_state,
         }
 
-        self.nr_pkt_ver = namedtuple('QcDiagNrPktVer', 'rel_min rel_maj')
-
     def update_parameters(self, display_format, gsmtapv3):
         self.display_format = display_format
 
@@ -75,27 +108,25 @@ class DiagNrLogParser:
     # ML1
     def parse_nr_ml1_meas_db_update(self, pkt_header, pkt_body, args):
         stdout = ''
-        pkt_ver = self.nr_pkt_ver._make(struct.unpack('<HH', pkt_body[0:4]))
+        measurement = [] if self.parent and self.parent.structured_fields else None
+        pkt_ver = NR_PKT_VER.unpack_from(pkt_body)
         num_layers = 0
         current_offset = 0
         if pkt_ver.rel_maj == 0x02:
             if pkt_ver.rel_min == 0x07:
-                ml1_shared_struct = namedtuple('QcDiagNrMl1Packet', 'num_layers ssb_periocity null frequency_offset timing_offset')
-                ml1_2_7 = ml1_shared_struct._make(struct.unpack('<BB2sII', pkt_body[4:16]))
+                ml1_2_7 = NR_ML1_MEAS_DB_V2_7.unpack_from(pkt_body, 4)
                 num_layers = ml1_2_7.num_layers
                 stdout += "NR ML1 Meas Packet: Layers: {}, ssb_periocity: {}\n".format(ml1_2_7.num_layers, ml1_2_7.ssb_periocity)
                 current_offset = 16
 
             elif pkt_ver.rel_min == 0x09:
-                ml1_shared_struct = namedtuple('QcDiagNrMl1Packet', 'unknown num_layers ssb_periocity null frequency_offset timing_offset')
-                ml1_2_9 = ml1_shared_struct._make(struct.unpack('<IBBHII', pkt_body[4:20]))
+                ml1_2_9 = NR_ML1_MEAS_DB_V2_9.unpack_from(pkt_body, 4)
                 num_layers = ml1_2_9.num_layers
                 stdout += "NR ML1 Meas Packet: Layers: {}, ssb_periocity: {}\n".format(ml1_2_9.num_layers, ml1_2_9.ssb_periocity)
                 current_offset = 20
         elif pkt_ver.rel_maj == 0x03:
             if pkt_ver.rel_min == 0x00:
-                ml1_shared_struct = namedtuple('QcDiagNrMl1Packet', 'unknown num_layers ssb_periocity null frequency_offset timing_offset')
-                ml1_3_0 = ml1_shared_struct._make(struct.unpack('<IBBHII', pkt_body[4:20]))
+                ml1_3_0 = NR_ML1_MEAS_DB_V2_9.unpack_from(pkt_body, 4)
                 num_layers = ml1_3_0.num_layers
                 stdout += "NR ML1 Meas Packet: Layers: {}, ssb_periocity: {}\n".format(ml1_3_0.num_layers, ml1_3_0.ssb_periocity)
                 current_offset = 20
@@ -106,15 +137,13 @@ class DiagNrLogParser:
             return
 
         for layer in range(num_layers):
-            meas_carrier_list_struct = namedtuple('QcDiagNrMl1Packet', 'raster_arfcn num_cells serv_cell_index serv_cell_pci serv_ssb null_0 serv_rsrp_rx_0 serv_rsrp_rx_1 serv_rx_beam_0 serv_rx_beam_1 serv_rfic_id null_1 serv_subarr_0 serv_subarr_1')
-            meas_carrier_list_struct_v3 = namedtuple('QcDiagNrMl1PacketV3', 'raster_arfcn cc_id num_cells serv_cell_pci serv_cell_index serv_ssb null_0 serv_rsrp_rx_0 serv_rsrp_rx_1 serv_rsrp_rx_2 serv_rsrp_rx_3 serv_rx_beam_0 serv_rx_beam_1 serv_rfic_id null_1 serv_subarr_0 serv_subarr_1')
             if pkt_ver.rel_maj == 0x02:
                 if pkt_ver.rel_min in (0x07, 0x09):
-                    meas_carrier_list = meas_carrier_list_struct._make(struct.unpack('<IBBHB3sIIHHH2sHH', pkt_body[current_offset:current_offset+32]))
+                    meas_carrier_list = NR_ML1_MEAS_DB_CARRIER_V2.unpack_from(pkt_body, current_offset)
                     current_offset += 32
             elif pkt_ver.rel_maj == 0x03:
                 if pkt_ver.rel_min in (0x00, ):
-                    meas_carrier_list = meas_carrier_list_struct_v3._make(struct.unpack('<IBBHBB2sIIIIHHH2sHH', pkt_body[current_offset:current_offset+40]))
+                    meas_carrier_list = NR_ML1_MEAS_DB_CARRIER_V3.unpack_from(pkt_body, current_offset)
                     current_offset += 40
 
             if pkt_ver.rel_maj == 0x02:
@@ -142,18 +171,21 @@ class DiagNrLogParser:
                 num_cells = meas_carrier_list.num_cells
 
             for cell in range(num_cells):
-                cell_list_struct = namedtuple('QcDiagNrMl1Packet', 'pci pbch_sfn num_beams null_0 cell_quality_rsrp cell_quality_rsrq')
-                cell_list = cell_list_struct._make(struct.unpack('<HHB3sII', pkt_body[current_offset:current_offset+16]))
+                cell_list = NR_ML1_MEAS_DB_CELL.unpack_from(pkt_body, current_offset)
                 current_offset += 16
                 stdout += "└── Cell {}: PCI: {:4d}, PBCH SFN: {}, RSRP: {:.2f}, RSRQ: {:.2f}, Num Beams: {}\n".format(
                     cell, cell_list.pci, cell_list.pbch_sfn,
                     self.parse_float_q7(cell_list.cell_quality_rsrp), self.parse_float_q7(cell_list.cell_quality_rsrq),
                     cell_list.num_beams)
+                if measurement is not None:
+                    measurement.append({'type': 'nr_measurement', 'technology': 'NR',
+                        'cell': 'serving' if cell_list.pci == meas_carrier_list.serv_cell_pci else 'neighbor',
+                        'nrarfcn': meas_carrier_list.raster_arfcn, 'pci': cell_list.pci, 'pbch_sfn': cell_list.pbch_sfn,
+                        'rsrp_dbm': self.parse_float_q7(cell_list.cell_quality_rsrp),
+                        'rsrq_db': self.parse_float_q7(cell_list.cell_quality_rsrq), 'num_beams': cell_list.num_beams})
                 for beam in range(cell_list.num_beams):
-                    beam_meas_struct = namedtuple('QcDiagNrMl1Packet', 'ssb_index null_0 rx_beam_0 rx_beam_1 null_1 ssb_ref_timing rx_beam_info_rsrp_0 rx_beam_info_rsrp_1 nr2nr_filtered_beam_rsrp_l3 nr2nr_filtered_beam_rsrq_l3 l_2_nr_filtered_tx_beam_rsrp_l3 l_2_nr_filtered_tx_beam_rsrq_l3')
-                    beam_meas_struct_v3 = namedtuple('QcDiagNrMl1PacketV3', 'ssb_index null_0 rx_beam_0 rx_beam_1 null_1 ssb_ref_timing rx_beam_info_rsrp_0 rx_beam_info_rsrp_1 unk_0 unk_1 unk_2 unk_3 unk_4 unk_5 unk_6 unk_7 unk_8 unk_9 nr2nr_filtered_beam_rsrp_l3 nr2nr_filtered_beam_rsrq_l3 l_2_nr_filtered_tx_beam_rsrp_l3 l_2_nr_filtered_tx_beam_rsrq_l3')
                     if pkt_ver.rel_maj == 0x02:
-                        beam_meas = beam_meas_struct._make(struct.unpack('<HHHHIQIIIIII', pkt_body[current_offset: current_offset+44]))
+                        beam_meas = NR_ML1_MEAS_DB_BEAM_V2.unpack_from(pkt_body, current_offset)
                         current_offset += 44
                         stdout += "    └── Beam {}: SSB[{}] Beam ID: {}/{}, RSRP: {:.2f}/{:.2f}, Filtered RSRP/RSRQ (Nr2Nr): {:.2f}/{:.2f}, Filtered RSRP/RSRQ (L2Nr): {:.2f}/{:.2f}\n".format(
                             beam, beam_meas.ssb_index,
@@ -163,7 +195,7 @@ class DiagNrLogParser:
                             self.parse_float_q7(beam_meas.l_2_nr_filtered_tx_beam_rsrp_l3), self.parse_float_q7(beam_meas.l_2_nr_filtered_tx_beam_rsrq_l3),
                         )
                     elif pkt_ver.rel_maj == 0x03:
-                        beam_meas = beam_meas_struct_v3._make(struct.unpack('<HHHHIQIIIIIIIIIIIIIIII', pkt_body[current_offset: current_offset+84]))
+                        beam_meas = NR_ML1_MEAS_DB_BEAM_V3.unpack_from(pkt_body, current_offset)
                         current_offset += 84
                         stdout += "    └── Beam {}: SSB[{}] Beam ID: {}/{}, RSRP: {:.2f}/{:.2f}, RSRQ: {:.2f}/{:.2f}, Filtered RSRP/RSRQ (Nr2Nr): {:.2f}/{:.2f}, Filtered RSRP/RSRQ (L2Nr): {:.2f}/{:.2f}\n".format(
                             beam, beam_meas.ssb_index,
@@ -175,14 +207,16 @@ class DiagNrLogParser:
                         )
 
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        return {'stdout': stdout.rstrip(), 'ts': pkt_ts}
+        result = {'stdout': stdout.rstrip(), 'ts': pkt_ts}
+        if measurement:
+            result['measurement'] = measurement
+        return result
 
     # RRC
     def parse_nr_mib_info(self, pkt_header, pkt_body, args):
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        pkt_ver = self.nr_pkt_ver._make(struct.unpack('<HH', pkt_body[0:4]))
+        pkt_ver = NR_PKT_VER.unpack_from(pkt_body)
 
-        item_struct = namedtuple('QcDiagNrMibInfo', 'pci nrarfcn')
         scs_map = {
             0: 15,
             1: 30,
@@ -192,15 +226,11 @@ class DiagNrLogParser:
 
         scs_str = ''
         if pkt_ver.rel_maj == 0x00 and pkt_ver.rel_min == 0x03: # Version 3
-            item = item_struct._make(struct.unpack('<HI', pkt_body[4:10]))
-            props_bits = bitstring.Bits(bytes=reversed(pkt_body[10:14]))
-            sfn = props_bits[0:10].uint
-            scs = props_bits[30:32].uint
+            item = NR_RRC_MIB_INFO.unpack_from(pkt_body, 4)
+            sfn, scs = NR_MIB_PROPS_V3_BITS.unpack(bitfields.uint_le(pkt_body[10:14]))
         elif pkt_ver.rel_maj == 0x02 and pkt_ver.rel_min == 0x00: # Version 131072
-            item = item_struct._make(struct.unpack('<HI', pkt_body[4:10]))
-            props_bits = bitstring.Bits(bytes=reversed(pkt_body[10:15]))
-            sfn = props_bits[0:10].uint
-            scs = props_bits[31:33].uint
+            item = NR_RRC_MIB_INFO.unpack_from(pkt_body, 4)
+            sfn, scs = NR_MIB_PROPS_V20000_BITS.unpack(bitfields.uint_le(pkt_body[10:15]))
         else:
             if self.parent:
                 self.parent.logger.log(logging.WARNING, 'Unknown NR MIB Information packet, version {}.{}'.format(pkt_ver.rel_maj, pkt_ver.rel_min))
@@ -218,20 +248,18 @@ class DiagNrLogParser:
 
     def parse_nr_rrc_scell_info(self, pkt_header, pkt_body, args):
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        pkt_ver = self.nr_pkt_ver._make(struct.unpack('<HH', pkt_body[0:4]))
+        pkt_ver = NR_PKT_VER.unpack_from(pkt_body)
 
-        item_struct = namedtuple('QcDiagNrScellInfo', 'pci dl_nrarfcn ul_nrarfcn dl_bandwidth ul_bandwidth cell_id mcc mnc_digit mnc allowed_access tac band')
-        item_struct_v30000 = namedtuple('QcDiagNrScellInfoV30000', 'pci nr_cgi dl_nrarfcn ul_nrarfcn dl_bandwidth ul_bandwidth cell_id mcc mnc_digit mnc allowed_access tac band')
         if pkt_ver.rel_maj == 0x00 and pkt_ver.rel_min == 0x04:
             # PCI 2b, DL NR-ARFCN 4b, UL NR-ARFCN 4b, DLBW 2b, ULBW 2b, Cell ID 8b, MCC 2b, MCC digit 1b, MNC 2b, MNC digit 1b, TAC 4b, ?
-            item = item_struct._make(struct.unpack('<H LLHH Q H BH B LH', pkt_body[4:38]))
+            item = NR_RRC_SCELL_INFO_V4.unpack_from(pkt_body, 4)
         elif pkt_ver.rel_maj == 0x03:
             if pkt_ver.rel_min == 0x00:
                 # PCI 2b, NR CGI 8b, DL NR-ARFCN 4b, UL NR-ARFCN 4b, DLBW 2b, ULBW 2b, Cell ID 8b, MCC 2b, MCC digit 1b, MNC 2b, MNC digit 1b, TAC 4b, ?
-                item = item_struct_v30000._make(struct.unpack('<H Q LLHH Q H BH B LH', pkt_body[4:46]))
+                item = NR_RRC_SCELL_INFO_V30000.unpack_from(pkt_body, 4)
             elif pkt_ver.rel_min in (0x02, 0x03, ):
                 # ? 3b, PCI 2b, NR CGI 8b, DL NR-ARFCN 4b, UL NR-ARFCN 4b, DLBW 2b, ULBW 2b, Cell ID 8b, MCC 2b, MCC digit 1b, MNC 2b, MNC digit 1b, TAC 4b, ?
-                item = item_struct_v30000._make(struct.unpack('<H Q LLHH Q H BH B LH', pkt_body[7:49]))
+                item = NR_RRC_SCELL_INFO_V30000.unpack_from(pkt_body, 7)
         else:
             if self.parent:
                 self.parent.logger.log(logging.WARNING, 'Unknown NR RRC SCell Information packet, version {}.{}'.format(pkt_ver.rel_maj, pkt_ver.rel_min))
@@ -254,7 +282,14 @@ class DiagNrLogParser:
         else:
             stdout = 'NR RRC SCell Info: NR-ARFCN: {}/{}, Bandwidth: {}/{} MHz, Band: {}, PCI: {:4d}, MCC: {}, MNC: {}, {}'.format(item.dl_nrarfcn,
                 item.ul_nrarfcn, item.dl_bandwidth, item.ul_bandwidth, item.band, item.pci, item.mcc, item.mnc, tac_cid_fmt)
-        return {'stdout': stdout, 'ts': pkt_ts}
+
+        result = {'stdout': stdout, 'ts': pkt_ts}
+        if self.parent and self.parent.structured_fields:
+            result['cell_info'] = {'type': 'nr_rrc_scell', 'technology': 'NR',
+                'nrarfcn_dl': item.dl_nrarfcn, 'nrarfcn_ul': item.ul_nrarfcn, 'band': item.band,
+                'bandwidth_dl_mhz': item.dl_bandwidth, 'bandwidth_ul_mhz': item.ul_bandwidth, 'pci': item.pci,
+                'mcc': item.mcc, 'mnc': item.mnc, 'mnc_digits': item.mnc_digit, 'tac': item.tac, 'cell_id': item.cell_id}
+        return result
 
     def parse_nr_rrc_conf_info(self, pkt_header, pkt_body, args):
         pass
@@ -263,25 +298,21 @@ class DiagNrLogParser:
         msg_content = b''
         stdout = ''
         pkt_ver = struct.unpack('<I', pkt_body[0:4])[0]
-        item_struct = namedtuple('QcDiagNrRrcOtaPacket', 'rrc_rel_maj rrc_rel_min rbid pci nrarfcn sfn_subfn pdu_id sib_mask len')
-        item_struct_v17 = namedtuple('QcDiagNrRrcOtaPacketV17', 'rrc_rel_maj rrc_rel_min rbid pci ncgi nrarfcn sfn_subfn pdu_id sib_mask len')
-        item_struct_v19 = namedtuple('QcDiagNrRrcOtaPacketV19', 'rrc_rel_maj rrc_rel_min rbid pci ncgi nrarfcn sfn_subfn pdu_id sib_mask len unk1')
-        item_struct_v23 = namedtuple('QcDiagNrRrcOtaPacketV23', 'rrc_rel_maj rrc_rel_min rbid pci ncgi nrarfcn sfn_subfn pdu_id sib_mask len unk1 unk2 unk3 segment_id')
 
         if pkt_ver in (0x09, ): # Version 9
-            item = item_struct._make(struct.unpack('<BBBHIIBIH', pkt_body[4:24]))
+            item = NR_RRC_OTA_V9.unpack_from(pkt_body, 4)
             msg_content = pkt_body[24:]
         elif pkt_ver in (0x0c, 0x0e): # Version 12, 14
-            item = item_struct._make(struct.unpack('<BBBHI3sBIH', pkt_body[4:23]))
+            item = NR_RRC_OTA_V12.unpack_from(pkt_body, 4)
             msg_content = pkt_body[23:]
         elif pkt_ver in (0x11, ): # Version 17
-            item = item_struct_v17._make(struct.unpack('<BBBH Q I3sBIH', pkt_body[4:31]))
+            item = NR_RRC_OTA_V17.unpack_from(pkt_body, 4)
             msg_content = pkt_body[31:]
         elif pkt_ver in (0x13, 0x14): # Version 19, 20
-            item = item_struct_v19._make(struct.unpack('<BBBH Q I3sBIHB', pkt_body[4:32]))
+            item = NR_RRC_OTA_V19.unpack_from(pkt_body, 4)
             msg_content = pkt_body[32:]
         elif pkt_ver in (0x17, 0x1a): # Version 23, 26
-            item = item_struct_v23._make(struct.unpack('<BBBH Q I3sBIHBBBB', pkt_body[4:35]))
+            item = NR_RRC_OTA_V23.unpack_from(pkt_body, 4)
             msg_content = pkt_body[35:]
         else:
             if self.parent:
@@ -290,10 +321,10 @@ class DiagNrLogParser:
             return None
 
         if pkt_ver >= 0x11:
-            try:
-                ncgi = bitstring.Bits(uint=item.ncgi, length=60)
-            except bitstring.exceptions.CreationError:
-                # Telit FN990 and others: invalid or logically unfit NR CGI is created, which does not fit in 60 bytes
+            if item.ncgi < (1 << 60):
+                ncgi = item.ncgi
+            else:
+                # Telit FN990 and others: invalid or logically unfit NR CGI is created, which does not fit in 60 bits
                 ncgi = None
         else:
             ncgi = None
@@ -406,16 +437,16 @@ class DiagNrLogParser:
             }
 
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        ts_sec = calendar.timegm(pkt_ts.timetuple())
+        ts_sec = pkt_ts.us // 1000000
         ts_usec = pkt_ts.microsecond
 
         if item.pdu_id in rrc_type_map.keys():
             type_str = rrc_type_map[item.pdu_id]
             gsmtapv3_metadata = dict()
             gsmtapv3_metadata[util.gsmtapv3_metadata_tags.BSIC_PSC_PCI] = item.pci
-            if ncgi:
-                mcc_mnc = util.unpack_mcc_mnc(ncgi[36:60].bytes)
-                cell_id = ncgi[0:36].uint
+            if ncgi is not None:
+                mcc_mnc = util.unpack_mcc_mnc(bitfields.field(ncgi, 36, 60).to_bytes(3, 'big'))
+                cell_id = bitfields.field(ncgi, 0, 36)
                 if self.display_format == 'd':
                     stdout += ', NR CGI: {}-{}-{}'.format(mcc_mnc[0], mcc_mnc[1], cell_id)
                 elif self.display_format == 'x':
@@ -456,11 +487,10 @@ class DiagNrLogParser:
     # NAS
     def parse_nr_mm_state(self, pkt_header, pkt_body, args):
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        pkt_ver = self.nr_pkt_ver._make(struct.unpack('<HH', pkt_body[0:4]))
+        pkt_ver = NR_PKT_VER.unpack_from(pkt_body)
 
         if (pkt_ver.rel_maj == 0x00 and pkt_ver.rel_min == 0x01) or (pkt_ver.rel_maj == 0x03 and pkt_ver.rel_min == 0x00): # Version 1 and 196608
-            item_struct = namedtuple('QcDiagNrNasMmState', 'mm_state mm_substate plmn_id guti_5gs mm_update_status tac')
-            item = item_struct._make(struct.unpack('<BH3s12sb3s', pkt_body[4:26]))
+            item = NR_NAS_MM_STATE.unpack_from(pkt_body, 4)
             plmn_id = util.unpack_mcc_mnc(item.plmn_id)
             tac = struct.unpack('>L', b'\x00'+item.tac)[0]
 
@@ -495,17 +525,16 @@ class DiagNrLogParser:
 
     def parse_nr_nas(self, pkt_header, pkt_body, args, cmd_id):
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        ts_sec = calendar.timegm(pkt_ts.timetuple())
+        ts_sec = pkt_ts.us // 1000000
         ts_usec = pkt_ts.microsecond
         stdout = ''
         plain = (cmd_id in (0xB800, 0xB801, 0xB80A, 0xB80B, 0xB814))
 
         # Version 4b, std version maj.min.rev 1b each
         pkt_ver = struct.unpack('<L', pkt_body[0:4])[0]
-        item_struct = namedtuple('QcDiagNrNasMsg', 'vermaj vermid vermin')
         msg_content = pkt_body[7:]
         if pkt_ver == 0x1:
-            item = item_struct._make(struct.unpack('<BBB', pkt_body[4:7]))
+            item = NR_NAS_MSG.unpack_from(pkt_body, 4)
             stdout = "NAS-5GS message ({:04X}) version {:x}.{:x}.{:x}".format(cmd_id, item.vermaj, item.vermid, item.vermin)
             msg_content = pkt_body[7:]
 
@@ -25,10 +25,10 @@ class DiagQCATMsgParser:
         
         # Map log IDs to parsers
         self.process = {
-            0x1098: lambda x, y, z: self.parse_ruim_debug(x, y, z),
-            0x1544: lambda x, y, z: self.parse_qmi_message(x, y, z),
-            0x1273: lambda x, y, z: self.parse_cm_phone_event(x, y, z),
-            0x199B: lambda x, y, z: self.parse_pm_policy_stats(x, y, z),
+            0x1098: self.parse_ruim_debug,
+            0x1544: self.parse_qmi_message,
+            0x1273: self.parse_cm_phone_event,
+            0x199B: self.parse_pm_policy_stats,
         }
     
     def update_parameters(self, display_format, gsmtapv3):
@@ -20,16 +20,16 @@ class DiagRfLogParser:
         
         # RF message IDs from QCAT output analysis
         self.process = {
-            0x1841: lambda x, y, z: self.parse_rf_asdiv(x, y, z),
-            0x19ED: lambda x, y, z: self.parse_atuner_detune_info(x, y, z),
-            0x1849: lambda x, y, z: self.parse_rf_device_status(x, y, z),
-            0x18F7: lambda x, y, z: self.parse_rf_calibration_data(x, y, z),
-            0x4179: lambda x, y, z: self.parse_rf_lte_tx_report(x, y, z),
-            0x41D4: lambda x, y, z: self.parse_rf_lte_rx_report(x, y, z),
-            0x4186: lambda x, y, z: self.parse_rf_gsm_tx_report(x, y, z),
-            0x4134: lambda x, y, z: self.parse_rf_wcdma_tx_report(x, y, z),
-            0x4178: lambda x, y, z: self.parse_rf_power_report(x, y, z),
-            0x4146: lambda x, y, z: self.parse_rf_antenna_report(x, y, z),
+            0x1841: self.parse_rf_asdiv,
+            0x19ED: self.parse_atuner_detune_info,
+            0x1849: self.parse_rf_device_status,
+            0x18F7: self.parse_rf_calibration_data,
+            0x4179: self.parse_rf_lte_tx_report,
+            0x41D4: self.parse_rf_lte_rx_report,
+            0x4186: self.parse_rf_gsm_tx_report,
+            0x4134: self.parse_rf_wcdma_tx_report,
+            0x4178: self.parse_rf_power_report,
+            0x4146: self.parse_rf_antenna_report,
         }
         
         self.no_process = {}
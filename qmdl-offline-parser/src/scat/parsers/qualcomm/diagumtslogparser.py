@@ -1,13 +1,19 @@
 #!/usr/bin/env python3
 
-from collections import namedtuple
-import calendar
 import logging
-import struct
 
 import scat.parsers.qualcomm.diagcmd as diagcmd
+import scat.parsers.qualcomm.diaglayouts as diaglayouts
 import scat.util as util
 
+# Record layouts by log code and packet version, see diaglayouts
+i = diagcmd.diag_log_get_umts_item_id
+c = diagcmd.diag_log_code_umts
+UMTS_NAS_OTA = diaglayouts.register(i(c.LOG_UMTS_NAS_OTA_MESSAGE_LOG_PACKET_C), None, 'QcDiagUmtsUeOta', '<BL',
+    'direction length')
+del i, c
+
+
 class DiagUmtsLogParser:
     def __init__(self, parent):
         self.parent = parent
@@ -23,8 +29,8 @@ class DiagUmtsLogParser:
         c = diagcmd.diag_log_code_umts
         self.process = {
             # UMTS (3G NAS)
-            i(c.LOG_UMTS_NAS_OTA_MESSAGE_LOG_PACKET_C): lambda x, y, z: self.parse_umts_ue_ota(x, y, z),
-            i(c.LOG_UMTS_DSDS_NAS_SIGNALING_MESSAGE): lambda x, y, z: self.parse_umts_ue_ota_dsds(x, y, z),
+            i(c.LOG_UMTS_NAS_OTA_MESSAGE_LOG_PACKET_C): self.parse_umts_ue_ota,
+            i(c.LOG_UMTS_DSDS_NAS_SIGNALING_MESSAGE): self.parse_umts_ue_ota_dsds,
         }
 
     def update_parameters(self, display_format, gsmtapv3):
@@ -36,8 +42,7 @@ class DiagUmtsLogParser:
         if args is not None and 'radio_id' in args:
             radio_id = args['radio_id']
 
-        item_struct = namedtuple('QcDiagUmtsUeOta', 'direction length')
-        item = item_struct._make(struct.unpack('<BL', pkt_body[0:5]))
+        item = UMTS_NAS_OTA.unpack_from(pkt_body)
         msg_content = pkt_body[5:]
 
         if item.length != len(msg_content):
@@ -46,7 +51,7 @@ class DiagUmtsLogParser:
             return None
 
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        ts_sec = calendar.timegm(pkt_ts.timetuple())
+        ts_sec = pkt_ts.us // 1000000
         ts_usec = pkt_ts.microsecond
 
         # msg_hdr[1] == L3 message length
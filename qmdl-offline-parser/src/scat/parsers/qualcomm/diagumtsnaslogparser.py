@@ -20,10 +20,10 @@ class DiagUmtsNasLogParser:
         
         # UMTS NAS message IDs from QCAT output analysis
         self.process = {
-            0x7152: lambda x, y, z: self.parse_umts_nas_fplmn_list(x, y, z),
-            0x7132: lambda x, y, z: self.parse_umts_nas_reg_state(x, y, z),
-            0x7131: lambda x, y, z: self.parse_umts_nas_mm_state(x, y, z),
-            0x7130: lambda x, y, z: self.parse_umts_nas_gmm_state(x, y, z),
+            0x7152: self.parse_umts_nas_fplmn_list,
+            0x7132: self.parse_umts_nas_reg_state,
+            0x7131: self.parse_umts_nas_mm_state,
+            0x7130: self.parse_umts_nas_gmm_state,
         }
         
         self.no_process = {}
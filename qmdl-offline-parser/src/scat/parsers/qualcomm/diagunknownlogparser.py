@@ -317,7 +317,7 @@ class DiagUnknownLogParser:
     def register_unknown_log_id(self, log_id):
         """Register a new unknown log ID for parsing"""
         if log_id not in self.process:
-            self.process[log_id] = lambda x, y, z: self.parse_unknown_log_packet(x, y, z)
+            self.process[log_id] = self.parse_unknown_log_packet
 
     def handles_log_id(self, log_id):
         """Check if this parser can handle the given log ID"""
@@ -20,13 +20,13 @@ class DiagWcdmaEnhancedLogParser:
         
         # High-frequency WCDMA message IDs from QCAT analysis
         self.process = {
-            0x418B: lambda x, y, z: self.parse_wcdma_flexible_dl_rlc_am_pdu(x, y, z),
-            0x421E: lambda x, y, z: self.parse_wcdma_mac_ehs_reassembly(x, y, z),
-            0x4134: lambda x, y, z: self.parse_wcdma_tx_report(x, y, z),
-            0x4222: lambda x, y, z: self.parse_wcdma_advanced_report(x, y, z),
-            0x4344: lambda x, y, z: self.parse_wcdma_multi_carrier_eul(x, y, z),
-            0x4322: lambda x, y, z: self.parse_wcdma_diversity_report(x, y, z),
-            0x435D: lambda x, y, z: self.parse_wcdma_calibration_report(x, y, z),
+            0x418B: self.parse_wcdma_flexible_dl_rlc_am_pdu,
+            0x421E: self.parse_wcdma_mac_ehs_reassembly,
+            0x4134: self.parse_wcdma_tx_report,
+            0x4222: self.parse_wcdma_advanced_report,
+            0x4344: self.parse_wcdma_multi_carrier_eul,
+            0x4322: self.parse_wcdma_diversity_report,
+            0x435D: self.parse_wcdma_calibration_report,
         }
         
         self.no_process = {}
@@ -1,15 +1,42 @@
 #!/usr/bin/env python3
 
-from collections import namedtuple
 import binascii
-import calendar
 import logging
 import math
 import struct
 
 import scat.parsers.qualcomm.diagcmd as diagcmd
+import scat.parsers.qualcomm.diaglayouts as diaglayouts
 import scat.util as util
 
+# Record layouts by log code and packet version, see diaglayouts
+i = diagcmd.diag_log_get_wcdma_item_id
+c = diagcmd.diag_log_code_wcdma
+WCDMA_CELL_RESEL_3G_V0 = diaglayouts.register(i(c.LOG_WCDMA_SEARCH_CELL_RESELECTION_RANK_C), ('3g', 0), 'QcDiagWcdmaSearchCellReselectionV03G', '<HHbhbh',
+    'uarfcn psc rscp rank_rscp ecio rank_ecio')
+WCDMA_CELL_RESEL_3G_V1 = diaglayouts.register(i(c.LOG_WCDMA_SEARCH_CELL_RESELECTION_RANK_C), ('3g', 1), 'QcDiagWcdmaSearchCellReselectionV13G', '<HHbhbhb',
+    'uarfcn psc rscp rank_rscp ecio rank_ecio resel_status')
+WCDMA_CELL_RESEL_3G_V2 = diaglayouts.register(i(c.LOG_WCDMA_SEARCH_CELL_RESELECTION_RANK_C), ('3g', 2), 'WcdmaSearchCellReselectionV23G', '<HHbhbhbhhb',
+    'uarfcn psc rscp rank_rscp ecio rank_ecio resel_status hcs_priority h_value hcs_cell_qualify')
+WCDMA_CELL_RESEL_2G_V0 = diaglayouts.register(i(c.LOG_WCDMA_SEARCH_CELL_RESELECTION_RANK_C), ('2g', 0), 'QcDiagWcdmaSearchCellReselectionV02G', '<HHbh',
+    'arfcn bsic rssi rank')
+WCDMA_CELL_RESEL_2G_V1 = diaglayouts.register(i(c.LOG_WCDMA_SEARCH_CELL_RESELECTION_RANK_C), ('2g', 1), 'QcDiagWcdmaSearchCellReselectionV12G', '<HHbhb',
+    'arfcn bsic rssi rank resel_status')
+WCDMA_CELL_RESEL_2G_V2 = diaglayouts.register(i(c.LOG_WCDMA_SEARCH_CELL_RESELECTION_RANK_C), ('2g', 2), 'WcdmaSearchCellReselectionV22G', '<HHbhbhhb',
+    'arfcn bsic rssi rank resel_status hcs_priority h_value hcs_cell_qualify')
+WCDMA_RLC_DL_AM_SIGNALING_PDU = diaglayouts.register(i(c.LOG_WCDMA_RLC_DL_AM_SIGNALING_PDU_C), None, 'QcDiagWcdmaRlcDlAmSignalingPdu', '<BHH',
+    'lcid pdu_count pdu_size')
+WCDMA_RLC_DL_CIPHER_PDU = diaglayouts.register(i(c.LOG_WCDMA_RLC_DL_PDU_CIPHER_PACKET_C), None, 'QcDiagWcdmaDlRlcCipherPdu', '<BLBLL',
+    'rlc_id ck ciph_alg ciph_msg count_c')
+WCDMA_RLC_UL_CIPHER_PDU = diaglayouts.register(i(c.LOG_WCDMA_RLC_UL_PDU_CIPHER_PACKET_C), None, 'QcDiagWcdmaUlRlcCipherPdu', '<BLBL',
+    'rlc_id ck ciph_alg count_c')
+WCDMA_RRC_CELL_ID = diaglayouts.register(i(c.LOG_WCDMA_CELL_ID_C), None, 'QcDiagWcdmaRrcCellId', '<LL LH BB H 3s 3s LL',
+    'ul_uarfcn dl_uarfcn cell_id ura_id flags access psc mcc mnc lac rac')
+WCDMA_RRC_OTA = diaglayouts.register(i(c.LOG_WCDMA_SIGNALING_MSG_C), None, 'QcDiagWcdmaRrcOtaPacket', '<BBH',
+    'channel_type rbid len')
+del i, c
+
+
 class DiagWcdmaLogParser:
     def __init__(self, parent):
         self.parent = parent
@@ -25,19 +52,19 @@ class DiagWcdmaLogParser:
         c = diagcmd.diag_log_code_wcdma
         self.process = {
             # Layer 1
-            i(c.LOG_WCDMA_SEARCH_CELL_RESELECTION_RANK_C): lambda x, y, z: self.parse_wcdma_search_cell_reselection(x, y, z),
+            i(c.LOG_WCDMA_SEARCH_CELL_RESELECTION_RANK_C): self.parse_wcdma_search_cell_reselection,
 
             # Layer 2
-            i(c.LOG_WCDMA_RLC_DL_AM_SIGNALING_PDU_C): lambda x, y, z: self.parse_wcdma_rlc_dl_am_signaling_pdu(x, y, z), # WCDMA RLC DL AM Signaling PDU
-            i(c.LOG_WCDMA_RLC_UL_AM_SIGNALING_PDU_C): lambda x, y, z: self.parse_wcdma_rlc_ul_am_signaling_pdu(x, y, z), # WCDMA RLC UL AM Signaling PDU
-            i(c.LOG_WCDMA_RLC_UL_AM_CONTROL_PDU_LOG_C): lambda x, y, z: self.parse_wcdma_rlc_ul_am_control_pdu_log(x, y, z), # WCDMA RLC UL AM Control PDU Log
-            i(c.LOG_WCDMA_RLC_DL_AM_CONTROL_PDU_LOG_C): lambda x, y, z: self.parse_wcdma_rlc_dl_am_control_pdu_log(x, y, z), # WCDMA RLC DL AM Control PDU Log
-            i(c.LOG_WCDMA_RLC_DL_PDU_CIPHER_PACKET_C): lambda x, y, z: self.parse_wcdma_rlc_dl_pdu_cipher_packet(x, y, z), # WCDMA RLC DL PDU Cipher Packet
-            i(c.LOG_WCDMA_RLC_UL_PDU_CIPHER_PACKET_C): lambda x, y, z: self.parse_wcdma_rlc_ul_pdu_cipher_packet(x, y, z), # WCDMA RLC UL PDU Cipher Packet
+            i(c.LOG_WCDMA_RLC_DL_AM_SIGNALING_PDU_C): self.parse_wcdma_rlc_dl_am_signaling_pdu, # WCDMA RLC DL AM Signaling PDU
+            i(c.LOG_WCDMA_RLC_UL_AM_SIGNALING_PDU_C): self.parse_wcdma_rlc_ul_am_signaling_pdu, # WCDMA RLC UL AM Signaling PDU
+            i(c.LOG_WCDMA_RLC_UL_AM_CONTROL_PDU_LOG_C): self.parse_wcdma_rlc_ul_am_control_pdu_log, # WCDMA RLC UL AM Control PDU Log
+            i(c.LOG_WCDMA_RLC_DL_AM_CONTROL_PDU_LOG_C): self.parse_wcdma_rlc_dl_am_control_pdu_log, # WCDMA RLC DL AM Control PDU Log
+            i(c.LOG_WCDMA_RLC_DL_PDU_CIPHER_PACKET_C): self.parse_wcdma_rlc_dl_pdu_cipher_packet, # WCDMA RLC DL PDU Cipher Packet
+            i(c.LOG_WCDMA_RLC_UL_PDU_CIPHER_PACKET_C): self.parse_wcdma_rlc_ul_pdu_cipher_packet, # WCDMA RLC UL PDU Cipher Packet
 
             # RRC
-            i(c.LOG_WCDMA_CELL_ID_C): lambda x, y, z: self.parse_wcdma_cell_id(x, y, z),
-            i(c.LOG_WCDMA_SIGNALING_MSG_C): lambda x, y, z: self.parse_wcdma_rrc(x, y, z),
+            i(c.LOG_WCDMA_CELL_ID_C): self.parse_wcdma_cell_id,
+            i(c.LOG_WCDMA_SIGNALING_MSG_C): self.parse_wcdma_rrc,
         }
 
     def update_parameters(self, display_format, gsmtapv3):
@@ -58,18 +85,6 @@ class DiagWcdmaLogParser:
         num_gsm_cells = pkt_body[1] & 0x3f # lower 6b
         stdout = ''
 
-        cell_search_v0_3g = namedtuple('QcDiagWcdmaSearchCellReselectionV03G',
-            'uarfcn psc rscp rank_rscp ecio rank_ecio')
-        cell_search_v0_2g = namedtuple('QcDiagWcdmaSearchCellReselectionV02G',
-            'arfcn bsic rssi rank')
-        cell_search_v1_3g = namedtuple('QcDiagWcdmaSearchCellReselectionV13G',
-            'uarfcn psc rscp rank_rscp ecio rank_ecio resel_status')
-        cell_search_v1_2g = namedtuple('QcDiagWcdmaSearchCellReselectionV12G',
-            'arfcn bsic rssi rank resel_status')
-        cell_search_v2_3g = namedtuple('WcdmaSearchCellReselectionV23G',
-            'uarfcn psc rscp rank_rscp ecio rank_ecio resel_status hcs_priority h_value hcs_cell_qualify')
-        cell_search_v2_2g = namedtuple('WcdmaSearchCellReselectionV22G',
-            'arfcn bsic rssi rank resel_status hcs_priority h_value hcs_cell_qualify')
 
         if pkt_version not in (0, 1, 2):
             self.parent.logger.log(logging.WARNING, 'Unsupported WCDMA search cell reselection version {}'.format(pkt_version))
@@ -77,51 +92,61 @@ class DiagWcdmaLogParser:
             return None
 
         stdout += 'WCDMA Search Cell: {} 3G cells, {} 2G cells\n'.format(num_wcdma_cells, num_gsm_cells)
+        measurement = [] if self.parent and self.parent.structured_fields else None
         pos = 2
         if pkt_version == 2:
             pos += 5
 
         for i in range(num_wcdma_cells):
             if pkt_version == 0:
-                cell_3g = cell_search_v0_3g._make(struct.unpack('<HHbhbh', pkt_body[pos:pos+10]))
+                cell_3g = WCDMA_CELL_RESEL_3G_V0.unpack_from(pkt_body, pos)
                 pos += 10
             elif pkt_version == 1:
-                cell_3g = cell_search_v1_3g._make(struct.unpack('<HHbhbhb', pkt_body[pos:pos+11]))
+                cell_3g = WCDMA_CELL_RESEL_3G_V1.unpack_from(pkt_body, pos)
                 pos += 11
             elif pkt_version == 2:
-                cell_3g = cell_search_v2_3g._make(struct.unpack('<HHbhbhbhhb', pkt_body[pos:pos+16]))
+                cell_3g = WCDMA_CELL_RESEL_3G_V2.unpack_from(pkt_body, pos)
                 pos += 16
 
             stdout += 'WCDMA Search Cell: 3G Cell {}: UARFCN: {}, PSC: {:3d}, RSCP: {}, Ec/Io: {:.2f}\n'.format(i,
                     cell_3g.uarfcn, cell_3g.psc,
                     self.get_real_rscp(cell_3g.rscp), self.get_real_ecio(cell_3g.ecio))
+            if measurement is not None:
+                measurement.append({'type': 'wcdma_measurement', 'technology': 'WCDMA',
+                    'uarfcn': cell_3g.uarfcn, 'psc': cell_3g.psc,
+                    'rscp_dbm': self.get_real_rscp(cell_3g.rscp), 'ecio_db': self.get_real_ecio(cell_3g.ecio)})
 
         for i in range(num_gsm_cells):
             if pkt_version == 0:
-                cell_2g = cell_search_v0_2g._make(struct.unpack('<HHbh', pkt_body[pos:pos+7]))
+                cell_2g = WCDMA_CELL_RESEL_2G_V0.unpack_from(pkt_body, pos)
                 pos += 7
             elif pkt_version == 1:
-                cell_2g = cell_search_v1_2g._make(struct.unpack('<HHbhb', pkt_body[pos:pos+8]))
+                cell_2g = WCDMA_CELL_RESEL_2G_V1.unpack_from(pkt_body, pos)
                 pos += 8
             elif pkt_version == 2:
-                cell_2g = cell_search_v2_2g._make(struct.unpack('<HHbhbhhb', pkt_body[pos:pos+13]))
+                cell_2g = WCDMA_CELL_RESEL_2G_V2.unpack_from(pkt_body, pos)
                 pos += 13
 
             stdout += 'WCDMA Search Cell: 2G Cell {}: ARFCN: {}, RSSI: {:.2f}, Rank: {}'.format(i,
                     cell_2g.arfcn & 0xfff, cell_2g.rssi, cell_2g.rank)
+            if measurement is not None:
+                measurement.append({'type': 'gsm_measurement', 'technology': 'GSM',
+                    'arfcn': cell_2g.arfcn & 0xfff, 'rssi_dbm': cell_2g.rssi, 'rank': cell_2g.rank})
 
-        return {'stdout': stdout.rstrip(), 'ts': pkt_ts}
+        result = {'stdout': stdout.rstrip(), 'ts': pkt_ts}
+        if measurement:
+            result['measurement'] = measurement
+        return result
 
     # WCDMA Layer 2
     def parse_wcdma_rlc_dl_am_signaling_pdu(self, pkt_header, pkt_body, args):
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        item_struct = namedtuple('QcDiagWcdmaRlcDlAmSignalingPdu', 'lcid pdu_count pdu_size')
         num_packets = pkt_body[0]
         packets = []
 
         pos = 1
         for x in range(num_packets):
-            item = item_struct._make(struct.unpack('<BHH', pkt_body[pos:pos+5]))
+            item = WCDMA_RLC_DL_AM_SIGNALING_PDU.unpack_from(pkt_body, pos)
             pos += 5
             actual_pdu_size = min(math.ceil(item.pdu_size / 8), len(pkt_body) - pos)
             rlc_pdu = pkt_body[pos:pos+actual_pdu_size]
@@ -185,10 +210,9 @@ class DiagWcdmaLogParser:
         num_packets = struct.unpack('<H', pkt_body[0:2])[0]
         pos = 2
         stdout = ''
-        item_struct = namedtuple('QcDiagWcdmaDlRlcCipherPdu', 'rlc_id ck ciph_alg ciph_msg count_c')
 
         for x in range(num_packets):
-            item = item_struct._make(struct.unpack('<BLBLL', pkt_body[pos:pos+14]))
+            item = WCDMA_RLC_DL_CIPHER_PDU.unpack_from(pkt_body, pos)
             pos += 14
             if item.ciph_alg == 0xff:
                 continue
@@ -202,10 +226,9 @@ class DiagWcdmaLogParser:
         num_packets = struct.unpack('<H', pkt_body[0:2])[0]
         pos = 2
         stdout = ''
-        item_struct = namedtuple('QcDiagWcdmaUlRlcCipherPdu', 'rlc_id ck ciph_alg count_c')
 
         for x in range(num_packets):
-            item = item_struct._make(struct.unpack('<BLBL', pkt_body[pos:pos+10]))
+            item = WCDMA_RLC_UL_CIPHER_PDU.unpack_from(pkt_body, pos)
             pos += 10
             if item.ciph_alg == 0xff:
                 continue
@@ -220,10 +243,9 @@ class DiagWcdmaLogParser:
         radio_id = 0
         if args is not None and 'radio_id' in args:
             radio_id = args['radio_id']
-        item_struct = namedtuple('QcDiagWcdmaRrcCellId', 'ul_uarfcn dl_uarfcn cell_id ura_id flags access psc mcc mnc lac rac')
         if len(pkt_body) < 32:
             pkt_body += b'\x00' * (32 - len(pkt_body))
-        item = item_struct._make(struct.unpack('<LL LH BB H 3s 3s LL', pkt_body[0:32]))
+        item = WCDMA_RRC_CELL_ID.unpack_from(pkt_body)
 
         psc = item.psc >> 4
         # UARFCN UL, UARFCN DL, CID, URA_ID, FLAGS, PSC, PLMN_ID, LAC, RAC
@@ -252,8 +274,7 @@ class DiagWcdmaLogParser:
             'ts': pkt_ts}
 
     def parse_wcdma_rrc(self, pkt_header, pkt_body, args):
-        item_struct = namedtuple('QcDiagWcdmaRrcOtaPacket', 'channel_type rbid len')
-        item = item_struct._make(struct.unpack('<BBH', pkt_body[0:4]))
+        item = WCDMA_RRC_OTA.unpack_from(pkt_body)
         msg_content = b''
         radio_id = 0
         if args is not None and 'radio_id' in args:
@@ -413,7 +434,7 @@ class DiagWcdmaLogParser:
             return None
 
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
-        ts_sec = calendar.timegm(pkt_ts.timetuple())
+        ts_sec = pkt_ts.us // 1000000
         ts_usec = pkt_ts.microsecond
 
         gsmtap_hdr = util.create_gsmtap_header(
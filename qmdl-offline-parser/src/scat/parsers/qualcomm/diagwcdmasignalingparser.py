@@ -20,16 +20,16 @@ class DiagWcdmaSignalingParser:
         
         # WCDMA signaling message IDs
         self.process = {
-            0x412F: lambda x, y, z: self.parse_wcdma_signaling_messages(x, y, z),
-            0x4135: lambda x, y, z: self.parse_wcdma_cell_id(x, y, z),
-            0x4342: lambda x, y, z: self.parse_wcdma_search_cell_reselection(x, y, z),
-            0x423F: lambda x, y, z: self.parse_wcdma_agc(x, y, z),
-            0x421C: lambda x, y, z: self.parse_wcdma_finger_info(x, y, z),
-            0x41D3: lambda x, y, z: self.parse_wcdma_tx_agc_adj(x, y, z),
-            0x4345: lambda x, y, z: self.parse_wcdma_rrc_states(x, y, z),
-            0x4176: lambda x, y, z: self.parse_wcdma_rx_diversity(x, y, z),
-            0x41B2: lambda x, y, z: self.parse_wcdma_compressed_mode(x, y, z),
-            0x19B5: lambda x, y, z: self.parse_wcdma_rrc_ota_message(x, y, z),
+            0x412F: self.parse_wcdma_signaling_messages,
+            0x4135: self.parse_wcdma_cell_id,
+            0x4342: self.parse_wcdma_search_cell_reselection,
+            0x423F: self.parse_wcdma_agc,
+            0x421C: self.parse_wcdma_finger_info,
+            0x41D3: self.parse_wcdma_tx_agc_adj,
+            0x4345: self.parse_wcdma_rrc_states,
+            0x4176: self.parse_wcdma_rx_diversity,
+            0x41B2: self.parse_wcdma_compressed_mode,
+            0x19B5: self.parse_wcdma_rrc_ota_message,
         }
         
         self.no_process = {}
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# coding: utf8
+# SPDX-License-Identifier: GPL-2.0-or-later
+"""
+ParallelDecoder Module
+
+Decodes a single large dump with a pool of worker processes.
+The frames of the dump (taken from its packet index) are cut into chunks at frame
+boundaries, every worker decodes whole chunks with its own QualcommParser instance,
+and the parse results are handed back to the main process in original frame order,
+where they pass through postprocess_parse_result and reach the writers. The event
+statistics, CRC counters and decoder profile of every chunk are merged into those of
+the main parser.
+
+Decoders keep some state between frames: the last serving cell caches of the parent
+parser (gsm_last_*, umts_last_*, lte_last_*) and the RRC segment reassembly buffers
+of the LTE and NR log parsers. Before decoding a chunk, a worker resets its parser
+and silently replays a warm-up set of earlier frames: the last frames preceding the
+chunk (overlap window, covering segment reassembly) and the last few frames of every
+log ID updating the serving cell caches.
+"""
+
+from array import array
+from collections import deque
+import mmap
+import multiprocessing
+
+from scat.parsers.qualcomm import diagcmd
+
+CHUNK_SIZE = 0x1000000
+OVERLAP_FRAMES = 256
+STATE_REPLAY_FRAMES = 4
+
+def _state_log_ids():
+    gsm = diagcmd.diag_log_get_gsm_item_id
+    wcdma = diagcmd.diag_log_get_wcdma_item_id
+    lte = diagcmd.diag_log_get_lte_item_id
+    return frozenset((
+        gsm(diagcmd.diag_log_code_gsm.LOG_GSM_L1_FCCH_ACQUISITION_C),
+        gsm(diagcmd.diag_log_code_gsm.LOG_GSM_L1_SCH_ACQUISITION_C),
+        gsm(diagcmd.diag_log_code_gsm.LOG_GSM_RR_CELL_INFORMATION_C),
+        gsm(diagcmd.diag_log_code_gsm.LOG_GSM_DSDS_L1_FCCH_ACQUISITION_C),
+        gsm(diagcmd.diag_log_code_gsm.LOG_GSM_DSDS_L1_SCH_ACQUISITION_C),
+        gsm(diagcmd.diag_log_code_gsm.LOG_GSM_DSDS_RR_CELL_INFORMATION_C),
+        wcdma(diagcmd.diag_log_code_wcdma.LOG_WCDMA_CELL_ID_C),
+        lte(diagcmd.diag_log_code_lte.LOG_LTE_ML1_SERVING_CELL_INFO),
+        lte(diagcmd.diag_log_code_lte.LOG_LTE_RRC_SERVING_CELL_INFO),
+    ))
+
+# Log IDs updating the serving cell caches of QualcommParser
+STATE_LOG_IDS = _state_log_ids()
+
+# Parameters only meaningful for the main process
+_main_only_parameters = ('log_level', 'jobs', 'index', 'log-ids', 'start-time', 'end-time', 'profile')
+
+_worker_parser = None
+_worker_fname = None
+_worker_file = None
+_worker_mapping = None
+
+def _init_worker(parser_class, params, log_level):
+    global _worker_parser
+    _worker_parser = parser_class()
+    _worker_parser.logger.setLevel(log_level)
+    _worker_parser.set_parameter(params)
+
+def _map_dump(fname):
+    global _worker_fname, _worker_file, _worker_mapping
+    if _worker_fname == fname:
+        return _worker_mapping
+    if _worker_mapping is not None:
+        _worker_mapping.close()
+        _worker_file.close()
+    _worker_file = open(fname, 'rb')
+    _worker_mapping = mmap.mmap(_worker_file.fileno(), 0, access=mmap.ACCESS_READ)
+    _worker_fname = fname
+    return _worker_mapping
+
+def _decode_chunk(task):
+    fname, dump_type, warm_offsets, warm_lengths, offsets, lengths = task
+    parser = _worker_parser
+    mapping = _map_dump(fname)
+    results = []
+
+    parser.reset_state()
+    with memoryview(mapping) as view:
+        for i in range(len(warm_offsets)):
+            pkt = view[warm_offsets[i]:warm_offsets[i] + warm_lengths[i]]
+            parser.parse_indexed_frame(dump_type, pkt)
+            del pkt
+        # Statistics only cover the frames of the chunk, merged in the main process
+        parser.event_statistics.reset()
+        parser.crc_verifier.reset()
+        if parser.profiler is not None:
+            parser.profiler.reset()
+
+        for i in range(len(offsets)):
+            pkt = view[offsets[i]:offsets[i] + lengths[i]]
+            parse_result = parser.parse_indexed_frame(dump_type, pkt)
+            del pkt
+            if parse_result is not None:
+                results.append(parse_result)
+    profile = parser.profiler.used_stats() if parser.profiler is not None else None
+    return results, parser.event_statistics, parser.crc_verifier.counts(), profile
+
+class ParallelDecoder:
+    """
+    Decodes the frames of an indexed dump in worker processes, keeping the frame order.
+    """
+    def __init__(self, parser, jobs, chunk_size=CHUNK_SIZE, overlap=OVERLAP_FRAMES):
+        self.parser = parser
+        self.jobs = jobs
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.logger = parser.logger
+
+    def _tasks(self, fname, index, positions):
+        lengths = index.lengths
+        cmds = index.cmds
+        log_ids = index.log_ids
+
+        recent = deque(maxlen=self.overlap)
+        state = {}
+        chunk = None
+        chunk_bytes = 0
+
+        for i in positions:
+            if chunk is None:
+                warm = set(recent)
+                for d in state.values():
+                    warm.update(d)
+                warm = sorted(warm)
+                chunk = array('Q')
+                chunk_bytes = 0
+
+            chunk.append(i)
+            chunk_bytes += lengths[i]
+
+            recent.append(i)
+            if cmds[i] == diagcmd.DIAG_LOG_F and log_ids[i] in STATE_LOG_IDS:
+                d = state.get(log_ids[i])
+                if d is None:
+                    d = state[log_ids[i]] = deque(maxlen=STATE_REPLAY_FRAMES)
+                d.append(i)
+
+            if chunk_bytes >= self.chunk_size:
+                yield self._make_task(fname, index, warm, chunk)
+                chunk = None
+
+        if chunk is not None:
+            yield self._make_task(fname, index, warm, chunk)
+
+    def _make_task(self, fname, index, warm, chunk):
+        offsets = index.offsets
+        lengths = index.lengths
+        return (fname, index.dump_type,
+            array('Q', (offsets[i] for i in warm)), array(lengths.typecode, (lengths[i] for i in warm)),
+            array('Q', (offsets[i] for i in chunk)), array(lengths.typecode, (lengths[i] for i in chunk)))
+
+    def run(self, fname, index, positions=None):
+        """Decodes the frames of fname and passes the results to the parser in frame order.
+
+        Parameters:
+        fname (str): filename of the uncompressed dump
+        index (QmdlIndex): packet index of the dump
+        positions (iterable): index positions to decode, None for all frames
+        """
+        if positions is None:
+            positions = range(len(index))
+
+        params = {k: v for k, v in self.parser.parameters.items() if k not in _main_only_parameters}
+        # Workers profile their decoders, the report is written by the main process
+        params['profile'] = self.parser.profiler is not None
+        pool = multiprocessing.Pool(self.jobs, initializer=_init_worker,
+            initargs=(type(self.parser), params, self.logger.getEffectiveLevel()))
+        # Bounded number of chunks in flight, results are consumed in submission order
+        pending = deque()
+        try:
+            for task in self._tasks(fname, index, positions):
+                pending.append(pool.apply_async(_decode_chunk, (task, )))
+                if len(pending) >= self.jobs * 2:
+                    self._consume(pending.popleft().get())
+            while len(pending) > 0:
+                self._consume(pending.popleft().get())
+            pool.close()
+        except KeyboardInterrupt:
+            pool.terminate()
+            return
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+
+    def _consume(self, chunk_result):
+        results, event_statistics, crc_counts, profile = chunk_result
+        for parse_result in results:
+            self.parser.postprocess_parse_result(parse_result)
+        self.parser.event_statistics.merge(event_statistics)
+        self.parser.crc_verifier.merge(crc_counts)
+        if profile is not None:
+            self.parser.profiler.merge(profile)
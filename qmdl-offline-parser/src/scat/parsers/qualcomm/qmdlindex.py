@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# coding: utf8
+# SPDX-License-Identifier: GPL-2.0-or-later
+"""
+QmdlIndex Module
+
+Builds and loads the packet index sidecar (.qidx) of QMDL, DLF and HDF dumps.
+For every frame the index records the byte offset, length, DIAG command, log ID and
+raw 64-bit QXDM timestamp in fixed-width binary columns. A dump is scanned once to
+build the index; later runs seek by time and iterate over selected log IDs directly.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+import logging
+import os
+import struct
+import sys
+
+import scat.framing as framing
+import scat.util as util
+from scat.parsers.qualcomm import diagcmd
+
+DUMP_TYPE_QMDL = 0
+DUMP_TYPE_DLF = 1
+DUMP_TYPE_HDF = 2
+
+QIDX_MAGIC = b'QIDX'
+QIDX_VERSION = 1
+QIDX_SUFFIX = '.qidx'
+
+# magic, version, dump type, source size, source mtime (ns), number of frames
+qidx_header = struct.Struct('<4sHB1xQQQ')
+
+# Column layout following the header: (attribute, array typecode)
+qidx_columns = (
+    ('offsets', 'Q'),
+    ('lengths', 'L'),
+    ('cmds', 'B'),
+    ('log_ids', 'H'),
+    ('timestamps', 'Q'),
+)
+
+def _column(typecode):
+    # array('L') is 8 bytes wide on some platforms, the on-disk width is fixed
+    if typecode == 'L' and array('L').itemsize != 4:
+        typecode = 'I'
+    return array(typecode)
+
+def index_filename(dump_filename):
+    return dump_filename + QIDX_SUFFIX
+
+def dump_type_from_filename(fname):
+    if fname.find('.dlf') > 0:
+        return DUMP_TYPE_DLF
+    elif fname.find('.hdf') > 0:
+        return DUMP_TYPE_HDF
+    return DUMP_TYPE_QMDL
+
+qxdm_log_peek = struct.Struct('<HQ')
+
+class QmdlIndex:
+    """
+    Per-frame packet index of a single dump file.
+    """
+    def __init__(self, dump_type=DUMP_TYPE_QMDL, source_size=0, source_mtime=0):
+        self.dump_type = dump_type
+        self.source_size = source_size
+        self.source_mtime = source_mtime
+        for name, typecode in qidx_columns:
+            setattr(self, name, _column(typecode))
+        self._ts_envelope = None
+        self._postings = None
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def append(self, offset, length, cmd, log_id, timestamp):
+        self.offsets.append(offset)
+        self.lengths.append(length)
+        self.cmds.append(cmd)
+        self.log_ids.append(log_id)
+        self.timestamps.append(timestamp)
+
+    def save(self, filename):
+        with open(filename, 'wb') as f:
+            f.write(qidx_header.pack(QIDX_MAGIC, QIDX_VERSION, self.dump_type,
+                self.source_size, self.source_mtime, len(self)))
+            for name, typecode in qidx_columns:
+                col = getattr(self, name)
+                if sys.byteorder == 'big':
+                    col = array(col.typecode, col)
+                    col.byteswap()
+                col.tofile(f)
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'rb') as f:
+            header = f.read(qidx_header.size)
+            if len(header) < qidx_header.size:
+                raise ValueError('{} is truncated'.format(filename))
+            magic, ver, dump_type, source_size, source_mtime, num_frames = qidx_header.unpack(header)
+            if magic != QIDX_MAGIC or ver != QIDX_VERSION:
+                raise ValueError('{} is not a supported packet index'.format(filename))
+
+            index = cls(dump_type, source_size, source_mtime)
+            for name, typecode in qidx_columns:
+                col = getattr(index, name)
+                try:
+                    col.fromfile(f, num_frames)
+                except EOFError:
+                    raise ValueError('{} is truncated'.format(filename))
+                if sys.byteorder == 'big':
+                    col.byteswap()
+        return index
+
+    def matches_source(self, fname):
+        st = os.stat(fname)
+        return self.source_size == st.st_size and self.source_mtime == st.st_mtime_ns
+
+    def frame(self, i):
+        return (self.offsets[i], self.lengths[i])
+
+    def _envelope(self):
+        # Running maximum of the timestamps. QXDM timestamps are almost, but not
+        # strictly monotonic, the envelope is monotonic and can be bisected.
+        if self._ts_envelope is None:
+            env = array('Q')
+            cur = 0
+            for ts in self.timestamps:
+                if ts > cur:
+                    cur = ts
+                env.append(cur)
+            self._ts_envelope = env
+        return self._ts_envelope
+
+    def seek_time(self, timestamp):
+        """Returns the position of the first frame at or after the raw QXDM timestamp."""
+        return bisect_left(self._envelope(), timestamp)
+
+    def _log_id_postings(self):
+        if self._postings is None:
+            postings = {}
+            cmds = self.cmds
+            for i, log_id in enumerate(self.log_ids):
+                if cmds[i] != diagcmd.DIAG_LOG_F:
+                    continue
+                p = postings.get(log_id)
+                if p is None:
+                    p = postings[log_id] = array('Q')
+                p.append(i)
+            self._postings = postings
+        return self._postings
+
+    def select(self, log_ids=None, start_ts=None, end_ts=None):
+        """Yields positions of the frames matching the log IDs and the time window.
+
+        Parameters:
+        log_ids (iterable): DIAG log IDs to return, None for all frames
+        start_ts (int): raw QXDM timestamp of the window start, None for no limit
+        end_ts (int): raw QXDM timestamp of the window end (inclusive), None for no limit
+        """
+        lo = 0
+        hi = len(self)
+        if start_ts is not None:
+            lo = self.seek_time(start_ts)
+        if end_ts is not None:
+            hi = bisect_right(self._envelope(), end_ts)
+        timestamps = self.timestamps
+
+        def in_window(i):
+            ts = timestamps[i]
+            if ts == 0:
+                return True
+            if start_ts is not None and ts < start_ts:
+                return False
+            if end_ts is not None and ts > end_ts:
+                return False
+            return True
+
+        if log_ids is None:
+            for i in range(lo, hi):
+                if in_window(i):
+                    yield i
+            return
+
+        postings = self._log_id_postings()
+        candidates = []
+        for log_id in set(log_ids):
+            p = postings.get(log_id)
+            if p is None:
+                continue
+            candidates.extend(p[bisect_left(p, lo):bisect_left(p, hi)])
+        candidates.sort()
+        for i in candidates:
+            if in_window(i):
+                yield i
+
+# Escaped bytes covering the multi-radio prefix and the DIAG_LOG_F header
+DIAG_PEEK_SIZE = 50
+
+def peek_diag_header(frame, hdlc_encoded):
+    # Returns (cmd, log_id, timestamp) of a DIAG frame from its first bytes only.
+    # Frames wrapped in DIAG_MULTI_RADIO_CMD_F report the nested command.
+    head = frame[0:DIAG_PEEK_SIZE]
+    if hdlc_encoded:
+        head = util.unwrap(head)
+    if len(head) > 0 and head[0] == diagcmd.DIAG_MULTI_RADIO_CMD_F:
+        head = head[8:]
+    if len(head) < 1:
+        return (0, 0, 0)
+    cmd = head[0]
+    if cmd == diagcmd.DIAG_LOG_F and len(head) >= 16:
+        log_id, ts = qxdm_log_peek.unpack_from(head, 6)
+        return (cmd, log_id, ts)
+    return (cmd, 0, 0)
+
+def _scan_qmdl(index, buf):
+    for start, stop in framing.HdlcFramer().iter_spans(buf):
+        if stop - start >= 3:
+            cmd, log_id, ts = peek_diag_header(buf[start:min(stop, start + DIAG_PEEK_SIZE)], True)
+            index.append(start, stop - start, cmd, log_id, ts)
+
+def _scan_dlf(index, buf):
+    # DLF record: length (2B, including itself), log ID (2B), timestamp (8B), body
+    for start, stop in framing.DlfFramer().iter_spans(buf):
+        if stop - start >= 12:
+            log_id, ts = qxdm_log_peek.unpack_from(buf, start + 2)
+        else:
+            log_id, ts = (0, 0)
+        index.append(start, stop - start, diagcmd.DIAG_LOG_F, log_id, ts)
+
+def _scan_hdf(index, buf):
+    # HDF packet: 0x10 0x00, length (2B), length (2B), log ID (2B), timestamp (8B), body
+    for start, stop in framing.HdfFramer().iter_spans(buf):
+        if stop - start >= 16:
+            log_id, ts = qxdm_log_peek.unpack_from(buf, start + 6)
+        else:
+            log_id, ts = (0, 0)
+        index.append(start, stop - start, diagcmd.DIAG_LOG_F, log_id, ts)
+
+def build_index(buf, dump_type, source_size=0, source_mtime=0):
+    """Scans a whole dump and returns its QmdlIndex.
+
+    Parameters:
+    buf (bytes-like): dump content, usually a memory mapping supporting find()
+    dump_type (int): one of DUMP_TYPE_QMDL, DUMP_TYPE_DLF, DUMP_TYPE_HDF
+    """
+    index = QmdlIndex(dump_type, source_size, source_mtime)
+    if dump_type == DUMP_TYPE_DLF:
+        _scan_dlf(index, buf)
+    elif dump_type == DUMP_TYPE_HDF:
+        _scan_hdf(index, buf)
+    else:
+        _scan_qmdl(index, buf)
+    return index
+
+def load_or_build_index(fname, buf, save=False, logger=None):
+    """Loads the sidecar index of fname if it is present and up to date, otherwise scans buf.
+
+    Parameters:
+    fname (str): dump filename, the sidecar is fname + '.qidx'
+    buf (bytes-like): dump content used when the index needs to be built
+    save (bool): write a freshly built index to the sidecar file
+    """
+    if logger is None:
+        logger = logging.getLogger('scat.qmdlindex')
+    qidx_fname = index_filename(fname)
+    dump_type = dump_type_from_filename(fname)
+
+    if os.path.exists(qidx_fname):
+        try:
+            index = QmdlIndex.load(qidx_fname)
+            if index.dump_type == dump_type and index.matches_source(fname):
+                logger.log(logging.INFO, 'Using packet index {} ({} frames)'.format(qidx_fname, len(index)))
+                return index
+            logger.log(logging.INFO, 'Packet index {} is stale, rebuilding'.format(qidx_fname))
+        except (ValueError, OSError) as e:
+            logger.log(logging.WARNING, 'Cannot load packet index {}: {}'.format(qidx_fname, e))
+
+    st = os.stat(fname)
+    index = build_index(buf, dump_type, st.st_size, st.st_mtime_ns)
+    logger.log(logging.INFO, 'Indexed {} frames of {}'.format(len(index), fname))
+    if save:
+        try:
+            index.save(qidx_fname)
+            logger.log(logging.INFO, 'Packet index written to {}'.format(qidx_fname))
+        except OSError as e:
+            logger.log(logging.WARNING, 'Cannot write packet index {}: {}'.format(qidx_fname, e))
+    return index
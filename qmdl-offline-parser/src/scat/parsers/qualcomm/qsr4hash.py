@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# coding: utf8
+# SPDX-License-Identifier: GPL-2.0-or-later
+"""
+Qsr4Hash Module
+
+Loads QSR4 message hash databases (QDB) and keeps the parsed tables in a
+binary sidecar cache (.qsr4c). Parsing a QDB means decompressing it and
+splitting every line of its Content, MtraceContent and QtraceStrContent
+sections; the cache stores the result as a sorted hash column, one column
+per record field and a deduplicated string table. It is memory mapped on
+later runs, and a record is only built when its hash is looked up.
+
+The cache is keyed by the QDB UUID and the SHA-1 of the QDB file, a cache
+of another or modified QDB is rebuilt.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+import hashlib
+import io
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import uuid
+import zlib
+
+QSR4C_MAGIC = b'QS4C'
+QSR4C_VERSION = 1
+QSR4C_SUFFIX = '.qsr4c'
+
+Qsr4Content = namedtuple('Qsr4Content', 'subsys_mask ssid line file string')
+Qsr4MtraceContent = namedtuple('Qsr4MtraceContent', 'line level client file tag string')
+
+# Tables of a QDB: (attribute, record type or None for plain strings, field kinds)
+# Field kinds: 'i' integer (stored as int64), 's' string (stored as uint32 string ID)
+qsr4_tables = (
+    ('content', Qsr4Content, 'iiiss'),
+    ('mtrace_content', Qsr4MtraceContent, 'ssssss'),
+    ('qtrace_str_content', None, 's'),
+)
+
+# magic, version, QDB UUID, SHA-1 of the QDB file, number of strings, string blob size
+qsr4c_header = struct.Struct('<4sH2x16s20sLQ')
+# number of entries of a table
+qsr4c_table_header = struct.Struct('<Q')
+
+tag_oneline_re = re.compile(r'\<(\w*)\>\s*([\w\-=.]*)\s*\<\\(\w*)\>')
+tag_open_re = re.compile(r'^\<(\w*)\>$')
+tag_close_re = re.compile(r'^\<\\(\w*)\>$')
+
+def cache_filename(qdb_filename):
+    return qdb_filename + QSR4C_SUFFIX
+
+def _typecode(kind):
+    return 'q' if kind == 'i' else 'L'
+
+def _array(typecode):
+    # array('L') is 8 bytes wide on some platforms, the on-disk width is fixed
+    if typecode == 'L' and array('L').itemsize != 4:
+        typecode = 'I'
+    return array(typecode)
+
+def _pad(size):
+    return -size % 8
+
+class Qsr4Table:
+    """
+    Read-only hash to record mapping of a QDB table.
+
+    Backed by plain dicts while the QDB is parsed, or by the sorted columns
+    of a cache file; records of the latter are built on first lookup.
+    """
+    def __init__(self, record=None, kinds='s', hashes=None, columns=None, strings=None):
+        self.record = record
+        self.kinds = kinds
+        self.hashes = hashes if hashes is not None else []
+        self.columns = columns if columns is not None else [[] for _ in kinds]
+        self.strings = strings
+        self.entries = {}
+
+    @classmethod
+    def from_dict(cls, record, kinds, entries):
+        table = cls(record, kinds)
+        table.entries = entries
+        table.hashes = sorted(entries)
+        return table
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def __iter__(self):
+        return iter(self.hashes)
+
+    def _find(self, key):
+        i = bisect_left(self.hashes, key)
+        if i < len(self.hashes) and self.hashes[i] == key:
+            return i
+        return -1
+
+    def _build(self, i):
+        values = []
+        for kind, column in zip(self.kinds, self.columns):
+            if kind == 'i':
+                values.append(column[i])
+            else:
+                values.append(self.strings[column[i]])
+        if self.record is None:
+            return values[0]
+        return self.record._make(values)
+
+    def get(self, key, default=None):
+        entry = self.entries.get(key)
+        if entry is None:
+            if self.strings is None:
+                return default
+            i = self._find(key)
+            if i < 0:
+                return default
+            entry = self._build(i)
+            self.entries[key] = entry
+        return entry
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        entry = self.get(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry
+
+    def items(self):
+        for key in self.hashes:
+            yield key, self[key]
+
+
+class Qsr4StringTable:
+    """
+    Strings of a cache file, decoded on access.
+    """
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __getitem__(self, i):
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], 'utf-8')
+
+
+class Qsr4Hash:
+    """
+    Parsed tables of a QSR4 hash database.
+    """
+    def __init__(self, qdb_uuid=None, digest=b''):
+        self.uuid = qdb_uuid
+        self.digest = digest
+        self.mapping = None
+        for name, record, kinds in qsr4_tables:
+            setattr(self, name, Qsr4Table(record, kinds))
+
+    def close(self):
+        # The mapping is released once the column views of the tables are gone
+        for name, record, kinds in qsr4_tables:
+            setattr(self, name, Qsr4Table(record, kinds))
+        self.mapping = None
+
+    def save(self, filename):
+        string_ids = {}
+        string_offsets = _array('L')
+        string_offsets.append(0)
+        blob = io.BytesIO()
+
+        def string_id(s):
+            i = string_ids.get(s)
+            if i is None:
+                i = len(string_ids)
+                string_ids[s] = i
+                blob.write(s.encode('utf-8'))
+                string_offsets.append(blob.tell())
+            return i
+
+        sections = []
+        for name, record, kinds in qsr4_tables:
+            table = getattr(self, name)
+            hashes = array('Q', table.hashes)
+            columns = [_array(_typecode(kind)) for kind in kinds]
+            for key in table.hashes:
+                entry = table[key]
+                values = (entry, ) if record is None else entry
+                for kind, column, value in zip(kinds, columns, values):
+                    column.append(value if kind == 'i' else string_id(value))
+            sections.append((hashes, columns))
+
+        blob = blob.getvalue()
+        # Written to a temporary file and renamed over the cache: processes
+        # mapping the previous cache keep its inode instead of seeing it truncated
+        f = tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(filename)),
+            prefix=os.path.basename(filename) + '.', suffix='.tmp', delete=False)
+        try:
+            with f:
+                f.write(qsr4c_header.pack(QSR4C_MAGIC, QSR4C_VERSION, self.uuid.bytes, self.digest,
+                    len(string_ids), len(blob)))
+                self._write_array(f, string_offsets)
+                f.write(blob)
+                f.write(b'\x00' * _pad(len(blob)))
+                for hashes, columns in sections:
+                    f.write(qsr4c_table_header.pack(len(hashes)))
+                    for col in [hashes] + columns:
+                        self._write_array(f, col)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(f.name, filename)
+        except BaseException:
+            try:
+                os.remove(f.name)
+            except OSError:
+                pass
+            raise
+
+    @staticmethod
+    def _write_array(f, col):
+        if sys.byteorder == 'big':
+            col = array(col.typecode, col)
+            col.byteswap()
+        col.tofile(f)
+        f.write(b'\x00' * _pad(len(col) * col.itemsize))
+
+    @classmethod
+    def load(cls, filename):
+        """Maps a cache file, the tables read their records from the mapping on lookup."""
+        with open(filename, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls._from_buffer(mapping, filename)
+
+    @classmethod
+    def _from_buffer(cls, mapping, filename):
+        view = memoryview(mapping)
+        pos = 0
+
+        def column(typecode, count):
+            nonlocal pos
+            itemsize = _array(typecode).itemsize
+            end = pos + count * itemsize
+            if end > len(view):
+                raise ValueError('{} is truncated'.format(filename))
+            if sys.byteorder == 'big':
+                col = _array(typecode)
+                col.frombytes(view[pos:end])
+                col.byteswap()
+            else:
+                col = view[pos:end].cast(_array(typecode).typecode)
+            pos = end + _pad(count * itemsize)
+            return col
+
+        if len(view) < qsr4c_header.size:
+            raise ValueError('{} is truncated'.format(filename))
+        magic, ver, uuid_bytes, digest, num_strings, blob_size = qsr4c_header.unpack_from(view)
+        if magic != QSR4C_MAGIC or ver != QSR4C_VERSION:
+            raise ValueError('{} is not a supported QSR4 hash cache'.format(filename))
+        pos = qsr4c_header.size
+
+        qdb = cls(uuid.UUID(bytes=uuid_bytes), digest)
+        qdb.mapping = mapping
+        offsets = column('L', num_strings + 1)
+        if pos + blob_size > len(view):
+            raise ValueError('{} is truncated'.format(filename))
+        strings = Qsr4StringTable(offsets, view[pos:pos + blob_size])
+        pos += blob_size + _pad(blob_size)
+
+        for name, record, kinds in qsr4_tables:
+            (num_entries, ) = qsr4c_table_header.unpack_from(view, pos)
+            pos += qsr4c_table_header.size
+            hashes = column('Q', num_entries)
+            columns = [column(_typecode(kind), num_entries) for kind in kinds]
+            setattr(qdb, name, Qsr4Table(record, kinds, hashes, columns, strings))
+        return qdb
+
+
+def read_qdb(filename):
+    """Returns the UUID, SHA-1 digest and zlib compressed body of a QDB file."""
+    with open(filename, 'rb') as qsr4_file:
+        data = qsr4_file.read()
+    if data[0:4] != b'\x7fQDB':
+        raise ValueError('{} is not a valid QSR4 hash file: magic does not match'.format(filename))
+    return uuid.UUID(bytes=data[4:20]), hashlib.sha1(data).digest(), data[64:]
+
+def parse_qdb(qdb_uuid, digest, zlib_content):
+    """Decompresses and parses the body of a QDB file."""
+    try:
+        content = zlib.decompress(zlib_content)
+    except zlib.error as e:
+        raise ValueError('Error while decompressing zlib content: {}'.format(e))
+
+    qsr4_content = {}
+    qsr4_mtrace_content = {}
+    qsr4_qtrace_str_content = {}
+    mode = 0
+
+    for l in io.BytesIO(content):
+        l = l.decode(errors='backslashreplace').strip()
+
+        if not l or l[0] == '#':
+            continue
+        is_tag_oneline = tag_oneline_re.match(l)
+        if is_tag_oneline:
+            # GUID, Version and Baseline tags
+            continue
+
+        is_tag_open = tag_open_re.match(l)
+        is_tag_close = tag_close_re.match(l)
+        if is_tag_open:
+            tag = is_tag_open.groups()[0]
+            if tag == 'Content':
+                mode = 1
+            elif tag == 'MtraceContent':
+                mode = 2
+            elif tag == 'QtraceStrContent':
+                mode = 3
+            else:
+                raise ValueError('Tag should be one of Content, MtraceContent, QtraceStrContent')
+        elif is_tag_close:
+            tag = is_tag_close.groups()[0]
+            if tag == 'Content':
+                if mode != 1:
+                    raise ValueError('Open and close tag mismatch')
+            elif tag == 'MtraceContent':
+                if mode != 2:
+                    raise ValueError('Open and close tag mismatch')
+            elif tag == 'QtraceStrContent':
+                if mode != 3:
+                    raise ValueError('Open and close tag mismatch')
+            mode = 0
+        else:
+            if mode == 1:
+                content_str = l.split(':', 5)
+                content_str[1] = int(content_str[1])
+                content_str[2] = int(content_str[2])
+                content_str[3] = int(content_str[3])
+                qsr4_content[int(content_str[0])] = Qsr4Content._make(content_str[1:])
+            elif mode == 2:
+                # line: pure int, "int|hex", "|hex"
+                # tag: pure str, "str|hex", "str|"
+                mtrace_str = l.split(':', 6)
+                qsr4_mtrace_content[int(mtrace_str[0])] = Qsr4MtraceContent._make(mtrace_str[1:])
+            elif mode == 3:
+                qtrace_str = l.split(':', 1)
+                qsr4_qtrace_str_content[int(qtrace_str[0])] = qtrace_str[1]
+
+    qdb = Qsr4Hash(qdb_uuid, digest)
+    for (name, record, kinds), entries in zip(qsr4_tables,
+            (qsr4_content, qsr4_mtrace_content, qsr4_qtrace_str_content)):
+        setattr(qdb, name, Qsr4Table.from_dict(record, kinds, entries))
+    return qdb
+
+def load_qsr4_hash(filename, cache=True, logger=None):
+    """Loads a QDB file through its cache file, parsing the QDB when the cache is missing or stale.
+
+    Parameters:
+    filename (str): QDB filename, the cache is filename + '.qsr4c'
+    cache (bool): use and write the cache file
+    """
+    if logger is None:
+        logger = logging.getLogger('scat.qsr4hash')
+    qdb_uuid, digest, zlib_content = read_qdb(filename)
+    logger.log(logging.INFO, 'Loading QSR4 hash file with UUID {}'.format(qdb_uuid))
+
+    cache_fname = cache_filename(filename)
+    if cache and os.path.exists(cache_fname):
+        try:
+            qdb = Qsr4Hash.load(cache_fname)
+            if qdb.uuid == qdb_uuid and qdb.digest == digest:
+                logger.log(logging.INFO, 'Using QSR4 hash cache {}'.format(cache_fname))
+                return qdb
+            qdb.close()
+            logger.log(logging.INFO, 'QSR4 hash cache {} is stale, rebuilding'.format(cache_fname))
+        except (ValueError, OSError, struct.error) as e:
+            logger.log(logging.WARNING, 'Cannot load QSR4 hash cache {}: {}'.format(cache_fname, e))
+
+    qdb = parse_qdb(qdb_uuid, digest, zlib_content)
+    if cache:
+        try:
+            qdb.save(cache_fname)
+            logger.log(logging.INFO, 'QSR4 hash cache written to {}'.format(cache_fname))
+        except (OSError, OverflowError) as e:
+            logger.log(logging.WARNING, 'Cannot write QSR4 hash cache {}: {}'.format(cache_fname, e))
+    return qdb
@@ -15,21 +15,26 @@ Used by the main entry point and batch wrapper for offline analysis.
 
 from collections import namedtuple
 from inspect import currentframe, getframeinfo
-from packaging import version
 from pathlib import Path
 import binascii
-import bitstring
 import datetime
-import io
+import functools
 import logging
 import os, sys
 import re
+import scat.bitfields as bitfields
+import scat.framing as framing
+import scat.profiler as profiler
 import scat.util as util
 import struct
-import uuid
-import zlib
 
 from scat.parsers.qualcomm import diagcmd
+from scat.parsers.qualcomm import diagdispatch
+from scat.parsers.qualcomm import diageventstats
+from scat.parsers.qualcomm import diaglayouts
+from scat.parsers.qualcomm import qmdlindex
+from scat.parsers.qualcomm import qsr4hash
+from scat.parsers.qualcomm.paralleldecoder import ParallelDecoder
 from scat.parsers.qualcomm.diaggsmlogparser import DiagGsmLogParser
 from scat.parsers.qualcomm.diagwcdmalogparser import DiagWcdmaLogParser
 from scat.parsers.qualcomm.diagumtslogparser import DiagUmtsLogParser
@@ -50,15 +55,38 @@ from scat.parsers.qualcomm.diagwcdmasignalingparser import DiagWcdmaSignalingPar
 from scat.parsers.qualcomm.diagcomprehensivelogparser import DiagComprehensiveLogParser
 from scat.parsers.qualcomm.diagunknownlogparser import DiagUnknownLogParser
 
-bitstring_ver = version.parse(bitstring.__version__)
-if bitstring_ver >= version.parse('4.2.0'):
-    bitstring.options.lsb0 = True
-elif bitstring_ver >= version.parse('4.0.0'):
-    bitstring.lsb0 = True
-elif bitstring_ver >= version.parse('3.1.7'):
-    bitstring.set_lsb0(True)
-else:
-    raise Exception("SCAT requires bitstring>=3.1.7, recommends bitstring>=4.0.0")
+# Observed fmt string: {'%02x', '%03d', '%04d', '%04x', '%08x', '%X', '%d', '%ld', '%llx', '%lu', '%u', '%x', '%p'}
+c_format_spec = re.compile(r'%((?:[-+0 #]{0,5})(?:\d+|\*)?(?:\.(?:\d+|\*))?)(?:h|l|ll|w|I|I32|I64)?([duxXp])|%%')
+
+@functools.lru_cache(maxsize=8192)
+def compile_c_format(fmtstr):
+    """Translates a C format string of a DIAG message into a str.format template.
+
+    Every conversion (including %%, which consumes an argument as before)
+    addresses its argument by position.
+
+    Returns:
+    (template, number of arguments, positions of %d arguments to be read as int32)
+    """
+    parts = []
+    signed_args = []
+    pos = 0
+    i = 0
+    for m in c_format_spec.finditer(fmtstr):
+        parts.append(fmtstr[pos:m.start()].replace('{', '{{').replace('}', '}}'))
+        conversion = m.group(2)
+        if conversion is None:
+            parts.append('%')
+        elif conversion in ('x', 'X', 'p'):
+            parts.append('{{{}:{}{}}}'.format(i, m.group(1), 'x' if conversion == 'p' else conversion))
+        else:
+            if conversion == 'd':
+                signed_args.append(i)
+            parts.append('{{{}:{}}}'.format(i, m.group(1)))
+        pos = m.end()
+        i += 1
+    parts.append(fmtstr[pos:].replace('{', '{{').replace('}', '}}'))
+    return ''.join(parts), i, tuple(signed_args)
 
 
 class QualcommParser:
@@ -95,11 +123,22 @@ class QualcommParser:
         self.log_id_range = {}
         self.cacombos = False
         self.combine_stdout = False
-        self.check_crc = True
+        self.structured_fields = False
         self.layers = []
         self.display_format = 'x'
         self.gsmtapv3 = False
-
+        self.build_index = False
+        self.index_log_ids = None
+        self.exclude_log_ids = None
+        self.layer_filter = False
+        self.index_start_ts = None
+        self.index_end_ts = None
+        self.jobs = 1
+        self.profiler = None
+        self.profile_filename = None
+        self.parameters = {}
+
+        self.qsr4_cache = True
         self.qsr4_content = {}
         self.qsr4_mtrace_content = {}
         self.qsr4_qtrace_str_content = {}
@@ -108,6 +147,7 @@ class QualcommParser:
         self.shortname = 'qc'
 
         self.logger = logging.getLogger('scat.qualcommparser')
+        self.crc_verifier = util.CrcVerifier(logger=self.logger)
         
         # Initialize enhanced parser for structured data extraction
         try:
@@ -126,19 +166,14 @@ class QualcommParser:
             DiagQCATMsgParser(self), DiagGnssLogParser(self), DiagRfLogParser(self),
             DiagUmtsNasLogParser(self), DiagWcdmaEnhancedLogParser(self), 
             DiagWcdmaSignalingParser(self), DiagComprehensiveLogParser(self), DiagUnknownLogParser(self)]
-        self.process = { }
-        self.no_process = { }
         self.unknown_log_parser = None
-
         for p in self.diag_log_parsers:
-            self.process.update(p.process)
-            try:
-                self.no_process.update(p.no_process)
-            except AttributeError:
-                pass
             # Keep reference to unknown log parser
             if hasattr(p, 'register_unknown_log_id'):
                 self.unknown_log_parser = p
+        self.dispatch_priority = diagdispatch.PRIORITY_LAST
+        self.build_log_dispatch()
+        self.update_log_filter()
 
         self.diag_event_parsers = [DiagCommonEventParser(self),
             DiagGsmEventParser(self), DiagLteEventParser(self)]
@@ -153,12 +188,68 @@ class QualcommParser:
                 self.no_process_event.update(p.no_process)
             except AttributeError:
                 pass
+        self.event_statistics = diageventstats.EventStatistics()
+        self.build_event_dispatch()
+
+    def build_event_dispatch(self):
+        """Precomputes the (handler, statistics kind) of every event ID known to the event parsers."""
+        self.event_dispatch = {event_id: (None, diageventstats.EVENT_IGNORED) for event_id in self.no_process_event}
+        for event_id, handler in self.process_event.items():
+            self.event_dispatch[event_id] = (handler[0], diageventstats.EVENT_KNOWN)
+        self.event_fallback = (self.diag_fallback_event_parser.parse_event_fallback, diageventstats.EVENT_UNKNOWN)
+
+    def build_log_dispatch(self):
+        """Merges the process dicts of the log parsers into the log ID dispatch table."""
+        self.log_dispatch = diagdispatch.LogDispatchTable(self.dispatch_priority, self.logger)
+        for p in self.diag_log_parsers:
+            self.log_dispatch.register_parser(p)
+        self.log_dispatch.report_conflicts()
+        self.process = self.log_dispatch.table
+        self.no_process = self.log_dispatch.unprocessed_log_ids()
+        if self.profiler is not None:
+            self.process = self.profiler.wrap_table('log', self.process, profiler.log_body_size)
+
+    def enable_profiler(self, filename=None):
+        """Times the log decoders, event decoders and writer calls from now on.
+
+        Parameters:
+        filename (str): file receiving the JSON report, None to only log the table
+        """
+        if self.profiler is None:
+            self.profiler = profiler.DecodeProfiler()
+            self.process = self.profiler.wrap_table('log', self.process, profiler.log_body_size)
+            self.process_event = {event_id: (self.profiler.wrap('event', event_id, handler[0]), ) + handler[1:]
+                for event_id, handler in self.process_event.items()}
+
+            # Fallback handlers serve many IDs, key them by the IDs in their arguments
+            fallback = self.diag_fallback_event_parser
+            fallback.parse_event_fallback = self.profiler.wrap_keyed('event',
+                fallback.parse_event_fallback, key=lambda args: args[1])
+            if self.unknown_log_parser:
+                self.unknown_log_parser.parse_unknown_log_packet = self.profiler.wrap_keyed('log',
+                    self.unknown_log_parser.parse_unknown_log_packet, key=lambda args: args[0].log_id,
+                    size=profiler.log_body_size)
+            self.writer = self.profiler.wrap_writer(self.writer)
+            self.build_event_dispatch()
+        self.profile_filename = filename
+
+    def report_profile(self):
+        if self.profiler is None:
+            return
+        self.logger.log(logging.INFO, 'Decode profile:\n{}'.format(self.profiler.format_table()))
+        if self.profile_filename:
+            self.profiler.save(self.profile_filename)
+            self.logger.log(logging.INFO, 'Decode profile report written to {}'.format(self.profile_filename))
 
     def set_io_device(self, io_device):
         self.io_device = io_device
 
     def set_writer(self, writer):
+        if self.profiler is not None:
+            writer = self.profiler.wrap_writer(writer)
         self.writer = writer
+        # Decoders attach typed fields to their results only for writers consuming them
+        self.set_parameter({'structured-fields': hasattr(writer, 'write_parsed_data')})
 
     def update_parameters(self, display_format, gsmtapv3):
         for p in self.diag_event_parsers:
@@ -168,99 +259,46 @@ class QualcommParser:
             p.update_parameters(display_format, gsmtapv3)
 
     def load_qsr4_hash(self, filename):
-        zlib_content = b''
-        content = b''
-        with open(filename, 'rb') as qsr4_file:
-            header = qsr4_file.read(64)
-            if header[0:4] != b'\x7fQDB':
-                self.logger.log(logging.ERROR, '{} is not a valid QSR4 hash file: magic does not match'.format(filename))
-                return False
-            qsr4_uuid = uuid.UUID(bytes=header[4:20])
-            self.logger.log(logging.INFO, 'Loading QSR4 hash file with UUID {}'.format(qsr4_uuid))
-            zlib_content = qsr4_file.read()
-
         try:
-            content = zlib.decompress(zlib_content)
-        except zlib.error as e:
-            self.logger.log(logging.ERROR, 'Error while decompressing zlib content: {}'.format(e))
+            qdb = qsr4hash.load_qsr4_hash(filename, cache=self.qsr4_cache, logger=self.logger)
+        except (ValueError, OSError) as e:
+            self.logger.log(logging.ERROR, 'Cannot load QSR4 hash file {}: {}'.format(filename, e))
             return False
 
-        mode = 0
-        tag_oneline_re = re.compile(r'\<(\w*)\>\s*([\w\-=.]*)\s*\<\\(\w*)\>')
-        tag_open_re = re.compile(r'^\<(\w*)\>$')
-        tag_close_re = re.compile(r'^\<\\(\w*)\>$')
+        self.qsr4_content = qdb.content
+        self.qsr4_mtrace_content = qdb.mtrace_content
+        self.qsr4_qtrace_str_content = qdb.qtrace_str_content
 
-        txt_qsr4_uuid = ''
-        txt_qsr4_version = ''
-        txt_qsr4_baseline = ''
+        if len(self.qsr4_content) > 0:
+            return True
 
-        content_t = namedtuple('Qsr4Content', 'subsys_mask ssid line file string')
-        mtrace_t = namedtuple('Qsr4MtraceContent', 'line level client file tag string')
-        for l in io.BytesIO(content):
-            l = l.decode(errors='backslashreplace').strip()
+    def reset_state(self):
+        self.gsm_last_cell_id = [0, 0]
+        self.gsm_last_arfcn = [0, 0]
 
-            if l[0] == '#':
-                continue
-            is_tag_oneline = tag_oneline_re.match(l)
-            if is_tag_oneline:
-                g = is_tag_oneline.groups()
-                if g[0] == g[2] == 'GUID':
-                    txt_qsr4_uuid = uuid.UUID(g[1])
-                elif g[0] == g[2] == 'Version':
-                    txt_qsr4_version = g[1]
-                elif g[0] == g[2] == 'Baseline':
-                    txt_qsr4_baseline = g[1]
-            else:
-                is_tag_open = tag_open_re.match(l)
-                is_tag_close = tag_close_re.match(l)
-                if is_tag_open:
-                    tag = is_tag_open.groups()[0]
-                    if tag == 'Content':
-                        mode = 1
-                    elif tag == 'MtraceContent':
-                        mode = 2
-                    elif tag == 'QtraceStrContent':
-                        mode = 3
-                    else:
-                        raise ValueError('Tag should be one of Content, MtraceContent, QtraceStrContent')
-                elif is_tag_close:
-                    tag = is_tag_close.groups()[0]
-                    if tag == 'Content':
-                        if mode != 1:
-                            raise ValueError('Open and close tag mismatch')
-                    elif tag == 'MtraceContent':
-                        if mode != 2:
-                            raise ValueError('Open and close tag mismatch')
-                    elif tag == 'QtraceStrContent':
-                        if mode != 3:
-                            raise ValueError('Open and close tag mismatch')
-                    mode = 0
-                else:
-                    if mode == 1:
-                        content_str = l.split(':', 5)
-                        content_str[1] = int(content_str[1])
-                        content_str[2] = int(content_str[2])
-                        content_str[3] = int(content_str[3])
-                        x = content_t._make(content_str[1:])
-                        # print('{:08x} {}'.format(int(content_str[0]), x))
-                        self.qsr4_content[int(content_str[0])] = x
-                    elif mode == 2:
-                        mtrace_str = l.split(':', 6)
-                        x = mtrace_t._make(mtrace_str[1:])
-                        # print('{:08x} {}'.format(int(mtrace_str[0]), x))
-                        self.qsr4_mtrace_content[int(mtrace_str[0])] = x
-                        # line: pure int, "int|hex", "|hex"
-                        # tag: pure str, "str|hex", "str|"
-                    elif mode == 3:
-                        qtrace_str = l.split(':', 1)
-                        # print('{:08x} {}'.format(int(qtrace_str[0]), qtrace_str[1]))
-                        self.qsr4_qtrace_str_content[int(qtrace_str[0])] = qtrace_str[1]
+        self.umts_last_cell_id = [0, 0]
+        self.umts_last_uarfcn_dl = [0, 0]
+        self.umts_last_uarfcn_ul = [0, 0]
 
-        if len(self.qsr4_content) > 0:
-            return True
+        self.lte_last_cell_id = [0, 0]
+        self.lte_last_earfcn_dl = [0, 0]
+        self.lte_last_earfcn_ul = [0, 0]
+        self.lte_last_earfcn_tdd = [0, 0]
+        self.lte_last_sfn = [0, 0]
+        self.lte_last_tx_ant = [0, 0]
+        self.lte_last_bw_dl = [0, 0]
+        self.lte_last_bw_ul = [0, 0]
+        self.lte_last_band_ind = [0, 0]
+        self.lte_last_tcrnti = [1, 1]
+
+        for p in self.diag_log_parsers:
+            if hasattr(p, 'rrc_segments'):
+                p.rrc_segments = dict()
 
     def set_parameter(self, params):
         qsr_hash_loaded = False
+        qsr4_hash_requested = False
+        self.parameters.update(params)
         for p in params:
             if p == 'log_level':
                 self.logger.setLevel(params[p])
@@ -273,10 +311,9 @@ class QualcommParser:
                 self.qsr4_hash_filename = params[p]
                 if not self.qsr4_hash_filename:
                     continue
-                try:
-                    qsr_hash_loaded = self.load_qsr4_hash(self.qsr4_hash_filename)
-                except ValueError as e:
-                    self.logger.log(logging.INFO, 'Error parsing QSR4 hash table: {}'.format(e))
+                qsr4_hash_requested = True
+            elif p == 'qsr4-cache':
+                self.qsr4_cache = params[p]
             elif p == 'events':
                 self.parse_events = params[p]
             elif p == 'msgs':
@@ -285,18 +322,86 @@ class QualcommParser:
                 self.cacombos = params[p]
             elif p == 'combine-stdout':
                 self.combine_stdout = params[p]
+            elif p == 'structured-fields':
+                self.structured_fields = params[p]
             elif p == 'disable-crc-check':
-                self.check_crc = not params[p]
+                if params[p]:
+                    self.crc_verifier.policy = util.CRC_OFF
+            elif p == 'crc-check':
+                if params[p]:
+                    self.crc_verifier = util.CrcVerifier(params[p], self.crc_verifier.sample_rate, self.logger)
+            elif p == 'crc-sample-rate':
+                self.crc_verifier.sample_rate = params[p] if params[p] else 0
             elif p == 'layer':
                 self.layers = params[p]
             elif p == 'format':
                 self.display_format = params[p]
             elif p == 'gsmtapv3':
                 self.gsmtapv3 = params[p]
-
+            elif p == 'index':
+                self.build_index = params[p]
+            elif p == 'log-ids':
+                self.index_log_ids = set(params[p]) if params[p] else None
+            elif p == 'exclude-log-ids':
+                self.exclude_log_ids = set(params[p]) if params[p] else None
+            elif p == 'layer-filter':
+                self.layer_filter = params[p]
+            elif p == 'start-time':
+                self.index_start_ts = util.qxdm_ts_from_datetime(params[p]) if params[p] else None
+            elif p == 'end-time':
+                self.index_end_ts = util.qxdm_ts_from_datetime(params[p]) if params[p] else None
+            elif p == 'jobs':
+                self.jobs = params[p] if params[p] else 1
+            elif p == 'profile':
+                if params[p]:
+                    self.enable_profiler(params[p] if isinstance(params[p], str) else None)
+            elif p == 'dispatch-priority':
+                if params[p] and params[p] != self.dispatch_priority:
+                    self.dispatch_priority = params[p]
+                    self.build_log_dispatch()
+
+        if qsr4_hash_requested:
+            # Loaded after the loop, so that qsr4-cache applies regardless of the parameter order
+            qsr_hash_loaded = self.load_qsr4_hash(self.qsr4_hash_filename)
         if qsr_hash_loaded:
             self.parse_msgs = True
         self.update_parameters(self.display_format, self.gsmtapv3)
+        self.update_log_filter()
+
+    def update_log_filter(self):
+        # Allowed log IDs: --log-ids, narrowed to the log masks of the layers with --layer-filter
+        # Denied log IDs: --exclude-log-ids and the log IDs known to be not processed
+        self.log_id_allow = self.index_log_ids
+        if self.layer_filter:
+            layer_log_ids = diagcmd.log_ids_scat(self.layers)
+            if self.log_id_allow is not None:
+                self.log_id_allow = self.log_id_allow & layer_log_ids
+            else:
+                self.log_id_allow = layer_log_ids
+
+        self.log_id_deny = set(self.no_process)
+        if self.exclude_log_ids:
+            self.log_id_deny |= self.exclude_log_ids
+
+    def log_id_excluded(self, log_id):
+        if log_id in self.log_id_deny:
+            return True
+        return self.log_id_allow is not None and log_id not in self.log_id_allow
+
+    def log_frame_excluded(self, pkt, hdlc_encoded = True):
+        """Checks whether a DIAG frame carries a log packet excluded by the log ID filter.
+
+        Only the first bytes of the frame are unescaped, so unwanted log packets are
+        dropped before unescaping and CRC checking the whole frame.
+
+        Parameters:
+        pkt (bytes-like): DIAG frame as passed to parse_diag
+        hdlc_encoded (bool): whether the frame is still HDLC encoded
+        """
+        cmd, log_id, _ = qmdlindex.peek_diag_header(pkt, hdlc_encoded)
+        if cmd != diagcmd.DIAG_LOG_F:
+            return False
+        return self.log_id_excluded(log_id)
 
     def sanitize_radio_id(self, radio_id):
         if radio_id <= 0:
@@ -448,20 +553,45 @@ class QualcommParser:
         if len(pkt) < 3:
             return
 
+        if self.log_frame_excluded(pkt, hdlc_encoded):
+            return None
+
         if hdlc_encoded:
             pkt = util.unwrap(pkt)
 
         # Check and strip CRC if existing
+        deferred_frame = None
         if has_crc:
-            # Check CRC only if check_crc is enabled
-            if self.check_crc:
-                crc = util.dm_crc16(pkt[:-2])
-                crc_pkt = (pkt[-1] << 8) | pkt[-2]
-                if crc != crc_pkt:
-                    self.logger.log(logging.WARNING, "CRC mismatch: expected 0x{:04x}, got 0x{:04x}".format(crc, crc_pkt))
-                    self.logger.log(logging.DEBUG, util.xxd(pkt))
+            if self.crc_verifier.needs_check(self.diag_log_length_mismatch(pkt)):
+                self.crc_verifier.verify(pkt)
+            elif self.crc_verifier.policy == util.CRC_LAZY:
+                deferred_frame = pkt
             pkt = pkt[:-2]
 
+        if deferred_frame is None:
+            return self.dispatch_diag(pkt, args)
+
+        try:
+            return self.dispatch_diag(pkt, args)
+        except Exception:
+            # Deferred CRC check: drop corrupted frames, keep decoder errors of valid ones
+            if self.crc_verifier.verify(deferred_frame, deferred=True):
+                raise
+            return None
+
+    def diag_log_length_mismatch(self, pkt):
+        # DIAG_LOG_F frame with CRC whose length field disagrees with the frame size
+        if len(pkt) < 18 or pkt[0] != diagcmd.DIAG_LOG_F:
+            return False
+        return struct.unpack_from('<H', pkt, 4)[0] != len(pkt) - 6
+
+    def dispatch_diag(self, pkt, args = None):
+        """Passes an unescaped DIAG packet without CRC to the parser of its command code.
+
+        Parameters:
+        pkt (bytes): DIAG packet without trailing CRC
+        args (dict): 'radio_id' (int): used SIM or subscription ID on multi-SIM devices
+        """
         if pkt[0] == diagcmd.DIAG_VERNO_F:
             return self.parse_diag_version(pkt)
         elif pkt[0] == diagcmd.DIAG_LOG_F:
@@ -490,38 +620,54 @@ class QualcommParser:
             return None
 
     def run_diag(self, writer_qmdl = None):
-        oldbuf = b''
-        loop = True
+        # The SIGINT handler of scat_main ends live captures with sys.exit
         try:
-            while loop:
-                buf = self.io_device.read(0x1000)
-                if len(buf) == 0:
-                    if self.io_device.block_until_data:
-                        continue
-                    else:
-                        loop = False
-                buf = oldbuf + buf
-                buf_atom = buf.split(b'\x7e')
-
-                if len(buf) < 1 or buf[-1] != 0x7e:
-                    oldbuf = buf_atom.pop()
-                else:
-                    oldbuf = b''
-
-                for pkt in buf_atom:
-                    if len(pkt) == 0:
-                        continue
-                    parse_result = self.parse_diag(pkt)
+            self.run_diag_frames(writer_qmdl)
+        finally:
+            self.log_statistics()
+
+    def run_diag_frames(self, writer_qmdl = None):
+        try:
+            for pkt in framing.read_frames(self.io_device, framing.HdlcFramer(logger=self.logger)):
+                parse_result = self.parse_diag(pkt)
+
+                if writer_qmdl:
+                    writer_qmdl.write_cp(pkt + b'\x7e')
+
+                if parse_result is not None:
+                    self.postprocess_parse_result(parse_result)
+
+        except KeyboardInterrupt:
+            return
 
-                    if writer_qmdl:
-                        writer_qmdl.write_cp(pkt + b'\x7e')
+    def run_diag_mapped(self, mapping):
+        """Parses a HDLC framed DIAG dump exposed as a memory mapping.
+
+        Frames are located by offset and passed to parse_diag as memoryview
+        slices, so the dump is never copied chunk-wise and resident memory
+        does not grow with the file size.
+
+        Parameters:
+        mapping (mmap.mmap): read-only mapping of an uncompressed QMDL file
+        """
+        try:
+            with memoryview(mapping) as view:
+                for pkt in framing.iter_frames(mapping, framing.HdlcFramer(logger=self.logger), view):
+                    parse_result = self.parse_diag(pkt)
+                    del pkt
 
                     if parse_result is not None:
                         self.postprocess_parse_result(parse_result)
-
         except KeyboardInterrupt:
             return
 
+    def run_dump_qmdl(self):
+        mapping = getattr(self.io_device, 'mapping', None)
+        if mapping is not None:
+            self.run_diag_mapped(mapping)
+        else:
+            self.run_diag_frames()
+
     def stop_diag(self):
         self.io_device.read(0x1000)
         self.logger.log(logging.INFO, 'Stopping diag')
@@ -530,98 +676,132 @@ class QualcommParser:
         self.io_device.write_then_read_discard(util.generate_packet(struct.pack('<LL', diagcmd.DIAG_LOG_CONFIG_F, diagcmd.LOG_CONFIG_DISABLE_OP)), 0x1000, False)
         self.io_device.write_then_read_discard(util.generate_packet(struct.pack('<BBHHH', diagcmd.DIAG_EXT_MSG_CONFIG_F, 0x05, 0x0000, 0x0000, 0x0000)), 0x1000, False)
 
-    def parse_dlf(self):
-        oldbuf = b''
-        while True:
-            buf = self.io_device.read(0x100000)
-            #print("%d"% len(buf))
-            if len(buf) == 0:
-                break
-            buf = oldbuf + buf
+    dlf_header = struct.Struct('<HHQ')
 
-            while True:
-                # DLF lacks CRC16/other fancy stuff
-                if len(buf) < 2:
-                    break
-                pkt_len = struct.unpack('<H', buf[0:2])[0]
-                if pkt_len < 2:
-                    buf = buf[2:]
-                    continue
-                pkt = buf[0:pkt_len]
-                pkt = b'\x10\x00' + pkt[0:2] + pkt
-                parse_result = self.parse_diag(pkt, has_crc=False, hdlc_encoded=False)
+    def parse_dlf_record(self, rec):
+        """Parses a single DLF record as a DIAG_LOG_F packet.
 
-                if parse_result is not None:
-                    self.postprocess_parse_result(parse_result)
+        The DLF record (length, log ID, timestamp, body) carries the same fields as
+        the DIAG_LOG_F header, the header is built from them without copying the body.
 
-                buf = buf[pkt_len:]
+        Parameters:
+        rec (bytes-like): DLF record
+        """
+        if len(rec) < 12:
+            return None
+        pkt_len, log_id, timestamp = self.dlf_header.unpack_from(rec)
+        if self.log_id_excluded(log_id):
+            return None
+        pkt_header = self.log_header(cmd_code=diagcmd.DIAG_LOG_F, reserved=0,
+            length1=pkt_len, length2=pkt_len, log_id=log_id, timestamp=timestamp)
+        return self.dispatch_diag_log(pkt_header, bytes(rec[12:]), None)
+
+    def parse_dlf(self):
+        for rec in framing.read_frames(self.io_device, framing.DlfFramer(logger=self.logger)):
+            parse_result = self.parse_dlf_record(rec)
+            del rec
 
-            oldbuf = buf
+            if parse_result is not None:
+                self.postprocess_parse_result(parse_result)
 
     # Experimental HDF parser.
     # It scans the file for packets in the format "0x10 0x00 packet_length body"
     # Ignoring any additional fields that the file might contain
     def parse_hdf(self):
-        while True:
-            header = self.io_device.read(1)
-
-            # EOF check
-            if len(header) == 0:
-                break
-
-            # First byte must be 0x10
-            if header != b'\x10':
-                continue
-
-            # Second byte must be 0x00
-            header += self.io_device.read(1)
-            if header != b'\x10\x00':
-                continue
+        for pkt in framing.read_frames(self.io_device, framing.HdfFramer(logger=self.logger)):
+            parse_result = self.parse_diag(pkt, has_crc=False, hdlc_encoded=False)
+            if parse_result is not None:
+                self.postprocess_parse_result(parse_result)
 
-            # pkt length from header and pkt length from body must be equal
-            header += self.io_device.read(2)
-            body = self.io_device.read(2)
-            if header[2:4] != body[0:2]:
-                continue
+    def run_dump_indexed(self, index, mapping):
+        """Parses the frames of a memory mapped dump selected through its packet index.
 
-            # Convert pkt length to int
-            pkt_len = struct.unpack('<H', header[2:4])[0]
+        Parameters:
+        index (QmdlIndex): packet index of the dump
+        mapping (mmap.mmap): read-only mapping of the uncompressed dump
+        """
+        dump_type = index.dump_type
+        offsets = index.offsets
+        lengths = index.lengths
+        try:
+            with memoryview(mapping) as view:
+                for i in index.select(self.index_log_ids, self.index_start_ts, self.index_end_ts):
+                    offset = offsets[i]
+                    pkt = view[offset:offset + lengths[i]]
+                    parse_result = self.parse_indexed_frame(dump_type, pkt)
+                    del pkt
 
-            body_len = pkt_len - 2
+                    if parse_result is not None:
+                        self.postprocess_parse_result(parse_result)
+        except KeyboardInterrupt:
+            return
 
-            if (body_len < 1):
-                continue
+    def parse_indexed_frame(self, dump_type, pkt):
+        """Parses a single frame located through the packet index.
 
-            # Read full body
-            body += self.io_device.read(body_len)
-            pkt = header + body
+        Parameters:
+        dump_type (int): dump type of the packet index
+        pkt (memoryview): frame content as recorded in the packet index
+        """
+        if dump_type == qmdlindex.DUMP_TYPE_DLF:
+            return self.parse_dlf_record(pkt)
+        elif dump_type == qmdlindex.DUMP_TYPE_HDF:
+            return self.parse_diag(pkt.tobytes(), has_crc=False, hdlc_encoded=False)
+        else:
+            return self.parse_diag(pkt)
 
-            parse_result = self.parse_diag(pkt, has_crc=False, hdlc_encoded=False)
-            if parse_result is not None:
-                self.postprocess_parse_result(parse_result)
+    def _dump_index_requested(self, fname):
+        if self.jobs > 1 or self.build_index or os.path.exists(qmdlindex.index_filename(fname)):
+            return True
+        return (self.index_log_ids is not None or self.index_start_ts is not None
+            or self.index_end_ts is not None)
 
     def read_dump(self):
         while self.io_device.file_available:
             self.logger.log(logging.INFO, "Reading from {}".format(self.io_device.fname))
+            mapping = getattr(self.io_device, 'mapping', None)
+            if self._dump_index_requested(self.io_device.fname):
+                if mapping is not None:
+                    index = qmdlindex.load_or_build_index(self.io_device.fname, mapping,
+                        save=self.build_index, logger=self.logger)
+                    if self.jobs > 1:
+                        decoder = ParallelDecoder(self, self.jobs)
+                        decoder.run(self.io_device.fname, index,
+                            index.select(self.index_log_ids, self.index_start_ts, self.index_end_ts))
+                    else:
+                        self.run_dump_indexed(index, mapping)
+                    self.io_device.open_next_file()
+                    continue
+                self.logger.log(logging.WARNING, 'Packet index and parallel decoding require an uncompressed dump, reading {} sequentially'.format(self.io_device.fname))
+
             if self.io_device.fname.find('.qmdl') > 0:
-                self.run_diag()
+                self.run_dump_qmdl()
             elif self.io_device.fname.find('.dlf') > 0:
                 self.parse_dlf()
             elif self.io_device.fname.find('.hdf') > 0:
                 self.parse_hdf()
             else:
                 self.logger.log(logging.INFO, 'Unknown baseband dump type, assuming QMDL')
-                self.run_diag()
+                self.run_dump_qmdl()
             self.io_device.open_next_file()
 
+        self.log_statistics()
+
+    def log_statistics(self):
+        crc = self.crc_verifier
+        if crc.verified + crc.skipped > 0:
+            self.logger.log(logging.INFO, crc.summary())
+        self.event_statistics.log(self.logger)
+        self.report_profile()
+
     def postprocess_parse_result(self, parse_result):
         if 'radio_id' in parse_result:
             radio_id = parse_result['radio_id']
         else:
             radio_id = 0
 
-        # Enhanced parsing: extract structured data
-        if hasattr(self, 'use_enhanced_parsing') and self.use_enhanced_parsing and hasattr(self, 'enhanced_parser') and self.enhanced_parser:
+        # Enhanced parsing: extract structured data from stdout of decoders without native fields
+        if self.use_enhanced_parsing and self.enhanced_parser and hasattr(self.writer, 'write_parsed_data'):
             enhanced_result = self.enhanced_parser.enhance_parse_result(parse_result)
         else:
             enhanced_result = parse_result
@@ -657,53 +837,27 @@ class QualcommParser:
         if hasattr(self.writer, 'write_stdout_data') and 'stdout' in enhanced_result:
             self.writer.write_stdout_data(enhanced_result['stdout'], radio_id, enhanced_result.get('ts', None))
 
-    log_header = namedtuple('QcDiagLogHeader', 'cmd_code reserved length1 length2 log_id timestamp')
+    log_header_layout = diaglayouts.RecordLayout('QcDiagLogHeader', '<BBHHHQ', 'cmd_code reserved length1 length2 log_id timestamp')
+    log_header = log_header_layout.record
 
     def _snprintf(self, fmtstr, fmtargs):
-        # Observed fmt string: {'%02x', '%03d', '%04d', '%04x', '%08x', '%X', '%d', '%ld', '%llx', '%lu', '%u', '%x', '%p'}
-        cfmt = re.compile(r'(%(?:(?:[-+0 #]{0,5})(?:\d+|\*)?(?:\.(?:\d+|\*))?(?:h|l|ll|w|I|I32|I64)?[duxXp])|%%)')
-        cfmt_nums = re.compile(r'%((?:[-+0 #]{0,5})(?:\d+|\*)?(?:\.(?:\d+|\*))?)(?:h|l|ll|w|I|I32|I64)?[duxXp]')
-        fmt_strs = cfmt.findall(fmtstr)
-        formatted_strs = []
-        log_content_pyfmt = cfmt.sub('{}', fmtstr)
-
-        i = 0
-        if len(fmtargs) != len(fmt_strs):
+        template, num_args, signed_args = compile_c_format(fmtstr)
+        if len(fmtargs) != num_args:
+            return fmtstr
+
+        if signed_args:
+            fmtargs = list(fmtargs)
+            for i in signed_args:
+                if fmtargs[i] > 2147483648:
+                    fmtargs[i] -= 4294967296
+        try:
+            return template.format(*fmtargs)
+        except (ValueError, IndexError, TypeError):
             log_content_formatted = fmtstr
-        else:
-            for fmt_str in fmt_strs:
-                fmt_num = ''
-                x = cfmt_nums.match(fmt_str)
-                if x:
-                    fmt_num = x.group(1)
-                if fmt_str == '%%':
-                    formatted_strs.append('%')
-                else:
-                    if fmt_str[-1] in ('x', 'X', 'p'):
-                        if fmt_str[-1] == 'p':
-                            pyfmt_str = '{:' + fmt_num + 'x' + '}'
-                        else:
-                            pyfmt_str = '{:' + fmt_num + fmt_str[-1] + '}'
-                        formatted_strs.append(pyfmt_str.format(fmtargs[i]))
-                    elif fmt_str[-1] in ('d'):
-                        pyfmt_str = '{:' + fmt_num + '}'
-                        if fmtargs[i] > 2147483648:
-                            formatted_strs.append(pyfmt_str.format(-(4294967296 - fmtargs[i])))
-                        else:
-                            formatted_strs.append(pyfmt_str.format(fmtargs[i]))
-                    else:
-                        pyfmt_str = '{:' + fmt_num + '}'
-                        formatted_strs.append(pyfmt_str.format(fmtargs[i]))
-                i += 1
-            try:
-                log_content_formatted = log_content_pyfmt.format(*formatted_strs)
-            except:
-                log_content_formatted = fmtstr
-                if len(fmtargs) > 0:
-                    log_content_formatted += ", args="
-                    log_content_formatted += ', '.join(['0x{:x}'.format(x) for x in fmtargs])
-
-        return log_content_formatted
+            if len(fmtargs) > 0:
+                log_content_formatted += ", args="
+                log_content_formatted += ', '.join(['0x{:x}'.format(x) for x in fmtargs])
+            return log_content_formatted
 
     def parse_diag_version(self, pkt):
         header = namedtuple('QcDiagVersion', 'compile_date compile_time release_date release_time chipset')
@@ -730,15 +884,24 @@ class QualcommParser:
         if len(pkt) < 16:
             return
 
-        pkt_header = self.log_header._make(struct.unpack('<BBHHHQ', pkt[0:16]))
-        pkt_body = pkt[16:]
+        pkt_header = self.log_header_layout.unpack_from(pkt)
+        return self.dispatch_diag_log(pkt_header, pkt[16:], args)
 
+    def dispatch_diag_log(self, pkt_header, pkt_body, args=None):
+        """Passes a DIAG_LOG_F packet to the log parser registered for its log ID.
+
+        Parameters:
+        pkt_header (QcDiagLogHeader): unpacked DIAG_LOG_F header
+        pkt_body (bytes): log packet body following the header
+        args (dict): 'radio_id' (int): used SIM or subscription ID on multi-SIM devices
+        """
         if len(pkt_body) != (pkt_header.length2 - 12):
             self.logger.log(logging.WARNING, "Packet length mismatch: expected {}, got {}".format(pkt_header.length2, len(pkt_body)+12))
 
-        if pkt_header.log_id in self.process.keys():
-            return self.process[pkt_header.log_id](pkt_header, pkt_body, args)
-        elif pkt_header.log_id in self.no_process.keys():
+        handler = self.process.get(pkt_header.log_id)
+        if handler is not None:
+            return handler(pkt_header, pkt_body, args)
+        elif pkt_header.log_id in self.no_process:
             return None
         else:
             # Handle unknown log packets with unknown log parser for QCAT parity
@@ -750,7 +913,8 @@ class QualcommParser:
                 ts = util.parse_qxdm_ts(pkt_header.timestamp)
                 return {'unknown_log': {'log_id': pkt_header.log_id, 'length': pkt_header.length2, 'body': pkt_body}, 'ts': ts}
 
-    event_header = namedtuple('QcDiagEventHeader', 'cmd_code msg_len')
+    event_header_layout = diaglayouts.RecordLayout('QcDiagEventHeader', '<BH', 'cmd_code msg_len')
+    event_header = event_header_layout.record
 
     def parse_diag_event(self, pkt):
         """Parses the DIAG_EVENT_REPORT_F packet.
@@ -758,14 +922,12 @@ class QualcommParser:
         Parameters:
         pkt (bytes): DIAG_EVENT_REPORT_F data without trailing CRC
         """
-        pkt_header = self.event_header._make(struct.unpack('<BH', pkt[0:3]))
+        pkt_header = self.event_header_layout.unpack_from(pkt)
 
         pos = 3
         event_pkts = []
-        ts = datetime.datetime.now()
-        # --- LOGGING PATCH: Collect all event IDs encountered ---
-        if not hasattr(self, '_event_id_log'):
-            self._event_id_log = set()
+        ts = datetime.datetime.now(datetime.timezone.utc)
+        self.event_statistics.reports += 1
         while pos < len(pkt):
             # id 12b, _pad 1b, payload_len 2b, ts_trunc 1b
             # defensive: ensure enough bytes for header
@@ -787,49 +949,22 @@ class QualcommParser:
                 pos += 10
             else:
                 # TODO: correctly parse ts
-                ts = datetime.datetime.now()
+                ts = datetime.datetime.now(datetime.timezone.utc)
                 pos += 4
 
-            event_dict = None
             assert (payload_len >= 0) and (payload_len <= 3)
-            # --- LOGGING PATCH: Add event_id to log ---
-            self._event_id_log.add(event_id)
             if payload_len == 0:
                 # No payload
-                if event_id in self.process_event.keys():
-                    event_dict = self.process_event[event_id][0](ts, event_id)
-                elif event_id in self.no_process_event.keys():
-                    event_dict = None
-                else:
-                    event_dict = self.diag_fallback_event_parser.parse_event_fallback(ts, event_id)
-                if event_dict is not None:
-                    event_pkts.append(event_dict)
+                args = ()
             elif payload_len == 1:
                 # 1x uint8
-                arg1 = pkt[pos]
-                if event_id in self.process_event.keys():
-                    event_dict = self.process_event[event_id][0](ts, event_id, arg1)
-                elif event_id in self.no_process_event.keys():
-                    event_dict = None
-                else:
-                    event_dict = self.diag_fallback_event_parser.parse_event_fallback(ts, event_id, arg1)
+                args = (pkt[pos], )
                 pos += 1
-                if event_dict is not None:
-                    event_pkts.append(event_dict)
             elif payload_len == 2:
                 # 2x uint8
-                arg1 = pkt[pos]
-                arg2 = pkt[pos+1]
-                if event_id in self.process_event.keys():
-                    event_dict = self.process_event[event_id][0](ts, event_id, arg1, arg2)
-                elif event_id in self.no_process_event.keys():
-                    event_dict = None
-                else:
-                    event_dict = self.diag_fallback_event_parser.parse_event_fallback(ts, event_id, arg1, arg2)
+                args = (pkt[pos], pkt[pos+1])
                 pos += 2
-                if event_dict is not None:
-                    event_pkts.append(event_dict)
-            elif payload_len == 3:
+            else:
                 # Pascal string
                 # ensure we have at least the length byte
                 if pos + 1 > len(pkt):
@@ -839,27 +974,21 @@ class QualcommParser:
                 if pos + 1 + bin_len > len(pkt):
                     self.logger.log(logging.WARNING, 'Truncated Pascal string payload for event id %d at pos %d (need %d bytes)', event_id, pos, bin_len)
                     break
-                arg_bin = pkt[pos+1:pos+1+bin_len]
-                if event_id in self.process_event.keys():
-                    event_dict = self.process_event[event_id][0](ts, event_id, arg_bin)
-                elif event_id in self.no_process_event.keys():
-                    event_dict = None
-                else:
-                    event_dict = self.diag_fallback_event_parser.parse_event_fallback(ts, event_id, arg_bin)
+                args = (pkt[pos+1:pos+1+bin_len], )
                 # advance pos by length byte + payload
                 pos += (1 + bin_len)
-                if event_dict is not None:
-                    event_pkts.append(event_dict)
-                elif event_id in self.no_process_event.keys():
-                    pass
-                else:
-                    event_pkts.append(self.diag_fallback_event_parser.parse_event_fallback(ts, event_id, arg_bin))
-
-        # --- LOGGING PATCH: Print all event IDs encountered to console ---
-        if hasattr(self, '_event_id_log'):
-            print('\nEvent IDs encountered during parsing:')
-            for eid in sorted(self._event_id_log):
-                print(eid)
+
+            handler, kind = self.event_dispatch.get(event_id, self.event_fallback)
+            self.event_statistics.add(event_id, ts, kind)
+            if handler is None:
+                continue
+            event_dict = handler(ts, event_id, *args)
+            if event_dict is None and payload_len == 3 and kind == diageventstats.EVENT_KNOWN:
+                # Keep Pascal string events the event parser did not decode as fallback output
+                event_dict = self.event_fallback[0](ts, event_id, *args)
+            if event_dict is not None:
+                event_pkts.append(event_dict)
+
         return {'cp': event_pkts, 'ts': ts}
 
     def parse_diag_log_config(self, pkt):
@@ -894,7 +1023,8 @@ class QualcommParser:
 
         return {'stdout': stdout}
 
-    ext_msg_header = namedtuple('QcDiagExtMsgHeader', 'cmd_code ts_type num_args drop_cnt timestamp line_no message_subsys_id reserved1')
+    ext_msg_header_layout = diaglayouts.RecordLayout('QcDiagExtMsgHeader', '<BBBBQHHL', 'cmd_code ts_type num_args drop_cnt timestamp line_no message_subsys_id reserved1')
+    ext_msg_header = ext_msg_header_layout.record
 
     def parse_diag_ext_msg(self, pkt):
         """Parses the DIAG_EXT_MSG_F packet.
@@ -905,7 +1035,7 @@ class QualcommParser:
         # 79 | 00 | 00 | 00 | 00 00 1c fc 0f 16 e4 00 | e6 04 | 94 13 | 02 00 00 00
         # cmd_code, ts_type, num_args, drop_cnt, TS, Line number, Message subsystem ID, ?
         # Message: two null-terminated strings, one for log and another for filename
-        pkt_header = self.ext_msg_header._make(struct.unpack('<BBBBQHHL', pkt[0:20]))
+        pkt_header = self.ext_msg_header_layout.unpack_from(pkt)
         pkt_ts = util.parse_qxdm_ts(pkt_header.timestamp)
         pkt_args = list(struct.unpack('<{}L'.format(pkt_header.num_args), pkt[20:20+4*pkt_header.num_args]))
         pkt_body = pkt[20 + 4 * pkt_header.num_args:]
@@ -927,7 +1057,7 @@ class QualcommParser:
             line_number = pkt_header.line_no
         )
 
-        gsmtap_hdr = util.create_gsmtap_header(
+        gsmtap_hdr = util.static_gsmtap_header(
             version = 2,
             payload_type = util.gsmtap_type.OSMOCORE_LOG)
 
@@ -986,7 +1116,8 @@ class QualcommParser:
     def parse_diag_qsr_ext_msg(self, pkt):
         return None
 
-    multisim_header = namedtuple('QcDiagMultiSimHeader', 'cmd_code reserved1 reserved2 radio_id')
+    multisim_header_layout = diaglayouts.RecordLayout('QcDiagMultiSimHeader', '<BBHL', 'cmd_code reserved1 reserved2 radio_id')
+    multisim_header = multisim_header_layout.record
 
     def parse_diag_multisim(self, pkt):
         """Parses the DIAG_MULTI_RADIO_CMD_F packet. This function calls nexted DIAG log packet with correct radio ID attached.
@@ -1000,7 +1131,7 @@ class QualcommParser:
         if len(pkt) < 8:
             return
 
-        pkt_header = self.multisim_header._make(struct.unpack('<BBHL', pkt[0:8]))
+        pkt_header = self.multisim_header_layout.unpack_from(pkt)
         pkt_body = pkt[8:]
 
         ret = self.parse_diag(pkt_body, hdlc_encoded=False, has_crc=False, args={'radio_id': self.sanitize_radio_id(pkt_header.radio_id)})
@@ -1008,16 +1139,16 @@ class QualcommParser:
             ret['radio_id'] = self.sanitize_radio_id(pkt_header.radio_id)
         return ret
 
-    qsr4_ext_msg_terse = namedtuple('QcDiagQsr4ExtMsgTerse', 'cmd_code ts_type num_size_args drop_cnt timestamp hash unk')
+    qsr4_ext_msg_terse_layout = diaglayouts.RecordLayout('QcDiagQsr4ExtMsgTerse', '<BBBBQLH', 'cmd_code ts_type num_size_args drop_cnt timestamp hash unk')
+    qsr4_ext_msg_terse = qsr4_ext_msg_terse_layout.record
     def parse_diag_qsr4_ext_msg(self, pkt):
         if len(pkt) < 18:
             return None
-        terse = self.qsr4_ext_msg_terse._make(struct.unpack('<BBBBQLH', pkt[0:18]))
+        terse = self.qsr4_ext_msg_terse_layout.unpack_from(pkt)
         pkt_ts = util.parse_qxdm_ts(terse.timestamp)
         extra = pkt[18:]
-        arg_num_size = bitstring.Bits(uint=terse.num_size_args, length=8)
-        arg_num = arg_num_size[0:4].uint
-        arg_size = arg_num_size[4:8].uint
+        arg_num = terse.num_size_args & 0x0f
+        arg_size = terse.num_size_args >> 4
         args = []
 
         if len(extra) != arg_num * arg_size:
@@ -1029,7 +1160,7 @@ class QualcommParser:
             args = list(struct.unpack('<' + 'H' * arg_num, extra))
         elif arg_size == 3:
             tmp_args = struct.unpack('3s' * arg_num, extra)
-            args = [bitstring.Bits(bytes=reversed(x)).uint for x in tmp_args]
+            args = [bitfields.uint_le(x) for x in tmp_args]
         elif arg_size == 4:
             args = list(struct.unpack('<' + 'L' * arg_num, extra))
         else:
@@ -1037,8 +1168,8 @@ class QualcommParser:
                 self.logger.log(logging.ERROR, 'Argument data size mismatch: expected {}, got {}'.format(arg_num * arg_size, len(extra)))
                 return None
 
-        if terse.hash in self.qsr4_content:
-            q = self.qsr4_content[terse.hash]
+        q = self.qsr4_content.get(terse.hash)
+        if q is not None:
 
             osmocore_log_hdr = util.create_osmocore_logging_header(
                 timestamp = pkt_ts,
@@ -1049,20 +1180,22 @@ class QualcommParser:
 
             log_content_formatted = self._snprintf(q.string, args)
 
-            gsmtap_hdr = util.create_gsmtap_header(
+            gsmtap_hdr = util.static_gsmtap_header(
                 version = 2,
                 payload_type = util.gsmtap_type.OSMOCORE_LOG)
 
             return {'cp': [gsmtap_hdr + osmocore_log_hdr + log_content_formatted.encode('utf-8')], 'ts': pkt_ts}
 
-    qsh_trace_msg_terse = namedtuple('QcDiagQshTraceMsgTerse', 'cmd_code unk1 client_id unk3 arg_count unk5 unk6 unk7 unk_inc hash')
+    qsh_trace_msg_terse_layout = diaglayouts.RecordLayout('QcDiagQshTraceMsgTerse', '<B BBBBBBB L L', 'cmd_code unk1 client_id unk3 arg_count unk5 unk6 unk7 unk_inc hash')
+    qsh_trace_msg_terse = qsh_trace_msg_terse_layout.record
     def parse_diag_qsh_trace_msg(self, pkt):
         if len(pkt) < 16:
             return None
-        terse = self.qsh_trace_msg_terse._make(struct.unpack('<B BBBBBBB L L', pkt[0:16]))
+        terse = self.qsh_trace_msg_terse_layout.unpack_from(pkt)
         num_args = terse.arg_count - 0x13
 
-        if terse.hash in self.qsr4_mtrace_content:
+        q = self.qsr4_mtrace_content.get(terse.hash)
+        if q is not None:
             extra = pkt[16:]
             assert len(extra)//4 == num_args
             if num_args > 0:
@@ -1070,7 +1203,6 @@ class QualcommParser:
             else:
                 args = []
 
-            q = self.qsr4_mtrace_content[terse.hash]
             if q.line.find('|') >= 0:
                 line_num = 0
                 level = 0
@@ -1088,7 +1220,7 @@ class QualcommParser:
                 line_number = line_num
             )
 
-            gsmtap_hdr = util.create_gsmtap_header(
+            gsmtap_hdr = util.static_gsmtap_header(
                 version = 2,
                 payload_type = util.gsmtap_type.OSMOCORE_LOG)
 
@@ -7,6 +7,7 @@ import binascii
 import datetime
 import logging
 import os, sys
+import scat.framing as framing
 import scat.util as util
 import struct
 
@@ -209,63 +210,15 @@ class SamsungParser:
     def run_diag(self, writer_sdmraw=None):
         self.logger.log(logging.INFO, 'Starting diag')
 
-        oldbuf = b''
-        loop = True
-        cur_pos = 0
         try:
-            while loop:
-                buf = self.io_device.read(0x1000)
-                if len(buf) == 0:
-                    if self.io_device.block_until_data:
-                        continue
-                    else:
-                        loop = False
-                buf = oldbuf + buf
+            for pkt in framing.read_frames(self.io_device, framing.SdmFramer(logger=self.logger)):
+                parse_result = self.parse_diag(pkt)
 
-                cur_pos = 0
-                while cur_pos < len(buf):
-                    pos = buf.find(b'\x7f', cur_pos)
+                if writer_sdmraw:
+                    writer_sdmraw.write_cp(pkt)
 
-                    if pos < 0:
-                        self.logger.log(logging.WARNING, 'Cannot find the start of packet')
-                        oldbuf = buf
-                        break
-
-                    if len(buf) < pos + 15:
-                        # self.logger.log(logging.WARNING, 'Packet shorter than expected')
-                        oldbuf = buf[pos:]
-                        break
-
-                    sdm_pkt_hdr = sdmheader._make(struct.unpack('<HBHHBBBL', buf[pos+1:pos+15]))
-
-                    # Sanity check
-                    if len(buf) < (pos + 2 + sdm_pkt_hdr.length1):
-                        # self.logger.log(logging.WARNING, 'Current buffer shorter than the packet, storing it')
-                        oldbuf = buf[pos:]
-                        break
-
-                    if buf[pos+1+sdm_pkt_hdr.length1] != 0x7e:
-                        self.logger.log(logging.WARNING, 'Packet start {:02x} and end {:02x} does not match, dropping'.format(buf[pos], buf[pos+1+sdm_pkt_hdr.length1]))
-                        cur_pos = pos + 2
-                        continue
-
-                    if sdm_pkt_hdr.length2 + 3 != sdm_pkt_hdr.length1:
-                        self.logger.log(logging.WARNING, 'Inner and outer length does not match, dropping')
-                        cur_pos = pos + 2
-                        continue
-
-                    parse_result = self.parse_diag(buf[pos:pos + sdm_pkt_hdr.length1 + 2])
-
-                    if writer_sdmraw:
-                        writer_sdmraw.write_cp(buf[pos:pos + sdm_pkt_hdr.length1 + 2])
-
-                    if parse_result is not None:
-                        self.postprocess_parse_result(parse_result)
-
-                    cur_pos = (pos + sdm_pkt_hdr.length1 + 2)
-
-                if cur_pos == len(buf):
-                    oldbuf = b''
+                if parse_result is not None:
+                    self.postprocess_parse_result(parse_result)
 
         except KeyboardInterrupt:
             return
@@ -278,38 +231,12 @@ class SamsungParser:
     def run_dump(self):
         self.logger.log(logging.INFO, 'Starting diag from dump')
 
-        oldbuf = b''
-        cur_pos = 0
         try:
-            while True:
-                buf = self.io_device.read(0x90000)
-                #util.xxd(buf, True)
-                if len(buf) == 0:
-                    continue
-                cur_pos = 0
-                first = False
-                while cur_pos < len(buf):
-                    #print('---- subpacket ----')
-                    #print(buf)
-                    #assert buf[cur_pos] == 0x7f
-                    if buf[cur_pos] != 0x7f:
-                        # if first:
-                        #     self.logger.log(logging.WARNING, 'Unexpected end of the packet, dropping it')
-                        #     self.logger.log(logging.DEBUG, util.xxd(buf))
-                        #     break
-                        cur_pos += 1
-                        continue
-                    first = True
-                    if cur_pos+SamsungParser.pkg_header_len < len(buf):
-                        len_1 = buf[cur_pos + 1] | (buf[cur_pos + 2] << 8)
-                        len_2 = buf[cur_pos + 3] | (buf[cur_pos + 4] << 8)
-                        #util.xxd(buf[cur_pos:cur_pos+len_1 + 2])
-                        #util.xxd(buf[cur_pos: cur_pos + len_1 + 2], True)
-                        self.parse_diag(buf[cur_pos:cur_pos + len_1 + 2])
-                    # cur_pos += (len_1 + 2)
-                    cur_pos += 1
-                    #print('%s/%s' % (cur_pos, len(buf)))
-                #print('---- end ----')
+            for pkt in framing.read_frames(self.io_device, framing.SdmFramer(logger=self.logger)):
+                parse_result = self.parse_diag(pkt)
+
+                if parse_result is not None:
+                    self.postprocess_parse_result(parse_result)
 
         except KeyboardInterrupt:
             return
@@ -320,50 +247,21 @@ class SamsungParser:
         # the timezone is specified in sdm file header, that header isn't supported by this parser.
         logger_header_struct = namedtuple('SdmLoggerHeader', 'magic logger_ts_low logger_ts_up seqnr direction group command timestamp')
 
-        oldbuf = b''
-        loop = True
-        cur_pos = 0
         try:
-            while loop:
-                buf = self.io_device.read(0x1000)
-                if len(buf) == 0:
-                    if self.io_device.block_until_data:
-                        continue
-                    else:
-                        loop = False
-                buf = oldbuf + buf
-
-                cur_pos = 0
-                while cur_pos < len(buf):
-                    if cur_pos + 2 > len(buf):
-                        oldbuf = buf[cur_pos:]
-                        break
-                    pkt_len = struct.unpack('<H', buf[cur_pos:cur_pos+2])[0]
-                    if cur_pos + pkt_len > len(buf):
-                        oldbuf = buf[cur_pos:]
-                        break
-                    pkt = buf[cur_pos+2:cur_pos+2+pkt_len]
-                    if len(pkt) < pkt_len:
-                        oldbuf = buf[cur_pos:]
-                        break
-                    cur_pos += (2 + pkt_len)
-
-                    # print(binascii.hexlify(pkt))
-                    if len(pkt) < 17:
-                        self.logger.log(logging.INFO, 'Skipping packet as shorter than expected')
-                        continue
-                    logger_header = logger_header_struct._make(struct.unpack('<HHLHBBBL', pkt[0:17]))
-                    if not (logger_header.magic == 0x7f39):
-                        self.logger.log(logging.INFO, 'Skipping packet as magic does not match')
-                        continue
-                    payload = pkt[17:]
-                    parse_result = self.parse_diag(generate_sdm_packet(logger_header.direction, logger_header.group, logger_header.command, payload, logger_header.timestamp))
-                    if parse_result is not None:
-                        parse_result['ts'] = util.parse_sdm_ts(logger_header.logger_ts_up, logger_header.logger_ts_low)
-                        self.postprocess_parse_result(parse_result)
-
-                if cur_pos == len(buf):
-                    oldbuf = b''
+            for pkt in framing.read_frames(self.io_device, framing.LengthPrefixFramer(logger=self.logger)):
+                # print(binascii.hexlify(pkt))
+                if len(pkt) < 17:
+                    self.logger.log(logging.INFO, 'Skipping packet as shorter than expected')
+                    continue
+                logger_header = logger_header_struct._make(struct.unpack('<HHLHBBBL', pkt[0:17]))
+                if not (logger_header.magic == 0x7f39):
+                    self.logger.log(logging.INFO, 'Skipping packet as magic does not match')
+                    continue
+                payload = pkt[17:]
+                parse_result = self.parse_diag(generate_sdm_packet(logger_header.direction, logger_header.group, logger_header.command, payload, logger_header.timestamp))
+                if parse_result is not None:
+                    parse_result['ts'] = util.parse_sdm_ts(logger_header.logger_ts_up, logger_header.logger_ts_low)
+                    self.postprocess_parse_result(parse_result)
 
         except KeyboardInterrupt:
             return
@@ -390,7 +288,7 @@ class SamsungParser:
             # ts is set only for .sdm dumps
             ts = parse_result['ts']
         else:
-            ts = datetime.datetime.now()
+            ts = datetime.datetime.now(datetime.timezone.utc)
 
         if 'cp' in parse_result:
             if 'layer' in parse_result:
@@ -2,22 +2,11 @@
 
 
 from collections import namedtuple
-from packaging import version
 import binascii
-import bitstring
 import logging
 import struct
 
-bitstring_ver = version.parse(bitstring.__version__)
-if bitstring_ver >= version.parse('4.2.0'):
-    bitstring.options.lsb0 = True
-elif bitstring_ver >= version.parse('4.0.0'):
-    bitstring.lsb0 = True
-elif bitstring_ver >= version.parse('3.1.7'):
-    bitstring.set_lsb0(True)
-else:
-    raise Exception("SCAT requires bitstring>=3.1.7, recommends bitstring>=4.0.0")
-
+import scat.bitfields as bitfields
 import scat.parsers.samsung.sdmcmd as sdmcmd
 
 class SdmControlParser:
@@ -194,7 +183,7 @@ class SdmControlParser:
         for i in range(item.num_items):
             if i in self.trace_group:
                 stdout += 'Item {} ({}): {:08x} - '.format(i, self.trace_group[i][0], items[i])
-                enabled_bits = str(bitstring.Bits(uint=items[i], length=32).bin)[::-1]
+                enabled_bits = bitfields.bin_lsb0(items[i], 32)
                 for x in range(len(enabled_bits)):
                     if x > (len(self.trace_group[i]) - 2):
                         break
@@ -7,6 +7,7 @@ from pathlib import Path
 import binascii
 import logging
 import os, sys
+import scat.framing as framing
 import scat.util as util
 import struct
 
@@ -119,9 +120,6 @@ class UnisocParser:
         usoc_header_struct = namedtuple('UnisocDumpHeader', 'magic unk1 unk2 unk3')
         sync_word = b'~~~~'
 
-        oldbuf = b''
-        loop = True
-        cur_pos = 0
         try:
             header_buf = self.io_device.read(0x10)
             usoc_header = usoc_header_struct._make(struct.unpack('<4L', header_buf))
@@ -135,37 +133,10 @@ class UnisocParser:
                 self.logger.log(logging.WARNING, "End-of-packet indicator not found")
                 return
 
-            while loop:
-                buf = self.io_device.read(0x90000)
-                if len(buf) == 0:
-                    if self.io_device.block_until_data:
-                        continue
-                    else:
-                        loop = False
-                buf = oldbuf + buf
-
-                cur_pos = 0
-                while cur_pos < len(buf):
-                    if cur_pos + 2 > len(buf):
-                        oldbuf = buf[cur_pos:]
-                        break
-                    pkt_len = struct.unpack('<H', buf[cur_pos:cur_pos+2])[0]
-                    if cur_pos + pkt_len > len(buf):
-                        oldbuf = buf[cur_pos:]
-                        break
-                    pkt = buf[cur_pos:cur_pos+pkt_len+4]
-                    if len(pkt) < (pkt_len+4):
-                        oldbuf = buf[cur_pos:]
-                        break
-
-                    parse_result = self.parse_diag(pkt)
-                    if parse_result is not None:
-                        self.postprocess_parse_result(parse_result)
-
-                    cur_pos += (pkt_len + 4)
-
-                if cur_pos == len(buf):
-                    oldbuf = b''
+            for pkt in framing.read_frames(self.io_device, framing.UnisocFramer(logger=self.logger)):
+                parse_result = self.parse_diag(pkt)
+                if parse_result is not None:
+                    self.postprocess_parse_result(parse_result)
 
         except KeyboardInterrupt:
             return
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# coding: utf8
+"""
+Decode profiler.
+
+Records packet counts, bytes, cumulative and maximum wall time of the log
+decoders (per log ID), event decoders (per event ID) and writer methods.
+Instrumentation is installed by wrapping the callables of the dispatch tables
+and the writer, so a parser running without profiler pays nothing for it.
+The counters of parallel decode workers are merged into those of the main
+process, their decoder times add up over all workers.
+"""
+
+import json
+import time
+
+
+class ProfileStat:
+    """
+    Counters of a single profiled decoder or writer method.
+    """
+    __slots__ = ('count', 'bytes', 'total_ns', 'max_ns')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.bytes = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def merge(self, other):
+        self.count += other.count
+        self.bytes += other.bytes
+        self.total_ns += other.total_ns
+        if other.max_ns > self.max_ns:
+            self.max_ns = other.max_ns
+
+    def add(self, nbytes, elapsed_ns):
+        self.count += 1
+        self.bytes += nbytes
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+
+def payload_size(args):
+    """Returns the size of the first bytes-like argument, 0 if there is none."""
+    for arg in args:
+        if isinstance(arg, (bytes, bytearray, memoryview, str)):
+            return len(arg)
+    return 0
+
+def log_body_size(args):
+    """Returns the log packet size of (pkt_header, pkt_body, args) log decoder arguments."""
+    return len(args[1]) + 12
+
+
+class DecodeProfiler:
+    """
+    Per log ID, event ID and writer method timing statistics.
+    """
+    KINDS = ('log', 'event', 'writer')
+
+    def __init__(self):
+        self.stats = {}
+        self.started_ns = time.perf_counter_ns()
+
+    def stat(self, kind, key):
+        """Returns the counters of (kind, key), creating them on first use."""
+        stat = self.stats.get((kind, key))
+        if stat is None:
+            stat = ProfileStat()
+            self.stats[(kind, key)] = stat
+        return stat
+
+    def reset(self):
+        """Clears the counters, the wrapped callables keep counting into them."""
+        for stat in self.stats.values():
+            stat.reset()
+
+    def used_stats(self):
+        """Returns the counters of the (kind, key) pairs called at least once."""
+        return {kind_key: stat for kind_key, stat in self.stats.items() if stat.count > 0}
+
+    def merge(self, stats):
+        """Adds the counters returned by used_stats() of another profiler."""
+        for (kind, key), stat in stats.items():
+            self.stat(kind, key).merge(stat)
+
+    def wrap(self, kind, key, func, size=payload_size):
+        """Returns func timed under (kind, key). size computes the byte count from the arguments."""
+        stat = self.stat(kind, key)
+        perf_counter_ns = time.perf_counter_ns
+
+        def profiled(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stat.add(size(args), perf_counter_ns() - start)
+        return profiled
+
+    def wrap_keyed(self, kind, func, key, size=payload_size):
+        """Returns func timed under (kind, key(args)), for handlers serving several IDs."""
+        perf_counter_ns = time.perf_counter_ns
+
+        def profiled(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.stat(kind, key(args)).add(size(args), perf_counter_ns() - start)
+        return profiled
+
+    def wrap_table(self, kind, table, size=payload_size):
+        """Returns a copy of a dispatch table with every handler timed under its key."""
+        return {key: self.wrap(kind, key, func, size) for key, func in table.items()}
+
+    def wrap_writer(self, writer):
+        """Returns a proxy of writer timing each of its methods."""
+        if writer is None or isinstance(writer, ProfiledWriter):
+            return writer
+        return ProfiledWriter(self, writer)
+
+    def report(self):
+        """Returns the statistics as JSON serializable dict, entries sorted by cumulative time."""
+        entries = []
+        for (kind, key), stat in sorted(self.stats.items(), key=lambda x: x[1].total_ns, reverse=True):
+            if stat.count == 0:
+                continue
+            entries.append({
+                'kind': kind,
+                'id': '0x{:04x}'.format(key) if kind == 'log' else key,
+                'count': stat.count,
+                'bytes': stat.bytes,
+                'total_ns': stat.total_ns,
+                'max_ns': stat.max_ns,
+                'mean_ns': stat.total_ns // stat.count,
+                'mb_per_s': (stat.bytes / 1e6) / (stat.total_ns / 1e9) if stat.total_ns > 0 else 0.0,
+            })
+        return {'wall_ns': time.perf_counter_ns() - self.started_ns, 'entries': entries}
+
+    def format_table(self, limit=None):
+        """Returns the statistics as text table, sorted by cumulative time."""
+        report = self.report()
+        entries = report['entries'] if limit is None else report['entries'][:limit]
+        lines = ['{:<7} {:<40} {:>9} {:>12} {:>11} {:>10} {:>10} {:>8}'.format(
+            'Kind', 'ID', 'Count', 'Bytes', 'Total ms', 'Mean us', 'Max us', 'MB/s')]
+        for e in entries:
+            lines.append('{:<7} {:<40} {:>9} {:>12} {:>11.3f} {:>10.1f} {:>10.1f} {:>8.2f}'.format(
+                e['kind'], str(e['id']), e['count'], e['bytes'], e['total_ns'] / 1e6,
+                e['mean_ns'] / 1e3, e['max_ns'] / 1e3, e['mb_per_s']))
+        lines.append('Wall time: {:.3f} s'.format(report['wall_ns'] / 1e9))
+        return '\n'.join(lines)
+
+    def save(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+
+class ProfiledWriter:
+    """
+    Writer proxy timing every method call of the wrapped writer.
+
+    Attributes missing on the wrapped writer are missing on the proxy as well,
+    so hasattr() checks of the parsers keep working.
+    """
+    def __init__(self, profiler, writer):
+        self._profiler = profiler
+        self._writer = writer
+
+    def __getattr__(self, name):
+        attr = getattr(self._writer, name)
+        if callable(attr):
+            attr = self._profiler.wrap('writer', '{}.{}'.format(type(self._writer).__name__, name), attr)
+            setattr(self, name, attr)
+        return attr
@@ -4,14 +4,15 @@
 """
 util.py - Utility and helper functions for SCAT/QMDL parsing
 
-Provides protocol helpers, CRC calculations, bitstring manipulation, and other shared logic used throughout the parser and writers.
+Provides protocol helpers, CRC calculations, bit field manipulation, and other shared logic used throughout the parser and writers.
 """
 
 from enum import IntEnum, unique
-from packaging import version
-import bitstring
+import binascii
+import scat.bitfields as bitfields
 import datetime
-import math
+import functools
+import logging
 import string
 import struct
 
@@ -22,60 +23,20 @@ except ModuleNotFoundError:
     has_libscrc = False
 
 
-bitstring_ver = version.parse(bitstring.__version__)
-if bitstring_ver >= version.parse('4.2.0'):
-    bitstring.options.lsb0 = True
-elif bitstring_ver >= version.parse('4.0.0'):
-    bitstring.lsb0 = True
-elif bitstring_ver >= version.parse('3.1.7'):
-    bitstring.set_lsb0(True)
-else:
-    raise Exception("SCAT requires bitstring>=3.1.7, recommends bitstring>=4.0.0")
-
 XXD_SET = string.ascii_letters + string.digits + string.punctuation
 
-crc_table = [
-    0x0000, 0x1189, 0x2312, 0x329b, 0x4624, 0x57ad, 0x6536, 0x74bf,
-    0x8c48, 0x9dc1, 0xaf5a, 0xbed3, 0xca6c, 0xdbe5, 0xe97e, 0xf8f7,
-    0x1081, 0x0108, 0x3393, 0x221a, 0x56a5, 0x472c, 0x75b7, 0x643e,
-    0x9cc9, 0x8d40, 0xbfdb, 0xae52, 0xdaed, 0xcb64, 0xf9ff, 0xe876,
-    0x2102, 0x308b, 0x0210, 0x1399, 0x6726, 0x76af, 0x4434, 0x55bd,
-    0xad4a, 0xbcc3, 0x8e58, 0x9fd1, 0xeb6e, 0xfae7, 0xc87c, 0xd9f5,
-    0x3183, 0x200a, 0x1291, 0x0318, 0x77a7, 0x662e, 0x54b5, 0x453c,
-    0xbdcb, 0xac42, 0x9ed9, 0x8f50, 0xfbef, 0xea66, 0xd8fd, 0xc974,
-    0x4204, 0x538d, 0x6116, 0x709f, 0x0420, 0x15a9, 0x2732, 0x36bb,
-    0xce4c, 0xdfc5, 0xed5e, 0xfcd7, 0x8868, 0x99e1, 0xab7a, 0xbaf3,
-    0x5285, 0x430c, 0x7197, 0x601e, 0x14a1, 0x0528, 0x37b3, 0x263a,
-    0xdecd, 0xcf44, 0xfddf, 0xec56, 0x98e9, 0x8960, 0xbbfb, 0xaa72,
-    0x6306, 0x728f, 0x4014, 0x519d, 0x2522, 0x34ab, 0x0630, 0x17b9,
-    0xef4e, 0xfec7, 0xcc5c, 0xddd5, 0xa96a, 0xb8e3, 0x8a78, 0x9bf1,
-    0x7387, 0x620e, 0x5095, 0x411c, 0x35a3, 0x242a, 0x16b1, 0x0738,
-    0xffcf, 0xee46, 0xdcdd, 0xcd54, 0xb9eb, 0xa862, 0x9af9, 0x8b70,
-    0x8408, 0x9581, 0xa71a, 0xb693, 0xc22c, 0xd3a5, 0xe13e, 0xf0b7,
-    0x0840, 0x19c9, 0x2b52, 0x3adb, 0x4e64, 0x5fed, 0x6d76, 0x7cff,
-    0x9489, 0x8500, 0xb79b, 0xa612, 0xd2ad, 0xc324, 0xf1bf, 0xe036,
-    0x18c1, 0x0948, 0x3bd3, 0x2a5a, 0x5ee5, 0x4f6c, 0x7df7, 0x6c7e,
-    0xa50a, 0xb483, 0x8618, 0x9791, 0xe32e, 0xf2a7, 0xc03c, 0xd1b5,
-    0x2942, 0x38cb, 0x0a50, 0x1bd9, 0x6f66, 0x7eef, 0x4c74, 0x5dfd,
-    0xb58b, 0xa402, 0x9699, 0x8710, 0xf3af, 0xe226, 0xd0bd, 0xc134,
-    0x39c3, 0x284a, 0x1ad1, 0x0b58, 0x7fe7, 0x6e6e, 0x5cf5, 0x4d7c,
-    0xc60c, 0xd785, 0xe51e, 0xf497, 0x8028, 0x91a1, 0xa33a, 0xb2b3,
-    0x4a44, 0x5bcd, 0x6956, 0x78df, 0x0c60, 0x1de9, 0x2f72, 0x3efb,
-    0xd68d, 0xc704, 0xf59f, 0xe416, 0x90a9, 0x8120, 0xb3bb, 0xa232,
-    0x5ac5, 0x4b4c, 0x79d7, 0x685e, 0x1ce1, 0x0d68, 0x3ff3, 0x2e7a,
-    0xe70e, 0xf687, 0xc41c, 0xd595, 0xa12a, 0xb0a3, 0x8238, 0x93b1,
-    0x6b46, 0x7acf, 0x4854, 0x59dd, 0x2d62, 0x3ceb, 0x0e70, 0x1ff9,
-    0xf78f, 0xe606, 0xd49d, 0xc514, 0xb1ab, 0xa022, 0x92b9, 0x8330,
-    0x7bc7, 0x6a4e, 0x58d5, 0x495c, 0x3de3, 0x2c6a, 0x1ef1, 0x0f78
-    ]
+# Bit-reversed byte values: CRC-16/X-25 is the reflected form of the CRC-CCITT
+# computed by binascii.crc_hqx, which runs in C and is always available
+crc_reflect_table = bytes(int('{:08b}'.format(x)[::-1], 2) for x in range(256))
 
 def dm_crc16(arr):
     if has_libscrc:
         return libscrc.x25(arr)
     else:
-        ret = 0xffff
-        for b in arr:
-            ret = (ret >> 8) ^ crc_table[(ret ^ b) & 0xff]
+        if type(arr) == memoryview:
+            arr = arr.tobytes()
+        ret = binascii.crc_hqx(arr.translate(crc_reflect_table), 0xffff)
+        ret = (crc_reflect_table[ret & 0xff] << 8) | crc_reflect_table[ret >> 8]
         return ret ^ 0xffff
 
 def wrap(arr):
@@ -84,6 +45,12 @@ def wrap(arr):
     return t
 
 def unwrap(arr):
+    # Decoders expect bytes: memoryviews of mapped dumps are copied once here
+    if type(arr) == memoryview:
+        arr = arr.tobytes()
+    # Most frames contain no escape at all, return bytes frames without copying
+    if b'\x7d' not in arr:
+        return arr
     t = arr.replace(b'\x7d\x5e', b'\x7e')
     t = t.replace(b'\x7d\x5d', b'\x7d')
     return t
@@ -95,21 +62,250 @@ def generate_packet(arr):
     arr += b'\x7e'
     return arr
 
-def parse_qxdm_ts(ts):
-    # Upper 48 bits: epoch at 1980-01-06 00:00:00, incremented by 1 for 1/800s
-    # Lower 16 bits: time since last 1/800s tick in 1/32 chip units
-
-    ts_upper = (ts >> 16)
-    ts_lower = ts & 0xffff
+CRC_STRICT = 'strict'
+CRC_LAZY = 'lazy'
+CRC_OFF = 'off'
+CRC_POLICIES = (CRC_STRICT, CRC_LAZY, CRC_OFF)
+
+class CrcVerifier:
+    """
+    Applies the CRC verification policy to DIAG frames and counts the outcome.
+    - strict: every frame is verified
+    - lazy: frames are decoded first, only suspicious frames, frames failing to
+      decode and every sample_rate-th frame are verified
+    - off: no frame is verified
+    """
+    def __init__(self, policy=CRC_STRICT, sample_rate=0, logger=None):
+        if policy not in CRC_POLICIES:
+            raise ValueError('Unknown CRC policy {}'.format(policy))
+        self.policy = policy
+        self.sample_rate = sample_rate
+        self.logger = logger if logger else logging.getLogger('scat.util')
+        self.reset()
+
+    def reset(self):
+        self.verified = 0
+        self.failed = 0
+        self.skipped = 0
+        self.sample_count = 0
+
+    def needs_check(self, suspicious=False):
+        """
+        Decide whether the current frame is verified before decoding.
+        Frames not verified are counted as skipped.
+        """
+        if self.policy == CRC_STRICT:
+            return True
+        if self.policy == CRC_LAZY:
+            if suspicious:
+                return True
+            if self.sample_rate > 0:
+                self.sample_count += 1
+                if self.sample_count >= self.sample_rate:
+                    self.sample_count = 0
+                    return True
+        self.skipped += 1
+        return False
+
+    def verify(self, pkt, deferred=False):
+        """
+        Verify the trailing CRC16 of an unescaped frame, returns True on match.
+        deferred is set when verifying a frame previously counted as skipped.
+        """
+        if deferred:
+            self.skipped -= 1
+        self.verified += 1
+        crc = dm_crc16(pkt[:-2])
+        crc_pkt = (pkt[-1] << 8) | pkt[-2]
+        if crc != crc_pkt:
+            self.failed += 1
+            self.logger.log(logging.WARNING, "CRC mismatch: expected 0x{:04x}, got 0x{:04x}".format(crc, crc_pkt))
+            self.logger.log(logging.DEBUG, xxd(pkt))
+            return False
+        return True
+
+    def counts(self):
+        return (self.verified, self.failed, self.skipped)
+
+    def merge(self, counts):
+        """Adds the counts() of another verifier"""
+        verified, failed, skipped = counts
+        self.verified += verified
+        self.failed += failed
+        self.skipped += skipped
+
+    def summary(self):
+        return 'CRC: {} verified, {} failed, {} skipped'.format(self.verified, self.failed, self.skipped)
+
+UNIX_EPOCH = datetime.datetime(1970, 1, 1, 0, 0, 0, tzinfo=datetime.timezone.utc)
+GPS_EPOCH = datetime.datetime(1980, 1, 6, 0, 0, 0, tzinfo=datetime.timezone.utc)
+# Microseconds from the Unix epoch to the GPS epoch and to the largest datetime
+GPS_EPOCH_US = 315964800 * 1000000
+MAX_TIMESTAMP_US = ((datetime.datetime.max.replace(tzinfo=datetime.timezone.utc) - UNIX_EPOCH)
+    // datetime.timedelta(microseconds=1))
+
+class TimestampFormatter:
+    """
+    Formats Timestamps, reusing the formatted part down to the second.
+
+    Consecutive records mostly fall into the same second, so per format string
+    only the last second is kept and the microseconds are filled in per record.
+    """
+    def __init__(self):
+        self.prefixes = {}
+
+    def _parts(self, ts, key, render):
+        second = ts.us // 1000000
+        entry = self.prefixes.get(key)
+        if entry is None or entry[0] != second:
+            entry = (second, render(UNIX_EPOCH + datetime.timedelta(seconds=second)))
+            self.prefixes[key] = entry
+        return entry[1]
+
+    def strftime(self, ts, fmt):
+        parts = self._parts(ts, fmt, lambda d: [d.strftime(part) for part in fmt.split('%f')])
+        if len(parts) == 1:
+            return parts[0]
+        return '{:06d}'.format(ts.us % 1000000).join(parts)
+
+    def isoformat(self, ts, sep='T'):
+        # datetime omits the fraction for whole seconds, the UTC offset is always +00:00
+        prefix = self._parts(ts, ('iso', sep), lambda d: d.isoformat(sep)[:-6])
+        usec = ts.us % 1000000
+        if usec == 0:
+            return prefix + '+00:00'
+        return '{}.{:06d}+00:00'.format(prefix, usec)
+
+timestamp_formatter = TimestampFormatter()
+
+# Units of Timestamp.raw
+TS_QXDM = 'qxdm'
+TS_SDM = 'sdm'
+
+@functools.total_ordering
+class Timestamp:
+    """
+    UTC timestamp kept as integer microseconds since the Unix epoch.
+
+    Parsers attach it to their results in place of a datetime: raw holds the
+    value read from the baseband and kind its unit (TS_QXDM for 64-bit QXDM
+    ticks, TS_SDM for SDM milliseconds). The datetime is only built when a
+    writer asks for it, strftime() and isoformat() go through the per-second
+    cache of TimestampFormatter, and other datetime attributes are forwarded
+    to the materialised datetime.
+    """
+    __slots__ = ('us', 'raw', 'kind', '_dt')
+
+    def __init__(self, us, raw=None, kind=None):
+        if not 0 <= us <= MAX_TIMESTAMP_US:
+            # Out of the datetime range, as parse_qxdm_ts always did
+            us = GPS_EPOCH_US
+            # raw no longer matches us
+            kind = None
+        self.us = us
+        self.raw = raw
+        self.kind = kind
+        self._dt = None
+
+    def datetime(self):
+        if self._dt is None:
+            self._dt = UNIX_EPOCH + datetime.timedelta(microseconds=self.us)
+        return self._dt
+
+    def timestamp(self):
+        return self.us / 1000000
+
+    @property
+    def microsecond(self):
+        return self.us % 1000000
+
+    def strftime(self, fmt):
+        return timestamp_formatter.strftime(self, fmt)
+
+    def isoformat(self, sep='T'):
+        return timestamp_formatter.isoformat(self, sep)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.datetime(), name)
+
+    def __eq__(self, other):
+        if isinstance(other, Timestamp):
+            return self.us == other.us
+        if isinstance(other, datetime.datetime):
+            return self.datetime() == other
+        return NotImplemented
+
+    def __lt__(self, other):
+        if isinstance(other, Timestamp):
+            return self.us < other.us
+        if isinstance(other, datetime.datetime):
+            return self.datetime() < other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.datetime())
+
+    def __add__(self, other):
+        return self.datetime() + other
+
+    def __sub__(self, other):
+        if isinstance(other, Timestamp):
+            other = other.datetime()
+        return self.datetime() - other
+
+    def __rsub__(self, other):
+        return other - self.datetime()
+
+    def __str__(self):
+        return self.isoformat(' ')
+
+    def __repr__(self):
+        return 'Timestamp({!r})'.format(self.datetime())
+
+def qxdm_ts_to_us(ts):
+    """Converts 64-bit QXDM ticks to microseconds since the GPS epoch, rounded as timedelta does."""
+    # Upper 48 bits: epoch at 1980-01-06 00:00:00, incremented by 1 for 1/800s (1250 us)
+    # Lower 16 bits: time since last 1/800s tick in 1/32 chip units (25/1024 us)
+    return (ts >> 16) * 1250 + ((ts & 0xffff) * 25 + 512) // 1024
 
-    epoch = datetime.datetime(1980, 1, 6, 0, 0, 0, tzinfo=datetime.timezone.utc)
-
-    try:
-        ts_delta = datetime.timedelta(0, 0, 0, ts_upper * 1.25 + ts_lower * (1 / 40960), 0, 0, 0)
-        date = epoch + ts_delta
-    except OverflowError:
-        date = epoch + datetime.timedelta(seconds=0)
-    return date
+def parse_qxdm_ts(ts):
+    return Timestamp(GPS_EPOCH_US + qxdm_ts_to_us(ts), ts, TS_QXDM)
+
+def qxdm_ts_from_datetime(date):
+    # Inverse of parse_qxdm_ts, truncated to the 1/800s tick
+    # Naive datetimes are treated as UTC
+
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    delta = date - GPS_EPOCH
+    delta_us = (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+    if delta_us < 0:
+        return 0
+    return (delta_us // 1250) << 16
+
+def timestamp_us(ts):
+    # Microseconds since the Unix epoch of a Timestamp or datetime, None otherwise
+    # Naive datetimes are treated as UTC
+
+    if isinstance(ts, Timestamp):
+        return ts.us
+    if isinstance(ts, datetime.datetime):
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=datetime.timezone.utc)
+        return (ts - UNIX_EPOCH) // datetime.timedelta(microseconds=1)
+    return None
+
+def timestamp_ns(ts):
+    # Nanoseconds since the Unix epoch of a Timestamp or datetime, None otherwise
+    # Timestamps parsed from QXDM ticks keep the 1/32 chip resolution of the ticks
+    # Naive datetimes are treated as UTC
+
+    if isinstance(ts, Timestamp) and ts.kind == TS_QXDM:
+        return (GPS_EPOCH_US + (ts.raw >> 16) * 1250) * 1000 + ((ts.raw & 0xffff) * 25000 + 512) // 1024
+    us = timestamp_us(ts)
+    return None if us is None else us * 1000
 
 def xxd(buf, stdout = False):
     xxd_str = ''
@@ -141,19 +337,11 @@ def xxd_oneline(buf, stdout = False):
 
 def parse_sdm_ts(ts_upper_32bits, ts_lower_16bits):
     # ts_upper_32bits + ts_lower_16bits = 48bits unsigned int = milliseconds since epoch
-    ts_upper = ts_upper_32bits << 16
-    ts_ms = ts_upper + ts_lower_16bits
-    ts_s = ts_ms / 1000.0
+    ts_ms = (ts_upper_32bits << 16) + ts_lower_16bits
 
-    if ts_s == 0:
-      return datetime.datetime.now()
-
-    try:
-        date = datetime.datetime.fromtimestamp(ts_s, tz=datetime.timezone.utc)
-    except OverflowError:
-        date = datetime.datetime.now()
-
-    return date
+    if ts_ms == 0 or ts_ms * 1000 > MAX_TIMESTAMP_US:
+        return datetime.datetime.now(datetime.timezone.utc)
+    return Timestamp(ts_ms * 1000, ts_ms, TS_SDM)
 
 # Definition copied from libosmocore's include/osmocom/core/gsmtap.h
 
@@ -437,26 +625,57 @@ class gsmtapv3_nr_rrc_types(IntEnum):
     SIB25 = 0x021f
     SIB17BIS = 0x0220
 
+gsmtap_v2_header = struct.Struct('!BBBBHBBLBBBB')
+gsmtap_v3_header = struct.Struct('!BBHHH')
+# GSMTAP v3 header followed by the CHANNEL_NUMBER TLV, optionally preceded by the PACKET_TIMESTAMP TLV
+gsmtap_v3_fixed_header = struct.Struct('!BBHHH' 'HHL')
+gsmtap_v3_fixed_header_ts = struct.Struct('!BBHHH' 'HHQL' 'HHL')
+gsmtapv3_tlv_header = struct.Struct('!HH')
+osmocore_logging_header = struct.Struct('!LL16sLB3x16s32sL')
+
+# Wireshark GSMTAP dissector accepts only 14 bits of ARFCN, except in GSM for implicitly marking uplink
+gsmtap_v2_full_arfcn_types = frozenset((gsmtap_type.UM, gsmtap_type.UM_BURST, gsmtap_type.ABIS,
+    gsmtap_type.GB_LLC, gsmtap_type.GB_SNDCP))
+
+def _gsmtapv3_metadata_structs():
+    t = gsmtapv3_metadata_tags
+    structs = {}
+    for tags, fmt in (
+            ((t.BAND_INDICATOR, t.BSIC_PSC_PCI, t.SUBFN, t.HFN), 'H'),
+            ((t.GSM_TIMESLOT, t.GSM_SUBSLOT, t.ANT_NUM), 'B'),
+            ((t.SIGNAL_LEVEL, t.RSSI, t.SNR, t.SINR, t.RSCP, t.ECIO, t.RSRP, t.RSRQ,
+              t.SS_RSRP, t.CSI_RSRP, t.SRS_RSRP, t.SS_RSRQ, t.CSI_RSRQ, t.SS_SINR, t.CSI_SINR), 'f')):
+        for tag in tags:
+            structs[int(tag)] = struct.Struct('!HH' + fmt)
+    return structs
+
+# TLV (tag, length, value) struct of integer GSMTAP v3 metadata by tag, '!HHL' for other tags
+gsmtapv3_metadata_structs = _gsmtapv3_metadata_structs()
+gsmtapv3_metadata_default_struct = struct.Struct('!HHL')
+
+def pack_gsmtapv3_metadata(metadata):
+    """Returns the TLVs of a GSMTAP v3 metadata dict (tag: int or bytes)."""
+    tlvs = []
+    for k, v in metadata.items():
+        if type(v) == int:
+            tlv_struct = gsmtapv3_metadata_structs.get(k, gsmtapv3_metadata_default_struct)
+            tlvs.append(tlv_struct.pack(k, tlv_struct.size - 4, v))
+        else:
+            tlvs.append(gsmtapv3_tlv_header.pack(k, len(v)))
+            tlvs.append(v)
+    return b''.join(tlvs)
+
 def create_gsmtap_header(version = 2, payload_type = 0, timeslot = 0,
     arfcn = 0, signal_dbm = 0, snr_db = 0, frame_number = 0,
     sub_type = 0, antenna_nr = 0, sub_slot = 0,
-    device_sec = 0, device_usec = 0, metadata = dict()):
-
-    gsmtap_v2_hdr_def = '!BBBBHBBLBBBB'
-    gsmtap_v3_hdr_def = '!BBHHH'
-    gsmtap_hdr = b''
-    gsmtap_v3_metadata = b''
+    device_sec = 0, device_usec = 0, metadata = None):
 
     if version == 2:
-        # Sanity check - Wireshark GSMTAP dissector accepts only 14 bits of ARFCN
-        # Only allow in GSM for implicitly marking uplink
-        if not (payload_type == gsmtap_type.UM or payload_type == gsmtap_type.UM_BURST or
-            payload_type == gsmtap_type.ABIS or
-            payload_type == gsmtap_type.GB_LLC or payload_type == gsmtap_type.GB_SNDCP):
+        if payload_type not in gsmtap_v2_full_arfcn_types:
             if arfcn < 0 or arfcn > (2 ** 14 - 1):
                 arfcn = 0
 
-        gsmtap_hdr = struct.pack(gsmtap_v2_hdr_def,
+        return gsmtap_v2_header.pack(
             2,                           # Version
             4,                           # Header Length
             payload_type,                # Type
@@ -471,50 +690,36 @@ def create_gsmtap_header(version = 2, payload_type = 0, timeslot = 0,
             0                            # Reserved
             )
     elif version == 3:
-        header_len = 8
-
         t = gsmtapv3_metadata_tags
+        gsmtap_v3_metadata = pack_gsmtapv3_metadata(metadata) if metadata else b''
+        fixed_header = gsmtap_v3_fixed_header_ts if device_sec > 0 else gsmtap_v3_fixed_header
+        header_len = fixed_header.size + len(gsmtap_v3_metadata)
+        padding = -header_len % 4
+
         if device_sec > 0:
-            gsmtap_v3_metadata += struct.pack('!HHQL', t.PACKET_TIMESTAMP, 12, device_sec, device_usec * 1000)
-            header_len += 16
-        gsmtap_v3_metadata += struct.pack('!HHL', t.CHANNEL_NUMBER, 4, arfcn)
-        header_len += 8
-        for k, v in metadata.items():
-            if type(v) == int:
-                if k in (t.BAND_INDICATOR, t.BSIC_PSC_PCI, t.SUBFN, t.HFN):
-                    buf = struct.pack('!H', v)
-                elif k in (t.GSM_TIMESLOT, t.GSM_SUBSLOT, t.ANT_NUM):
-                    buf = struct.pack('!B', v)
-                elif k in (t.SIGNAL_LEVEL, t.RSSI, t.SNR, t.SINR, t.RSCP, t.ECIO, t.RSRP, t.RSRQ,
-                           t.SS_RSRP, t.CSI_RSRP, t.SRS_RSRP, t.SS_RSRQ, t.CSI_RSRQ, t.SS_SINR, t.CSI_SINR):
-                    buf = struct.pack('!f', v)
-                else:
-                    buf = struct.pack('!L', v)
-            else:
-                buf = v
-            gsmtap_v3_metadata += struct.pack('!HH', k, len(buf))
-            gsmtap_v3_metadata += buf
-            header_len += (4 + len(buf))
-
-        gsmtap_hdr = struct.pack(gsmtap_v3_hdr_def,
-            3,                           # Version
-            0,                           # Reserved
-            math.ceil(header_len/4),     # Header Length
-            payload_type,                # Type
-            sub_type,                    # Subtype
-            )
-        gsmtap_hdr += gsmtap_v3_metadata
-        if len(gsmtap_hdr) < (4 * math.ceil(header_len/4)):
-            gsmtap_hdr += (b'\x00' * (4 * math.ceil(header_len/4) - len(gsmtap_hdr)))
+            gsmtap_hdr = fixed_header.pack(3, 0, (header_len + padding) // 4, payload_type, sub_type,
+                t.PACKET_TIMESTAMP, 12, device_sec, device_usec * 1000,
+                t.CHANNEL_NUMBER, 4, arfcn)
+        else:
+            gsmtap_hdr = fixed_header.pack(3, 0, (header_len + padding) // 4, payload_type, sub_type,
+                t.CHANNEL_NUMBER, 4, arfcn)
+        if gsmtap_v3_metadata or padding:
+            gsmtap_hdr += gsmtap_v3_metadata + b'\x00' * padding
+        return gsmtap_hdr
     else:
         assert (version == 2) or (version == 3), "GSMTAP version should be either 2 or 3"
 
-    return gsmtap_hdr
+@functools.lru_cache(maxsize=None)
+def static_gsmtap_header(version = 2, payload_type = 0, sub_type = 0):
+    """Returns the GSMTAP header without per packet fields, packed once per (version, payload_type, sub_type)."""
+    return create_gsmtap_header(version=version, payload_type=payload_type, sub_type=sub_type)
 
-def create_osmocore_logging_header(timestamp = datetime.datetime.now(),
+def create_osmocore_logging_header(timestamp = None,
         process_name = '', pid = 0, level = 0,
         subsys_name = '', filename = '', line_number = 0):
 
+    if timestamp is None:
+        timestamp = datetime.datetime.now(datetime.timezone.utc)
     if type(process_name) == str:
         process_name = process_name.encode('utf-8')
     if type(subsys_name) == str:
@@ -522,7 +727,7 @@ def create_osmocore_logging_header(timestamp = datetime.datetime.now(),
     if type(filename) == str:
         filename = filename.encode('utf-8')
 
-    logging_hdr = struct.pack('!LL16sLB3x16s32sL',
+    logging_hdr = osmocore_logging_header.pack(
         int(timestamp.timestamp()) % 4294967296, # uint32_t sec
         timestamp.microsecond, # uint32_t usec
         process_name, # uint8_t proc_name[16]
@@ -711,19 +916,14 @@ def convert_mnc(mnc_digit_2, mnc_digit_1, mnc_digit_0):
         mnc = '{:03}'.format(mnc_digit_2 * 100 + mnc_digit_1 * 10 + mnc_digit_0)
     return mnc
 
+# BCD digits of a PLMN ID, LSB0 bit ranges of the little endian value
+MCC_MNC_BITS = bitfields.BitFields((0, 4), (4, 8), (8, 12), (12, 16), (16, 20), (20, 24))
+
 def unpack_mcc_mnc(mcc_mnc_bin):
     mcc = '000'
     mnc = '00'
 
-    mcc_mnc_bits = bitstring.Bits(bytes=reversed(mcc_mnc_bin))
-
-    mcc_digit_2 = mcc_mnc_bits[0:4].uint
-    mcc_digit_1 = mcc_mnc_bits[4:8].uint
-    mcc_digit_0 = mcc_mnc_bits[8:12].uint
-
-    mnc_digit_0 = mcc_mnc_bits[12:16].uint
-    mnc_digit_2 = mcc_mnc_bits[16:20].uint
-    mnc_digit_1 = mcc_mnc_bits[20:24].uint
+    mcc_digit_2, mcc_digit_1, mcc_digit_0, mnc_digit_0, mnc_digit_2, mnc_digit_1 = MCC_MNC_BITS.unpack(bitfields.uint_le(mcc_mnc_bin))
 
     try:
         mcc = convert_mcc(mcc_digit_2, mcc_digit_1, mcc_digit_0)
@@ -740,8 +940,7 @@ def unpack_lai(lai_bin):
     except ValueError:
         mcc_mnc = ('000', '00')
 
-    lac_bits = bitstring.Bits(bytes=lai_bin[3:5])
-    lac = lac_bits.uint
+    lac = bitfields.uint_be(lai_bin[3:5])
 
     return (mcc_mnc[0], mcc_mnc[1], lac)
 
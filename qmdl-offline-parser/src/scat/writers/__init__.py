@@ -7,3 +7,6 @@ from scat.writers.rawwriter import RawWriter
 from scat.writers.nullwriter import NullWriter
 from scat.writers.jsonwriter import JsonWriter
 from scat.writers.txtwriter import TxtWriter
+from scat.writers.sqlitewriter import SqliteWriter
+from scat.writers.compositewriter import CompositeWriter
+from scat.writers.columnarwriter import ColumnarWriter
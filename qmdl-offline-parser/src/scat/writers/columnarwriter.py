@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# coding: utf8
+# SPDX-License-Identifier: GPL-2.0-or-later
+"""
+ColumnarWriter Module
+
+Provides a class for exporting the measurement records of a dump column by
+column. Measurement fields are accumulated in typed array buffers and flushed
+in row groups to Parquet or an Arrow IPC file when pyarrow is installed, or
+to numbered .npz chunks (<name>.00000.npz, ...) otherwise. The .npz chunks are
+written without NumPy and load with numpy.load or read_npz_columns.
+
+Missing integer fields are stored as -1 and missing levels as NaN. The rat and
+cell columns hold indexes into RAT_NAMES and CELL_NAMES, dictionary encoded
+in Parquet and Arrow.
+"""
+
+import array
+import ast
+import datetime
+import glob
+import math
+import struct
+import sys
+import zipfile
+
+from scat.util import timestamp_us
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+    has_pyarrow = True
+except ModuleNotFoundError:
+    has_pyarrow = False
+
+COLUMNAR_FORMATS = ('parquet', 'arrow', 'npz')
+COLUMNAR_EXTENSIONS = {'parquet': '.parquet', 'arrow': '.arrow', 'npz': '.npz'}
+
+RAT_NAMES = ('unknown', 'LTE', 'NR', 'WCDMA', 'GSM')
+CELL_NAMES = ('unknown', 'serving', 'neighbor', 'scell')
+CATEGORIES = {'rat': RAT_NAMES, 'cell': CELL_NAMES}
+
+# column: (array typecode, missing value, measurement record keys)
+MEASUREMENT_COLUMNS = (
+    ('ts_us', 'q', 0, ()),
+    ('radio_id', 'b', 0, ()),
+    ('rat', 'b', 0, ('technology', )),
+    ('cell', 'b', 0, ('cell', )),
+    ('arfcn', 'i', -1, ('earfcn', 'nrarfcn', 'uarfcn', 'arfcn')),
+    ('pci', 'i', -1, ('pci', 'psc')),
+    ('rsrp', 'f', math.nan, ('rsrp_dbm', )),
+    ('rsrq', 'f', math.nan, ('rsrq_db', )),
+    ('rssi', 'f', math.nan, ('rssi_dbm', )),
+    ('sinr', 'f', math.nan, ('sinr_db', 'snr_db')),
+    ('rscp', 'f', math.nan, ('rscp_dbm', )),
+    ('ecio', 'f', math.nan, ('ecio_db', )),
+    ('rxpwr', 'f', math.nan, ('rxpwr_dbm', )),
+)
+
+_CATEGORY_CODES = {name: {value: code for code, value in enumerate(values)} for name, values in CATEGORIES.items()}
+# Columns filled from the measurement record keys, with the category codes if any
+_RECORD_COLUMNS = tuple((name, missing, keys, _CATEGORY_CODES.get(name))
+    for name, typecode, missing, keys in MEASUREMENT_COLUMNS if keys)
+
+def default_columnar_format():
+    return 'parquet' if has_pyarrow else 'npz'
+
+def npz_chunk_pattern(filename):
+    """Glob pattern of the .npz chunks written for filename"""
+    if filename.endswith('.npz'):
+        filename = filename[:-len('.npz')]
+    return filename + '.[0-9][0-9][0-9][0-9][0-9].npz'
+
+def _npy_descr(typecode):
+    item = array.array(typecode)
+    kind = 'f' if typecode in 'fd' else 'i'
+    if item.itemsize == 1:
+        return '|' + kind + '1'
+    return ('<' if sys.byteorder == 'little' else '>') + kind + str(item.itemsize)
+
+def _npy(descr, length, data):
+    # NPY format version 1.0: magic, header length and a dict literal padded to 64 bytes
+    header = "{{'descr': '{}', 'fortran_order': False, 'shape': ({},), }}".format(descr, length)
+    header += ' ' * (-(10 + len(header) + 1) % 64) + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin-1') + data
+
+def read_npz_columns(filename):
+    """
+    Read the measurement columns of all .npz chunks written for filename into arrays, without NumPy.
+    """
+    typecodes = {name: typecode for name, typecode, missing, keys in MEASUREMENT_COLUMNS}
+    columns = {name: array.array(typecode) for name, typecode in typecodes.items()}
+    for chunk in sorted(glob.glob(npz_chunk_pattern(filename))):
+        with zipfile.ZipFile(chunk) as z:
+            for name, column in columns.items():
+                data = z.read(name + '.npy')
+                header_len = struct.unpack_from('<H', data, 8)[0]
+                header = ast.literal_eval(data[10:10 + header_len].decode('latin-1'))
+                values = array.array(typecodes[name], data[10 + header_len:])
+                if header['descr'][0] not in ('|', '<' if sys.byteorder == 'little' else '>'):
+                    values.byteswap()
+                column.extend(values)
+    return columns
+
+
+class ColumnarWriter:
+    """
+    Handles exporting measurement records to columnar row groups.
+    """
+    def __init__(self, filename, fmt=None, row_group_size=65536):
+        """
+        Initialize the ColumnarWriter. fmt is one of COLUMNAR_FORMATS, by default
+        taken from the file extension, else Parquet when pyarrow is installed
+        and .npz chunks otherwise.
+        """
+        if fmt is None:
+            fmt = default_columnar_format()
+            for extension_fmt, extension in COLUMNAR_EXTENSIONS.items():
+                if filename.endswith(extension):
+                    fmt = extension_fmt
+        if fmt not in COLUMNAR_FORMATS:
+            raise ValueError('Unknown columnar format {}, available formats: {}'.format(fmt, ', '.join(COLUMNAR_FORMATS)))
+        if fmt != 'npz' and not has_pyarrow:
+            raise ValueError('Columnar format {} requires pyarrow'.format(fmt))
+
+        self.filename = filename
+        self.fmt = fmt
+        self.row_group_size = row_group_size
+        self.closed = False
+        self.rows = 0
+        self.total_rows = 0
+        self.total_messages = 0
+        self.outputs = []
+        self.columns = {name: array.array(typecode) for name, typecode, missing, keys in MEASUREMENT_COLUMNS}
+
+        self.schema = None
+        self.arrow_writer = None
+        if fmt != 'npz':
+            self.schema = pyarrow.schema([(name, self._arrow_type(name, typecode))
+                for name, typecode, missing, keys in MEASUREMENT_COLUMNS])
+            if fmt == 'parquet':
+                self.arrow_writer = pyarrow.parquet.ParquetWriter(filename, self.schema)
+            else:
+                self.arrow_writer = pyarrow.ipc.new_file(filename, self.schema)
+            self.outputs.append(filename)
+
+    @staticmethod
+    def _arrow_type(name, typecode):
+        value_type = {'q': pyarrow.int64(), 'b': pyarrow.int8(), 'i': pyarrow.int32(), 'f': pyarrow.float32()}[typecode]
+        if name in CATEGORIES:
+            return pyarrow.dictionary(value_type, pyarrow.string())
+        return value_type
+
+    def write_cp(self, sock_content, radio_id, ts):
+        """Count control plane data, payloads are not exported"""
+        self.total_messages += 1
+
+    def write_up(self, sock_content, radio_id, ts):
+        """Count user plane data, payloads are not exported"""
+        self.total_messages += 1
+
+    def write_parsed_data(self, parsed_result, radio_id=0, ts=None):
+        """Append the measurement records of a parse result to the column buffers"""
+        measurement = parsed_result.get('measurement')
+        if not measurement:
+            return
+        if isinstance(measurement, dict):
+            measurement = (measurement, )
+        if ts is None:
+            ts = datetime.datetime.now(datetime.timezone.utc)
+
+        columns = self.columns
+        for record in measurement:
+            columns['ts_us'].append(timestamp_us(record.get('timestamp', ts)) or 0)
+            columns['radio_id'].append(record.get('radio_id', radio_id))
+            for name, missing, keys, codes in _RECORD_COLUMNS:
+                value = missing
+                for key in keys:
+                    if record.get(key) is not None:
+                        value = record[key]
+                        break
+                if codes is not None:
+                    value = codes.get(value, missing)
+                columns[name].append(value)
+            self.rows += 1
+
+        if self.rows >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered rows as a row group"""
+        if self.rows == 0:
+            return
+        if self.fmt == 'npz':
+            self._write_npz_chunk()
+        else:
+            self._write_arrow_batch()
+        self.total_rows += self.rows
+        self.rows = 0
+        self.columns = {name: array.array(typecode) for name, typecode, missing, keys in MEASUREMENT_COLUMNS}
+
+    def _write_arrow_batch(self):
+        arrays = []
+        for field in self.schema:
+            column = self.columns[field.name]
+            if field.name in CATEGORIES:
+                indices = pyarrow.Array.from_buffers(field.type.index_type, self.rows, [None, pyarrow.py_buffer(column)])
+                arrays.append(pyarrow.DictionaryArray.from_arrays(indices, pyarrow.array(CATEGORIES[field.name])))
+            else:
+                arrays.append(pyarrow.Array.from_buffers(field.type, self.rows, [None, pyarrow.py_buffer(column)]))
+        batch = pyarrow.RecordBatch.from_arrays(arrays, schema=self.schema)
+        if self.fmt == 'parquet':
+            self.arrow_writer.write_table(pyarrow.Table.from_batches([batch]))
+        else:
+            self.arrow_writer.write_batch(batch)
+
+    def _write_npz_chunk(self):
+        base = self.filename[:-len('.npz')] if self.filename.endswith('.npz') else self.filename
+        chunk = '{}.{:05d}.npz'.format(base, len(self.outputs))
+        with zipfile.ZipFile(chunk, 'w', zipfile.ZIP_STORED) as z:
+            for name, typecode, missing, keys in MEASUREMENT_COLUMNS:
+                column = self.columns[name]
+                z.writestr(name + '.npy', _npy(_npy_descr(typecode), len(column), column.tobytes()))
+            for name, values in CATEGORIES.items():
+                width = max(len(value) for value in values)
+                data = b''.join(value.encode('utf-32-le').ljust(4 * width, b'\x00') for value in values)
+                z.writestr(name + '_names.npy', _npy('<U{}'.format(width), len(values), data))
+        self.outputs.append(chunk)
+
+    def close(self):
+        """Flush the buffered rows and close the output"""
+        if self.closed:
+            return
+        self.closed = True
+        self.flush()
+        if self.arrow_writer is not None:
+            self.arrow_writer.close()
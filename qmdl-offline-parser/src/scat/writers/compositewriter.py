@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# coding: utf8
+"""
+CompositeWriter Module
+
+Provides a writer forwarding the writer interface to several writers, used by
+the main parser and the batch mode to produce several output formats at once.
+"""
+
+
+class CompositeWriter:
+    """
+    Forwards the writer interface to every writer implementing the method.
+    """
+    def __init__(self, writers):
+        self.writers = list(writers)
+
+    def _forward(self, method, *args):
+        for w in self.writers:
+            if hasattr(w, method):
+                getattr(w, method)(*args)
+
+    def write_cp(self, sock_content, radio_id, ts):
+        self._forward('write_cp', sock_content, radio_id, ts)
+
+    def write_up(self, sock_content, radio_id, ts):
+        self._forward('write_up', sock_content, radio_id, ts)
+
+    def write_parsed_data(self, parsed_result, radio_id, ts):
+        self._forward('write_parsed_data', parsed_result, radio_id, ts)
+
+    def write_stdout_data(self, stdout_text, radio_id, ts):
+        self._forward('write_stdout_data', stdout_text, radio_id, ts)
+
+    def close(self):
+        for w in self.writers:
+            if hasattr(w, 'close'):
+                w.close()
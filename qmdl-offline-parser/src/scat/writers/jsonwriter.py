@@ -8,13 +8,41 @@ JsonWriter Module
 Provides a class for writing parsed cellular log data to JSON format.
 Tracks metadata, summary statistics, and detailed message lists for analysis.
 Used by the main parser and batch wrapper to output structured results.
+
+Output modes:
+  document - keeps all records in memory and writes a single JSON document on close
+  stream   - spools the records of every section to NDJSON files next to the output
+             as they arrive and concatenates them into the same single document on close
+  ndjson   - writes one JSON record per line as it arrives, each tagged with its
+             section; file_info and summary records follow on close
+Only the summary counters and the cell deduplication keys are kept in memory
+in the stream and ndjson modes.
+
+Raw GSMTAP payloads are only captured on request: they are appended to a
+binary sidecar (<output>.raw) and the raw_messages records refer to them by
+offset and length, see read_raw_payload().
 """
 
 import json
 import datetime
 import os
+import shutil
+import tempfile
 from pathlib import Path
-import binascii
+
+JSON_MODES = ('document', 'stream', 'ndjson')
+
+# Record lists of the document, in output order
+JSON_SECTIONS = ('cell_info', 'measurements', 'rrc_messages', 'nas_messages', 'mac_messages',
+    'events', 'security_info', 'ca_combos', 'raw_messages')
+
+RAW_SIDECAR_SUFFIX = '.raw'
+
+def read_raw_payload(raw_filename, record):
+    """Returns the payload of a raw_messages record from the binary sidecar"""
+    with open(raw_filename, 'rb') as f:
+        f.seek(record['offset'])
+        return f.read(record['length'])
 
 
 class JsonWriter:
@@ -29,11 +57,18 @@ class JsonWriter:
         """
         pass
 
-    def __init__(self, json_filename):
+    def __init__(self, json_filename, mode='document', buffer_size=1048576, raw_capture=False):
         """
         Initialize the JsonWriter with the output filename and default data structure.
+        mode is one of JSON_MODES, buffer_size the buffer of the streamed files in bytes.
+        raw_capture appends the control and user plane payloads to the binary sidecar.
         """
+        if mode not in JSON_MODES:
+            raise ValueError('Invalid JSON output mode {}, available modes: {}'.format(mode, ', '.join(JSON_MODES)))
         self.json_filename = json_filename
+        self.mode = mode
+        self.buffer_size = buffer_size
+        self.closed = False
         self.data = {
             "file_info": {
                 "filename": None,
@@ -63,6 +98,25 @@ class JsonWriter:
         # Track unique cells and their information
         self.cells_seen = {}
 
+        self.out_file = None
+        self.spool_dir = None
+        self.spool_files = {}
+        if self.mode != 'document':
+            for section in JSON_SECTIONS:
+                del self.data[section]
+        if self.mode == 'ndjson':
+            self.out_file = open(self.json_filename, 'w', encoding='utf-8', buffering=self.buffer_size)
+        elif self.mode == 'stream':
+            self.spool_dir = tempfile.mkdtemp(prefix='.{}.'.format(os.path.basename(self.json_filename)),
+                dir=os.path.dirname(os.path.abspath(self.json_filename)))
+
+        self.raw_file = None
+        self.raw_offset = 0
+        if raw_capture:
+            self.raw_filename = self.json_filename + RAW_SIDECAR_SUFFIX
+            self.raw_file = open(self.raw_filename, 'wb', buffering=self.buffer_size)
+            self.data["file_info"]["raw_file"] = os.path.basename(self.raw_filename)
+
     def set_input_filename(self, filename):
         """
         Set the input filename for metadata and record its size if available.
@@ -74,56 +128,40 @@ class JsonWriter:
     def write_cp(self, sock_content, radio_id, ts):
         """
         Write control plane data to the JSON structure.
-        Increments message counters and stores raw message for debugging/completeness.
+        Increments message counters and, with raw capture, stores the payload in the sidecar.
         """
         self._increment_counter('total_messages')
-        # Store raw message for debugging/completeness
-        raw_msg = {
-            "timestamp": ts.isoformat() if isinstance(ts, datetime.datetime) else str(ts),
-            "radio_id": radio_id,
-            "type": "control_plane",
-            "data": binascii.hexlify(sock_content).decode('ascii'),
-            "length": len(sock_content)
-        }
-        self.data["raw_messages"].append(raw_msg)
+        if self.raw_file is not None:
+            self._write_raw(sock_content, radio_id, ts, "control_plane")
 
     def write_up(self, sock_content, radio_id, ts):
         """Write user plane data"""
         self._increment_counter('total_messages')
-        
-        # Store raw message for debugging/completeness
+        if self.raw_file is not None:
+            self._write_raw(sock_content, radio_id, ts, "user_plane")
+
+    def _write_raw(self, sock_content, radio_id, ts, msg_type):
+        """Append a payload to the sidecar and record its position"""
         raw_msg = {
-            "timestamp": ts.isoformat() if isinstance(ts, datetime.datetime) else str(ts),
+            "timestamp": ts.isoformat() if hasattr(ts, 'isoformat') else str(ts),
             "radio_id": radio_id,
-            "type": "user_plane", 
-            "data": binascii.hexlify(sock_content).decode('ascii'),
+            "type": msg_type,
+            "offset": self.raw_offset,
             "length": len(sock_content)
         }
-        self.data["raw_messages"].append(raw_msg)
+        self.raw_file.write(sock_content)
+        self.raw_offset += len(sock_content)
+        self._emit("raw_messages", raw_msg)
 
     def write_parsed_data(self, parsed_result, radio_id=0, ts=None):
         """Write structured parsed data"""
         if ts is None:
-            ts = datetime.datetime.now()
-            
-        timestamp = ts.isoformat() if isinstance(ts, datetime.datetime) else str(ts)
-        
-        # Extract cell information
-        if 'cell_info' in parsed_result:
-            cell_data = parsed_result['cell_info'].copy()
-            cell_data.update({
-                "timestamp": timestamp,
-                "radio_id": radio_id
-            })
+            ts = datetime.datetime.now(datetime.timezone.utc)
             
-            # Track unique cells
-            cell_key = f"{cell_data.get('pci', 0)}_{cell_data.get('earfcn_dl', 0)}_{radio_id}"
-            if cell_key not in self.cells_seen:
-                self.data["cell_info"].append(cell_data)
-                self.cells_seen[cell_key] = True
+        timestamp = ts.isoformat() if hasattr(ts, 'isoformat') else str(ts)
         
         # Helper to process dict or list
-        def process_item(item, target_list, extra_update=None, unique_key=None):
+        def process_item(item, section, extra_update=None, unique_key=None):
             if isinstance(item, list):
                 for entry in item:
                     entry_copy = entry.copy()
@@ -132,10 +170,10 @@ class JsonWriter:
                     if unique_key:
                         key = unique_key(entry_copy)
                         if key not in self.cells_seen:
-                            target_list.append(entry_copy)
+                            self._emit(section, entry_copy)
                             self.cells_seen[key] = True
                     else:
-                        target_list.append(entry_copy)
+                        self._emit(section, entry_copy)
             elif isinstance(item, dict):
                 entry_copy = item.copy()
                 if extra_update:
@@ -143,24 +181,24 @@ class JsonWriter:
                 if unique_key:
                     key = unique_key(entry_copy)
                     if key not in self.cells_seen:
-                        target_list.append(entry_copy)
+                        self._emit(section, entry_copy)
                         self.cells_seen[key] = True
                 else:
-                    target_list.append(entry_copy)
+                    self._emit(section, entry_copy)
 
         # Extract cell information
         if 'cell_info' in parsed_result:
             process_item(
                 parsed_result['cell_info'],
-                self.data["cell_info"],
+                "cell_info",
                 {"timestamp": timestamp, "radio_id": radio_id},
-                lambda cell: f"{cell.get('pci', 0)}_{cell.get('earfcn_dl', 0)}_{radio_id}"
+                lambda cell: self._cell_key(cell, radio_id)
             )
         # Extract measurement data
         if 'measurement' in parsed_result:
             process_item(
                 parsed_result['measurement'],
-                self.data["measurements"],
+                "measurements",
                 {"timestamp": timestamp, "radio_id": radio_id}
             )
             self._increment_counter('measurements')
@@ -168,7 +206,7 @@ class JsonWriter:
         if 'rrc_message' in parsed_result:
             process_item(
                 parsed_result['rrc_message'],
-                self.data["rrc_messages"],
+                "rrc_messages",
                 {"timestamp": timestamp, "radio_id": radio_id}
             )
             self._increment_counter('rrc_messages')
@@ -176,7 +214,7 @@ class JsonWriter:
         if 'nas_message' in parsed_result:
             process_item(
                 parsed_result['nas_message'],
-                self.data["nas_messages"],
+                "nas_messages",
                 {"timestamp": timestamp, "radio_id": radio_id}
             )
             self._increment_counter('nas_messages')
@@ -184,7 +222,7 @@ class JsonWriter:
         if 'mac_message' in parsed_result:
             process_item(
                 parsed_result['mac_message'],
-                self.data["mac_messages"],
+                "mac_messages",
                 {"timestamp": timestamp, "radio_id": radio_id}
             )
             self._increment_counter('mac_messages')
@@ -192,7 +230,7 @@ class JsonWriter:
         if 'event' in parsed_result:
             process_item(
                 parsed_result['event'],
-                self.data["events"],
+                "events",
                 {"timestamp": timestamp, "radio_id": radio_id}
             )
             self._increment_counter('events')
@@ -200,20 +238,26 @@ class JsonWriter:
         if 'security' in parsed_result:
             process_item(
                 parsed_result['security'],
-                self.data["security_info"],
+                "security_info",
                 {"timestamp": timestamp, "radio_id": radio_id}
             )
         # Extract CA combos
         if 'ca_combo' in parsed_result:
             process_item(
                 parsed_result['ca_combo'],
-                self.data["ca_combos"],
+                "ca_combos",
                 {"timestamp": timestamp, "radio_id": radio_id}
             )
         self._increment_counter('cellular_messages')
             
         # ...existing code...
     
+    def _cell_key(self, cell, radio_id):
+        """Key of a unique cell: decoder type, cell identity and channel number"""
+        identity = cell.get('pci', cell.get('cell_id', 0))
+        channel = cell.get('earfcn_dl', cell.get('nrarfcn_dl', cell.get('arfcn', 0)))
+        return f"{cell.get('type', '')}_{identity}_{channel}_{radio_id}"
+
     def _parse_stdout_line(self, line, timestamp, radio_id):
         """Parse individual stdout lines into structured data"""
         parsed = {}
@@ -446,6 +490,51 @@ class JsonWriter:
         if counter_name in self.data["summary"]:
             self.data["summary"][counter_name] += 1
     
+    def _emit(self, section, record):
+        """Store a record of a section, or write it out in the streaming modes"""
+        if self.mode == 'document':
+            self.data[section].append(record)
+        elif self.mode == 'ndjson':
+            line = {"section": section}
+            line.update(record)
+            self.out_file.write(json.dumps(line, ensure_ascii=False))
+            self.out_file.write('\n')
+        else:
+            f = self.spool_files.get(section)
+            if f is None:
+                f = open(os.path.join(self.spool_dir, section + '.ndjson'), 'w+', encoding='utf-8', buffering=self.buffer_size)
+                self.spool_files[section] = f
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+
+    def _assemble_document(self):
+        """Concatenate the spooled sections into the single document layout"""
+        with open(self.json_filename, 'w', encoding='utf-8', buffering=self.buffer_size) as out:
+            out.write('{\n')
+            for key in ("file_info", "summary"):
+                out.write('  "{}": {},\n'.format(key, json.dumps(self.data[key], ensure_ascii=False)))
+            for i, section in enumerate(JSON_SECTIONS):
+                out.write('  "{}": ['.format(section))
+                f = self.spool_files.get(section)
+                if f is not None:
+                    f.seek(0)
+                    sep = '\n    '
+                    for line in f:
+                        out.write(sep)
+                        out.write(line.rstrip('\n'))
+                        sep = ',\n    '
+                    out.write('\n  ')
+                out.write(']\n' if i == len(JSON_SECTIONS) - 1 else '],\n')
+            out.write('}\n')
+
+    def _remove_spool(self):
+        for f in self.spool_files.values():
+            f.close()
+        self.spool_files = {}
+        if self.spool_dir is not None:
+            shutil.rmtree(self.spool_dir, ignore_errors=True)
+            self.spool_dir = None
+
     def finalize(self):
         """Finalize and write the JSON file"""
         # Calculate percentages
@@ -455,9 +544,27 @@ class JsonWriter:
             self.data["summary"]["cellular_percentage"] = round((cellular / total) * 100, 2)
             
         # Write JSON file
-        with open(self.json_filename, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        if self.mode == 'ndjson':
+            for key in ("file_info", "summary"):
+                line = {"section": key}
+                line.update(self.data[key])
+                self.out_file.write(json.dumps(line, ensure_ascii=False))
+                self.out_file.write('\n')
+            self.out_file.close()
+        elif self.mode == 'stream':
+            try:
+                self._assemble_document()
+            finally:
+                self._remove_spool()
+        else:
+            with open(self.json_filename, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, indent=2, ensure_ascii=False)
             
     def close(self):
         """Close the writer and finalize output"""
+        if self.closed:
+            return
+        self.closed = True
+        if self.raw_file is not None:
+            self.raw_file.close()
         self.finalize()
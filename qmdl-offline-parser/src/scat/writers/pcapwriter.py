@@ -1,42 +1,106 @@
-
 #!/usr/bin/env python3
 # coding: utf8
 """
 PcapWriter Module
 
 Provides a class for writing parsed cellular log data to PCAP format for use with Wireshark or other packet analysis tools.
-Handles construction of Ethernet, IP, and UDP headers and writes packets to a PCAP file.
+Handles construction of Ethernet, IP, and UDP headers and writes packets to a PCAP or pcapng file.
+
+Packet headers are packed into a preallocated buffer and the packets are
+written in large blocks. The pcapng format has one interface per radio ID, and
+both formats can store nanosecond timestamps, which keep the resolution of the
+QXDM ticks. The upper_pdu link type skips the Ethernet/IP/UDP encapsulation:
+packets are handed to the gsmtap (control plane) or ip/ipv6 (user plane)
+dissectors of Wireshark by name.
 """
 
 import datetime
 import struct
 
+from scat.util import timestamp_ns
+
+PCAP_FORMATS = ('pcap', 'pcapng')
+PCAP_LINK_TYPES = ('ethernet', 'upper_pdu')
+
+LINKTYPE_ETHERNET = 1
+LINKTYPE_WIRESHARK_UPPER_PDU = 252
+# Exported PDU tag naming the dissector
+EXP_PDU_TAG_PROTO_NAME = 12
+
+PCAP_GLOBAL_HDR = struct.Struct('<LHHLLLL')
+PCAP_REC_HDR = struct.Struct('<LLLL')
+PCAPNG_SHB = struct.Struct('<LLLHHqL')
+PCAPNG_EPB_HDR = struct.Struct('<LLLLLLL')
+ETH_HDR = b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x08\x00'
+IP_UDP_HDR = struct.Struct('!BBHHBBBBHLLHHHH')
+
+def _exported_pdu_tags(proto_name):
+    # Tags are padded to 4 bytes and terminated by an end of options tag
+    name = proto_name.encode('ascii')
+    name += b'\x00' * (-len(name) % 4)
+    return struct.pack('!HH', EXP_PDU_TAG_PROTO_NAME, len(name)) + name + b'\x00\x00\x00\x00'
+
+def _pcapng_option(code, value):
+    return struct.pack('<HH', code, len(value)) + value + b'\x00' * (-len(value) % 4)
+
 
 class PcapWriter:
     """
     Handles writing parsed cellular log data to a PCAP file.
     Constructs Ethernet, IP, and UDP headers and writes packets for analysis in Wireshark.
     """
-    def __init__(self, filename, port_cp = 4729, port_up = 47290):
+    def __init__(self, filename, port_cp = 4729, port_up = 47290, fmt='pcap', nanosecond=False,
+            link_type='ethernet', buffer_size=1048576):
         """
         Initialize the PcapWriter with output filename and default header values.
+        fmt is one of PCAP_FORMATS and link_type one of PCAP_LINK_TYPES; nanosecond
+        stores nanosecond instead of microsecond timestamps. Packets are written
+        in blocks of buffer_size bytes.
         """
+        if fmt not in PCAP_FORMATS:
+            raise ValueError('Unknown PCAP format {}, available formats: {}'.format(fmt, ', '.join(PCAP_FORMATS)))
+        if link_type not in PCAP_LINK_TYPES:
+            raise ValueError('Unknown PCAP link type {}, available link types: {}'.format(link_type, ', '.join(PCAP_LINK_TYPES)))
+
         self.port_cp = port_cp
         self.port_up = port_up
         self.ip_id = 0
         self.base_address = 0x7f000001
+        self.fmt = fmt
+        self.nanosecond = nanosecond
+        self.link_type = link_type
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.interfaces = {}
         self.pcap_file = open(filename, 'wb')
-        self.eth_hdr = b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x08\x00'
-        pcap_global_hdr = struct.pack('<LHHLLLL',
-                0xa1b2c3d4,
-                2,
-                4,
-                0,
-                0,
-                0xffff,
-                1,
-                )
-        self.pcap_file.write(pcap_global_hdr)
+        self.eth_hdr = ETH_HDR
+
+        if link_type == 'ethernet':
+            self.linktype = LINKTYPE_ETHERNET
+            encap_len = len(ETH_HDR) + IP_UDP_HDR.size
+        else:
+            self.linktype = LINKTYPE_WIRESHARK_UPPER_PDU
+            self.pdu_tags = {'gsmtap': _exported_pdu_tags('gsmtap'), 4: _exported_pdu_tags('ip'), 6: _exported_pdu_tags('ipv6')}
+            encap_len = 0
+
+        # Record header and encapsulation, packed in place for every packet
+        rec_hdr = PCAPNG_EPB_HDR if fmt == 'pcapng' else PCAP_REC_HDR
+        self.hdr = bytearray(rec_hdr.size + encap_len)
+        if link_type == 'ethernet':
+            self.hdr[rec_hdr.size:rec_hdr.size + len(ETH_HDR)] = ETH_HDR
+
+        if fmt == 'pcapng':
+            self.pcap_file.write(PCAPNG_SHB.pack(0x0a0d0d0a, PCAPNG_SHB.size, 0x1a2b3c4d, 1, 0, -1, PCAPNG_SHB.size))
+        else:
+            self.pcap_file.write(PCAP_GLOBAL_HDR.pack(
+                    0xa1b23c4d if nanosecond else 0xa1b2c3d4,
+                    2,
+                    4,
+                    0,
+                    0,
+                    0xffff,
+                    self.linktype,
+                    ))
 
     def __enter__(self):
         """
@@ -44,56 +108,115 @@ class PcapWriter:
         """
         return self
 
-    def write_pkt(self, sock_content, port, radio_id=0, ts=datetime.datetime.now()):
+    def _interface_id(self, radio_id):
+        # Interface Description Block written on the first packet of each radio ID
+        interface_id = self.interfaces.get(radio_id)
+        if interface_id is None:
+            interface_id = len(self.interfaces)
+            self.interfaces[radio_id] = interface_id
+            options = _pcapng_option(2, 'radio{}'.format(radio_id).encode('ascii'))
+            if self.nanosecond:
+                options += _pcapng_option(9, b'\x09')
+            options += b'\x00\x00\x00\x00'
+            block_len = 20 + len(options)
+            self.buffer += struct.pack('<LLHHL', 0x00000001, block_len, self.linktype, 0, 0xffff) + options + struct.pack('<L', block_len)
+        return interface_id
+
+    def write_pkt(self, sock_content, port, radio_id=0, ts=None):
         """
         Write a single packet to the PCAP file, constructing all necessary headers.
         Args:
             sock_content: Raw packet content
             port: Destination UDP port
             radio_id: Radio interface identifier
-            ts: Timestamp for the packet
+            ts: Timestamp for the packet, the current time if None
         """
-        pcap_hdr = struct.pack('<LLLL',
-                int(ts.timestamp()) % 4294967296,
-                ts.microsecond,
-                len(sock_content) + 8 + 20 + 14,
-                len(sock_content) + 8 + 20 + 14,
-                )
-
-        if radio_id <= 0:
-            dest_address = self.base_address
+        if ts is None:
+            ts = datetime.datetime.now(datetime.timezone.utc)
+        ts_ns = timestamp_ns(ts)
+
+        hdr = self.hdr
+        if self.link_type == 'ethernet':
+            if radio_id <= 0:
+                dest_address = self.base_address
+            else:
+                dest_address = self.base_address + radio_id
+            pkt_len = len(sock_content) + 8 + 20 + 14
+            IP_UDP_HDR.pack_into(hdr, len(hdr) - IP_UDP_HDR.size,
+                    0x45,                        # version, IHL, dsf
+                    0x00,
+                    len(sock_content) + 8 + 20,  # length
+                    self.ip_id,                  # id
+                    0x40,                        # flags/fragment offset
+                    0x00,
+                    0x40,                        # TTL
+                    0x11,                        # proto = udp
+                    0xffff,                      # header checksum
+                    0x7f000001,                  # src address
+                    dest_address,                # dest address
+                    13337,                       # source port
+                    port,                        # destination port
+                    len(sock_content) + 8,       # length
+                    0xffff,                      # checksum
+                    )
+            self.ip_id += 1
+            if self.ip_id > 65535:
+                self.ip_id = 0
+            pdu_tags = b''
         else:
-            dest_address = self.base_address + radio_id
-        ip_hdr = struct.pack('!BBHHBBBBHLL',
-                0x45,                        # version, IHL, dsf
-                0x00,
-                len(sock_content) + 8 + 20,  # length
-                self.ip_id,                  # id
-                0x40,                        # flags/fragment offset
-                0x00,
-                0x40,                        # TTL
-                0x11,                        # proto = udp
-                0xffff,                      # header checksum
-                0x7f000001,                  # src address
-                dest_address,                # dest address
-                )
-        udp_hdr = struct.pack('!HHHH',
-                13337,                 # source port
-                port,                  # destination port
-                len(sock_content) + 8, # length
-                0xffff,                # checksum
-                )
-
-        self.pcap_file.write(pcap_hdr + self.eth_hdr + ip_hdr + udp_hdr + sock_content)
-        self.ip_id += 1
-        if self.ip_id > 65535:
-            self.ip_id = 0
-
-    def write_cp(self, sock_content, radio_id=0, ts=datetime.datetime.now()):
+            if port == self.port_cp:
+                pdu_tags = self.pdu_tags['gsmtap']
+            else:
+                pdu_tags = self.pdu_tags.get(sock_content[0] >> 4 if len(sock_content) > 0 else 4, self.pdu_tags[4])
+            pkt_len = len(pdu_tags) + len(sock_content)
+
+        buf = self.buffer
+        if self.fmt == 'pcapng':
+            interface_id = self._interface_id(radio_id)
+            ts_units = ts_ns if self.nanosecond else ts_ns // 1000
+            padding = -pkt_len % 4
+            block_len = PCAPNG_EPB_HDR.size + pkt_len + padding + 4
+            PCAPNG_EPB_HDR.pack_into(hdr, 0, 0x00000006, block_len, interface_id,
+                    (ts_units >> 32) & 0xffffffff, ts_units & 0xffffffff, pkt_len, pkt_len)
+            buf += hdr
+            buf += pdu_tags
+            buf += sock_content
+            buf += struct.pack('<{}xL'.format(padding), block_len)
+        else:
+            PCAP_REC_HDR.pack_into(hdr, 0,
+                    (ts_ns // 1000000000) % 4294967296,
+                    ts_ns % 1000000000 if self.nanosecond else (ts_ns // 1000) % 1000000,
+                    pkt_len,
+                    pkt_len,
+                    )
+            buf += hdr
+            buf += pdu_tags
+            buf += sock_content
+
+        if len(buf) >= self.buffer_size:
+            self.flush()
+
+    def write_cp(self, sock_content, radio_id=0, ts=None):
         self.write_pkt(sock_content, self.port_cp, radio_id, ts)
 
-    def write_up(self, sock_content, radio_id=0, ts=datetime.datetime.now()):
+    def write_up(self, sock_content, radio_id=0, ts=None):
         self.write_pkt(sock_content, self.port_up, radio_id, ts)
 
+    def flush(self):
+        """
+        Write the buffered packets to the PCAP file.
+        """
+        if self.buffer:
+            self.pcap_file.write(self.buffer)
+            del self.buffer[:]
+
+    def close(self):
+        """
+        Write the buffered packets and close the PCAP file.
+        """
+        if not self.pcap_file.closed:
+            self.flush()
+            self.pcap_file.close()
+
     def __exit__(self, exc_type, exc_value, traceback):
-        self.pcap_file.close()
+        self.close()
@@ -74,7 +74,7 @@ class QcatTxtWriter:
             ts = datetime.datetime.now()
         
         # Format timestamp: "YYYY Mon DD HH:MM:SS.mmm"
-        if isinstance(ts, datetime.datetime):
+        if hasattr(ts, 'strftime'):
             ts_full = ts.strftime('%Y %b %_d  %H:%M:%S.%f')[:-3]
             ts_time = ts.strftime('%H:%M:%S.%f')[:-3]
         else:
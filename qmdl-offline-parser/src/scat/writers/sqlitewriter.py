@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# coding: utf8
+# SPDX-License-Identifier: GPL-2.0-or-later
+"""
+SqliteWriter Module
+
+Provides a class for writing parsed cellular log data to a SQLite database.
+Every record type goes to its own typed table (cells, measurements, RRC/NAS/MAC
+messages, events, QMI/QCAT messages). Rows are buffered and
+inserted with executemany in large transactions on a WAL journal, and the
+query indexes are built once after the bulk load, when the writer is closed.
+
+Fields without a column of their own are kept as JSON in the extra column.
+"""
+
+import datetime
+import json
+import os
+import sqlite3
+
+from scat.util import timestamp_us
+
+# Columns common to all record tables
+COMMON_COLUMNS = (('ts_us', 'INTEGER'), ('timestamp', 'TEXT'), ('radio_id', 'INTEGER'))
+
+# table: (parsed result key, ((column, type, record keys), ...), index columns)
+SQLITE_TABLES = {
+    'cells': ('cell_info', (
+        ('type', 'TEXT', ('type', )),
+        ('technology', 'TEXT', ('technology', )),
+        ('pci', 'INTEGER', ('pci', 'psc')),
+        ('earfcn', 'INTEGER', ('earfcn_dl', 'nrarfcn_dl', 'uarfcn', 'arfcn', 'earfcn')),
+        ('earfcn_ul', 'INTEGER', ('earfcn_ul', 'nrarfcn_ul')),
+        ('band', 'INTEGER', ('band', )),
+        ('mcc', 'TEXT', ('mcc', )),
+        ('mnc', 'TEXT', ('mnc', )),
+        ('tac', 'INTEGER', ('tac', 'lac')),
+        ('cell_id', 'INTEGER', ('cell_id', )),
+    ), (('pci', 'earfcn'), )),
+    'measurements': ('measurement', (
+        ('type', 'TEXT', ('type', )),
+        ('technology', 'TEXT', ('technology', )),
+        ('cell', 'TEXT', ('cell', )),
+        ('pci', 'INTEGER', ('pci', 'psc')),
+        ('earfcn', 'INTEGER', ('earfcn', 'nrarfcn', 'uarfcn', 'arfcn')),
+        ('rsrp', 'REAL', ('rsrp_dbm', )),
+        ('rsrq', 'REAL', ('rsrq_db', )),
+        ('rssi', 'REAL', ('rssi_dbm', )),
+        ('sinr', 'REAL', ('sinr_db', 'snr_db')),
+        ('rscp', 'REAL', ('rscp_dbm', )),
+        ('ecio', 'REAL', ('ecio_db', )),
+        ('rxpwr', 'REAL', ('rxpwr_dbm', )),
+    ), (('pci', 'earfcn'), )),
+    'rrc_messages': ('rrc_message', (
+        ('type', 'TEXT', ('type', )),
+        ('direction', 'TEXT', ('direction', )),
+        ('message_type', 'TEXT', ('message_type', )),
+        ('raw_line', 'TEXT', ('raw_line', )),
+    ), ()),
+    'nas_messages': ('nas_message', (
+        ('type', 'TEXT', ('type', )),
+        ('direction', 'TEXT', ('direction', )),
+        ('nas_protocol', 'TEXT', ('nas_protocol', )),
+        ('message_type', 'TEXT', ('message_type', )),
+        ('raw_line', 'TEXT', ('raw_line', )),
+    ), ()),
+    'mac_messages': ('mac_message', (
+        ('type', 'TEXT', ('type', )),
+        ('direction', 'TEXT', ('direction', )),
+        ('message_type', 'TEXT', ('message_type', )),
+        ('raw_line', 'TEXT', ('raw_line', )),
+    ), ()),
+    'events': ('event', (
+        ('event_id', 'INTEGER', ('id', )),
+        ('name', 'TEXT', ('type', )),
+        ('payload', 'TEXT', ('payload', )),
+        ('payload_str', 'TEXT', ('payload_str', )),
+        # Events extracted from the stdout text have no ID
+        ('event_type', 'TEXT', ('event_type', )),
+        ('raw_line', 'TEXT', ('raw_line', )),
+    ), (('event_id', ), ('event_type', ))),
+    'qcat_messages': ('qcat_msg', (
+        ('log_id', 'INTEGER', ('log_id', )),
+        ('type', 'TEXT', ('type', )),
+        ('direction', 'TEXT', ('direction', )),
+    ), (('log_id', ), )),
+}
+
+# Record keys stored in the common columns
+_COMMON_KEYS = ('timestamp', 'radio_id')
+
+def _json_default(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+
+class SqliteWriter:
+    """
+    Handles writing parsed cellular log data to a SQLite database with one table per record type.
+    """
+    def __init__(self, sqlite_filename, batch_size=20000):
+        """
+        Initialize the SqliteWriter, replacing an existing database of the same name.
+        batch_size is the number of buffered rows inserted per transaction.
+        """
+        self.sqlite_filename = sqlite_filename
+        self.batch_size = batch_size
+        self.closed = False
+        self.info = {
+            'filename': None,
+            'size_bytes': 0,
+            'parsed_timestamp': datetime.datetime.now().isoformat(),
+            'total_messages': 0,
+            'cellular_messages': 0,
+        }
+
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(sqlite_filename + suffix):
+                os.remove(sqlite_filename + suffix)
+        self.conn = sqlite3.connect(sqlite_filename)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+
+        self.insert_sql = {}
+        self.result_keys = []
+        for table, (result_key, columns, indexes) in SQLITE_TABLES.items():
+            column_defs = ['id INTEGER PRIMARY KEY']
+            column_defs += ['{} {}'.format(name, sql_type) for name, sql_type in COMMON_COLUMNS]
+            column_defs += ['{} {}'.format(name, sql_type) for name, sql_type, keys in columns]
+            column_defs.append('extra TEXT')
+            self.conn.execute('CREATE TABLE {} ({})'.format(table, ', '.join(column_defs)))
+
+            names = [name for name, sql_type in COMMON_COLUMNS] + [name for name, sql_type, keys in columns] + ['extra']
+            self.insert_sql[table] = 'INSERT INTO {} ({}) VALUES ({})'.format(table, ', '.join(names), ', '.join('?' * len(names)))
+            self.result_keys.append((result_key, table, columns))
+        self.conn.execute('CREATE TABLE file_info (key TEXT PRIMARY KEY, value)')
+        self.conn.commit()
+
+        self.pending = {table: [] for table in SQLITE_TABLES}
+        self.pending_rows = 0
+
+    def set_input_filename(self, filename):
+        """
+        Set the input filename for metadata and record its size if available.
+        """
+        self.info['filename'] = filename
+        if os.path.exists(filename):
+            self.info['size_bytes'] = os.path.getsize(filename)
+
+    def write_cp(self, sock_content, radio_id, ts):
+        """Count control plane data, payloads are not stored"""
+        self.info['total_messages'] += 1
+
+    def write_up(self, sock_content, radio_id, ts):
+        """Count user plane data, payloads are not stored"""
+        self.info['total_messages'] += 1
+
+    def write_stdout_data(self, stdout_text, radio_id=0, ts=None):
+        """Stdout text is not stored, the typed records are"""
+        pass
+
+    def write_parsed_data(self, parsed_result, radio_id=0, ts=None):
+        """Buffer the records of a parse result as rows of their tables"""
+        if ts is None:
+            ts = datetime.datetime.now(datetime.timezone.utc)
+        self.info['cellular_messages'] += 1
+
+        for result_key, table, columns in self.result_keys:
+            item = parsed_result.get(result_key)
+            if item is None:
+                continue
+            if isinstance(item, dict):
+                item = (item, )
+            for record in item:
+                if isinstance(record, dict):
+                    self.pending[table].append(self._row(record, columns, radio_id, ts))
+                    self.pending_rows += 1
+
+        if self.pending_rows >= self.batch_size:
+            self.flush()
+
+    def _row(self, record, columns, radio_id, ts):
+        record_ts = record.get('timestamp', ts)
+        used = set(_COMMON_KEYS)
+        row = [timestamp_us(record_ts), record_ts.isoformat() if hasattr(record_ts, 'isoformat') else str(record_ts),
+            record.get('radio_id', radio_id)]
+        for name, sql_type, keys in columns:
+            value = None
+            for key in keys:
+                if key in record:
+                    value = record[key]
+                    used.add(key)
+                    break
+            if isinstance(value, memoryview):
+                value = bytes(value)
+            row.append(value)
+
+        extra = {k: v for k, v in record.items() if k not in used}
+        row.append(json.dumps(extra, ensure_ascii=False, default=_json_default) if extra else None)
+        return row
+
+    def flush(self):
+        """Insert the buffered rows in a single transaction"""
+        if self.pending_rows == 0:
+            return
+        with self.conn:
+            for table, rows in self.pending.items():
+                if rows:
+                    self.conn.executemany(self.insert_sql[table], rows)
+                    self.pending[table] = []
+        self.pending_rows = 0
+
+    def create_indexes(self):
+        """Build the query indexes, done once after the bulk load"""
+        with self.conn:
+            for table, (result_key, columns, indexes) in SQLITE_TABLES.items():
+                self.conn.execute('CREATE INDEX IF NOT EXISTS idx_{0}_ts ON {0} (ts_us)'.format(table))
+                for index in indexes:
+                    self.conn.execute('CREATE INDEX IF NOT EXISTS idx_{0}_{1} ON {0} ({2})'.format(
+                        table, '_'.join(index), ', '.join(index)))
+
+    def close(self):
+        """Flush the buffered rows, build the indexes and close the database"""
+        if self.closed:
+            return
+        self.closed = True
+        self.flush()
+        self.create_indexes()
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO file_info (key, value) VALUES (?, ?)', self.info.items())
+        self.conn.close()
@@ -71,7 +71,7 @@ class TxtWriter:
             return
             
         self.stats['total_messages'] += 1
-        timestamp_str = ts.strftime('%Y %b %d %H:%M:%S.%f')[:-3] if isinstance(ts, datetime.datetime) else str(ts)
+        timestamp_str = ts.strftime('%Y %b %d %H:%M:%S.%f')[:-3] if hasattr(ts, 'strftime') else str(ts)
         self.file_handle.write(f"\n{'='*80}\n[CONTROL PLANE MESSAGE] Radio {radio_id} | {timestamp_str}\n{'='*80}\n")
         self.file_handle.write(f"  Length: {len(sock_content)}\n")
         self.file_handle.write(f"  Data: {binascii.hexlify(sock_content).decode('ascii')}\n")
@@ -81,7 +81,7 @@ class TxtWriter:
         Write user plane data to the TXT file with improved section header and indentation.
         """
         self.stats['total_messages'] += 1
-        timestamp_str = ts.strftime('%Y %b %d %H:%M:%S.%f')[:-3] if isinstance(ts, datetime.datetime) else str(ts)
+        timestamp_str = ts.strftime('%Y %b %d %H:%M:%S.%f')[:-3] if hasattr(ts, 'strftime') else str(ts)
         self.file_handle.write(f"\n{'='*80}\n[USER PLANE MESSAGE] Radio {radio_id} | {timestamp_str}\n{'='*80}\n")
         self.file_handle.write(f"  Length: {len(sock_content)}\n")
         self.file_handle.write(f"  Data: {binascii.hexlify(sock_content).decode('ascii')}\n")
@@ -90,7 +90,7 @@ class TxtWriter:
         """Write structured parsed data in human-readable format matching example.txt"""
         if ts is None:
             ts = datetime.datetime.now()
-        timestamp_str = ts.strftime('%Y %b %d %H:%M:%S.%f')[:-3] if isinstance(ts, datetime.datetime) else str(ts)
+        timestamp_str = ts.strftime('%Y %b %d %H:%M:%S.%f')[:-3] if hasattr(ts, 'strftime') else str(ts)
         self.stats['cellular_messages'] += 1
 
         def process_item(item, write_func):
@@ -147,7 +147,7 @@ class TxtWriter:
             
         if ts is None:
             ts = datetime.datetime.now()
-        timestamp_str = ts.isoformat() if isinstance(ts, datetime.datetime) else str(ts)
+        timestamp_str = ts.isoformat() if hasattr(ts, 'isoformat') else str(ts)
         
         self.file_handle.write(f"[{timestamp_str}] Radio {radio_id} - Parsed Output\n")
         self.file_handle.write("-" * 60 + "\n")
@@ -249,7 +249,7 @@ class TxtWriter:
                     dt = datetime.datetime.fromisoformat(ts.replace('Z', '+00:00'))
                 except:
                     dt = datetime.datetime.now()
-            elif isinstance(ts, datetime.datetime):
+            elif hasattr(ts, 'strftime'):
                 dt = ts
             else:
                 dt = datetime.datetime.now()
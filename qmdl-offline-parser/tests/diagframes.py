@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+# Shared helpers of the tests building DIAG dumps
+
+import struct
+
+import scat.util as util
+import scat.parsers.qualcomm.diagcmd as diagcmd
+
+class CollectingWriter:
+    def __init__(self):
+        self.stdout = []
+
+    def write_cp(self, sock_content, radio_id, ts):
+        pass
+
+    def write_up(self, sock_content, radio_id, ts):
+        pass
+
+    def write_stdout_data(self, stdout_text, radio_id, ts):
+        self.stdout.append(stdout_text)
+
+def build_log_pkt(log_id, payload, timestamp=0):
+    return struct.pack('<BBHHHQ', diagcmd.DIAG_LOG_F, 0, len(payload) + 12, len(payload) + 12, log_id, timestamp) + payload
+
+def build_log_frame(log_id, payload, timestamp=0):
+    return util.generate_packet(build_log_pkt(log_id, payload, timestamp))
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+import unittest
+import binascii
+import io
+import json
+import os
+import tempfile
+
+import scat.parsers.qualcomm.diagcmd as diagcmd
+from scat import batch
+from tests.diagframes import build_log_frame
+
+class TestBatch(unittest.TestCase):
+    scell_meas_id = diagcmd.diag_log_get_lte_item_id(diagcmd.diag_log_code_lte.LOG_LTE_ML1_SERVING_CELL_MEAS_AND_EVAL)
+    scell_meas_v4 = binascii.unhexlify('040100009C18D60AECC44E00E2244E00FFFCE30FFED80A0047AD56021D310100A2624100')
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.indir = os.path.join(self.tmpdir.name, 'in')
+        self.outdir = os.path.join(self.tmpdir.name, 'out')
+        os.makedirs(os.path.join(self.indir, 'sub'))
+        for name in ('a.qmdl', 'b.qmdl', os.path.join('sub', 'c.qmdl')):
+            with open(os.path.join(self.indir, name), 'wb') as f:
+                for i in range(10):
+                    f.write(build_log_frame(self.scell_meas_id, self.scell_meas_v4))
+        with open(os.path.join(self.indir, 'notes.txt'), 'w') as f:
+            f.write('not a dump')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_collect_dumps(self):
+        dumps = batch.collect_dumps([self.indir])
+        self.assertEqual([os.path.basename(x) for x in dumps], ['a.qmdl', 'b.qmdl'])
+
+        dumps = batch.collect_dumps([self.indir], recursive=True)
+        self.assertEqual([os.path.basename(x) for x in dumps], ['a.qmdl', 'b.qmdl', 'c.qmdl'])
+
+        dumps = batch.collect_dumps([os.path.join(self.indir, '*.qmdl'), os.path.join(self.indir, 'a.qmdl')])
+        self.assertEqual([os.path.basename(x) for x in dumps], ['a.qmdl', 'b.qmdl'])
+
+    def test_output_prefix(self):
+        self.assertEqual(batch.output_prefix('/data/x/log.qmdl.gz', '/out'), os.path.join('/out', 'log'))
+        self.assertEqual(batch.output_prefix('/data/x/log.qmdl', None), os.path.join('/data/x', 'log'))
+
+    def test_process_dump(self):
+        fname = os.path.join(self.indir, 'a.qmdl')
+        result = batch.process_dump({'fname': fname, 'prefix': os.path.join(self.tmpdir.name, 'a'),
+            'type': 'qc', 'formats': ['json', 'txt'], 'params': {}, 'log_level': 30,
+            'port_cp': 4729, 'port_up': 47290})
+        self.assertIsNone(result['error'])
+        self.assertEqual(result['size'], os.path.getsize(fname))
+        self.assertEqual(len(result['outputs']), 2)
+        with open(os.path.join(self.tmpdir.name, 'a.json')) as f:
+            self.assertEqual(json.load(f)['file_info']['filename'], fname)
+
+        result = batch.process_dump({'fname': os.path.join(self.indir, 'missing.qmdl'),
+            'prefix': os.path.join(self.tmpdir.name, 'missing'), 'type': 'qc', 'formats': ['json'],
+            'params': {}, 'log_level': 30, 'port_cp': 4729, 'port_up': 47290})
+        self.assertIsNotNone(result['error'])
+
+    def test_create_writers(self):
+        from scat.writers.compositewriter import CompositeWriter
+        from scat.writers.pcapwriter import PcapWriter
+
+        fname = os.path.join(self.indir, 'a.qmdl')
+        writer, outputs = batch._create_writers(fname, os.path.join(self.tmpdir.name, 'a'), ['pcap'], 4729, 47290)
+        writer.close()
+        self.assertIsInstance(writer, PcapWriter)
+        self.assertEqual(outputs, [os.path.join(self.tmpdir.name, 'a.pcap')])
+
+        writer, outputs = batch._create_writers(fname, os.path.join(self.tmpdir.name, 'a'), ['json', 'pcap'], 4729, 47290)
+        writer.close()
+        self.assertIsInstance(writer, CompositeWriter)
+        self.assertEqual(len(outputs), 2)
+
+    def test_print_report(self):
+        results = [
+            {'fname': 'a.qmdl', 'size': 2048, 'elapsed': 1.0, 'cpu': 1.0, 'outputs': [], 'error': None},
+            {'fname': 'b.qmdl', 'size': 0, 'elapsed': 0.0, 'cpu': 0.0, 'outputs': [], 'error': 'Traceback\nOSError: broken'},
+        ]
+        stream = io.StringIO()
+        batch.print_report(results, 2.0, stream)
+        report = stream.getvalue()
+        self.assertIn('2 (1 succeeded, 1 failed)', report)
+        self.assertIn('Throughput: 1.0 KiB/s', report)
+        self.assertIn('b.qmdl: OSError: broken', report)
+
+    def test_batch_main(self):
+        ret = batch.batch_main([self.indir, '-r', '-o', self.outdir, '-j', '2', '-f', 'json,txt'])
+        self.assertEqual(ret, 0)
+        self.assertEqual(sorted(os.listdir(self.outdir)), ['a.json', 'a.txt', 'b.json', 'b.txt', 'c.json', 'c.txt'])
+
+if __name__ == '__main__':
+    unittest.main()
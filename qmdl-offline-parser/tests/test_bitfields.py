@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+import unittest
+import random
+
+import scat.bitfields as bitfields
+import scat.util as util
+
+try:
+    import bitstring
+    has_bitstring = True
+except ModuleNotFoundError:
+    has_bitstring = False
+
+class TestBitFields(unittest.TestCase):
+    def test_fields(self):
+        self.assertEqual(bitfields.field(0xabcd, 4, 12), 0xbc)
+        self.assertEqual(bitfields.BitFields((0, 4), (4, 16)).unpack(0xabcd), (0xd, 0xabc))
+        self.assertEqual(bitfields.uint_le(b'\x01\x02\x03'), 0x030201)
+        self.assertEqual(bitfields.uint_be(b'\x01\x02'), 0x0102)
+        self.assertEqual(bitfields.join_words([0x11111111, 0x2]), 0x211111111)
+        self.assertEqual(bitfields.bin_lsb0(0b1101, 8), '10110000')
+        with self.assertRaises(ValueError):
+            bitfields.BitFields((4, 4))
+
+    def test_plmn(self):
+        self.assertEqual(util.unpack_mcc_mnc(b'\x62\xf2\x20'), ('262', '02'))
+        self.assertEqual(util.unpack_lai(b'\x62\xf2\x20\x12\x34'), ('262', '02', 0x1234))
+
+    @unittest.skipUnless(has_bitstring, 'bitstring is not installed')
+    def test_bitstring_lsb0(self):
+        bitstring.options.lsb0 = True
+        try:
+            rng = random.Random(0)
+            for _ in range(100):
+                length = rng.choice((8, 16, 32, 64))
+                value = rng.getrandbits(length)
+                start = rng.randrange(length)
+                stop = rng.randrange(start + 1, length + 1)
+                bits = bitstring.Bits(uint=value, length=length)
+                self.assertEqual(bitfields.field(value, start, stop), bits[start:stop].uint)
+                self.assertEqual(bitfields.bin_lsb0(value, length), bits.bin[::-1])
+
+                buf = value.to_bytes(length // 8, 'little')
+                self.assertEqual(bitfields.uint_le(buf), bitstring.Bits(bytes=reversed(buf)).uint)
+        finally:
+            bitstring.options.lsb0 = False
+
+if __name__ == '__main__':
+    unittest.main()
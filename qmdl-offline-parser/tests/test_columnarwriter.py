@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+import unittest
+import datetime
+import math
+import os
+import tempfile
+import zipfile
+
+import scat.writers.columnarwriter as columnarwriter
+from scat.writers.columnarwriter import ColumnarWriter, read_npz_columns
+
+class TestColumnarWriter(unittest.TestCase):
+    ts = datetime.datetime(2024, 1, 2, 3, 4, 5, 6000, tzinfo=datetime.timezone.utc)
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_records(self, writer):
+        writer.write_cp(b'\x01\x02', 0, self.ts)
+        writer.write_parsed_data({'cell_info': {'type': 'lte_rrc_scell', 'pci': 1}}, 0, self.ts)
+        for pci in (1, 2, 3):
+            writer.write_parsed_data({'measurement': [{'type': 'lte_measurement', 'technology': 'LTE', 'cell': 'serving',
+                'earfcn': 1300, 'pci': pci, 'rsrp_dbm': -100.5, 'rsrq_db': -10.25}]}, 0, self.ts)
+        writer.write_parsed_data({'measurement': {'type': 'wcdma_measurement', 'technology': 'WCDMA',
+            'uarfcn': 10700, 'psc': 300, 'rscp_dbm': -90.0, 'ecio_db': -5.5}}, 1, self.ts)
+        writer.close()
+
+    def check_columns(self, columns):
+        self.assertEqual(list(columns['ts_us']), [1704164645006000] * 4)
+        self.assertEqual(list(columns['radio_id']), [0, 0, 0, 1])
+        self.assertEqual([columnarwriter.RAT_NAMES[x] for x in columns['rat']], ['LTE', 'LTE', 'LTE', 'WCDMA'])
+        self.assertEqual([columnarwriter.CELL_NAMES[x] for x in columns['cell']], ['serving', 'serving', 'serving', 'unknown'])
+        self.assertEqual(list(columns['arfcn']), [1300, 1300, 1300, 10700])
+        self.assertEqual(list(columns['pci']), [1, 2, 3, 300])
+        self.assertEqual(list(columns['rsrp'])[:3], [-100.5] * 3)
+        self.assertTrue(math.isnan(columns['rsrp'][3]))
+        self.assertEqual(columns['rscp'][3], -90.0)
+
+    def test_npz(self):
+        fname = os.path.join(self.tmpdir.name, 'meas.npz')
+        writer = ColumnarWriter(fname, 'npz', row_group_size=2)
+        self.write_records(writer)
+        self.assertEqual(writer.total_rows, 4)
+        self.assertEqual([os.path.basename(x) for x in writer.outputs], ['meas.00000.npz', 'meas.00001.npz'])
+
+        with zipfile.ZipFile(writer.outputs[0]) as z:
+            data = z.read('pci.npy')
+            self.assertEqual(data[:8], b'\x93NUMPY\x01\x00')
+            self.assertEqual((10 + int.from_bytes(data[8:10], 'little')) % 64, 0)
+            self.assertIn('rat_names.npy', z.namelist())
+        self.check_columns(read_npz_columns(fname))
+
+        with self.assertRaises(ValueError):
+            ColumnarWriter(fname, 'csv')
+
+    @unittest.skipUnless(columnarwriter.has_pyarrow, 'pyarrow is not installed')
+    def test_parquet(self):
+        import pyarrow.ipc
+        import pyarrow.parquet
+
+        fname = os.path.join(self.tmpdir.name, 'meas.parquet')
+        self.write_records(ColumnarWriter(fname, 'parquet', row_group_size=2))
+        parquet_file = pyarrow.parquet.ParquetFile(fname)
+        self.assertEqual(parquet_file.num_row_groups, 2)
+        table = parquet_file.read()
+        self.assertEqual(table.column('rat').to_pylist(), ['LTE', 'LTE', 'LTE', 'WCDMA'])
+        self.assertEqual(table.column('pci').to_pylist(), [1, 2, 3, 300])
+
+        fname = os.path.join(self.tmpdir.name, 'meas.arrow')
+        self.write_records(ColumnarWriter(fname, 'arrow', row_group_size=2))
+        with pyarrow.ipc.open_file(fname) as reader:
+            self.assertEqual(reader.num_record_batches, 2)
+            self.assertEqual(reader.read_all().column('arfcn').to_pylist(), [1300, 1300, 1300, 10700])
+
+if __name__ == '__main__':
+    unittest.main()
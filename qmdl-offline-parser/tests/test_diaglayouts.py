@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+
+import unittest
+import struct
+
+import scat.parsers.qualcomm.diagcmd as diagcmd
+import scat.parsers.qualcomm.diaglayouts as diaglayouts
+import scat.parsers.qualcomm.diagltelogparser as diagltelogparser
+import scat.parsers.qualcomm.diagnrlogparser as diagnrlogparser
+
+class TestDiagLayouts(unittest.TestCase):
+    def test_registry(self):
+        lte_rrc_ota = diagcmd.diag_log_get_lte_item_id(diagcmd.diag_log_code_lte.LOG_LTE_RRC_OTA_MESSAGE)
+        self.assertIs(diaglayouts.get(lte_rrc_ota, 30), diagltelogparser.LTE_RRC_OTA_V30)
+        self.assertIsNone(diaglayouts.get(lte_rrc_ota, 0xff))
+
+        nr_mib = diagcmd.diag_log_get_lte_item_id(diagcmd.diag_log_code_5gnr.LOG_5GNR_RRC_MIB_INFO)
+        self.assertIs(diaglayouts.get(nr_mib, 3), diagnrlogparser.NR_RRC_MIB_INFO)
+
+        with self.assertRaises(ValueError):
+            diaglayouts.register(lte_rrc_ota, 30, 'Duplicate', '<B', 'a')
+        with self.assertRaises(ValueError):
+            diaglayouts.RecordLayout('Mismatch', '<BH', 'a')
+
+    def test_unpack_from(self):
+        layout = diaglayouts.RecordLayout('Test', '<BHL', 'a b c')
+        self.assertEqual(layout.size, 7)
+        buf = b'\xff' + struct.pack('<BHL', 1, 2, 3) + b'\xff'
+        item = layout.unpack_from(memoryview(buf), 1)
+        self.assertEqual(item, layout.record(a=1, b=2, c=3))
+        with self.assertRaises(struct.error):
+            layout.unpack_from(buf, 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,6 +7,7 @@ from collections import namedtuple
 
 import scat.parsers.qualcomm.diagcmd as diagcmd
 from scat.parsers.qualcomm.diagltelogparser import DiagLteLogParser
+from scat.parsers.qualcomm.qualcommparser import QualcommParser
 
 class TestDiagLteLogParser(unittest.TestCase):
     parser = DiagLteLogParser(parent=None)
@@ -73,6 +74,14 @@ LTE ML1 SCell Meas Response (Cell 0): PCI: 416, SFN/SubFN: 655/8, Serving cell i
 LTE ML1 SCell Meas Response (Cell 0): PCI: 94, SFN/SubFN: 1005/1, Serving cell index: 1, is_serving_cell: 1
 LTE ML1 SCell Meas Response (Cell 1): PCI: 93, SFN/SubFN: 1005/2, Serving cell index: 1, is_serving_cell: 0''')
 
+        # Measurement records carry the printed fields only
+        parent = QualcommParser()
+        parent.structured_fields = True
+        result = DiagLteLogParser(parent=parent).parse_lte_ml1_scell_meas_response(pkt_header, payload, None)
+        self.assertEqual(result['measurement'], [
+            {'type': 'lte_measurement', 'technology': 'LTE', 'cell': 'serving', 'earfcn': 1444, 'pci': 94, 'sfn': 1005, 'subfn': 1, 'scell_index': 1},
+            {'type': 'lte_measurement', 'technology': 'LTE', 'cell': 'scell', 'earfcn': 1444, 'pci': 93, 'sfn': 1005, 'subfn': 2, 'scell_index': 1}])
+
         # V60
         payload = binascii.unhexlify('01010000193ca00014050000010000000f00000000010203e48100009a1d0000580e03002c87d10c9a491300cfc44900983441001394450059242500d2244d00041184100891b30d082184108e9a1200eff111008e020000ffff0300090004003900380039003a0000000000784401007b7101004a090100a2a30000ebc10700e23507002701000027010000c10000009500000007755000f4944e000000000008010000')
         pkt_header = self.log_header(cmd_code=0x10, reserved=0, length1=len(payload) + 12, length2=len(payload) + 12,
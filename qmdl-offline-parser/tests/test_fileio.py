@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+import unittest
+import binascii
+import os
+import tempfile
+
+import scat.framing as framing
+import scat.parsers.qualcomm.diagcmd as diagcmd
+from scat.iodevices.fileio import FileIO
+from scat.parsers.qualcomm.qualcommparser import QualcommParser
+from tests.diagframes import CollectingWriter, build_log_pkt, build_log_frame
+
+class TestFileIO(unittest.TestCase):
+    scell_meas_id = diagcmd.diag_log_get_lte_item_id(diagcmd.diag_log_code_lte.LOG_LTE_ML1_SERVING_CELL_MEAS_AND_EVAL)
+    scell_meas_v4 = binascii.unhexlify('040100009C18D60AECC44E00E2244E00FFFCE30FFED80A0047AD56021D310100A2624100')
+    scell_meas_v5 = binascii.unhexlify('05010000160d0000d40e00004bb444005444450039e514133149070048adfe019f310100a23f0000')
+
+    def setUp(self):
+        fd, self.fname = tempfile.mkstemp(suffix='.qmdl')
+        with os.fdopen(fd, 'wb') as f:
+            for i in range(200):
+                f.write(build_log_frame(self.scell_meas_id, self.scell_meas_v4))
+                f.write(build_log_frame(self.scell_meas_id, self.scell_meas_v5))
+            # Incomplete trailing frame must be ignored
+            f.write(build_log_frame(self.scell_meas_id, self.scell_meas_v4)[:-1])
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def parse_file(self, use_mmap):
+        parser = QualcommParser()
+        writer = CollectingWriter()
+        io_device = FileIO([self.fname], use_mmap=use_mmap)
+        if use_mmap:
+            self.assertIsNotNone(io_device.mapping)
+        else:
+            self.assertIsNone(io_device.mapping)
+        parser.set_io_device(io_device)
+        parser.set_writer(writer)
+        parser.read_dump()
+        self.assertIsNone(io_device.mapping)
+        return writer.stdout
+
+    def test_mapped_read_dump_matches_chunked(self):
+        mapped = self.parse_file(use_mmap=True)
+        chunked = self.parse_file(use_mmap=False)
+        self.assertEqual(len(mapped), 400)
+        self.assertEqual(mapped, chunked)
+        self.assertEqual(mapped[0], 'LTE SCell: EARFCN: 6300, PCI: 214, Measured RSRP: -101.25, Measured RSSI: -66.62, Measured RSRQ: -14.06')
+
+    def write_hdf(self):
+        fd, fname = tempfile.mkstemp(suffix='.hdf')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'\xaa\xbb\xcc')
+            for i in range(50):
+                f.write(build_log_pkt(self.scell_meas_id, self.scell_meas_v4))
+                # Length mismatch, skipped as a whole header
+                f.write(b'\x10\x00\x05\x00\x06\x00')
+                f.write(build_log_pkt(self.scell_meas_id, self.scell_meas_v5))
+                f.write(b'\x00' * (i % 5))
+        return fname
+
+    def test_hdf_frames(self):
+        fname = self.write_hdf()
+        try:
+            for block_size in (7, 64, 0x100000):
+                frames = list(framing.read_frames(FileIO([fname]), framing.HdfFramer(), block_size))
+                self.assertEqual(len(frames), 100)
+                self.assertEqual(frames[0], build_log_pkt(self.scell_meas_id, self.scell_meas_v4))
+                self.assertEqual(frames[1], build_log_pkt(self.scell_meas_id, self.scell_meas_v5))
+
+            parser = QualcommParser()
+            writer = CollectingWriter()
+            parser.set_io_device(FileIO([fname]))
+            parser.set_writer(writer)
+            parser.read_dump()
+            self.assertEqual(len(writer.stdout), 100)
+            self.assertEqual(writer.stdout[0], 'LTE SCell: EARFCN: 6300, PCI: 214, Measured RSRP: -101.25, Measured RSSI: -66.62, Measured RSRQ: -14.06')
+        finally:
+            os.unlink(fname)
+
+    def test_dlf_records(self):
+        fd, fname = tempfile.mkstemp(suffix='.dlf')
+        with os.fdopen(fd, 'wb') as f:
+            for i in range(50):
+                # DLF record: DIAG_LOG_F packet without command and the first length field
+                f.write(build_log_pkt(self.scell_meas_id, self.scell_meas_v4, i)[4:])
+                f.write(build_log_pkt(self.scell_meas_id, self.scell_meas_v5, i)[4:])
+        try:
+            for block_size in (5, 64, 0x100000):
+                records = list(framing.read_frames(FileIO([fname]), framing.DlfFramer(), block_size))
+                self.assertEqual(len(records), 100)
+                self.assertEqual(records[1], build_log_pkt(self.scell_meas_id, self.scell_meas_v5, 0)[4:])
+
+            parser = QualcommParser()
+            writer = CollectingWriter()
+            parser.set_io_device(FileIO([fname]))
+            parser.set_writer(writer)
+            parser.read_dump()
+            self.assertEqual(len(writer.stdout), 100)
+            self.assertEqual(writer.stdout[1], 'LTE SCell: EARFCN: 3350, PCI: 212, Measured RSRP: -111.31, Measured RSSI: -80.88, Measured RSRQ: -10.44')
+        finally:
+            os.unlink(fname)
+
+if __name__ == '__main__':
+    unittest.main()
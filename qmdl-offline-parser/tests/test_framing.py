@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+import unittest
+import io
+import struct
+
+import scat.framing as framing
+
+class BytesIODevice:
+    def __init__(self, buf):
+        self.f = io.BytesIO(buf)
+        self.block_until_data = False
+
+    def read(self, read_size, decode_hdlc = False):
+        return self.f.read(read_size)
+
+def sdm_frame(body):
+    # 0x7f, outer length, unknown, inner length, remaining header, body, 0x7e
+    length1 = 14 + len(body)
+    return b'\x7f' + struct.pack('<HBHHBBBL', length1, 0, length1 - 3, 0, 0, 0, 0, 0) + body + b'\x7e'
+
+class TestFraming(unittest.TestCase):
+    def read_all(self, buf, framer, read_sizes=(1, 3, 64)):
+        results = []
+        for read_size in read_sizes:
+            results.append(list(framing.read_frames(BytesIODevice(buf), framer, read_size)))
+        for r in results[1:]:
+            self.assertEqual(r, results[0])
+        spans = [buf[x:y] for x, y in framer.iter_spans(buf)]
+        self.assertEqual(spans, results[0])
+        return results[0]
+
+    def test_ringbuffer(self):
+        ring = framing.RingBuffer(compact_threshold=4)
+        ring.write(b'0123456789')
+        ring.consume_to(6)
+        self.assertEqual(len(ring), 4)
+        ring.write(b'ab')
+        self.assertEqual(ring.start, 0)
+        self.assertEqual(ring.take(ring.start, ring.end), b'6789ab')
+        ring.consume_to(ring.end)
+        ring.write(b'c')
+        self.assertEqual(bytes(ring.data), b'c')
+
+    def test_hdlc(self):
+        buf = b'\x7e\x01\x02\x7e\x7e\x03\x7e\x04'
+        self.assertEqual(self.read_all(buf, framing.HdlcFramer()), [b'\x01\x02', b'\x03'])
+        self.assertEqual(self.read_all(buf, framing.HdlcFramer(keep_trailing=True)), [b'\x01\x02', b'\x03', b'\x04'])
+        frames = [x.tobytes() for x in framing.iter_frames(buf, framing.HdlcFramer())]
+        self.assertEqual(frames, [b'\x01\x02', b'\x03'])
+
+    def test_sdm(self):
+        a = sdm_frame(b'\x11' * 4)
+        b = sdm_frame(b'\x22' * 8)
+        broken = bytearray(sdm_frame(b'\x33' * 4))
+        broken[-1] = 0x00
+        buf = b'\x00' + a + bytes(broken) + b'\x01\x02' + b + a[:5]
+        self.assertEqual(self.read_all(buf, framing.SdmFramer()), [a, b])
+
+    def test_length_prefix(self):
+        buf = struct.pack('<H', 3) + b'abc' + struct.pack('<H', 0) + struct.pack('<H', 2) + b'de' + struct.pack('<H', 5) + b'f'
+        self.assertEqual(self.read_all(buf, framing.LengthPrefixFramer()), [b'abc', b'', b'de'])
+
+    def test_unisoc(self):
+        a = struct.pack('<H', 4) + b'\x01\x02' + b'~~~~'
+        b = struct.pack('<H', 5) + b'\x03\x04\x05' + b'~~~~'
+        garbage = struct.pack('<H', 4) + b'\x09\x09' + b'xxxx'
+        buf = a + garbage + b'~~~~' + b
+        self.assertEqual(self.read_all(buf, framing.UnisocFramer()), [a, b])
+
+    def test_dlf(self):
+        a = struct.pack('<HHQ', 14, 0xb0c0, 0) + b'\x01\x02'
+        b = struct.pack('<HHQ', 12, 0xb0c1, 0)
+        buf = a + b'\x00\x00' + b + a[:5]
+        self.assertEqual(self.read_all(buf, framing.DlfFramer()), [a, b, a[:5]])
+
+    def test_hdf(self):
+        a = struct.pack('<BBHHHQ', 0x10, 0, 14, 14, 0xb0c0, 0) + b'\x01\x02'
+        buf = b'\xaa' + a + b'\x10\x00\x05\x00\x06\x00' + a + b'\x10' + a[:8]
+        self.assertEqual(self.read_all(buf, framing.HdfFramer()), [a, a, a[:8]])
+
+if __name__ == '__main__':
+    unittest.main()
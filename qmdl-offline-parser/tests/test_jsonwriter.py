@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import unittest
+import datetime
+import json
+import os
+import tempfile
+
+from scat.writers.jsonwriter import JsonWriter, read_raw_payload
+
+class TestJsonWriter(unittest.TestCase):
+    ts = datetime.datetime(2024, 1, 2, 3, 4, 5, 6000, tzinfo=datetime.timezone.utc)
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_records(self, writer):
+        writer.data['file_info']['parsed_timestamp'] = 'fixed'
+        writer.write_cp(b'\x01\x02', 0, self.ts)
+        writer.write_up(b'\x45\x00\x00', 0, self.ts)
+        for pci in (1, 2, 1):
+            writer.write_parsed_data({'cell_info': {'type': 'lte_rrc_scell', 'pci': pci, 'earfcn_dl': 1300},
+                'measurement': [{'type': 'lte_measurement', 'pci': pci, 'rsrp_dbm': -100.5}]}, 0, self.ts)
+        writer.write_parsed_data({'event': [{'type': 'EVENT_TEST', 'name': 'café'}]}, 1, self.ts)
+        writer.close()
+
+    def test_stream(self):
+        document = os.path.join(self.tmpdir.name, 'document.json')
+        self.write_records(JsonWriter(document))
+        stream = os.path.join(self.tmpdir.name, 'stream.json')
+        writer = JsonWriter(stream, mode='stream')
+        self.assertNotIn('measurements', writer.data)
+        self.write_records(writer)
+
+        with open(document, encoding='utf-8') as f:
+            expected = json.load(f)
+        with open(stream, encoding='utf-8') as f:
+            result = json.load(f)
+        self.assertEqual(list(result.keys()), list(expected.keys()))
+        self.assertEqual(result, expected)
+        self.assertEqual(len(result['cell_info']), 2)
+        self.assertEqual(result['security_info'], [])
+        # The spooled sections are removed once assembled
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)), ['document.json', 'stream.json'])
+
+    def test_ndjson(self):
+        fname = os.path.join(self.tmpdir.name, 'out.ndjson')
+        self.write_records(JsonWriter(fname, mode='ndjson'))
+        with open(fname, encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual([line['section'] for line in lines], ['cell_info', 'measurements',
+            'cell_info', 'measurements', 'measurements', 'events', 'file_info', 'summary'])
+        self.assertEqual(lines[5]['name'], 'café')
+        self.assertEqual(lines[-1]['measurements'], 3)
+        self.assertEqual(lines[-1]['total_messages'], 2)
+
+        with self.assertRaises(ValueError):
+            JsonWriter(fname, mode='xml')
+
+    def test_raw_capture(self):
+        fname = os.path.join(self.tmpdir.name, 'out.json')
+        self.write_records(JsonWriter(fname, raw_capture=True))
+        with open(fname, encoding='utf-8') as f:
+            result = json.load(f)
+        self.assertEqual(result['file_info']['raw_file'], 'out.json.raw')
+        raw_messages = result['raw_messages']
+        self.assertEqual([(r['type'], r['offset'], r['length']) for r in raw_messages],
+            [('control_plane', 0, 2), ('user_plane', 2, 3)])
+        raw_fname = os.path.join(self.tmpdir.name, result['file_info']['raw_file'])
+        self.assertEqual(read_raw_payload(raw_fname, raw_messages[1]), b'\x45\x00\x00')
+        self.assertEqual(os.path.getsize(raw_fname), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+import unittest
+import binascii
+import os
+import struct
+import tempfile
+
+import scat.util as util
+import scat.parsers.qualcomm.diagcmd as diagcmd
+import scat.parsers.qualcomm.qmdlindex as qmdlindex
+from scat.iodevices.fileio import FileIO
+from scat.parsers.qualcomm.paralleldecoder import ParallelDecoder
+from scat.parsers.qualcomm.qualcommparser import QualcommParser
+from tests.diagframes import CollectingWriter, build_log_frame
+
+class TestParallelDecoder(unittest.TestCase):
+    scell_meas_id = diagcmd.diag_log_get_lte_item_id(diagcmd.diag_log_code_lte.LOG_LTE_ML1_SERVING_CELL_MEAS_AND_EVAL)
+    scell_meas_v4 = binascii.unhexlify('040100009C18D60AECC44E00E2244E00FFFCE30FFED80A0047AD56021D310100A2624100')
+    scell_meas_v5 = binascii.unhexlify('05010000160d0000d40e00004bb444005444450039e514133149070048adfe019f310100a23f0000')
+    rrc_cell_info_id = diagcmd.diag_log_get_lte_item_id(diagcmd.diag_log_code_lte.LOG_LTE_RRC_SERVING_CELL_INFO)
+    rrc_cell_info_v2 = binascii.unhexlify('028F001405644B64640074BC01D60503000000060102010000')
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.tmpdir.name, 'test.qmdl')
+        with open(self.fname, 'wb') as f:
+            f.write(build_log_frame(self.rrc_cell_info_id, self.rrc_cell_info_v2))
+            for i in range(300):
+                f.write(build_log_frame(self.scell_meas_id, self.scell_meas_v4, i))
+                f.write(build_log_frame(self.scell_meas_id, self.scell_meas_v5, i))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def run_parser(self, jobs, params={}):
+        parser = QualcommParser()
+        writer = CollectingWriter()
+        parser.set_io_device(FileIO([self.fname]))
+        parser.set_writer(writer)
+        parser.set_parameter(dict(params, jobs=jobs))
+        parser.read_dump()
+        return parser, writer
+
+    def parse_file(self, jobs):
+        return self.run_parser(jobs)[1].stdout
+
+    def test_tasks_warm_window(self):
+        parser = QualcommParser()
+        with open(self.fname, 'rb') as f:
+            index = qmdlindex.build_index(f.read(), qmdlindex.DUMP_TYPE_QMDL)
+        decoder = ParallelDecoder(parser, 2, chunk_size=1, overlap=4)
+        tasks = list(decoder._tasks(self.fname, index, range(len(index))))
+        self.assertEqual(len(tasks), len(index))
+
+        # First chunk has nothing to replay
+        self.assertEqual(len(tasks[0][2]), 0)
+        # Later chunks replay the serving cell info frame and the overlap window
+        fname, dump_type, warm_offsets, warm_lengths, offsets, lengths = tasks[100]
+        self.assertEqual(list(warm_offsets), [index.offsets[i] for i in (0, 96, 97, 98, 99)])
+        self.assertEqual(list(offsets), [index.offsets[100]])
+        self.assertEqual(list(lengths), [index.lengths[100]])
+
+    def test_parallel_matches_sequential(self):
+        sequential = self.parse_file(1)
+        parallel = self.parse_file(2)
+        self.assertEqual(len(sequential), 601)
+        self.assertEqual(parallel, sequential)
+
+    def test_parallel_small_chunks(self):
+        parser = QualcommParser()
+        writer = CollectingWriter()
+        parser.set_writer(writer)
+        with open(self.fname, 'rb') as f:
+            index = qmdlindex.build_index(f.read(), qmdlindex.DUMP_TYPE_QMDL)
+        ParallelDecoder(parser, 2, chunk_size=1000, overlap=8).run(self.fname, index)
+        self.assertEqual(len(writer.stdout), 601)
+        self.assertEqual(writer.stdout[0], 'LTE RRC SCell Info: EARFCN: 1300/19300, Band: 3, Bandwidth: 20/20 MHz, PCI: 143, MCC: 262, MNC: 01, xTAC/xCID: 5d6/1bc7400')
+        self.assertEqual(writer.stdout[1::2], ['LTE SCell: EARFCN: 6300, PCI: 214, Measured RSRP: -101.25, Measured RSSI: -66.62, Measured RSRQ: -14.06'] * 300)
+
+    def test_parallel_statistics(self):
+        with open(self.fname, 'ab') as f:
+            for i in range(20):
+                event = struct.pack('<HQ', 4000, (i + 1) << 16)
+                f.write(util.generate_packet(struct.pack('<BH', diagcmd.DIAG_EVENT_REPORT_F, len(event)) + event))
+        sequential, _ = self.run_parser(1, {'events': True})
+        parallel, _ = self.run_parser(2, {'events': True})
+        self.assertEqual(sequential.event_statistics.count(), 20)
+        self.assertEqual(parallel.event_statistics.events, sequential.event_statistics.events)
+        self.assertEqual(parallel.event_statistics.reports, 20)
+        self.assertEqual(parallel.crc_verifier.counts(), sequential.crc_verifier.counts())
+        self.assertEqual(parallel.crc_verifier.verified, 621)
+
+    def test_parallel_profile(self):
+        sequential, _ = self.run_parser(1, {'profile': True})
+        parallel, _ = self.run_parser(2, {'profile': True})
+        log_stat = parallel.profiler.stats[('log', self.scell_meas_id)]
+        self.assertEqual(log_stat.count, 600)
+        self.assertEqual(log_stat.bytes, sequential.profiler.stats[('log', self.scell_meas_id)].bytes)
+        self.assertEqual(parallel.profiler.stats[('writer', 'CollectingWriter.write_stdout_data')].count, 601)
+
+if __name__ == '__main__':
+    unittest.main()
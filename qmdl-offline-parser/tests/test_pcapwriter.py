@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+import unittest
+import datetime
+import os
+import struct
+import tempfile
+
+import scat.util as util
+from scat.writers.pcapwriter import PcapWriter
+
+class TestPcapWriter(unittest.TestCase):
+    ts = datetime.datetime(2024, 1, 2, 3, 4, 5, 6000, tzinfo=datetime.timezone.utc)
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.tmpdir.name, 'out.pcap')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def read(self):
+        with open(self.fname, 'rb') as f:
+            return f.read()
+
+    def pcapng_blocks(self, data):
+        blocks = []
+        pos = 0
+        while pos < len(data):
+            block_type, block_len = struct.unpack_from('<LL', data, pos)
+            self.assertEqual(struct.unpack_from('<L', data, pos + block_len - 4)[0], block_len)
+            blocks.append((block_type, data[pos + 8:pos + block_len - 4]))
+            pos += block_len
+        return blocks
+
+    def test_pcap(self):
+        writer = PcapWriter(self.fname, 4729, 47290, buffer_size=4096)
+        writer.write_cp(b'\x02\x04\x0d', 0, self.ts)
+        writer.write_up(b'\x45\x00', 1, self.ts)
+        # Packets are buffered until the writer is closed
+        self.assertEqual(writer.pcap_file.tell(), 24)
+        writer.close()
+        writer.close()
+
+        data = self.read()
+        self.assertEqual(data[:24], struct.pack('<LHHLLLL', 0xa1b2c3d4, 2, 4, 0, 0, 0xffff, 1))
+        self.assertEqual(struct.unpack_from('<LLLL', data, 24), (1704164645, 6000, 45, 45))
+        self.assertEqual(data[40:54], b'\x00' * 12 + b'\x08\x00')
+        self.assertEqual(struct.unpack_from('!LL', data, 66), (0x7f000001, 0x7f000001))
+        self.assertEqual(struct.unpack_from('!HHH', data, 74), (13337, 4729, 11))
+        self.assertEqual(data[82:85], b'\x02\x04\x0d')
+
+        second = 85
+        self.assertEqual(struct.unpack_from('!H', data, second + 16 + 14 + 4)[0], 1)
+        self.assertEqual(struct.unpack_from('!L', data, second + 16 + 14 + 16)[0], 0x7f000002)
+        self.assertEqual(struct.unpack_from('!H', data, second + 16 + 14 + 22)[0], 47290)
+        self.assertEqual(len(data), second + 16 + 42 + 2)
+
+    def test_pcapng(self):
+        # 1/32 chip resolution of the QXDM ticks
+        ts = util.parse_qxdm_ts(1)
+        writer = PcapWriter(self.fname, 4729, 47290, fmt='pcapng', nanosecond=True, link_type='upper_pdu', buffer_size=1)
+        writer.write_cp(b'\x02\x04\x0d', 1, ts)
+        writer.write_up(b'\x60\x00', 0, ts)
+        writer.write_cp(b'\x02', 1, ts)
+        writer.close()
+
+        blocks = self.pcapng_blocks(self.read())
+        self.assertEqual([block_type for block_type, body in blocks], [0x0a0d0d0a, 1, 6, 1, 6, 6])
+        self.assertEqual(struct.unpack_from('<LHHq', blocks[0][1]), (0x1a2b3c4d, 1, 0, -1))
+
+        idb = blocks[1][1]
+        self.assertEqual(struct.unpack_from('<HHL', idb), (252, 0, 0xffff))
+        self.assertEqual(idb[8:20], struct.pack('<HH', 2, 6) + b'radio1\x00\x00')
+        self.assertEqual(idb[20:28], struct.pack('<HH', 9, 1) + b'\x09\x00\x00\x00')
+
+        interface_id, ts_high, ts_low, cap_len, orig_len = struct.unpack_from('<LLLLL', blocks[2][1])
+        self.assertEqual(interface_id, 0)
+        self.assertEqual((ts_high << 32) | ts_low, util.GPS_EPOCH_US * 1000 + 24)
+        pkt = blocks[2][1][20:20 + cap_len]
+        self.assertEqual(pkt, struct.pack('!HH', 12, 8) + b'gsmtap\x00\x00' + b'\x00' * 4 + b'\x02\x04\x0d')
+
+        interface_id, ts_high, ts_low, cap_len, orig_len = struct.unpack_from('<LLLLL', blocks[4][1])
+        self.assertEqual(interface_id, 1)
+        self.assertEqual(blocks[4][1][20:20 + cap_len], struct.pack('!HH', 12, 4) + b'ipv6' + b'\x00' * 4 + b'\x60\x00')
+        self.assertEqual(struct.unpack_from('<L', blocks[5][1])[0], 0)
+
+        with self.assertRaises(ValueError):
+            PcapWriter(self.fname, fmt='erf')
+
+if __name__ == '__main__':
+    unittest.main()
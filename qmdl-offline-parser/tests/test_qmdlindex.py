@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+import unittest
+import binascii
+import datetime
+import os
+import tempfile
+
+import scat.util as util
+import scat.parsers.qualcomm.diagcmd as diagcmd
+import scat.parsers.qualcomm.qmdlindex as qmdlindex
+from scat.iodevices.fileio import FileIO
+from scat.parsers.qualcomm.qualcommparser import QualcommParser
+from tests.diagframes import CollectingWriter, build_log_frame
+
+class TestQmdlIndex(unittest.TestCase):
+    scell_meas_id = diagcmd.diag_log_get_lte_item_id(diagcmd.diag_log_code_lte.LOG_LTE_ML1_SERVING_CELL_MEAS_AND_EVAL)
+    scell_meas_v4 = binascii.unhexlify('040100009C18D60AECC44E00E2244E00FFFCE30FFED80A0047AD56021D310100A2624100')
+    other_id = 0xb0c0
+    base_time = datetime.datetime(2024, 1, 1, 0, 0, 0, tzinfo=datetime.timezone.utc)
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.tmpdir.name, 'test.qmdl')
+        with open(self.fname, 'wb') as f:
+            for i in range(100):
+                ts = util.qxdm_ts_from_datetime(self.base_time + datetime.timedelta(seconds=i))
+                f.write(build_log_frame(self.scell_meas_id, self.scell_meas_v4, ts))
+                f.write(build_log_frame(self.other_id, b'\x00' * 4, ts))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_qxdm_ts_from_datetime(self):
+        ts = util.qxdm_ts_from_datetime(self.base_time)
+        self.assertEqual(util.parse_qxdm_ts(ts), self.base_time)
+        self.assertEqual(util.qxdm_ts_from_datetime(self.base_time.replace(tzinfo=None)), ts)
+
+    def test_build_save_load(self):
+        with open(self.fname, 'rb') as f:
+            buf = f.read()
+        index = qmdlindex.build_index(buf, qmdlindex.DUMP_TYPE_QMDL)
+        self.assertEqual(len(index), 200)
+        self.assertEqual(index.cmds[0], diagcmd.DIAG_LOG_F)
+        self.assertEqual(index.log_ids[0], self.scell_meas_id)
+        self.assertEqual(index.log_ids[1], self.other_id)
+        self.assertEqual(index.offsets[0], 0)
+
+        qidx_fname = qmdlindex.index_filename(self.fname)
+        index.save(qidx_fname)
+        loaded = qmdlindex.QmdlIndex.load(qidx_fname)
+        self.assertEqual(list(loaded.offsets), list(index.offsets))
+        self.assertEqual(list(loaded.lengths), list(index.lengths))
+        self.assertEqual(list(loaded.log_ids), list(index.log_ids))
+        self.assertEqual(list(loaded.timestamps), list(index.timestamps))
+
+    def test_select(self):
+        with open(self.fname, 'rb') as f:
+            index = qmdlindex.build_index(f.read(), qmdlindex.DUMP_TYPE_QMDL)
+        start_ts = util.qxdm_ts_from_datetime(self.base_time + datetime.timedelta(seconds=10))
+        end_ts = util.qxdm_ts_from_datetime(self.base_time + datetime.timedelta(seconds=19))
+
+        self.assertEqual(index.seek_time(start_ts), 20)
+        self.assertEqual(list(index.select(start_ts=start_ts, end_ts=end_ts)), list(range(20, 40)))
+        self.assertEqual(list(index.select(log_ids=[self.other_id], start_ts=start_ts, end_ts=end_ts)), list(range(21, 40, 2)))
+        self.assertEqual(list(index.select(log_ids=[0x1234])), [])
+
+    def test_read_dump_with_index(self):
+        parser = QualcommParser()
+        writer = CollectingWriter()
+        parser.set_io_device(FileIO([self.fname]))
+        parser.set_writer(writer)
+        parser.set_parameter({
+            'index': True,
+            'log-ids': [self.scell_meas_id],
+            'start-time': self.base_time + datetime.timedelta(seconds=90),
+            'end-time': None})
+        parser.read_dump()
+
+        self.assertEqual(len(writer.stdout), 10)
+        self.assertTrue(os.path.exists(qmdlindex.index_filename(self.fname)))
+        index = qmdlindex.QmdlIndex.load(qmdlindex.index_filename(self.fname))
+        self.assertTrue(index.matches_source(self.fname))
+
+if __name__ == '__main__':
+    unittest.main()
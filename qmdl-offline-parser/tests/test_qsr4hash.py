@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+import unittest
+import os
+import tempfile
+import uuid
+import zlib
+
+import scat.parsers.qualcomm.qsr4hash as qsr4hash
+from scat.parsers.qualcomm.qualcommparser import QualcommParser
+
+QDB_UUID = uuid.UUID('12345678-1234-5678-1234-567812345678')
+QDB_TEXT = '''# Test QDB
+<GUID>12345678-1234-5678-1234-567812345678<\\GUID>
+<Content>
+305419896:1:2:3:lte_rrc.c:RRC state %d: %s
+16:4:5:6:lte_rrc.c:Timer %u
+<\\Content>
+<MtraceContent>
+77:10:2:client:mtrace.c:tag:Trace %x
+<\\MtraceContent>
+<QtraceStrContent>
+5:qtrace: string
+<\\QtraceStrContent>
+'''
+
+class TestQsr4Hash(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.tmpdir.name, 'test.qdb')
+        self.write_qdb(QDB_TEXT)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_qdb(self, text):
+        with open(self.fname, 'wb') as f:
+            f.write((b'\x7fQDB' + QDB_UUID.bytes).ljust(64, b'\x00'))
+            f.write(zlib.compress(text.encode('utf-8')))
+
+    def check_tables(self, qdb):
+        self.assertEqual(len(qdb.content), 2)
+        self.assertEqual(qdb.content[305419896], qsr4hash.Qsr4Content(1, 2, 3, 'lte_rrc.c', 'RRC state %d: %s'))
+        self.assertEqual(qdb.content.get(16).string, 'Timer %u')
+        self.assertIsNone(qdb.content.get(17))
+        self.assertNotIn(17, qdb.content)
+        self.assertEqual(qdb.mtrace_content[77], qsr4hash.Qsr4MtraceContent('10', '2', 'client', 'mtrace.c', 'tag', 'Trace %x'))
+        self.assertEqual(qdb.qtrace_str_content[5], 'qtrace: string')
+        with self.assertRaises(KeyError):
+            qdb.qtrace_str_content[6]
+
+    def test_cache(self):
+        cache_fname = qsr4hash.cache_filename(self.fname)
+        qdb = qsr4hash.load_qsr4_hash(self.fname, cache=False)
+        self.check_tables(qdb)
+        self.assertFalse(os.path.exists(cache_fname))
+
+        qdb = qsr4hash.load_qsr4_hash(self.fname)
+        self.check_tables(qdb)
+        self.assertTrue(os.path.exists(cache_fname))
+
+        qdb = qsr4hash.load_qsr4_hash(self.fname)
+        self.assertIsNotNone(qdb.mapping)
+        self.assertEqual(qdb.content.entries, {})
+        self.check_tables(qdb)
+        self.assertEqual(sorted(qdb.content.entries), [16, 305419896])
+        qdb.close()
+
+        # A modified QDB with the same UUID invalidates the cache
+        self.write_qdb(QDB_TEXT.replace('Timer %u', 'Timer %d'))
+        qdb = qsr4hash.load_qsr4_hash(self.fname)
+        self.assertIsNone(qdb.mapping)
+        self.assertEqual(qdb.content[16].string, 'Timer %d')
+
+    def test_save_over_mapped_cache(self):
+        cache_fname = qsr4hash.cache_filename(self.fname)
+        qsr4hash.load_qsr4_hash(self.fname).close()
+        mapped = qsr4hash.load_qsr4_hash(self.fname)
+        self.assertIsNotNone(mapped.mapping)
+        inode = os.stat(cache_fname).st_ino
+
+        # Another process rebuilding the cache replaces the file, the mapping keeps the old one
+        qdb = qsr4hash.load_qsr4_hash(self.fname, cache=False)
+        qdb.save(cache_fname)
+        self.assertNotEqual(os.stat(cache_fname).st_ino, inode)
+        self.check_tables(mapped)
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)), sorted([os.path.basename(self.fname), os.path.basename(cache_fname)]))
+        mapped.close()
+        self.check_tables(qsr4hash.load_qsr4_hash(self.fname))
+
+    def test_parser(self):
+        parser = QualcommParser()
+        parser.set_parameter({'qsr4-hash': self.fname, 'qsr4-cache': False})
+        self.assertTrue(parser.parse_msgs)
+        self.assertEqual(parser.qsr4_content[16].line, 6)
+        self.assertFalse(os.path.exists(qsr4hash.cache_filename(self.fname)))
+
+        with open(self.fname, 'wb') as f:
+            f.write(b'\x00' * 64)
+        parser = QualcommParser()
+        parser.set_parameter({'qsr4-hash': self.fname})
+        self.assertFalse(parser.parse_msgs)
+
+if __name__ == '__main__':
+    unittest.main()
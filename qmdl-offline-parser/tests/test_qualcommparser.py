@@ -2,10 +2,22 @@
 
 import unittest
 import binascii
+import contextlib
 import datetime
+import io
+import json
+import os
+import struct
+import tempfile
 from collections import namedtuple
 
+from scat.iodevices.fileio import FileIO
+from scat.parsers.enhanced_qualcomm_parser import EnhancedQualcommParser
 from scat.parsers.qualcomm.qualcommparser import QualcommParser
+import scat.parsers.qualcomm.qualcommparser as qualcommparser
+import scat.parsers.qualcomm.diagcmd as diagcmd
+import scat.util as util
+from tests.diagframes import CollectingWriter, build_log_frame
 
 class TestQualcommParser(unittest.TestCase):
     parser = QualcommParser()
@@ -108,5 +120,206 @@ class TestQualcommParser(unittest.TestCase):
         expected_cp = binascii.unhexlify('0204100000000000000000000000000012d544aa0009c7e8000000000000000000000000000000000000000000000000393530390000000000000000000000006c74655f6d6c315f6d642e6300000000000000000000000000000000000000000000093f53656e7420496e697420416371205265713b2065617266636e203234353320667265715f3130304b487a2038373433206d61785f667265715f6f6666736574203133353030202074617267657465645f6163715f666c61672030207461726765745f6369642030206d61782068662034206e756d5f626c6f636b65645f63656c6c73203020667363616e206d6f64653a2030')
         self.assertEqual(result['cp'][0], expected_cp)
 
+    def test_snprintf(self):
+        self.assertEqual(qualcommparser.compile_c_format('a %d b %04x %% %p {c}'), ('a {0:} b {1:04x} % {3:x} {{c}}', 4, (0, )))
+        self.assertEqual(self.parser._snprintf('a %d b %04x %% %p {c}', [0xffffffff, 0xab, 0, 0x10]), 'a -1 b 00ab % 10 {c}')
+        self.assertEqual(self.parser._snprintf('a %d', []), 'a %d')
+        self.assertEqual(self.parser._snprintf('a %.2d', [1]), 'a %.2d, args=0x1')
+        self.assertIs(qualcommparser.compile_c_format('a %d'), qualcommparser.compile_c_format('a %d'))
+
+    def test_log_filter(self):
+        parser = QualcommParser()
+
+        def log_frame(log_id):
+            body = b'\x7d\x7e' * 4
+            return util.generate_packet(struct.pack('<BBHHHQ', 0x10, 0, len(body) + 12, len(body) + 12, log_id, 0) + body)[:-1]
+
+        # 0xb07e is escaped inside the header
+        parser.set_parameter({'log-ids': [0xb07e, 0xb0c0]})
+        self.assertFalse(parser.log_frame_excluded(log_frame(0xb07e)))
+        self.assertTrue(parser.log_frame_excluded(log_frame(0xb0c1)))
+        self.assertIsNone(parser.parse_diag(log_frame(0xb0c1)))
+        self.assertFalse(parser.log_frame_excluded(util.generate_packet(b'\x00' * 8)[:-1]))
+
+        parser.set_parameter({'log-ids': None, 'exclude-log-ids': [0xb0c1]})
+        self.assertTrue(parser.log_frame_excluded(log_frame(0xb0c1)))
+        self.assertFalse(parser.log_frame_excluded(log_frame(0xb0c2)))
+
+        parser.set_parameter({'exclude-log-ids': None, 'layer': ['rrc'], 'layer-filter': True})
+        self.assertFalse(parser.log_id_excluded(0xb0c0))
+        self.assertTrue(parser.log_id_excluded(0xb0e2))
+        parser.set_parameter({'layer': ['rrc', 'nas']})
+        self.assertFalse(parser.log_id_excluded(0xb0e2))
+
+    def test_unwrap(self):
+        frame = b'\x10\x00\x01\x02'
+        self.assertIs(util.unwrap(frame), frame)
+        self.assertEqual(util.unwrap(memoryview(frame)), frame)
+        self.assertEqual(util.unwrap(b'\x01\x7d\x5e\x7d\x5d\x02'), b'\x01\x7e\x7d\x02')
+
+    def test_crc_policy(self):
+        self.assertEqual(util.dm_crc16(b'123456789'), 0x906e)
+        self.assertEqual(util.dm_crc16(memoryview(b'123456789')), 0x906e)
+
+        parser = QualcommParser()
+        body = b'\x00' * 4
+        pkt = struct.pack('<BBHHHQ', 0x10, 0, len(body) + 12, len(body) + 12, 0x1ffe, 0) + body
+        good = util.generate_packet(pkt)[:-1]
+        bad = util.generate_packet(pkt[:-1] + b'\x01')[:-1][:-2] + util.wrap(good[-2:])
+
+        parser.set_parameter({'crc-check': 'strict'})
+        parser.parse_diag(good)
+        parser.parse_diag(bad)
+        self.assertEqual((parser.crc_verifier.verified, parser.crc_verifier.failed, parser.crc_verifier.skipped), (2, 1, 0))
+
+        # Lazy: frames decoding fine are not verified, failing ones are verified and dropped
+        parser.set_parameter({'crc-check': 'lazy'})
+        parser.parse_diag(good)
+        parser.parse_diag(bad)
+        self.assertEqual((parser.crc_verifier.verified, parser.crc_verifier.failed, parser.crc_verifier.skipped), (0, 0, 2))
+
+        def failing_dispatch(pkt, args=None):
+            raise ValueError('decoder failure')
+        parser.dispatch_diag = failing_dispatch
+        self.assertIsNone(parser.parse_diag(bad))
+        self.assertRaises(ValueError, parser.parse_diag, good)
+        self.assertEqual((parser.crc_verifier.verified, parser.crc_verifier.failed, parser.crc_verifier.skipped), (2, 1, 2))
+        del parser.dispatch_diag
+
+        # Lazy with sampling and length mismatch
+        parser.set_parameter({'crc-check': 'lazy', 'crc-sample-rate': 2})
+        for i in range(4):
+            parser.parse_diag(good)
+        truncated = util.generate_packet(pkt[:-1])[:-1]
+        parser.parse_diag(truncated)
+        self.assertEqual((parser.crc_verifier.verified, parser.crc_verifier.failed, parser.crc_verifier.skipped), (3, 0, 2))
+
+        parser.set_parameter({'crc-check': 'strict', 'disable-crc-check': True})
+        parser.parse_diag(bad)
+        self.assertEqual((parser.crc_verifier.verified, parser.crc_verifier.skipped), (0, 1))
+
+    def test_run_diag_statistics(self):
+        # Live captures log the CRC outcome like dumps
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir, 'live.bin')
+            with open(fname, 'wb') as f:
+                f.write(build_log_frame(0x1ffe, b'\x00' * 4) * 3)
+            parser = QualcommParser()
+            parser.set_io_device(FileIO([fname]))
+            parser.set_writer(CollectingWriter())
+            parser.set_parameter({'crc-check': 'strict'})
+            with self.assertLogs(parser.logger, 'INFO') as logs:
+                parser.run_diag()
+        self.assertIn('INFO:scat.qualcommparser:CRC: 3 verified, 0 failed, 0 skipped', logs.output)
+
+    def test_log_dispatch(self):
+        parser = QualcommParser()
+        handler = parser.log_dispatch.get(0x418b)
+        self.assertEqual(type(handler.__self__).__name__, 'DiagWcdmaEnhancedLogParser')
+        self.assertIn(0x418b, [c.log_id for c in parser.log_dispatch.conflicts])
+        self.assertNotIn(0x5226, parser.no_process)
+        for log_id, handler in parser.process.items():
+            self.assertNotEqual(getattr(handler, '__name__', None), '<lambda>')
+
+        parser.set_parameter({'dispatch-priority': 'first'})
+        handler = parser.log_dispatch.get(0x418b)
+        self.assertEqual(type(handler.__self__).__name__, 'DiagGnssLogParser')
+        self.assertIs(parser.process, parser.log_dispatch.table)
+
+    def test_profile(self):
+        class TestWriter:
+            def __init__(self):
+                self.cp = []
+            def write_cp(self, sock_content, radio_id, ts):
+                self.cp.append(sock_content)
+
+        parser = QualcommParser()
+        writer = TestWriter()
+        parser.set_writer(writer)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            report_file = os.path.join(tmpdir, 'profile.json')
+            parser.set_parameter({'profile': report_file})
+            self.assertFalse(hasattr(parser.writer, 'write_up'))
+
+            body = b'\x00' * 4
+            parser.parse_diag_log(struct.pack('<BBHHHQ', 0x10, 0, len(body) + 12, len(body) + 12, 0x1ffe, 0) + body)
+            parser.postprocess_parse_result({'cp': [b'\x01\x02\x03']})
+            self.assertEqual(writer.cp, [b'\x01\x02\x03'])
+
+            parser.report_profile()
+            with open(report_file) as f:
+                report = json.load(f)
+        entries = {(e['kind'], e['id']): e for e in report['entries']}
+        self.assertEqual(entries[('log', '0x1ffe')]['count'], 1)
+        self.assertEqual(entries[('log', '0x1ffe')]['bytes'], 16)
+        self.assertEqual(entries[('writer', 'TestWriter.write_cp')]['bytes'], 3)
+
+    def test_event_statistics(self):
+        parser = QualcommParser()
+        guid = bytes([0x07]) + bytes(range(16))
+        events = struct.pack('<HQB', 2865 | (3 << 13), 0, len(guid)) + guid
+        events += struct.pack('<HQ', 4000, 0) * 2
+        pkt = struct.pack('<BH', 0x60, len(events)) + events
+
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            result = parser.parse_diag_event(pkt)
+        self.assertEqual(stdout.getvalue(), '')
+        self.assertEqual(result['cp'][0]['type'], 'EVENT_DIAG_QSHRINK_ID')
+
+        stats = parser.event_statistics
+        self.assertEqual(stats.reports, 1)
+        self.assertEqual(stats.events[2865][0], 1)
+        self.assertEqual(stats.events[4000][0], 2)
+        self.assertEqual(stats.count('unknown'), 2)
+        self.assertEqual(stats.summary(), 'Events: 3 in 1 reports, 2 distinct IDs (1 known, 0 ignored, 1 unknown)')
+
+    def test_structured_fields(self):
+        class TestWriter:
+            def __init__(self):
+                self.parsed = []
+            def write_parsed_data(self, parsed_result, radio_id=0, ts=None):
+                self.parsed.append(parsed_result)
+
+        body = binascii.unhexlify('028F001405644B64640074BC01D60503000000060102010000')
+        pkt = struct.pack('<BBHHHQ', 0x10, 0, len(body) + 12, len(body) + 12, 0xb0c2, 0) + body
+
+        parser = QualcommParser()
+        result = parser.parse_diag_log(pkt)
+        self.assertNotIn('cell_info', result)
+
+        writer = TestWriter()
+        parser.set_writer(writer)
+        self.assertTrue(parser.parameters['structured-fields'])
+        result = parser.parse_diag_log(pkt)
+        parser.postprocess_parse_result(result)
+        self.assertEqual(result['stdout'], 'LTE RRC SCell Info: EARFCN: 1300/19300, Band: 3, Bandwidth: 20/20 MHz, PCI: 143, MCC: 262, MNC: 01, xTAC/xCID: 5d6/1bc7400')
+        self.assertIs(writer.parsed[0], result)
+        cell_info = result['cell_info']
+        self.assertEqual((cell_info['earfcn_dl'], cell_info['earfcn_ul'], cell_info['pci']), (1300, 19300, 143))
+        self.assertEqual((cell_info['mcc'], cell_info['mnc'], cell_info['tac'], cell_info['cell_id']), (262, 1, 0x5d6, 0x1bc7400))
+        # Same keys and types as the stdout extraction
+        self.assertEqual(cell_info, dict(EnhancedQualcommParser(parser).enhance_parse_result({'stdout': result['stdout']})['cell_info'], **cell_info))
+        self.assertIsInstance(cell_info['bandwidth_dl_mhz'], float)
+        self.assertEqual((cell_info['tac_hex'], cell_info['cell_id_hex']), ('5d6', '1bc7400'))
+
+        # GSM MCC/MNC are integers as well
+        body = binascii.unhexlify('10800401187662f220014100ff')
+        log_id = diagcmd.diag_log_get_gsm_item_id(diagcmd.diag_log_code_gsm.LOG_GSM_RR_CELL_INFORMATION_C)
+        pkt = struct.pack('<BBHHHQ', 0x10, 0, len(body) + 12, len(body) + 12, log_id, 0) + body
+        cell_info = parser.parse_diag_log(pkt)['cell_info']
+        self.assertEqual((cell_info['mcc'], cell_info['mnc'], cell_info['mnc_digits']), (262, 2, 2))
+
+        # Decoders without native fields keep the stdout extraction
+        parser.postprocess_parse_result({'stdout': 'WCDMA Search Cell: 3G Cell 0: UARFCN: 10737, PSC:  50, RSCP: -95, Ec/Io: -7.50'})
+        self.assertEqual(writer.parsed[1]['measurement'][0]['uarfcn'], 10737)
+
+        # No cells, no empty measurement list blocking the stdout extraction
+        body = b'\x00\x00'
+        pkt = struct.pack('<BBHHHQ', 0x10, 0, len(body) + 12, len(body) + 12, 0x4005, 0) + body
+        result = parser.parse_diag_log(pkt)
+        self.assertEqual(result['stdout'], 'WCDMA Search Cell: 0 3G cells, 0 2G cells')
+        self.assertNotIn('measurement', result)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+import unittest
+import datetime
+import json
+import os
+import sqlite3
+import tempfile
+
+from scat.writers.sqlitewriter import SqliteWriter
+
+class TestSqliteWriter(unittest.TestCase):
+    ts = datetime.datetime(2024, 1, 2, 3, 4, 5, 6000, tzinfo=datetime.timezone.utc)
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.tmpdir.name, 'out.sqlite')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_tables(self):
+        writer = SqliteWriter(self.fname, batch_size=2)
+        writer.write_cp(b'\x01\x02', 0, self.ts)
+        for pci in (1, 2, 1):
+            writer.write_parsed_data({'cell_info': {'type': 'lte_rrc_scell', 'pci': pci, 'earfcn_dl': 1300, 'mcc': 1, 'mnc': 1, 'mnc_digits': 2},
+                'measurement': [{'type': 'lte_measurement', 'pci': pci, 'earfcn': 1300, 'rsrp_dbm': -100.5}]}, 0, self.ts)
+        writer.write_parsed_data({'event': [{'id': 1605, 'type': 'EVENT_TEST', 'payload': '01'}]}, 1, self.ts)
+        writer.write_parsed_data({'event': {'type': 'event', 'event_type': 'timer', 'timer_action': 'start',
+            'raw_line': 'T3410 Timer Start'}}, 0, self.ts)
+        writer.close()
+        writer.close()
+
+        conn = sqlite3.connect(self.fname)
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM cells').fetchone()[0], 3)
+        self.assertEqual(conn.execute('SELECT ts_us, pci, earfcn, mcc, extra FROM cells WHERE pci = 2').fetchall(),
+            [(1704164645006000, 2, 1300, '1', json.dumps({'mnc_digits': 2}))])
+        self.assertEqual(conn.execute('SELECT rsrp FROM measurements WHERE pci = 1 AND earfcn = 1300').fetchall(),
+            [(-100.5, ), (-100.5, )])
+        self.assertEqual(conn.execute('SELECT radio_id, event_id, name, payload FROM events').fetchall(),
+            [(1, 1605, 'EVENT_TEST', '01'), (0, None, 'event', None)])
+        self.assertEqual(conn.execute('SELECT event_type, raw_line, extra FROM events WHERE event_id IS NULL').fetchall(),
+            [('timer', 'T3410 Timer Start', json.dumps({'timer_action': 'start'}))])
+        info = dict(conn.execute('SELECT key, value FROM file_info'))
+        self.assertEqual(info['total_messages'], 1)
+        self.assertEqual(info['cellular_messages'], 5)
+
+        indexes = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")]
+        self.assertIn('idx_cells_pci_earfcn', indexes)
+        self.assertIn('idx_events_ts', indexes)
+        self.assertIn('idx_events_event_type', indexes)
+        self.assertIn('idx_qcat_messages_log_id', indexes)
+        self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        conn.close()
+
+        # An existing database is replaced
+        SqliteWriter(self.fname).close()
+        conn = sqlite3.connect(self.fname)
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM cells').fetchone()[0], 0)
+        conn.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+import unittest
+import binascii
+import datetime
+import pickle
+import random
+
+import scat.util as util
+
+class TestTimestamp(unittest.TestCase):
+    def parse_qxdm_ts_float(self, ts):
+        epoch = datetime.datetime(1980, 1, 6, 0, 0, 0, tzinfo=datetime.timezone.utc)
+        try:
+            return epoch + datetime.timedelta(milliseconds=(ts >> 16) * 1.25 + (ts & 0xffff) * (1 / 40960))
+        except OverflowError:
+            return epoch
+
+    def test_qxdm_ts(self):
+        rng = random.Random(0)
+        for _ in range(1000):
+            raw = rng.getrandbits(rng.choice((40, 48, 56)))
+            ts = util.parse_qxdm_ts(raw)
+            date = self.parse_qxdm_ts_float(raw)
+            self.assertEqual(ts.raw, raw)
+            # The float conversion is off by one microsecond when rounding near .5
+            self.assertLessEqual(abs(ts - date), datetime.timedelta(microseconds=1))
+
+            date = ts.datetime()
+            self.assertEqual(ts, date)
+            self.assertEqual(ts.isoformat(), date.isoformat())
+            self.assertEqual(str(ts), str(date))
+            self.assertEqual(ts.strftime('%Y %b %_d  %H:%M:%S.%f')[:-3], date.strftime('%Y %b %_d  %H:%M:%S.%f')[:-3])
+            self.assertEqual((int(ts.timestamp()), ts.microsecond), (int(date.timestamp()), date.microsecond))
+            self.assertLessEqual(abs(util.timestamp_ns(ts) - util.timestamp_us(date) * 1000), 500)
+
+        ts = util.parse_qxdm_ts(0)
+        self.assertEqual(ts, datetime.datetime(1980, 1, 6, tzinfo=datetime.timezone.utc))
+        self.assertEqual(ts.isoformat(), '1980-01-06T00:00:00+00:00')
+        self.assertEqual(ts.year, 1980)
+        self.assertEqual(util.timestamp_ns(util.parse_qxdm_ts(1)), util.GPS_EPOCH_US * 1000 + 24)
+        self.assertEqual(util.timestamp_ns(datetime.datetime(1970, 1, 1, 0, 0, 1)), 1000000000)
+        self.assertEqual(pickle.loads(pickle.dumps(ts)).kind, util.TS_QXDM)
+        self.assertEqual(pickle.loads(pickle.dumps(ts)), ts)
+
+        # Out of range ticks fall back to the GPS epoch, without the tick resolution
+        ts = util.parse_qxdm_ts(0xffffffffffffffff)
+        self.assertEqual(ts.kind, None)
+        self.assertEqual(util.timestamp_ns(ts), util.GPS_EPOCH_US * 1000)
+
+    def test_sdm_ts(self):
+        ts = util.parse_sdm_ts(0x0184, 0x1234)
+        self.assertEqual(ts.raw, 0x01841234)
+        self.assertEqual(ts.kind, util.TS_SDM)
+        # The raw milliseconds are not QXDM ticks
+        self.assertEqual(util.timestamp_ns(ts), 0x01841234 * 1000000)
+        self.assertEqual(ts, datetime.datetime.fromtimestamp(0x01841234 / 1000, tz=datetime.timezone.utc))
+
+    def test_formatter(self):
+        formatter = util.TimestampFormatter()
+        first = util.Timestamp(1000000000 * 1000000 + 1)
+        second = util.Timestamp(1000000000 * 1000000 + 999999)
+        self.assertEqual(formatter.strftime(first, '%H:%M:%S.%f'), '01:46:40.000001')
+        self.assertEqual(formatter.strftime(second, '%H:%M:%S.%f'), '01:46:40.999999')
+        self.assertEqual(len(formatter.prefixes), 1)
+        self.assertEqual(formatter.isoformat(util.Timestamp(0)), '1970-01-01T00:00:00+00:00')
+
+class TestGsmtapHeader(unittest.TestCase):
+    def test_v2(self):
+        hdr = util.create_gsmtap_header(version=2, payload_type=util.gsmtap_type.LTE_RRC, arfcn=0x4000, frame_number=5, sub_type=1)
+        self.assertEqual(hdr, binascii.unhexlify('02040d000000000000000005010000 00'.replace(' ', '')))
+        hdr = util.create_gsmtap_header(version=2, payload_type=util.gsmtap_type.UM, arfcn=0x4001)
+        self.assertEqual(hdr[4:6], b'\x40\x01')
+        self.assertIs(util.static_gsmtap_header(2, util.gsmtap_type.OSMOCORE_LOG), util.static_gsmtap_header(2, util.gsmtap_type.OSMOCORE_LOG))
+
+    def test_v3(self):
+        t = util.gsmtapv3_metadata_tags
+        hdr = util.create_gsmtap_header(version=3, payload_type=0x0501, sub_type=0x0002, arfcn=1,
+            metadata={t.BSIC_PSC_PCI: 0x0102, t.ANT_NUM: 3})
+        # 8 byte header, CHANNEL_NUMBER TLV (8), BSIC_PSC_PCI TLV (6), ANT_NUM TLV (5), 1 byte padding
+        self.assertEqual(hdr, binascii.unhexlify(
+            '0300' '0007' '0501' '0002' '00020004' '00000001' '00050002' '0102' '000d0001' '03' '00'))
+        hdr = util.create_gsmtap_header(version=3, payload_type=0x0501, device_sec=1, device_usec=2)
+        self.assertEqual(hdr[:12], binascii.unhexlify('0300' '0008' '0501' '0000' '0000000c'))
+        self.assertEqual(len(hdr), 32)
+
+if __name__ == '__main__':
+    unittest.main()
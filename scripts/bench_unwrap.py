@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Microbenchmark of the HDLC unescape used for every DIAG frame.
+
+Compares util.unwrap against the previous unconditional two-pass
+implementation, on synthetic frames with and without escapes, or on the
+frames of a QMDL dump given on the command line.
+
+Usage:
+    PYTHONPATH=qmdl-offline-parser/src python3 scripts/bench_unwrap.py [dump.qmdl]
+"""
+
+import os
+import random
+import sys
+import timeit
+
+import scat.framing as framing
+import scat.util as util
+
+
+def unwrap_two_pass(arr):
+    if type(arr) == memoryview:
+        arr = arr.tobytes()
+    t = arr.replace(b'\x7d\x5e', b'\x7e')
+    t = t.replace(b'\x7d\x5d', b'\x7d')
+    return t
+
+
+def synthetic_frames(count=1000, size=300):
+    rng = random.Random(0)
+    clean_bytes = [b for b in range(256) if b not in (0x7d, 0x7e)]
+    clean = [bytes(rng.choice(clean_bytes) for _ in range(size)) for _ in range(count)]
+    escaped = [util.wrap(os.urandom(size)) for _ in range(count)]
+    # Frames of the mapped dump paths are memoryviews, which unwrap copies to bytes
+    views = [memoryview(frame) for frame in clean]
+    return [('no escapes', clean), ('escaped', escaped), ('no escapes (view)', views)]
+
+
+def dump_frames(fname):
+    with open(fname, 'rb') as f:
+        buf = f.read()
+    return [(os.path.basename(fname), [buf[x:y] for x, y in framing.HdlcFramer().iter_spans(buf)])]
+
+
+def bench(frames, func, repeat=5):
+    def run():
+        for frame in frames:
+            func(frame)
+    return min(timeit.repeat(run, number=1, repeat=repeat))
+
+
+def main():
+    sets = dump_frames(sys.argv[1]) if len(sys.argv) > 1 else synthetic_frames()
+    for name, frames in sets:
+        for frame in frames:
+            assert util.unwrap(frame) == unwrap_two_pass(frame)
+        old = bench(frames, unwrap_two_pass)
+        new = bench(frames, util.unwrap)
+        print('{:<20} {:>7} frames  two-pass {:8.2f} ms  unwrap {:8.2f} ms  speedup {:5.2f}x'.format(
+            name, len(frames), old * 1000, new * 1000, old / new if new > 0 else 0))
+
+
+if __name__ == '__main__':
+    main()